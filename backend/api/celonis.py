@@ -1,20 +1,31 @@
 """Contains the dependency injection for the CelonisConnectionManager.
 
-This module contains one function, which is used to return a
-CelonisConnectionManager instance. The function is used as a dependency
-in the FastAPI application.
+This module contains the function that returns the
+CelonisConnectionManager instance of a workspace from the connection
+pool. The function is used as a dependency in the FastAPI application.
 """
 
-from typing import Union
+import os
+from functools import lru_cache
+from typing import Any, Iterator, Optional, Tuple, Type, Union
 
-from dotenv import load_dotenv
-from fastapi import HTTPException, Request
+from fastapi import Depends, HTTPException, Request
 from pydantic import ValidationError
-from pydantic_settings import BaseSettings, SettingsConfigDict
+from pydantic_settings import (
+    BaseSettings,
+    PydanticBaseSettingsSource,
+    SettingsConfigDict,
+)
 
+from backend.api.models.schemas.setup_models import CelonisCredentials
+from backend.api.workspaces import Workspace, get_workspace
 from backend.celonis_connection.celonis_connection_manager import (
     CelonisConnectionManager,
 )
+from backend.celonis_connection.connection_pool import (
+    CelonisConnectionPool,
+    create_connection_pool,
+)
 
 # **************** Celonis Settings ****************
 
@@ -26,6 +37,8 @@ class CelonisSettings(BaseSettings):
     environment variables. The settings are loaded from a .env file
     using the `pydantic_settings` library. The settings include the
     Celonis base URL, data pool name, data model name, and API token.
+    The .env file takes precedence over the environment, since it holds
+    the credentials saved by /api/setup/celonis-credentials.
     """
 
     CELONIS_BASE_URL: str
@@ -33,50 +46,139 @@ class CelonisSettings(BaseSettings):
     CELONIS_DATA_MODEL_NAME: str
     API_TOKEN: str
 
-    model_config = SettingsConfigDict(env_file=".env")
+    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
+
+    @classmethod
+    def settings_customise_sources(
+        cls,
+        settings_cls: Type[BaseSettings],
+        init_settings: PydanticBaseSettingsSource,
+        env_settings: PydanticBaseSettingsSource,
+        dotenv_settings: PydanticBaseSettingsSource,
+        file_secret_settings: PydanticBaseSettingsSource,
+    ) -> Tuple[PydanticBaseSettingsSource, ...]:
+        """Reads the .env file before the environment variables."""
+        return init_settings, dotenv_settings, env_settings, file_secret_settings
+
+
+@lru_cache(maxsize=1)
+def _load_celonis_settings(env_mtime: Optional[int]) -> Optional[CelonisSettings]:
+    try:
+        return CelonisSettings()  # type: ignore
+    except ValidationError:
+        return None
+
+
+def load_celonis_settings() -> Optional[CelonisSettings]:
+    """Loads the Celonis settings from the .env file and the environment.
 
+    The settings are cached until the .env file changes, e.g. when new
+    credentials are saved, so requests do not read the file every time.
 
-def get_celonis_connection(request: Request) -> CelonisConnectionManager:
+    Returns:
+        The settings, or None if Celonis is not configured yet.
+    """
+    try:
+        env_mtime: Optional[int] = os.stat(".env").st_mtime_ns
+    except OSError:
+        env_mtime = None
+    return _load_celonis_settings(env_mtime)
+
+
+def get_celonis_credentials(workspace: Workspace) -> Optional[CelonisCredentials]:
+    """Returns the Celonis credentials of a workspace.
+
+    Args:
+        workspace: The workspace.
+
+    Returns:
+        The credentials of the workspace, or of the .env file if the
+        workspace has none, or None if Celonis is not configured yet.
+    """
+    if workspace.credentials is not None:
+        return workspace.credentials
+    cfg = load_celonis_settings()
+    if cfg is None:
+        return None
+    return CelonisCredentials(
+        celonis_base_url=cfg.CELONIS_BASE_URL,
+        celonis_data_pool_name=cfg.CELONIS_DATA_POOL_NAME,
+        celonis_data_model_name=cfg.CELONIS_DATA_MODEL_NAME,
+        api_token=cfg.API_TOKEN,
+    )
+
+
+def get_celonis_connection(
+    request: Request, workspace: Workspace = Depends(get_workspace)
+) -> Iterator[CelonisConnectionManager]:
     """Returns a CelonisConnectionManager instance.
 
-    It tries to get the CelonisConnectionManager instance from the
-    application state. If it is not present, it creates a new instance
-    using the settings from the environment variables. The instance is
-    then stored in the application state for later use.
+    A manager in the state of the workspace, e.g. an offline one, is
+    returned as is. Otherwise the manager of the credentials of the
+    workspace, or of the .env file if the workspace has none, is taken
+    from the connection pool in the application state. The pool creates
+    it on the first request unless it was warmed up already, and replaces
+    it when the credentials change. A pooled manager is acquired until the
+    request is done, so the pool does not close it in between.
     This function is used as a dependency in the FastAPI application.
 
     Args:
         request: The FastAPI request object. This is used to access the
           application state via `request.app.state`. The application state
-          contains the `CelonisConnectionManager` instance, which is created
-          during application startup and stored for later use.
+          contains the connection pool, which is created during
+          application startup.
+        workspace: The workspace of the request.
 
-    Returns:
+    Yields:
         The CelonisConnectionManager instance. This is used to connect to the
         Celonis API and perform operations on the data pool.
     """
-    # If it is already in the app state, return it
+    # A fixed manager in the workspace takes precedence over the pool
     mgr: Union[CelonisConnectionManager, None] = getattr(
-        request.app.state, "celonis", None
+        workspace.state, "celonis", None
     )
     if mgr is not None:
-        return mgr
+        yield mgr
+        return
 
-    # If it is not in the app state, create a new one
-    try:
-        load_dotenv(".env", override=True)
-        cfg = CelonisSettings()  # type: ignore
-    except ValidationError:
+    credentials = get_celonis_credentials(workspace)
+    if credentials is None:
         raise HTTPException(
             status_code=400,
             detail="Celonis not configured. POST to /api/setup/celonis-credentials first.",
         )
-    # Build the connection manager and cache it
-    mgr = CelonisConnectionManager(
-        base_url=cfg.CELONIS_BASE_URL,
-        data_pool_name=cfg.CELONIS_DATA_POOL_NAME,
-        data_model_name=cfg.CELONIS_DATA_MODEL_NAME,
-        api_token=cfg.API_TOKEN,
+    pool: Union[CelonisConnectionPool, None] = getattr(
+        request.app.state, "celonis_pool", None
+    )
+    if pool is None:
+        pool = create_connection_pool()
+        request.app.state.celonis_pool = pool
+    mgr = pool.get(
+        credentials.celonis_base_url,
+        credentials.celonis_data_pool_name,
+        credentials.celonis_data_model_name,
+        credentials.api_token,
+    )
+    mgr.acquire()
+    try:
+        yield mgr
+    finally:
+        mgr.release()
+
+
+def warm_up_celonis_connection(app: Any) -> None:
+    """Connects to Celonis in the background if the credentials are known.
+
+    Args:
+        app: The FastAPI application with the connection pool in its state.
+    """
+    pool: Union[CelonisConnectionPool, None] = getattr(app.state, "celonis_pool", None)
+    cfg = load_celonis_settings()
+    if pool is None or cfg is None:
+        return
+    pool.warm_up_in_background(
+        cfg.CELONIS_BASE_URL,
+        cfg.CELONIS_DATA_POOL_NAME,
+        cfg.CELONIS_DATA_MODEL_NAME,
+        cfg.API_TOKEN,
     )
-    request.app.state.celonis = mgr
-    return mgr
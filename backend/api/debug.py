@@ -0,0 +1,41 @@
+"""Contains the router for inspecting the backend while it is running."""
+
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, Query
+
+from backend.celonis_connection.pql_profiler import get_pql_profiler
+
+router = APIRouter(prefix="/api/debug", tags=["Debug"])
+
+
+@router.get("/pql-stats")
+async def get_pql_stats(
+    limit: Optional[int] = Query(
+        None, ge=1, description="Maximum number of queries to return."
+    ),
+) -> Dict[str, Any]:
+    """Returns the statistics of the latest PQL queries.
+
+    The queries in the rolling window of the PQL profiler are grouped by
+    their text and sorted by their total duration, the slowest first.
+
+    Args:
+        limit: The maximum number of queries to return.
+
+    Returns:
+        The statistics of the queries, see PQLProfiler.get_stats.
+    """
+    return get_pql_profiler().get_stats(limit)
+
+
+@router.delete("/pql-stats")
+async def clear_pql_stats() -> Dict[str, str]:
+    """Removes all queries from the rolling window of the PQL profiler.
+
+    Returns:
+        A dictionary containing a message indicating the success of the
+        operation.
+    """
+    get_pql_profiler().clear()
+    return {"message": "PQL statistics cleared"}
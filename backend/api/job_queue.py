@@ -0,0 +1,479 @@
+"""Contains the submission of the jobs and the workers that run them.
+
+By default the jobs are kept in the memory of the process and run as
+background tasks of the request that submitted them, so a job can only be
+polled on the worker process that accepted it. With a shared job store
+the records of the jobs are kept in the store and the submitted jobs are
+put into its queue. Every process then runs worker threads that take the
+jobs from the queue, so any process can accept, run and serve a job. This
+allows several uvicorn workers, e.g. `uvicorn backend.main:app --workers 4`.
+
+The job store is configured with the environment variables or the .env
+file:
+
+    JOB_STORE=memory            # memory, sqlite or module.path:StoreClass
+    JOB_STORE_URL=jobs.sqlite3  # Path of the SQLite file, passed to the store
+    JOB_WORKERS=2               # Worker threads per process
+    JOB_POLL_SECONDS=0.5        # Time between two polls of an empty queue
+    JOB_LEASE_SECONDS=60        # A job of a dead worker is rerun after this
+
+An external broker is plugged in by implementing the JobStore interface
+of backend/utils/job_store.py and setting JOB_STORE to its class.
+
+The API tokens are never queued. A queued job only names its Celonis
+connection, and the worker takes the token from the .env file of its own
+process, or reuses a manager of its connection pool. The credentials of
+a workspace and its fixed managers, e.g. offline ones, are only known to
+the process that received them. A job using them is thus pinned to that
+process and only its workers claim it.
+
+The workspace IDs must be accepted by every process, so a shared job
+store requires WORKSPACE_SECRET to be set.
+
+The uploaded logs are still kept per process. The commit of a log thus
+runs in the process it was uploaded to, only its job is shared, and the
+upload and the commit must reach the same process, e.g. with sticky
+sessions.
+
+Example:
+    submit_job(background_tasks, workspace, task, job_id, celonis, zeta)
+"""
+
+import importlib
+import os
+import socket
+import threading
+from functools import lru_cache, wraps
+from typing import Any, Callable, List, Optional
+
+from fastapi import BackgroundTasks
+from pydantic import BaseModel
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+from backend.api.celonis import get_celonis_credentials
+from backend.api.workspaces import Workspace, get_workspace_settings
+from backend.celonis_connection.celonis_connection_manager import (
+    CelonisConnectionManager,
+)
+from backend.utils.job_store import JobMapping, JobStore, QueuedJob, SQLiteJobStore
+from backend.utils.profiling import profiled_job
+
+# Only the tasks and models of the backend are loaded by their name
+_ALLOWED_PREFIX = "backend."
+
+# **************** Job Queue Settings ****************
+
+
+class JobQueueSettings(BaseSettings):
+    """Settings of the job store, loaded from the environment or .env."""
+
+    JOB_STORE: str = "memory"
+    JOB_STORE_URL: str = "jobs.sqlite3"
+    JOB_WORKERS: int = 2
+    JOB_POLL_SECONDS: float = 0.5
+    JOB_LEASE_SECONDS: float = 60.0
+
+    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
+
+
+@lru_cache
+def get_job_queue_settings() -> JobQueueSettings:
+    """Returns the job queue settings, loaded once per process."""
+    return JobQueueSettings()
+
+
+def _import_name(name: str) -> Any:
+    """Returns an object by its full name, e.g. package.module.function.
+
+    Raises:
+        ValueError: If the name is not in the backend or does not exist.
+    """
+    module_name, _, attr = name.replace(":", ".").rpartition(".")
+    if not name.startswith(_ALLOWED_PREFIX) or not module_name:
+        raise ValueError(f"Cannot load {name}, only backend objects are allowed.")
+    try:
+        return getattr(importlib.import_module(module_name), attr)
+    except (ImportError, AttributeError) as e:
+        raise ValueError(f"Cannot load {name}: {e}")
+
+
+def create_job_store(settings: Optional[JobQueueSettings] = None) -> Optional[JobStore]:
+    """Returns the job store configured by the settings.
+
+    Args:
+        settings: The job queue settings, by default loaded from the
+          environment.
+
+    Returns:
+        The job store, or None if the jobs are kept in memory.
+
+    Raises:
+        ValueError: If JOB_STORE is not a known store or JobStore class, or
+        if WORKSPACE_SECRET is not set for a shared store.
+    """
+    settings = settings or get_job_queue_settings()
+    if settings.JOB_STORE == "memory":
+        return None
+    if not get_workspace_settings().WORKSPACE_SECRET:
+        # Otherwise every process signs the workspace IDs with its own
+        # random secret and rejects the IDs of the others
+        raise ValueError(
+            f"JOB_STORE={settings.JOB_STORE} requires WORKSPACE_SECRET to be set."
+        )
+    if settings.JOB_STORE == "sqlite":
+        return SQLiteJobStore(settings.JOB_STORE_URL)
+    store_class = _import_name(settings.JOB_STORE)
+    if not (isinstance(store_class, type) and issubclass(store_class, JobStore)):
+        raise ValueError(f"{settings.JOB_STORE} is not a JobStore.")
+    return store_class(settings.JOB_STORE_URL)
+
+
+# **************** Submission ****************
+
+
+def process_name() -> str:
+    """Returns the name of this process, unique across machines."""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def _is_local_connection(workspace: Workspace, value: Any) -> bool:
+    """Returns whether an argument is a connection only this process knows.
+
+    The managers of a fixed workspace connection or of the credentials of
+    a workspace cannot be created by another process.
+    """
+    return isinstance(value, CelonisConnectionManager) and (
+        getattr(workspace.state, "celonis", None) is not None
+        or workspace.credentials is not None
+    )
+
+
+def encode_argument(value: Any) -> Any:
+    """Returns an argument of a task in a form that can be queued as JSON.
+
+    Connection managers are replaced by their connection key without the
+    API token, the worker takes the manager from its own connection pool.
+    Pydantic models are replaced by their class and their fields.
+
+    Args:
+        value: The argument.
+
+    Returns:
+        The encoded argument.
+    """
+    if isinstance(value, CelonisConnectionManager):
+        return {
+            "__celonis__": {
+                "base_url": value.base_url,
+                "data_pool_name": value.data_pool_name,
+                "data_model_name": value.data_model_name,
+            }
+        }
+    if isinstance(value, BaseModel):
+        cls = type(value)
+        return {
+            "__model__": f"{cls.__module__}.{cls.__qualname__}",
+            "data": value.model_dump(mode="json"),
+        }
+    return value
+
+
+def holding_connections(
+    task: Callable[..., Any], *args: Any, **kwargs: Any
+) -> Callable[..., Any]:
+    """Returns the task, which keeps the managers among its arguments open.
+
+    The managers are acquired right away and released once the task has
+    run, so the connection pool does not close them while the job waits
+    or runs.
+
+    Args:
+        task: The task.
+        *args: The arguments the task will be called with.
+        **kwargs: The keyword arguments the task will be called with.
+
+    Returns:
+        The wrapped task, which must be called exactly once.
+    """
+    managers = [
+        value
+        for value in (*args, *kwargs.values())
+        if isinstance(value, CelonisConnectionManager)
+    ]
+    for manager in managers:
+        manager.acquire()
+
+    @wraps(task)
+    def run(*run_args: Any, **run_kwargs: Any) -> Any:
+        try:
+            return task(*run_args, **run_kwargs)
+        finally:
+            for manager in managers:
+                manager.release()
+
+    return run
+
+
+def submit_job(
+    background_tasks: BackgroundTasks,
+    workspace: Workspace,
+    task: Callable[..., Any],
+    job_id: str,
+    *args: Any,
+    profile: bool = False,
+    **kwargs: Any,
+) -> None:
+    """Schedules the task of a job that was added to a workspace.
+
+    Without a job store the task runs as a background task of the
+    request. Otherwise the job is put into the queue of the store and
+    run by the first free worker of any process, or of this process if
+    only it knows the connection of the job.
+
+    Args:
+        background_tasks: The background tasks of the request.
+        workspace: The workspace of the job.
+        task: The compute_and_store_* task, called with the workspace, the
+          job ID and the other arguments.
+        job_id: The ID of the job.
+        *args: The other arguments of the task.
+        profile: If True, the job is profiled, see profiled_job.
+        **kwargs: The keyword arguments of the task.
+    """
+    jobs = workspace.state.jobs
+    if not isinstance(jobs, JobMapping):
+        task = profiled_job(task) if profile else task
+        background_tasks.add_task(
+            holding_connections(task, *args, **kwargs),
+            workspace,
+            job_id,
+            *args,
+            **kwargs,
+        )
+        return
+    # A job whose connection only this process knows is pinned to it
+    local = any(
+        _is_local_connection(workspace, value) for value in (*args, *kwargs.values())
+    )
+    process = process_name() if local else None
+    jobs.store.enqueue(
+        QueuedJob(
+            namespace=workspace.workspace_id,
+            job_id=job_id,
+            task=f"{task.__module__}.{task.__qualname__}",
+            args=[encode_argument(arg) for arg in args],
+            kwargs={key: encode_argument(value) for key, value in kwargs.items()},
+            profile=profile,
+            process=process,
+        )
+    )
+
+
+# **************** Workers ****************
+
+
+class JobWorker:
+    """Runs the queued jobs of a job store in a thread.
+
+    While a job runs, a heartbeat thread renews its lease three times per
+    lease_seconds.
+
+    Attributes:
+        name: The name of the worker, unique across processes.
+        process: The name of the process of the worker, whose pinned jobs
+            it claims too.
+        store: The job store.
+        poll_seconds: The time between two polls of an empty queue.
+        lease_seconds: The time after which the job of a dead worker is
+            claimed again.
+    """
+
+    name: str
+    process: str
+    store: JobStore
+    poll_seconds: float
+    lease_seconds: float
+
+    def __init__(
+        self,
+        app: Any,
+        store: JobStore,
+        name: str,
+        poll_seconds: float = 0.5,
+        lease_seconds: float = 60.0,
+    ) -> None:
+        """Initialize the worker.
+
+        Args:
+            app: The FastAPI application with the workspaces and the
+              connection pool in its state.
+            store: The job store.
+            name: The name of the worker.
+            poll_seconds: The time between two polls of an empty queue.
+            lease_seconds: The time after which the job of a dead worker
+              is claimed again.
+        """
+        self.name = name
+        self.process = process_name()
+        self.store = store
+        self.poll_seconds = poll_seconds
+        self.lease_seconds = lease_seconds
+        self._app = app
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _get_celonis(
+        self,
+        workspace: Workspace,
+        base_url: str,
+        data_pool_name: str,
+        data_model_name: str,
+    ) -> CelonisConnectionManager:
+        """Returns the manager of a queued connection from the pool.
+
+        Raises:
+            ValueError: If this process has neither the API token nor a
+            manager of the connection, e.g. because the job was pinned to
+            a process that has been restarted since.
+        """
+        pool = self._app.state.celonis_pool
+        credentials = get_celonis_credentials(workspace)
+        if credentials is not None and (
+            credentials.celonis_base_url,
+            credentials.celonis_data_pool_name,
+            credentials.celonis_data_model_name,
+        ) == (base_url, data_pool_name, data_model_name):
+            return pool.get(
+                base_url, data_pool_name, data_model_name, credentials.api_token
+            )
+        manager = pool.find(base_url, data_pool_name, data_model_name)
+        if manager is None:
+            raise ValueError(
+                f"No API token for the data model {data_model_name} of "
+                f"{base_url} in worker {self.name}."
+            )
+        return manager
+
+    def _decode_argument(self, workspace: Workspace, value: Any) -> Any:
+        if isinstance(value, dict) and "__celonis__" in value:
+            # A fixed manager of the workspace takes precedence, as in
+            # get_celonis_connection
+            fixed = getattr(workspace.state, "celonis", None)
+            if fixed is not None:
+                return fixed
+            return self._get_celonis(workspace, **value["__celonis__"])
+        if isinstance(value, dict) and "__model__" in value:
+            return _import_name(value["__model__"]).model_validate(value["data"])
+        return value
+
+    def run_once(self) -> bool:
+        """Runs the oldest queued job, if there is one.
+
+        Returns:
+            Whether a job was run.
+        """
+        job = self.store.claim(self.name, self.lease_seconds, self.process)
+        if job is None:
+            return False
+        done = threading.Event()
+        heartbeat = threading.Thread(
+            target=self._heartbeat,
+            args=(job, done),
+            name=f"{self.name}-heartbeat",
+            daemon=True,
+        )
+        heartbeat.start()
+        try:
+            workspace = self._app.state.workspaces.get(job.namespace)
+            task = _import_name(job.task)
+            args = [self._decode_argument(workspace, arg) for arg in job.args]
+            kwargs = {
+                key: self._decode_argument(workspace, value)
+                for key, value in job.kwargs.items()
+            }
+            if job.profile:
+                task = profiled_job(task)
+            holding_connections(task, *args, **kwargs)(
+                workspace, job.job_id, *args, **kwargs
+            )
+        except Exception as e:
+            # The tasks handle their own errors, this is a job that could
+            # not be started
+            print(f"Worker {self.name} could not run job {job.job_id}: {e}")
+            rec = JobMapping(self.store, job.namespace).get(job.job_id)
+            if rec is not None:
+                rec.error = str(e)
+                rec.status = "failed"
+        finally:
+            done.set()
+            heartbeat.join()
+            self.store.finish(job.namespace, job.job_id)
+        return True
+
+    def _heartbeat(self, job: QueuedJob, done: threading.Event) -> None:
+        while not done.wait(self.lease_seconds / 3):
+            try:
+                if not self.store.renew(
+                    job.namespace, job.job_id, self.name, self.lease_seconds
+                ):
+                    print(f"Worker {self.name} lost the lease of job {job.job_id}.")
+                    return
+            except Exception as e:
+                print(f"Worker {self.name} could not renew job {job.job_id}: {e}")
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                ran = self.run_once()
+            except Exception as e:
+                print(f"Worker {self.name} could not read the job queue: {e}")
+                ran = False
+            if not ran:
+                self._stop.wait(self.poll_seconds)
+
+    def start(self) -> None:
+        """Starts the worker thread."""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stops the worker thread after its current job.
+
+        Args:
+            timeout: The maximum time to wait for the current job.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+def start_job_workers(
+    app: Any, store: JobStore, settings: Optional[JobQueueSettings] = None
+) -> List[JobWorker]:
+    """Starts the worker threads of this process.
+
+    Args:
+        app: The FastAPI application with the workspaces and the
+          connection pool in its state.
+        store: The job store.
+        settings: The job queue settings, by default loaded from the
+          environment.
+
+    Returns:
+        The started workers.
+    """
+    settings = settings or get_job_queue_settings()
+    workers = [
+        JobWorker(
+            app,
+            store,
+            f"{process_name()}-{i}",
+            poll_seconds=settings.JOB_POLL_SECONDS,
+            lease_seconds=settings.JOB_LEASE_SECONDS,
+        )
+        for i in range(settings.JOB_WORKERS)
+    ]
+    for worker in workers:
+        worker.start()
+    return workers
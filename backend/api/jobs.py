@@ -1,8 +1,12 @@
 """Contains the router for handling jobs."""
 
-from fastapi import APIRouter, HTTPException, Request
+from typing import Any, Dict, Literal, Union
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse
 
 from backend.api.models.schemas.job_models import JobStatus
+from backend.api.workspaces import get_workspace
 
 router = APIRouter(prefix="/api/jobs", tags=["Jobs"])
 
@@ -14,21 +18,63 @@ async def get_jobs(job_id: str, request: Request) -> JobStatus:
     Args:
         job_id: The ID of the job to be fetched.
         request: The FastAPI request object. This is used to access the
-          application state via `request.app.state`.
+          workspace of the request, see get_workspace.
 
     Raises:
         HTTPException: If the job with the given ID is not found in the
-        application state.
+        workspace.
 
     Returns:
         The status of the job as a JobStatus object.
     """
-    job = request.app.state.jobs.get(job_id)
+    job = get_workspace(request).state.jobs.get(job_id)
     if not job:
         raise HTTPException(status_code=404, detail=f"Job with ID {job_id} not found.")
     return job
 
 
+@router.get("/{job_id}/profile", response_model=None)
+async def get_job_profile(
+    job_id: str,
+    request: Request,
+    format: Literal["json", "collapsed"] = Query(
+        "json", description="The profile as JSON or the collapsed stacks."
+    ),
+) -> Union[Dict[str, Any], PlainTextResponse]:
+    """Fetches the CPU and memory profile of a job that was profiled.
+
+    Args:
+        job_id: The ID of the job.
+        request: The FastAPI request object. This is used to access the
+          workspace of the request, see get_workspace.
+        format: "json" for the whole profile, "collapsed" for a download
+          of the sampled stacks in the collapsed stack format, which
+          flamegraph.pl and speedscope read.
+
+    Raises:
+        HTTPException: If the job is not found or has no profile, e.g.
+        because it was not submitted with profile=true or is not finished.
+
+    Returns:
+        The profile of the job, see JobProfiler.get_result.
+    """
+    job = await get_jobs(job_id, request)
+    if job.profile is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Job with ID {job_id} has no profile. Submit the job with "
+            "profile=true and fetch the profile once it has finished.",
+        )
+    if format == "collapsed":
+        return PlainTextResponse(
+            job.profile["collapsed_stacks"],
+            headers={
+                "Content-Disposition": f'attachment; filename="{job_id}.collapsed"'
+            },
+        )
+    return job.profile
+
+
 def verify_correct_job_module(job_id: str, request: Request, module: str):
     """Verifies if a job belongs to the module.
 
@@ -37,13 +83,13 @@ def verify_correct_job_module(job_id: str, request: Request, module: str):
     Args:
         job_id: The ID of the job to be fetched.
         request: The FastAPI request object. This is used to access the
-          application state via `request.app.state`.
+          workspace of the request, see get_workspace.
         module: The name of the module that the job is checked against
 
     Raises:
         HTTPException: If the job with the given ID does not belong to the module
     """
-    if request.app.state.jobs[job_id].module != module:
+    if get_workspace(request).state.jobs[job_id].module != module:
         raise HTTPException(
             status_code=400, detail="Job ID belongs to a different module"
         )
@@ -9,146 +9,289 @@ metadata to create a celonis connection.
 
 import os
 import tempfile
-from typing import Dict, List, Optional
+import uuid
+from functools import lru_cache
+from typing import Dict, List, Literal, Optional
 
-import pandas as pd
-from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    HTTPException,
+    Request,
+    UploadFile,
+)
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 import backend.utils.file_handlers as file_handlers
 from backend.api.celonis import get_celonis_connection
+from backend.api.job_queue import holding_connections
 from backend.api.models.schemas.setup_models import ColumnMapping
+from backend.api.tasks.log_tasks import commit_log_and_store_result, remove_log_cache
+from backend.api.workspaces import Workspace, add_job, get_workspace
 from backend.celonis_connection.celonis_connection_manager import (
     CelonisConnectionManager,
 )
 
 router = APIRouter(prefix="/api/logs", tags=["Logs"])
+MODULE_NAME = "commit_log"
+
+# **************** Upload Settings ****************
+
+
+class UploadSettings(BaseSettings):
+    """Settings for the log upload.
+
+    The settings are loaded from the environment variables or a .env file.
+    They include the maximum size of an uploaded log, the size of the
+    chunks in which it is streamed to disk, and the number of rows per
+    chunk and parallel chunks of the table upload to Celonis.
+    """
+
+    MAX_UPLOAD_SIZE_MB: int = 2048
+    UPLOAD_CHUNK_SIZE_KB: int = 1024
+    CELONIS_UPLOAD_CHUNK_ROWS: int = 1_000_000
+    CELONIS_UPLOAD_WORKERS: int = 4
+
+    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
+
+
+@lru_cache
+def get_upload_settings() -> UploadSettings:
+    """Returns the upload settings, loaded once per process."""
+    return UploadSettings()
+
+
+# **************** Routes ****************
 
 
 @router.post("/upload-log", status_code=201)
-async def upload_log(file: UploadFile, request: Request) -> Dict[str, List[str]]:
+async def upload_log(
+    file: UploadFile,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    settings: UploadSettings = Depends(get_upload_settings),
+) -> Dict[str, List[str]]:
     """Uploads an event log file and retrieves its columns.
 
-    The file gets stored in a temporary file for the later upload to Celonis.
+    The file is streamed in chunks to a temporary file for the later upload
+    to Celonis, so it is never held in memory as a whole. The columns are
+    read from the CSV header or the first events of the XES file only.
+    Compressed logs (.csv.gz, .xes.gz or a .zip with one log) are stored
+    compressed and only decompressed while they are read. Afterwards, the
+    log is parsed once in the background and cached as an Arrow file, which
+    the commit reads instead of parsing the log again.
 
     Args:
-        file: The event log file to be uploaded. This should be a .csv or .xes file.
+        file: The event log file to be uploaded. This should be a .csv or .xes
+          file, optionally compressed as .gz or .zip.
         request: The FastAPI request object. This is used to access the
-          application state via `request.app.state`.
+          workspace of the request, see get_workspace.
+        background_tasks: The FastAPI background tasks, used to parse and
+          cache the log after the response was sent.
+        settings (optional): The upload settings DI. Defaults to
+          Depends(get_upload_settings).
 
     Returns:
         The columns of the uploaded log file as a dictionary.
 
     Raises:
         HTTPException: If the file name is not provided or if the file type is
-        invalid, or if there is an error processing the file.
+        invalid, if the file exceeds the maximum upload size, or if there is
+        an error processing the file.
     """
-    # Only allow .csv and .xes files
+    # Only allow .csv and .xes files and their compressed versions
     if not file.filename:
         raise HTTPException(400, "File name is required.")
 
-    ext = os.path.splitext(file.filename)[1].lower()
+    ext = file_handlers.get_file_extension(file.filename)
 
-    if ext not in (".csv", ".xes"):
+    if (
+        ext
+        not in file_handlers.LOG_EXTENSIONS + file_handlers.COMPRESSED_LOG_EXTENSIONS
+    ):
         raise HTTPException(
             status_code=400,
-            detail="Invalid file type. Only .csv and .xes are allowed.",
+            detail=(
+                "Invalid file type. Only .csv, .xes, .csv.gz, .xes.gz and .zip "
+                "are allowed."
+            ),
         )
 
-    content = await file.read()
-
-    # Get the logs columns
+    # Stream the upload to a tmp file for the later upload
+    max_size = settings.MAX_UPLOAD_SIZE_MB * 1024 * 1024
+    chunk_size = settings.UPLOAD_CHUNK_SIZE_KB * 1024
+    size = 0
+    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=ext)
     try:
-        df = file_handlers.process_file(content, ext)
-    except Exception as e:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Error processing file: {str(e)}",
-        )
+        while chunk := await file.read(chunk_size):
+            size += len(chunk)
+            if size > max_size:
+                raise HTTPException(
+                    status_code=413,
+                    detail=(
+                        "File too large. The maximum upload size is "
+                        f"{settings.MAX_UPLOAD_SIZE_MB} MB."
+                    ),
+                )
+            tmp.write(chunk)
+        tmp.close()
+
+        # Get the logs columns
+        try:
+            columns = file_handlers.read_columns(tmp.name, ext)
+        except Exception as e:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Error processing file: {str(e)}",
+            )
+    except HTTPException:
+        tmp.close()
+        if os.path.exists(tmp.name):
+            os.unlink(tmp.name)
+        raise
+
+    # Store the path to the tmp file in the workspace
+    workspace = get_workspace(request)
+    remove_log_cache(workspace)
+    workspace.state.current_log = tmp.name
+    workspace.state.current_log_columns = columns
+
+    background_tasks.add_task(cache_parsed_log, workspace, tmp.name, ext)
 
-    # Store file to a tmp file for the later upload
-    suffix = ext
-    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
-    tmp.write(content)
-    tmp.close()
+    return {"columns": columns}
 
-    # Store the path to the tmp file in the app state
-    request.app.state.current_log = tmp.name
-    request.app.state.current_log_columns = df.columns.tolist()
 
-    return {"columns": df.columns.tolist()}
+def cache_parsed_log(workspace: Workspace, path: str, ext: str) -> None:
+    """Parses an uploaded XES log and caches it as an Arrow file.
+
+    CSV logs are not cached, since their columns can only be typed once
+    the column mapping of the commit is known, see read_csv_typed. The
+    cache is only registered in the workspace if the log is still the
+    current log of the workspace once parsing is done. Failures are not
+    fatal, the commit then parses the log itself.
+
+    Args:
+        workspace: The workspace the log was uploaded to.
+        path: The path to the uploaded log file.
+        ext: The file extension of the log file.
+    """
+    cache_path = f"{path}{file_handlers.LOG_CACHE_SUFFIX}"
+    try:
+        if file_handlers.get_log_format(path, ext) != ".xes":
+            return
+        df = file_handlers.read_log_file(path, ext)
+        file_handlers.write_log_cache(df, cache_path)
+    except Exception as e:
+        print(f"Could not cache the parsed log {path}: {e}")
+        return
+
+    if workspace.state.current_log == path:
+        workspace.state.current_log_cache = cache_path
+    elif os.path.exists(cache_path):
+        os.unlink(cache_path)
 
 
-@router.post("/commit-log-to-celonis")
+@router.post("/commit-log-to-celonis", status_code=202)
 async def commit_log_to_celonis(
+    background_tasks: BackgroundTasks,
     request: Request,
     payload: Optional[ColumnMapping] = None,
+    mode: Literal["replace", "new_events", "new_cases"] = "replace",
     celonis: CelonisConnectionManager = Depends(get_celonis_connection),
+    settings: UploadSettings = Depends(get_upload_settings),
 ) -> Dict[str, str]:
     """Uploads the log file to Celonis and creates a table.
 
+    The commit runs as a job in the background, so the parsing, upload
+    and reload of the data model do not block other requests. Its phase
+    and progress can be polled via /api/jobs/{job_id}, the result contains
+    the message of the commit once it is complete.
+
+    Logs with more rows than CELONIS_UPLOAD_CHUNK_ROWS are uploaded in
+    chunks, CELONIS_UPLOAD_WORKERS of them in parallel. If a chunk fails,
+    committing the same log again only uploads the missing chunks.
+
+    In the modes "new_events" and "new_cases", the log is treated as a
+    delta of the existing table instead. Only the events newer than the
+    latest event in the table, or the events of cases not yet in the
+    table, are appended and loaded into the data model. If the table does
+    not exist yet, it is created from the whole log.
+
     Args:
+        background_tasks: The background tasks object. This is used to
+          schedule the commit.
+        request: The FastAPI request object. This is used to access the
+          workspace of the request, see get_workspace.
         payload (optional): The column mapping for the event log. This should be a
           ColumnMapping object containing the case ID, activity, and timestamp
           columns. It is only needed if the log is a csv file.
-        request: The FastAPI request object. This is used to access the
-          application state via `request.app.state`.
+        mode (optional): How the log is committed, "replace", "new_events" or
+          "new_cases". Defaults to "replace".
         celonis (optional): The Celonis Connection DI. Defaults to
           Depends(get_celonis_connection).
+        settings (optional): The upload settings DI. Defaults to
+          Depends(get_upload_settings).
 
     Raises:
-        HTTPException: If no log file is found in the app state, or if there is an
-        error processing the file.
+        HTTPException: If no log file is found in the workspace, if the
+        file or the mapping is invalid, or if a log is already being
+        committed.
 
     Returns:
-        A dictionary containing a message indicating the success of the
-        operation.
+        A dictionary containing the job ID of the commit.
     """
-    path = request.app.state.current_log  # Path to the temporary file with the log
+    workspace = get_workspace(request)
+    path = workspace.state.current_log  # Path to the temporary file with the log
     if not path or not os.path.exists(path):
         raise HTTPException(
             status_code=400,
             detail="No log file found. Please upload a log first.",
         )
 
-    # Read the log file and convert it
-    with open(path, "rb") as f:
-        content = f.read()
-    ext = os.path.splitext(path)[1].lower()
+    ext = file_handlers.get_file_extension(path)
     try:
-        df = file_handlers.process_file(content, ext)
+        log_format = file_handlers.get_log_format(path, ext)
     except ValueError as e:
         raise HTTPException(
             status_code=400,
             detail=f"Error processing file: {str(e)}",
         )
     # CSV files must enforce a mapping
-    if ext == ".csv":
+    if log_format == ".csv":
         if not payload:
             raise HTTPException(
                 status_code=400,
                 detail="Column mapping is required for CSV files.",
             )
-    # Rename the columns according to the mapping if specified
-    if payload:
-        df = df.rename(
-            columns={
-                payload.case_id_column: "case:concept:name",
-                payload.activity_column: "concept:name",
-                payload.timestamp_column: "time:timestamp",
-                payload.resource_1_column: "org:resource",
-                payload.group_column: "org:group",
-            }
+
+    # Only one log can be committed to the data model at a time
+    if any(
+        job.module == MODULE_NAME and job.status in ("pending", "running")
+        for job in workspace.state.jobs.values()
+    ):
+        raise HTTPException(
+            status_code=409,
+            detail="A log is already being committed. Please wait for its job.",
         )
-        # Convert the timestamp column to datetime
-        df["time:timestamp"] = pd.to_datetime(df["time:timestamp"], errors="coerce")  # type: ignore
 
-    # Upload to Celonis
-    celonis.add_dataframe(df)
-    celonis.create_table()
+    job_id = str(uuid.uuid4())
+
+    # Intialize the record in the workspace
+    add_job(workspace, job_id, MODULE_NAME)
 
-    # Clean up the temporary file
-    os.unlink(path)
-    request.app.state.current_log = None
-    request.app.state.current_log_columns = []
+    # Schedule the worker. The uploaded log is only known to this process,
+    # so the commit is not put into a shared job queue, see job_queue.py.
+    background_tasks.add_task(
+        holding_connections(commit_log_and_store_result, celonis),
+        workspace,
+        job_id,
+        celonis,
+        path,
+        payload,
+        mode,
+        chunk_size=settings.CELONIS_UPLOAD_CHUNK_ROWS,
+        max_workers=settings.CELONIS_UPLOAD_WORKERS,
+    )
 
-    return {"message": "Table created successfully"}
+    return {"job_id": job_id}
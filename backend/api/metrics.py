@@ -0,0 +1,81 @@
+"""Contains the router that exposes the metrics in Prometheus text format."""
+
+import os
+from typing import Any, List
+
+from fastapi import APIRouter, Request
+from fastapi.responses import PlainTextResponse
+
+from backend.utils.metrics import CACHED_BYTES, JOBS, REGISTRY, estimate_nbytes
+
+router = APIRouter(tags=["Metrics"])
+
+# The content type of the Prometheus text format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+JOB_STATUSES = ("pending", "running", "complete", "failed")
+
+
+def _file_size(path: Any) -> int:
+    """Returns the size of a file, or 0 if there is none."""
+    return os.path.getsize(path) if path and os.path.exists(path) else 0
+
+
+def _workspace_states(state: Any) -> List[Any]:
+    """Returns the states of all workspaces, or the state itself."""
+    registry = getattr(state, "workspaces", None)
+    if registry is None:
+        return [state]
+    return [workspace.state for workspace in registry.list()]
+
+
+def update_gauges(state: Any) -> None:
+    """Sets the gauges from the application state.
+
+    The jobs and the caches of all workspaces are added up.
+
+    Args:
+        state: The application state with the workspaces, or the state of
+          a single workspace with the jobs and the caches.
+    """
+    states = _workspace_states(state)
+    jobs: List[Any] = [
+        job for s in states for job in (getattr(s, "jobs", None) or {}).values()
+    ]
+    for status in JOB_STATUSES:
+        JOBS.set(sum(job.status == status for job in jobs), status=status)
+
+    CACHED_BYTES.set(
+        sum(_file_size(getattr(s, "current_log", None)) for s in states),
+        cache="uploaded_log",
+    )
+    CACHED_BYTES.set(
+        sum(_file_size(getattr(s, "current_log_cache", None)) for s in states),
+        cache="parsed_log",
+    )
+    CACHED_BYTES.set(
+        sum(
+            estimate_nbytes(value)
+            for s in states
+            for value in (getattr(s, "extract_cache", None) or {}).values()
+        ),
+        cache="extract",
+    )
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics(request: Request) -> PlainTextResponse:
+    """Returns the metrics of the backend in Prometheus text format.
+
+    The gauges of the job queue and the caches are taken from the
+    application state when the metrics are scraped.
+
+    Args:
+        request: The FastAPI request object. This is used to access the
+          application state via `request.app.state`.
+
+    Returns:
+        The metrics in Prometheus text format.
+    """
+    update_gauges(request.app.state)
+    return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
@@ -5,7 +5,7 @@ The job is used to represent a job in the system.
 
 from typing import Any, Dict, Literal, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class JobStatus(BaseModel):
@@ -17,10 +17,19 @@ class JobStatus(BaseModel):
     "completed", or "failed".
     The result is an optional dictionary containing the result of the job.
     The error is an optional string containing the error message if the
-    job failed.
+    job failed. Long running jobs may report the phase they are in and
+    the completed fraction of that phase as progress. A complete job is
+    marked stale once a commit changed the log it was computed from, its
+    result is then kept but should be computed again. Profiled jobs keep
+    their CPU and memory profile, which is only returned by
+    /api/jobs/{job_id}/profile.
     """
 
     module: str  # e.g. log_skeleton, temporal
     status: Literal["pending", "running", "complete", "failed"]
     result: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
+    phase: Optional[str] = None  # e.g. parse, upload
+    progress: Optional[float] = None  # between 0 and 1
+    stale: bool = False
+    profile: Optional[Dict[str, Any]] = Field(default=None, exclude=True)
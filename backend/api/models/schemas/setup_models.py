@@ -25,10 +25,15 @@ class CelonisCredentials(BaseModel):
 
 
 class ColumnMapping(BaseModel):
-    """Defines the column mapping for the event log."""
+    """Defines the column mapping for the event log.
+
+    The timestamp format is a strptime format, e.g. "%d.%m.%Y %H:%M". If it
+    is not given, it is detected from the timestamps.
+    """
 
     case_id_column: str
     activity_column: str
     timestamp_column: str
     resource_1_column: Optional[str] = None
     group_column: Optional[str] = None
+    timestamp_format: Optional[str] = None
@@ -6,11 +6,12 @@ from typing import Dict, List, TypeAlias, Union
 from fastapi import APIRouter, BackgroundTasks, Depends, Request, Query
 
 from backend.api.celonis import get_celonis_connection
+from backend.api.job_queue import submit_job
 from backend.api.jobs import verify_correct_job_module
-from backend.api.models.schemas.job_models import JobStatus
 from backend.api.tasks.declarative_constraints_tasks import (
     compute_and_store_declarative_constraints,
 )
+from backend.api.workspaces import add_job, get_workspace
 from backend.celonis_connection.celonis_connection_manager import (
     CelonisConnectionManager,
 )
@@ -35,40 +36,47 @@ async def compute_declarative_constraints(
     min_support: float = Query(0.3, description="Minimum support ratio"),
     min_confidence: float = Query(0.75, description="Minimum confidence ratio"),
     fitness_score: float = Query(1.0, description="Fitness score for the constraints"),
+    profile: bool = Query(False, description="Profile the CPU and memory of the job."),
     celonis: CelonisConnectionManager = Depends(get_celonis_connection),
 ) -> Dict[str, str]:
     """Computes the declarative constraints and stores it.
 
-    The declarative model is computed in the background and stored in the app state.
+    The declarative model is computed in the background and stored in the workspace.
 
     Args:
         background_tasks: The background tasks object. This is used to schedule
           the computation of the declarative model.
         request: The FastAPI request object. This is used to access the
-          application state via `request.app.state`.
+          workspace of the request, see get_workspace.
         celonis (optional): The CelonisManager dependency injection.
           Defaults to Depends(get_celonis_connection).
         min_support: The minimum support ratio for the constraints.
         min_confidence: The minimum confidence ratio for the constraints.
         fitness_score: The fitness score for the constraints.
+        profile: If True, the job is profiled and its profile can be
+          downloaded from /api/jobs/{job_id}/profile.
 
     Returns:
         A dictionary containing the job ID of the scheduled task.
     """
+    workspace = get_workspace(request)
     job_id = str(uuid.uuid4())
 
-    # Intialize the record in the app state
-    request.app.state.jobs[job_id] = JobStatus(module=MODULE_NAME, status="pending")
+    # Intialize the record in the workspace
+    add_job(workspace, job_id, MODULE_NAME)
 
     # Schedule the worker
-    background_tasks.add_task(
-        compute_and_store_declarative_constraints,
-        request.app,
+    task = compute_and_store_declarative_constraints
+    submit_job(
+        background_tasks,
+        workspace,
+        task,
         job_id,
         celonis,
         min_support,
         min_confidence,
         fitness_score,
+        profile=profile,
     )
 
     return {"job_id": job_id}
@@ -84,7 +92,7 @@ def get_existance_violations(job_id: str, request: Request) -> ReturnGraphType:
     Args:
         job_id: The ID of the job for which to retrieve the existance violations.
         request: The FastAPI request object. This is used to access the
-            application state via `request.app.state`.
+            workspace of the request, see get_workspace.
 
 
     Returns:
@@ -92,7 +100,7 @@ def get_existance_violations(job_id: str, request: Request) -> ReturnGraphType:
     """
     verify_correct_job_module(job_id, request, MODULE_NAME)
 
-    return request.app.state.jobs[job_id].result.get("existance", [])
+    return get_workspace(request).state.jobs[job_id].result.get("existance", [])
 
 
 @router.get("/get_absence_violations/{job_id}")
@@ -102,14 +110,14 @@ def get_absence_violations(job_id: str, request: Request) -> ReturnGraphType:
     Args:
         job_id: The ID of the job for which to retrieve the  violations.
         request: The FastAPI request object. This is used to access the
-            application state via `request.app.state`.
+            workspace of the request, see get_workspace.
 
     Returns:
         A list of lists containing the absence violations for the specified job.
     """
     verify_correct_job_module(job_id, request, MODULE_NAME)
 
-    return request.app.state.jobs[job_id].result.get("absence", [])
+    return get_workspace(request).state.jobs[job_id].result.get("absence", [])
 
 
 @router.get("/get_exactly_one_violations/{job_id}")
@@ -119,14 +127,14 @@ def get_exactly_one_violations(job_id: str, request: Request) -> ReturnGraphType
     Args:
         job_id: The ID of the job for which to retrieve the  violations.
         request: The FastAPI request object. This is used to access the
-            application state via `request.app.state`.
+            workspace of the request, see get_workspace.
 
     Returns:
         A list of lists containing the exactly_one violations for the specified job.
     """
     verify_correct_job_module(job_id, request, MODULE_NAME)
 
-    return request.app.state.jobs[job_id].result.get("exactly_one", [])
+    return get_workspace(request).state.jobs[job_id].result.get("exactly_one", [])
 
 
 @router.get("/get_init_violations/{job_id}")
@@ -136,14 +144,14 @@ def get_init_violations(job_id: str, request: Request) -> ReturnGraphType:
     Args:
         job_id: The ID of the job for which to retrieve the  violations.
         request: The FastAPI request object. This is used to access the
-            application state via `request.app.state`.
+            workspace of the request, see get_workspace.
 
     Returns:
         A list of lists containing the init violations for the specified job.
     """
     verify_correct_job_module(job_id, request, MODULE_NAME)
 
-    return request.app.state.jobs[job_id].result.get("init", [])
+    return get_workspace(request).state.jobs[job_id].result.get("init", [])
 
 
 @router.get("/get_responded_existence_violations/{job_id}")
@@ -155,14 +163,16 @@ def get_responded_existence_violations(
     Args:
         job_id: The ID of the job for which to retrieve the  violations.
         request: The FastAPI request object. This is used to access the
-            application state via `request.app.state`.
+            workspace of the request, see get_workspace.
 
     Returns:
         A list of lists containing the responded_existence violations for the specified job.
     """
     verify_correct_job_module(job_id, request, MODULE_NAME)
 
-    return request.app.state.jobs[job_id].result.get("responded_existence", [])
+    return (
+        get_workspace(request).state.jobs[job_id].result.get("responded_existence", [])
+    )
 
 
 @router.get("/get_coexistence_violations/{job_id}")
@@ -172,14 +182,14 @@ def get_coexistence_violations(job_id: str, request: Request) -> ReturnGraphType
     Args:
         job_id: The ID of the job for which to retrieve the  violations.
         request: The FastAPI request object. This is used to access the
-            application state via `request.app.state`.
+            workspace of the request, see get_workspace.
 
     Returns:
         A list of lists containing the coexistence violations for the specified job.
     """
     verify_correct_job_module(job_id, request, MODULE_NAME)
 
-    return request.app.state.jobs[job_id].result.get("coexistence", [])
+    return get_workspace(request).state.jobs[job_id].result.get("coexistence", [])
 
 
 @router.get("/get_response_violations/{job_id}")
@@ -189,14 +199,14 @@ def get_response_violations(job_id: str, request: Request) -> ReturnGraphType:
     Args:
         job_id: The ID of the job for which to retrieve the  violations.
         request: The FastAPI request object. This is used to access the
-            application state via `request.app.state`.
+            workspace of the request, see get_workspace.
 
     Returns:
         A list of lists containing the response violations for the specified job.
     """
     verify_correct_job_module(job_id, request, MODULE_NAME)
 
-    return request.app.state.jobs[job_id].result.get("response", [])
+    return get_workspace(request).state.jobs[job_id].result.get("response", [])
 
 
 @router.get("/get_precedence_violations/{job_id}")
@@ -206,14 +216,14 @@ def get_precedence_violations(job_id: str, request: Request) -> ReturnGraphType:
     Args:
         job_id: The ID of the job for which to retrieve the  violations.
         request: The FastAPI request object. This is used to access the
-            application state via `request.app.state`.
+            workspace of the request, see get_workspace.
 
     Returns:
         A list of lists containing the precedence violations for the specified job.
     """
     verify_correct_job_module(job_id, request, MODULE_NAME)
 
-    return request.app.state.jobs[job_id].result.get("precedence", [])
+    return get_workspace(request).state.jobs[job_id].result.get("precedence", [])
 
 
 @router.get("/get_succession_violations/{job_id}")
@@ -223,14 +233,14 @@ def get_succession_violations(job_id: str, request: Request) -> ReturnGraphType:
     Args:
         job_id: The ID of the job for which to retrieve the  violations.
         request: The FastAPI request object. This is used to access the
-            application state via `request.app.state`.
+            workspace of the request, see get_workspace.
 
     Returns:
         A list of lists containing the succession violations for the specified job.
     """
     verify_correct_job_module(job_id, request, MODULE_NAME)
 
-    return request.app.state.jobs[job_id].result.get("succession", [])
+    return get_workspace(request).state.jobs[job_id].result.get("succession", [])
 
 
 @router.get("/get_altprecedence_violations/{job_id}")
@@ -240,14 +250,14 @@ def get_altprecedence_violations(job_id: str, request: Request) -> ReturnGraphTy
     Args:
         job_id: The ID of the job for which to retrieve the  violations.
         request: The FastAPI request object. This is used to access the
-            application state via `request.app.state`.
+            workspace of the request, see get_workspace.
 
     Returns:
         A list of lists containing the altprecedence violations for the specified job.
     """
     verify_correct_job_module(job_id, request, MODULE_NAME)
 
-    return request.app.state.jobs[job_id].result.get("altprecedence", [])
+    return get_workspace(request).state.jobs[job_id].result.get("altprecedence", [])
 
 
 @router.get("/get_altsuccession_violations/{job_id}")
@@ -257,14 +267,14 @@ def get_altsuccession_violations(job_id: str, request: Request) -> ReturnGraphTy
     Args:
         job_id: The ID of the job for which to retrieve the  violations.
         request: The FastAPI request object. This is used to access the
-            application state via `request.app.state`.
+            workspace of the request, see get_workspace.
 
     Returns:
         A list of lists containing the altsuccession violations for the specified job.
     """
     verify_correct_job_module(job_id, request, MODULE_NAME)
 
-    return request.app.state.jobs[job_id].result.get("altsuccession", [])
+    return get_workspace(request).state.jobs[job_id].result.get("altsuccession", [])
 
 
 @router.get("/get_chainresponse_violations/{job_id}")
@@ -274,14 +284,14 @@ def get_chainresponse_violations(job_id: str, request: Request) -> ReturnGraphTy
     Args:
         job_id: The ID of the job for which to retrieve the  violations.
         request: The FastAPI request object. This is used to access the
-            application state via `request.app.state`.
+            workspace of the request, see get_workspace.
 
     Returns:
         A list of lists containing the chainresponse violations for the specified job.
     """
     verify_correct_job_module(job_id, request, MODULE_NAME)
 
-    return request.app.state.jobs[job_id].result.get("chainresponse", [])
+    return get_workspace(request).state.jobs[job_id].result.get("chainresponse", [])
 
 
 @router.get("/get_chainprecedence_violations/{job_id}")
@@ -291,14 +301,14 @@ def get_chainprecedence_violations(job_id: str, request: Request) -> ReturnGraph
     Args:
         job_id: The ID of the job for which to retrieve the  violations.
         request: The FastAPI request object. This is used to access the
-            application state via `request.app.state`.
+            workspace of the request, see get_workspace.
 
     Returns:
         A list of lists containing the chainprecedence violations for the specified job.
     """
     verify_correct_job_module(job_id, request, MODULE_NAME)
 
-    return request.app.state.jobs[job_id].result.get("chainprecedence", [])
+    return get_workspace(request).state.jobs[job_id].result.get("chainprecedence", [])
 
 
 @router.get("/get_chainsuccession_violations/{job_id}")
@@ -308,14 +318,14 @@ def get_chainsuccession_violations(job_id: str, request: Request) -> ReturnGraph
     Args:
         job_id: The ID of the job for which to retrieve the  violations.
         request: The FastAPI request object. This is used to access the
-            application state via `request.app.state`.
+            workspace of the request, see get_workspace.
 
     Returns:
         A list of lists containing the chainsuccession violations for the specified job.
     """
     verify_correct_job_module(job_id, request, MODULE_NAME)
 
-    return request.app.state.jobs[job_id].result.get("chainsuccession", [])
+    return get_workspace(request).state.jobs[job_id].result.get("chainsuccession", [])
 
 
 @router.get("/get_noncoexistence_violations/{job_id}")
@@ -325,14 +335,14 @@ def get_noncoexistence_violations(job_id: str, request: Request) -> ReturnGraphT
     Args:
         job_id: The ID of the job for which to retrieve the  violations.
         request: The FastAPI request object. This is used to access the
-            application state via `request.app.state`.
+            workspace of the request, see get_workspace.
 
     Returns:
         A list of lists containing the noncoexistence violations for the specified job.
     """
     verify_correct_job_module(job_id, request, MODULE_NAME)
 
-    return request.app.state.jobs[job_id].result.get("noncoexistence", [])
+    return get_workspace(request).state.jobs[job_id].result.get("noncoexistence", [])
 
 
 @router.get("/get_nonsuccession_violations/{job_id}")
@@ -342,14 +352,14 @@ def get_nonsuccession_violations(job_id: str, request: Request) -> ReturnGraphTy
     Args:
         job_id: The ID of the job for which to retrieve the  violations.
         request: The FastAPI request object. This is used to access the
-            application state via `request.app.state`.
+            workspace of the request, see get_workspace.
 
     Returns:
         A list of lists containing the nonsuccession violations for the specified job.
     """
     verify_correct_job_module(job_id, request, MODULE_NAME)
 
-    return request.app.state.jobs[job_id].result.get("nonsuccession", [])
+    return get_workspace(request).state.jobs[job_id].result.get("nonsuccession", [])
 
 
 @router.get("/get_nonchainsuccession_violations/{job_id}")
@@ -359,14 +369,16 @@ def get_nonchainsuccession_violations(job_id: str, request: Request) -> ReturnGr
     Args:
         job_id: The ID of the job for which to retrieve the  violations.
         request: The FastAPI request object. This is used to access the
-            application state via `request.app.state`.
+            workspace of the request, see get_workspace.
 
     Returns:
         A list of lists containing the nonchainsuccession violations for the specified job.
     """
     verify_correct_job_module(job_id, request, MODULE_NAME)
 
-    return request.app.state.jobs[job_id].result.get("nonchainsuccession", [])
+    return (
+        get_workspace(request).state.jobs[job_id].result.get("nonchainsuccession", [])
+    )
 
 
 # **************** Retrieving Declarative Model Attributes - PQL Queries ****************
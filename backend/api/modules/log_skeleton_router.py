@@ -3,11 +3,12 @@
 import uuid
 from typing import Dict, List, Literal, TypedDict
 
-from fastapi import APIRouter, BackgroundTasks, Depends, Request
+from fastapi import APIRouter, BackgroundTasks, Depends, Query, Request
 
 from backend.api.celonis import get_celonis_connection
-from backend.api.models.schemas.job_models import JobStatus
+from backend.api.job_queue import submit_job
 from backend.api.tasks.log_skeleton_tasks import compute_and_store_log_skeleton
+from backend.api.workspaces import add_job, get_workspace
 from backend.celonis_connection.celonis_connection_manager import (
     CelonisConnectionManager,
 )
@@ -44,32 +45,35 @@ class EndpointReturnType(TypedDict):
 async def compute_log_skeleton(
     background_tasks: BackgroundTasks,
     request: Request,
+    profile: bool = Query(False, description="Profile the CPU and memory of the job."),
     celonis: CelonisConnectionManager = Depends(get_celonis_connection),
 ) -> Dict[str, str]:
     """Computes the log skeleton and stores it.
 
-    The log skeleton is computed in the background and stored in the app state.
+    The log skeleton is computed in the background and stored in the workspace.
 
     Args:
         background_tasks: The background tasks object. This is used to schedule
           the computation of the log skeleton.
         request: The FastAPI request object. This is used to access the
-          application state via `request.app.state`.
+          workspace of the request, see get_workspace.
+        profile: If True, the job is profiled and its profile can be
+          downloaded from /api/jobs/{job_id}/profile.
         celonis (optional): The CelonisManager dependency injection.
           Defaults to Depends(get_celonis_connection).
 
     Returns:
         A dictionary containing the job ID of the scheduled task.
     """
+    workspace = get_workspace(request)
     job_id = str(uuid.uuid4())
 
-    # Intialize the record in the app state
-    request.app.state.jobs[job_id] = JobStatus(module=MODULE_NAME, status="pending")
+    # Intialize the record in the workspace
+    add_job(workspace, job_id, MODULE_NAME)
 
     # Schedule the worker
-    background_tasks.add_task(
-        compute_and_store_log_skeleton, request.app, job_id, celonis
-    )
+    task = compute_and_store_log_skeleton
+    submit_job(background_tasks, workspace, task, job_id, celonis, profile=profile)
 
     return {"job_id": job_id}
 
@@ -88,7 +92,7 @@ def get_equivalence(job_id: str, request: Request) -> EndpointReturnType:
     Returns:
         A JSON object with "tables" and "graphs" keys.
     """
-    result = request.app.state.jobs[job_id].result.get("equivalence", [])
+    result = get_workspace(request).state.jobs[job_id].result.get("equivalence", [])
     if not result:
         return {"tables": [], "graphs": []}
     return {
@@ -156,7 +160,7 @@ def get_always_after(job_id: str, request: Request) -> EndpointReturnType:
     Returns:
         A dictionary with a "tables" list and optional "graphs" list.
     """
-    result = request.app.state.jobs[job_id].result.get("always_after", [])
+    result = get_workspace(request).state.jobs[job_id].result.get("always_after", [])
     if not result:
         return {"tables": [], "graphs": []}
     return {
@@ -221,7 +225,7 @@ def get_always_after_pql(
 @router.get("/old/get_always_before/{job_id}")
 def get_always_before(job_id: str, request: Request) -> EndpointReturnType:
     """Retrieves the always-before relations from the log skeleton."""
-    result = request.app.state.jobs[job_id].result.get("always_before", [])
+    result = get_workspace(request).state.jobs[job_id].result.get("always_before", [])
     if not result:
         return {"tables": [], "graphs": []}
     return {
@@ -286,7 +290,7 @@ def get_always_before_pql(
 @router.get("/old/get_never_together/{job_id}")
 def get_never_together(job_id: str, request: Request) -> EndpointReturnType:  # type: ignore
     """Retrieves the never-together relations from the log skeleton."""
-    result = request.app.state.jobs[job_id].result.get("never_together", [])
+    result = get_workspace(request).state.jobs[job_id].result.get("never_together", [])
     if not result:
         return {"tables": [], "graphs": []}
     return {
@@ -351,7 +355,9 @@ def get_never_together_pql(
 @router.get("/old/get_directly_follows/{job_id}")
 def get_directly_follows(job_id: str, request: Request) -> EndpointReturnType:
     """Retrieves the directly-follows relations from the log skeleton."""
-    result = request.app.state.jobs[job_id].result.get("directly_follows", [])
+    result = (
+        get_workspace(request).state.jobs[job_id].result.get("directly_follows", [])
+    )
     if not result:
         return {"tables": [], "graphs": []}
     return {
@@ -417,7 +423,7 @@ def get_directly_follows_pql(
 @router.get("/old/get_activity_frequencies/{job_id}")
 def get_activity_frequencies(job_id: str, request: Request) -> EndpointReturnType:
     """Retrieves the activity frequencies from the log skeleton."""
-    freq_dict = request.app.state.jobs[job_id].result.get("activ_freq", {})
+    freq_dict = get_workspace(request).state.jobs[job_id].result.get("activ_freq", {})
 
     # Format the frequencies into a list of lists for the table
     rows = [  # type: ignore
@@ -1,20 +1,35 @@
 """Contains the routes for handling resource-based conformance checking."""
 
 import uuid
-from typing import Any, Dict, List, TypeAlias, Union
+from typing import Any, Dict, List, Optional, TypeAlias, Union
 
 from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request
+import pandas as pd
 
 from backend.api.celonis import get_celonis_connection
+from backend.api.job_queue import submit_job
 from backend.api.jobs import verify_correct_job_module
-from backend.api.models.schemas.job_models import JobStatus
 from backend.api.tasks.resource_based_tasks import (
     compute_and_store_resource_based_metrics,
 )
+from backend.api.workspaces import (
+    add_job,
+    get_extract_cache,
+    get_workspace,
+    store_in_cache,
+)
 from backend.celonis_connection.celonis_connection_manager import (
     CelonisConnectionManager,
+    pql_date,
 )
+from backend.conformance_checking.case_resource_index import CaseResourceIndex
+from backend.conformance_checking.multitasking import MultitaskingIndex
 from backend.conformance_checking.resource_based import ResourceBased
+from backend.conformance_checking.role_discovery import DEFAULT_ROLES_THRESHOLD
+from backend.conformance_checking.resource_profile_cube import (
+    Granularity,
+    ResourceProfileCube,
+)
 from backend.pql_queries import resource_based_queries
 
 # **************** Type Aliases ****************
@@ -31,6 +46,13 @@ MODULE_NAME = "resource_based"
 async def compute_resource_based_metrics(
     background_tasks: BackgroundTasks,
     request: Request,
+    roles_threshold: float = Query(
+        DEFAULT_ROLES_THRESHOLD,
+        ge=0,
+        le=1,
+        description="Similarity two roles need to exceed to be merged.",
+    ),
+    profile: bool = Query(False, description="Profile the CPU and memory of the job."),
     celonis: CelonisConnectionManager = Depends(get_celonis_connection),
 ) -> Dict[str, str]:
     """Computes the resource-based metrics and stores it.
@@ -38,18 +60,28 @@ async def compute_resource_based_metrics(
     Args:
         background_tasks: The background tasks manager.
         request: The FastAPI request object.
+        roles_threshold: The similarity two roles need to exceed to be
+          merged by the organizational role discovery. Defaults to 0.65,
+          as in PM4Py.
+        profile: If True, the job is profiled and its profile can be
+          downloaded from /api/jobs/{job_id}/profile.
         celonis: The Celonis connection manager instance.
 
     Returns:
         A dictionary containing the job ID of the scheduled task.
     """
+    workspace = get_workspace(request)
     job_id = str(uuid.uuid4())
-    request.app.state.jobs[job_id] = JobStatus(module=MODULE_NAME, status="pending")
-    background_tasks.add_task(
-        compute_and_store_resource_based_metrics,
-        request.app,
+    add_job(workspace, job_id, MODULE_NAME)
+    task = compute_and_store_resource_based_metrics
+    submit_job(
+        background_tasks,
+        workspace,
+        task,
         job_id,
         celonis,
+        roles_threshold,
+        profile=profile,
     )
     return {"job_id": job_id}
 
@@ -73,7 +105,8 @@ async def get_handover_of_work_metric(
     verify_correct_job_module(job_id, request, MODULE_NAME)
 
     raw_values = (
-        request.app.state.jobs[job_id]
+        get_workspace(request)
+        .state.jobs[job_id]
         .result.get("handover_of_work", {})
         .get("values", [])
     )
@@ -124,7 +157,8 @@ async def get_subcontracting_metric(
     verify_correct_job_module(job_id, request, MODULE_NAME)
 
     raw_values = (
-        request.app.state.jobs[job_id]
+        get_workspace(request)
+        .state.jobs[job_id]
         .result.get("subcontracting", {})
         .get("values", [])
     )
@@ -173,7 +207,8 @@ async def get_working_together_metric(
     verify_correct_job_module(job_id, request, MODULE_NAME)
 
     raw_values = (
-        request.app.state.jobs[job_id]
+        get_workspace(request)
+        .state.jobs[job_id]
         .result.get("working_together", {})
         .get("values", [])
     )
@@ -222,7 +257,8 @@ async def get_similar_activities_metric(
     verify_correct_job_module(job_id, request, MODULE_NAME)
 
     raw_values = (
-        request.app.state.jobs[job_id]
+        get_workspace(request)
+        .state.jobs[job_id]
         .result.get("similar_activities", {})
         .get("values", [])
     )
@@ -276,7 +312,9 @@ async def get_organizational_roles_result(
     """
     verify_correct_job_module(job_id, request, MODULE_NAME)
 
-    roles_data = request.app.state.jobs[job_id].result.get("organizational_roles", [])
+    roles_data = (
+        get_workspace(request).state.jobs[job_id].result.get("organizational_roles", [])
+    )
 
     rows: List[List[str]] = []
     for role in roles_data:
@@ -300,11 +338,82 @@ async def get_organizational_roles_result(
 # **************** Resource Profiles ****************
 
 
+class CubeOptions:
+    """Whether a resource profile metric is answered from the cube.
+
+    The resource profile endpoints take these options as query parameters.
+    With use_cube, the metric is answered from the resource profile cube
+    of the current extract instead of an extraction per request. The
+    window bounds are then snapped to the bucket grid of the granularity.
+
+    Attributes:
+        use_cube: If True, the metric is answered from the cube.
+        granularity: The time bucket of the cube, "hour" or "day".
+    """
+
+    def __init__(
+        self,
+        use_cube: bool = Query(
+            False, description="Answer from the precomputed resource profile cube."
+        ),
+        granularity: Granularity = Query("day", description="Time bucket of the cube."),
+    ) -> None:
+        """Initialize the options from the query parameters."""
+        self.use_cube = use_cube
+        self.granularity = granularity
+
+
+def _get_resource_profile_log(
+    celonis: CelonisConnectionManager,
+    columns: List[str],
+    start_time: str,
+    end_time: str,
+    resource: Optional[str] = None,
+) -> pd.DataFrame:
+    """Extracts only the columns and events a resource profile metric needs.
+
+    The time window and the resource are pushed down to Celonis as
+    filters. This is only used for metrics that look at the events in the
+    window and not at whole cases.
+
+    Args:
+        celonis: The Celonis connection manager instance.
+        columns: The columns the metric needs.
+        start_time: The start time of the window.
+        end_time: The end time of the window.
+        resource (optional): Only the events of this resource are extracted.
+
+    Returns:
+        The extracted events with UTC timestamps.
+
+    Raises:
+        HTTPException: If a time is invalid or if no data could be
+          retrieved from Celonis.
+    """
+    try:
+        pql_date(start_time)
+        pql_date(end_time)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    df = celonis.get_filtered_dataframe_from_celonis(
+        columns,
+        start_time=start_time,
+        end_time=end_time,
+        resources=[resource] if resource else None,
+    )
+    if df is None:
+        raise HTTPException(status_code=404, detail="No data retrieved from Celonis.")
+    df["time:timestamp"] = pd.to_datetime(df["time:timestamp"]).dt.tz_localize("UTC")
+    return df
+
+
 @router.get("/resource-profile/distinct-activities", response_model=int)
 async def get_distinct_activities(
+    request: Request,
     resource: str = Query(..., description="The resource identifier."),
     start_time: str = Query(..., description="Start time."),
     end_time: str = Query(..., description="End time."),
+    cube_options: CubeOptions = Depends(),
     celonis: CelonisConnectionManager = Depends(get_celonis_connection),
 ) -> int:
     """Retrieves the number of distinct activities.
@@ -314,14 +423,25 @@ async def get_distinct_activities(
         end_time: The end time of the range.
         resource: The resource for which to calculate the number of
                 distinct activities.
+        request: The FastAPI request object.
+        cube_options: Whether to answer from the cube, see CubeOptions.
         celonis: The Celonis connection manager instance.
 
     Returns:
         The number of distinct activities for the specified resource.
     """
-    df = celonis.get_dataframe_with_resource_group_from_celonis()
-    if df is None or df.empty:
-        raise HTTPException(status_code=404, detail="No data retrieved from Celonis.")
+    if cube_options.use_cube:
+        cube = get_resource_profile_cube(request, celonis, cube_options.granularity)
+        return cube.get_number_of_distinct_activities(start_time, end_time, resource)
+    df = _get_resource_profile_log(
+        celonis,
+        ["case:concept:name", "concept:name", "time:timestamp", "org:resource"],
+        start_time,
+        end_time,
+        resource,
+    )
+    if df.empty:
+        return 0
     try:
         rb = ResourceBased(log=df)
         return rb.get_number_of_distinct_activities(start_time, end_time, resource)
@@ -333,9 +453,11 @@ async def get_distinct_activities(
 
 @router.get("/pql/resource-profile/distinct-activities", response_model=int)
 async def get_distinct_activities_pql(
+    request: Request,
     resource: str = Query(..., description="The resource identifier."),
     start_time: str = Query(..., description="Start time."),
     end_time: str = Query(..., description="End time."),
+    cube_options: CubeOptions = Depends(),
     celonis: CelonisConnectionManager = Depends(get_celonis_connection),
 ) -> int:
     """Retrieves the number of distinct activities via a pql query.
@@ -345,11 +467,18 @@ async def get_distinct_activities_pql(
         end_time: The end time of the range.
         resource: The resource for which to calculate the number of
                 distinct activities.
+        request: The FastAPI request object.
+        cube_options: Whether to answer from the cube, see CubeOptions.
         celonis: The Celonis connection manager instance.
 
     Returns:
         The number of distinct activities for the specified resource.
     """
+    if cube_options.use_cube:
+        cube = get_resource_profile_cube(
+            request, celonis, cube_options.granularity, from_pql=True
+        )
+        return cube.get_number_of_distinct_activities(start_time, end_time, resource)
     try:
         result = resource_based_queries.get_number_of_distinct_activities(
             celonis, start_time, end_time, resource
@@ -361,6 +490,7 @@ async def get_distinct_activities_pql(
 
 @router.get("/resource-profile/activity-frequency", response_model=float)
 async def get_resource_activity_frequency(
+    request: Request,
     resource: str = Query(..., description="The resource identifier."),
     activity: str = Query(..., description="The specific activity name."),
     start_time: str = Query(
@@ -368,6 +498,7 @@ async def get_resource_activity_frequency(
         description="Start time of the interval.",
     ),
     end_time: str = Query(..., description="End time of the interval."),
+    cube_options: CubeOptions = Depends(),
     celonis: CelonisConnectionManager = Depends(get_celonis_connection),
 ) -> float:
     """Retrieves the activity frequency for a given resource and activity.
@@ -377,14 +508,25 @@ async def get_resource_activity_frequency(
         activity: The activity for which to calculate the frequency.
         start_time: The start time of the interval.
         end_time: The end time of the interval.
+        request: The FastAPI request object.
+        cube_options: Whether to answer from the cube, see CubeOptions.
         celonis: The Celonis connection manager instance.
 
     Returns:
         A float indicating the activity frequency.
     """
-    df = celonis.get_dataframe_with_resource_group_from_celonis()
-    if df is None or df.empty:
-        raise HTTPException(status_code=404, detail="No data retrieved from Celonis.")
+    if cube_options.use_cube:
+        cube = get_resource_profile_cube(request, celonis, cube_options.granularity)
+        return cube.get_activity_frequency(start_time, end_time, resource, activity)
+    df = _get_resource_profile_log(
+        celonis,
+        ["case:concept:name", "concept:name", "time:timestamp", "org:resource"],
+        start_time,
+        end_time,
+        resource,
+    )
+    if df.empty:
+        return 0.0
     try:
         rb = ResourceBased(log=df)
         return rb.get_activity_frequency(start_time, end_time, resource, activity)
@@ -397,6 +539,7 @@ async def get_resource_activity_frequency(
 
 @router.get("/pql/resource-profile/activity-frequency", response_model=float)
 async def get_resource_activity_frequency_pql(
+    request: Request,
     resource: str = Query(..., description="The resource identifier."),
     activity: str = Query(..., description="The specific activity name."),
     start_time: str = Query(
@@ -404,6 +547,7 @@ async def get_resource_activity_frequency_pql(
         description="Start time of the interval.",
     ),
     end_time: str = Query(..., description="End time of the interval."),
+    cube_options: CubeOptions = Depends(),
     celonis: CelonisConnectionManager = Depends(get_celonis_connection),
 ) -> float:
     """Retrieves the activity frequency for an activity via a PQL query.
@@ -413,11 +557,18 @@ async def get_resource_activity_frequency_pql(
         activity: The activity for which to calculate the frequency.
         start_time: The start time of the interval.
         end_time: The end time of the interval.
+        request: The FastAPI request object.
+        cube_options: Whether to answer from the cube, see CubeOptions.
         celonis: The Celonis connection manager instance.
 
     Returns:
         A float indicating the activity frequency.
     """
+    if cube_options.use_cube:
+        cube = get_resource_profile_cube(
+            request, celonis, cube_options.granularity, from_pql=True
+        )
+        return cube.get_activity_frequency(start_time, end_time, resource, activity)
     try:
         result = resource_based_queries.get_activity_frequency(
             celonis, start_time, end_time, resource, activity
@@ -429,9 +580,11 @@ async def get_resource_activity_frequency_pql(
 
 @router.get("/resource-profile/activity-completions", response_model=int)
 async def get_resource_activity_completions(
+    request: Request,
     resource: str = Query(..., description="The resource identifier."),
     start_time: str = Query(..., description="Start time of the interval."),
     end_time: str = Query(..., description="End time of the interval."),
+    cube_options: CubeOptions = Depends(),
     celonis: CelonisConnectionManager = Depends(get_celonis_connection),
 ) -> int:
     """Retrieves the number of activity instances completed by a resource.
@@ -440,14 +593,25 @@ async def get_resource_activity_completions(
         resource: The resource for which to calculate activity completions.
         start_time: The start time of the interval.
         end_time: The end time of the interval.
+        request: The FastAPI request object.
+        cube_options: Whether to answer from the cube, see CubeOptions.
         celonis: The Celonis connection manager instance.
 
     Returns:
         An integer indicating the number of activity completions.
     """
-    df = celonis.get_dataframe_with_resource_group_from_celonis()
-    if df is None or df.empty:
-        raise HTTPException(status_code=404, detail="No data retrieved from Celonis.")
+    if cube_options.use_cube:
+        cube = get_resource_profile_cube(request, celonis, cube_options.granularity)
+        return cube.get_activity_completions(start_time, end_time, resource)
+    df = _get_resource_profile_log(
+        celonis,
+        ["case:concept:name", "time:timestamp", "org:resource"],
+        start_time,
+        end_time,
+        resource,
+    )
+    if df.empty:
+        return 0
     try:
         rb = ResourceBased(log=df)
         return rb.get_activity_completions(start_time, end_time, resource)
@@ -460,9 +624,11 @@ async def get_resource_activity_completions(
 
 @router.get("/pql/resource-profile/activity-completions", response_model=int)
 async def get_resource_activity_completions_pql(
+    request: Request,
     resource: str = Query(..., description="The resource identifier."),
     start_time: str = Query(..., description="Start time of the interval."),
     end_time: str = Query(..., description="End time of the interval."),
+    cube_options: CubeOptions = Depends(),
     celonis: CelonisConnectionManager = Depends(get_celonis_connection),
 ) -> int:
     """Retrieves the number of activity instances completed via a PQL query.
@@ -471,11 +637,18 @@ async def get_resource_activity_completions_pql(
         resource: The resource for which to calculate activity completions.
         start_time: The start time of the interval.
         end_time: The end time of the interval.
+        request: The FastAPI request object.
+        cube_options: Whether to answer from the cube, see CubeOptions.
         celonis: The Celonis connection manager instance.
 
     Returns:
         An integer indicating the number of activity completions.
     """
+    if cube_options.use_cube:
+        cube = get_resource_profile_cube(
+            request, celonis, cube_options.granularity, from_pql=True
+        )
+        return cube.get_activity_completions(start_time, end_time, resource)
     try:
         result = resource_based_queries.get_activity_completions(
             celonis, start_time, end_time, resource
@@ -487,9 +660,11 @@ async def get_resource_activity_completions_pql(
 
 @router.get("/resource-profile/case-completions", response_model=int)
 async def get_resource_case_completions(
+    request: Request,
     resource: str = Query(..., description="The resource identifier."),
     start_time: str = Query(..., description="Start time of the interval."),
     end_time: str = Query(..., description="End time of the interval."),
+    cube_options: CubeOptions = Depends(),
     celonis: CelonisConnectionManager = Depends(get_celonis_connection),
 ) -> int:
     """Retrieves the number of cases completed by a resource.
@@ -498,11 +673,16 @@ async def get_resource_case_completions(
         resource: The resource for which to calculate case completions.
         start_time: The start time of the interval.
         end_time: The end time of the interval.
+        request: The FastAPI request object.
+        cube_options: Whether to answer from the cube, see CubeOptions.
         celonis: The Celonis connection manager instance.
 
     Returns:
         An integer indicating the number of case completions involving the resource.
     """
+    if cube_options.use_cube:
+        cube = get_resource_profile_cube(request, celonis, cube_options.granularity)
+        return cube.get_case_completions(start_time, end_time, resource)
     df = celonis.get_dataframe_with_resource_group_from_celonis()
     if df is None or df.empty:
         raise HTTPException(status_code=404, detail="No data retrieved from Celonis.")
@@ -518,9 +698,11 @@ async def get_resource_case_completions(
 
 @router.get("/pql/resource-profile/case-completions", response_model=int)
 async def get_resource_case_completions_pql(
+    request: Request,
     resource: str = Query(..., description="The resource identifier."),
     start_time: str = Query(..., description="Start time of the interval."),
     end_time: str = Query(..., description="End time of the interval."),
+    cube_options: CubeOptions = Depends(),
     celonis: CelonisConnectionManager = Depends(get_celonis_connection),
 ) -> int:
     """Retrieves the number of cases completed by a resource via a PQL query.
@@ -529,11 +711,18 @@ async def get_resource_case_completions_pql(
         resource: The resource for which to calculate case completions.
         start_time: The start time of the interval.
         end_time: The end time of the interval.
+        request: The FastAPI request object.
+        cube_options: Whether to answer from the cube, see CubeOptions.
         celonis: The Celonis connection manager instance.
 
     Returns:
         An integer indicating the number of case completions involving the resource.
     """
+    if cube_options.use_cube:
+        cube = get_resource_profile_cube(
+            request, celonis, cube_options.granularity, from_pql=True
+        )
+        return cube.get_case_completions(start_time, end_time, resource)
     try:
         result = resource_based_queries.get_case_completions(
             celonis, start_time, end_time, resource
@@ -545,9 +734,11 @@ async def get_resource_case_completions_pql(
 
 @router.get("/resource-profile/fraction-case-completions", response_model=float)
 async def get_resource_fraction_case_completions(
+    request: Request,
     resource: str = Query(..., description="The resource identifier."),
     start_time: str = Query(..., description="Start time of the interval."),
     end_time: str = Query(..., description="End time of the interval."),
+    cube_options: CubeOptions = Depends(),
     celonis: CelonisConnectionManager = Depends(get_celonis_connection),
 ) -> float:
     """Retrieves the fraction of cases completed by a resource.
@@ -556,11 +747,16 @@ async def get_resource_fraction_case_completions(
         resource: The resource for which to calculate the fraction of case completions.
         start_time: The start time of the interval.
         end_time: The end time of the interval.
+        request: The FastAPI request object.
+        cube_options: Whether to answer from the cube, see CubeOptions.
         celonis: The Celonis connection manager instance.
 
     Returns:
         A float indicating the fraction of case completions involving the resource.
     """
+    if cube_options.use_cube:
+        cube = get_resource_profile_cube(request, celonis, cube_options.granularity)
+        return cube.get_fraction_case_completions(start_time, end_time, resource)
     df = celonis.get_dataframe_with_resource_group_from_celonis()
     if df is None or df.empty:
         raise HTTPException(status_code=404, detail="No data retrieved from Celonis.")
@@ -576,9 +772,11 @@ async def get_resource_fraction_case_completions(
 
 @router.get("/pql/resource-profile/fraction-case-completions", response_model=float)
 async def get_resource_fraction_case_completions_pql(
+    request: Request,
     resource: str = Query(..., description="The resource identifier."),
     start_time: str = Query(..., description="Start time of the interval."),
     end_time: str = Query(..., description="End time of the interval."),
+    cube_options: CubeOptions = Depends(),
     celonis: CelonisConnectionManager = Depends(get_celonis_connection),
 ) -> float:
     """Retrieves the fraction of cases completed by a resource via a PQL query.
@@ -587,11 +785,18 @@ async def get_resource_fraction_case_completions_pql(
         resource: The resource for which to calculate the fraction of case completions.
         start_time: The start time of the interval.
         end_time: The end time of the interval.
+        request: The FastAPI request object.
+        cube_options: Whether to answer from the cube, see CubeOptions.
         celonis: The Celonis connection manager instance.
 
     Returns:
         A float indicating the fraction of case completions involving the resource.
     """
+    if cube_options.use_cube:
+        cube = get_resource_profile_cube(
+            request, celonis, cube_options.granularity, from_pql=True
+        )
+        return cube.get_fraction_case_completions(start_time, end_time, resource)
     try:
         result = resource_based_queries.get_fraction_case_completions(
             celonis, start_time, end_time, resource
@@ -792,6 +997,7 @@ async def get_interaction_of_two_resources(
 
 @router.get("/pql/resource-profile/interaction-two-resources", response_model=float)
 async def get_interaction_of_two_resources_pql(
+    request: Request,
     resource1: str = Query(..., description="The first resource identifier."),
     resource2: str = Query(..., description="The second resource identifier."),
     start_time: str = Query(..., description="Start time of the interval."),
@@ -800,7 +1006,11 @@ async def get_interaction_of_two_resources_pql(
 ) -> float:
     """Retrieves the interaction between two resources via a PQL query.
 
+    The case/resource index is built by one PQL query and cached for the
+    current extract, see get_case_resource_index.
+
     Args:
+        request: The FastAPI request object.
         resource1: The first resource.
         resource2: The second resource.
         start_time: The start time of the interval.
@@ -812,7 +1022,12 @@ async def get_interaction_of_two_resources_pql(
     """
     try:
         result = resource_based_queries.get_interaction_two_resources(
-            celonis, start_time, end_time, resource1, resource2
+            celonis,
+            start_time,
+            end_time,
+            resource1,
+            resource2,
+            index=get_case_resource_index(request, celonis, from_pql=True),
         )
     except HTTPException as e:
         raise HTTPException(status_code=e.status_code, detail=e.detail) from e
@@ -837,9 +1052,15 @@ async def get_resource_social_position(
     Returns:
         A float indicating the social position of the resource.
     """
-    df = celonis.get_dataframe_with_resource_group_from_celonis()
-    if df is None or df.empty:
-        raise HTTPException(status_code=404, detail="No data retrieved from Celonis.")
+    # All resources active in the window are needed for the ratio
+    df = _get_resource_profile_log(
+        celonis,
+        ["case:concept:name", "time:timestamp", "org:resource"],
+        start_time,
+        end_time,
+    )
+    if df.empty:
+        return 0.0
     try:
         rb = ResourceBased(log=df)
         return rb.get_social_position(start_time, end_time, resource)
@@ -849,6 +1070,303 @@ async def get_resource_social_position(
         )
 
 
+# **************** Resource Profile Cube ****************
+
+
+@router.post("/resource-profile/cube")
+async def build_resource_profile_cube(
+    request: Request,
+    granularity: Granularity = Query("day", description="Time bucket of the cube."),
+    rebuild: bool = Query(False, description="Rebuild an already cached cube."),
+    celonis: CelonisConnectionManager = Depends(get_celonis_connection),
+) -> Dict[str, Union[str, int]]:
+    """Builds the resource profile cube of the current extract ahead of time.
+
+    Building the cube up front lets the first windowed query be answered
+    by lookups only, e.g. when the UI opens the resource profile sliders.
+
+    Args:
+        request: The FastAPI request object.
+        granularity: The time bucket of the cube, "hour" or "day".
+        rebuild: If True, an already cached cube is discarded and rebuilt.
+        celonis: The Celonis connection manager instance.
+
+    Returns:
+        A summary of the cube with its time range, dimensions and size.
+    """
+    if rebuild:
+        get_extract_cache(get_workspace(request), celonis).pop(
+            _cube_cache_key(granularity), None
+        )
+    cube = get_resource_profile_cube(request, celonis, granularity)
+    return cube.get_summary()
+
+
+def _cube_cache_key(granularity: Granularity) -> str:
+    """Returns the key of the resource profile cube in the extract cache."""
+    return f"resource_profile_cube:{granularity}"
+
+
+def get_resource_profile_cube(
+    request: Request,
+    celonis: CelonisConnectionManager,
+    granularity: Granularity,
+    from_pql: bool = False,
+) -> ResourceProfileCube:
+    """Returns the resource profile cube of the current extract.
+
+    The cube is built on first use and cached in the extract cache of the
+    workspace, which is cleared whenever a new log is committed to its
+    connection.
+
+    Args:
+        request: The FastAPI request object.
+        celonis: The Celonis connection manager instance.
+        granularity: The time bucket of the cube, "hour" or "day".
+        from_pql (optional): If True, the cube is built from a PQL query
+          instead of the full resource/group extract. Defaults to False.
+
+    Raises:
+        HTTPException: If no data could be retrieved from Celonis.
+
+    Returns:
+        The resource profile cube.
+    """
+    cache_key = _cube_cache_key(granularity)
+    workspace = get_workspace(request)
+    cube: Union[ResourceProfileCube, None] = get_extract_cache(workspace, celonis).get(
+        cache_key
+    )
+    if cube is not None:
+        return cube
+
+    if from_pql:
+        cube = resource_based_queries.get_resource_profile_cube(celonis, granularity)
+    else:
+        df = celonis.get_dataframe_with_resource_group_from_celonis()
+        if df is None or df.empty:
+            raise HTTPException(
+                status_code=404, detail="No data retrieved from Celonis."
+            )
+        cube = ResourceProfileCube(df, granularity=granularity)
+
+    store_in_cache(workspace, cache_key, cube)
+    return cube
+
+
+# **************** Multitasking Time Series ****************
+
+MULTITASKING_INDEX_CACHE_KEY = "multitasking_index"
+
+
+@router.get("/resource-profile/multitasking/bulk")
+async def get_resource_multitasking_bulk(
+    request: Request,
+    start_time: str = Query(..., description="Start time of the interval."),
+    end_time: str = Query(..., description="End time of the interval."),
+    granularity: Granularity = Query("day", description="Time bucket of a value."),
+    resources: Union[List[str], None] = Query(
+        None, description="The resources to include. Defaults to all resources."
+    ),
+    celonis: CelonisConnectionManager = Depends(get_celonis_connection),
+) -> Dict[str, List[Dict[str, List[Any]]]]:
+    """Retrieves the multitasking per resource and time bucket.
+
+    All values are answered from one interval index of the current
+    extract, so the UI can fetch the whole time series in one request.
+
+    Args:
+        request: The FastAPI request object.
+        start_time: The start time of the interval.
+        end_time: The end time of the interval.
+        granularity: The time bucket of a value, "hour" or "day".
+        resources: The resources to include. Defaults to all resources.
+        celonis: The Celonis connection manager instance.
+
+    Returns:
+        A ResponseSchema with a single table of resource, bucket and
+        multitasking, no graph.
+    """
+    index = get_multitasking_index(request, celonis)
+    try:
+        series = index.get_multitasking_time_series(
+            start_time, end_time, granularity, resources
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+    rows: List[List[Any]] = [
+        [resource, bucket, f"{value:.4f}"]
+        for resource, values in series.items()
+        for bucket, value in values
+    ]
+
+    return {
+        "tables": [
+            {
+                "headers": ["Resource", "Time Bucket", "Multitasking"],
+                "rows": rows,
+            }
+        ],
+        "graphs": [],
+    }
+
+
+def get_multitasking_index(
+    request: Request, celonis: CelonisConnectionManager
+) -> MultitaskingIndex:
+    """Returns the multitasking index of the current extract.
+
+    The index is built on first use and cached in the extract cache of the
+    workspace, which is cleared whenever a new log is committed.
+
+    Args:
+        request: The FastAPI request object.
+        celonis: The Celonis connection manager instance.
+
+    Raises:
+        HTTPException: If no data could be retrieved from Celonis.
+
+    Returns:
+        The multitasking index.
+    """
+    workspace = get_workspace(request)
+    index: Union[MultitaskingIndex, None] = get_extract_cache(workspace, celonis).get(
+        MULTITASKING_INDEX_CACHE_KEY
+    )
+    if index is not None:
+        return index
+
+    df = celonis.get_dataframe_with_resource_group_from_celonis()
+    if df is None or df.empty:
+        raise HTTPException(status_code=404, detail="No data retrieved from Celonis.")
+    index = MultitaskingIndex(df)
+
+    store_in_cache(workspace, MULTITASKING_INDEX_CACHE_KEY, index)
+    return index
+
+
+# **************** Resource Interaction Matrix ****************
+
+CASE_RESOURCE_INDEX_CACHE_KEY = "case_resource_index"
+
+
+@router.get("/resource-profile/interaction-matrix")
+async def get_resource_interaction_matrix(
+    request: Request,
+    start_time: str = Query(..., description="Start time of the interval."),
+    end_time: str = Query(..., description="End time of the interval."),
+    celonis: CelonisConnectionManager = Depends(get_celonis_connection),
+) -> Dict[str, List[Dict[str, List[Any]]]]:
+    """Retrieves the interaction between all pairs of resources.
+
+    Counts the cases completed in [start_time, end_time) in which both
+    resources were involved, as the single interaction endpoint does.
+
+    Args:
+        request: The FastAPI request object.
+        start_time: The start time of the interval.
+        end_time: The end time of the interval.
+        celonis: The Celonis connection manager instance.
+
+    Returns:
+        A ResponseSchema with a single resource x resource table, no graph.
+    """
+    index = get_case_resource_index(request, celonis)
+    return _format_interaction_matrix(
+        index.get_interaction_matrix(start_time, end_time)
+    )
+
+
+@router.get("/pql/resource-profile/interaction-matrix")
+async def get_resource_interaction_matrix_pql(
+    request: Request,
+    start_time: str = Query(..., description="Start time of the interval."),
+    end_time: str = Query(..., description="End time of the interval."),
+    celonis: CelonisConnectionManager = Depends(get_celonis_connection),
+) -> Dict[str, List[Dict[str, List[Any]]]]:
+    """Retrieves the interaction between all pairs of resources via PQL.
+
+    Counts the cases completed in [start_time, end_time] in which both
+    resources were involved, as the single PQL interaction endpoint does.
+
+    Args:
+        request: The FastAPI request object.
+        start_time: The start time of the interval.
+        end_time: The end time of the interval.
+        celonis: The Celonis connection manager instance.
+
+    Returns:
+        A ResponseSchema with a single resource x resource table, no graph.
+    """
+    index = get_case_resource_index(request, celonis, from_pql=True)
+    return _format_interaction_matrix(
+        index.get_interaction_matrix(start_time, end_time, inclusive_end=True)
+    )
+
+
+def _format_interaction_matrix(
+    matrix: pd.DataFrame,
+) -> Dict[str, List[Dict[str, List[Any]]]]:
+    """Formats an interaction matrix as a single table."""
+    rows: List[List[Any]] = [
+        [resource, *[str(value) for value in values]]
+        for resource, values in zip(matrix.index, matrix.to_numpy().tolist())
+    ]
+    return {
+        "tables": [
+            {
+                "headers": ["Resource", *[str(column) for column in matrix.columns]],
+                "rows": rows,
+            }
+        ],
+        "graphs": [],
+    }
+
+
+def get_case_resource_index(
+    request: Request,
+    celonis: CelonisConnectionManager,
+    from_pql: bool = False,
+) -> CaseResourceIndex:
+    """Returns the case/resource index of the current extract.
+
+    The index is built on first use and cached in the extract cache of the
+    workspace, which is cleared whenever a new log is committed.
+
+    Args:
+        request: The FastAPI request object.
+        celonis: The Celonis connection manager instance.
+        from_pql (optional): If True, the index is built from a PQL query
+          instead of the full resource/group extract. Defaults to False.
+
+    Raises:
+        HTTPException: If no data could be retrieved from Celonis.
+
+    Returns:
+        The case/resource index.
+    """
+    workspace = get_workspace(request)
+    index: Union[CaseResourceIndex, None] = get_extract_cache(workspace, celonis).get(
+        CASE_RESOURCE_INDEX_CACHE_KEY
+    )
+    if index is not None:
+        return index
+
+    if from_pql:
+        index = resource_based_queries.get_case_resource_index(celonis)
+    else:
+        df = celonis.get_dataframe_with_resource_group_from_celonis()
+        if df is None or df.empty:
+            raise HTTPException(
+                status_code=404, detail="No data retrieved from Celonis."
+            )
+        index = CaseResourceIndex(df)
+
+    store_in_cache(workspace, CASE_RESOURCE_INDEX_CACHE_KEY, index)
+    return index
+
+
 # **************** Organizational Mining ****************
 
 
@@ -868,7 +1386,8 @@ async def get_group_relative_focus_metric(
     verify_correct_job_module(job_id, request, MODULE_NAME)
 
     focus_data = (
-        request.app.state.jobs[job_id]
+        get_workspace(request)
+        .state.jobs[job_id]
         .result.get("organizational_diagnostics", {})
         .get("group_relative_focus", {})
     )
@@ -910,7 +1429,8 @@ async def get_group_relative_stake_metric(
     verify_correct_job_module(job_id, request, MODULE_NAME)
 
     stake_data = (
-        request.app.state.jobs[job_id]
+        get_workspace(request)
+        .state.jobs[job_id]
         .result.get("organizational_diagnostics", {})
         .get("group_relative_stake", {})
     )
@@ -952,7 +1472,8 @@ async def get_group_coverage_metric(
     verify_correct_job_module(job_id, request, MODULE_NAME)
 
     coverage_data = (
-        request.app.state.jobs[job_id]
+        get_workspace(request)
+        .state.jobs[job_id]
         .result.get("organizational_diagnostics", {})
         .get("group_coverage", {})
     )
@@ -992,7 +1513,8 @@ async def get_group_member_contribution_metric(
     verify_correct_job_module(job_id, request, MODULE_NAME)
 
     contribution_data = (
-        request.app.state.jobs[job_id]
+        get_workspace(request)
+        .state.jobs[job_id]
         .result.get("organizational_diagnostics", {})
         .get("group_member_contribution", {})
     )
@@ -1,18 +1,21 @@
 """Contains the routes for temporal conformance checking."""
 
 import uuid
-from typing import Any, Dict, List, TypeAlias, Union
+from typing import Any, Dict, List, Optional, TypeAlias, Union
 
 from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request
 
 from backend.api.celonis import get_celonis_connection
+from backend.api.job_queue import submit_job
 from backend.api.jobs import verify_correct_job_module
 from backend.api.models.schemas.job_models import JobStatus
 from backend.api.tasks.temporal_profile_tasks import (
     compute_and_store_temporal_conformance_result,
 )
+from backend.api.workspaces import add_job, get_workspace
 from backend.celonis_connection.celonis_connection_manager import (
     CelonisConnectionManager,
+    build_extract_filters,
 )
 
 TableType: TypeAlias = Dict[str, Union[List[str], List[List[Any]]]]
@@ -33,27 +36,66 @@ async def compute_temporal_conformance_result(
         description="Zeta value for temporal profile conformance checking",
         gt=0.0,
     ),
+    start_time: Optional[str] = Query(
+        None, description="Only events at or after this time."
+    ),
+    end_time: Optional[str] = Query(None, description="Only events before this time."),
+    activities: Optional[List[str]] = Query(
+        None, description="Only the temporal profile of these activities."
+    ),
+    case_sample: Optional[int] = Query(
+        None, description="Only this many randomly drawn cases.", gt=0
+    ),
+    profile: bool = Query(False, description="Profile the CPU and memory of the job."),
     celonis_connection: CelonisConnectionManager = Depends(get_celonis_connection),
 ) -> Dict[str, str]:
     """Computes the temporal conformance result and stores it.
 
+    The filters are pushed down to Celonis, so only the events they keep
+    are extracted. Since the temporal profile relates every pair of
+    activities in a case, restricting the activities keeps the profile of
+    the remaining pairs unchanged.
+
     Args:
         background_tasks: The background tasks manager.
         request: The FastAPI request object.
         zeta: The zeta value used for temporal profile conformance checking.
+        start_time: Only events at or after this time are extracted.
+        end_time: Only events before this time are extracted.
+        activities: Only events of these activities are extracted.
+        case_sample: Only the events of this many cases are extracted.
+        profile: If True, the job is profiled and its profile can be
+          downloaded from /api/jobs/{job_id}/profile.
         celonis_connection: The Celonis connection manager instance.
 
     Returns:
         A dictionary containing the job ID of the scheduled task.
+
+    Raises:
+        HTTPException: If the start or end time is invalid.
     """
+    try:
+        build_extract_filters(start_time=start_time, end_time=end_time)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    workspace = get_workspace(request)
     job_id = str(uuid.uuid4())
-    request.app.state.jobs[job_id] = JobStatus(module=MODULE_NAME, status="pending")
-    background_tasks.add_task(
-        compute_and_store_temporal_conformance_result,
-        request.app,
+    add_job(workspace, job_id, MODULE_NAME)
+    task = compute_and_store_temporal_conformance_result
+    submit_job(
+        background_tasks,
+        workspace,
+        task,
         job_id,
         celonis_connection,
         zeta,
+        {
+            "start_time": start_time,
+            "end_time": end_time,
+            "activities": activities,
+            "case_sample": case_sample,
+        },
+        profile=profile,
     )
     return {"job_id": job_id}
 
@@ -80,7 +122,7 @@ async def get_temporal_conformance_result(
     """
     verify_correct_job_module(job_id, request, MODULE_NAME)
 
-    job: JobStatus = request.app.state.jobs.get(job_id)
+    job: JobStatus = get_workspace(request).state.jobs.get(job_id)
     if not job:
         raise HTTPException(status_code=404, detail=f"Job with ID {job_id} not found")
 
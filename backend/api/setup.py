@@ -9,10 +9,11 @@ from pathlib import Path
 from typing import Dict, List
 
 from dotenv import dotenv_values, set_key
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Request
 from filelock import FileLock
 
 from backend.api.models.schemas.setup_models import CelonisCredentials
+from backend.api.workspaces import DEFAULT_WORKSPACE, Workspace, get_workspace
 
 router = APIRouter(prefix="/api/setup", tags=["Setup"])
 
@@ -23,13 +24,37 @@ LOCK_PATH = ENV_PATH.with_suffix(".env.lock")  # /app/.env.lock
 # **************** Endpoints ****************
 
 
+def _warm_up(request: Request, credentials: CelonisCredentials) -> None:
+    """Connects to Celonis with the credentials in the background."""
+    pool = getattr(request.app.state, "celonis_pool", None)
+    if pool is not None:
+        pool.warm_up_in_background(
+            credentials.celonis_base_url,
+            credentials.celonis_data_pool_name,
+            credentials.celonis_data_model_name,
+            credentials.api_token,
+        )
+
+
 @router.post("/celonis-credentials")
-async def celonis_credentials(credentials: CelonisCredentials):
+async def celonis_credentials(
+    credentials: CelonisCredentials,
+    request: Request,
+    workspace: Workspace = Depends(get_workspace),
+):
     """Saves the Celonis credentials to the .env file.
 
+    The credentials of a workspace other than the default one are only
+    kept in the workspace. The connection with the new credentials is
+    created in the background, so it is ready for the first request that
+    needs it.
+
     Args:
         credentials: The Celonis credentials to be saved. This should be a
           CelonisCredentials object.
+        request: The FastAPI request object. This is used to access the
+          connection pool via `request.app.state`.
+        workspace: The workspace of the request.
 
 
     Returns:
@@ -37,6 +62,11 @@ async def celonis_credentials(credentials: CelonisCredentials):
         operation.
     """
     """Save (or update) Celonis credentials in the bind-mounted .env file."""
+    if workspace.workspace_id != DEFAULT_WORKSPACE:
+        workspace.credentials = credentials
+        _warm_up(request, credentials)
+        return {"message": "Credentials saved to the workspace"}
+
     env_vars = dotenv_values(ENV_PATH)
 
     # Short-circuit when they already match
@@ -84,30 +114,34 @@ async def celonis_credentials(credentials: CelonisCredentials):
         }
     )
 
+    _warm_up(request, credentials)
+
     return {"message": "Credentials saved to .env"}
 
 
 @router.get("/get-column-names")
-async def get_column_names(request: Request) -> Dict[str, List[str]]:
+async def get_column_names(
+    workspace: Workspace = Depends(get_workspace),
+) -> Dict[str, List[str]]:
     """Provides the column names of the current log.
 
     Args:
-        request: The FastAPI request object. This is used to access the app state
-          and retrieve the current log columns.
+        workspace: The workspace of the request. Its state holds the
+          current log columns.
 
     Returns:
         A dictionary containing the column names of the current log.
 
     Raises:
-        HTTPException: If no log columns are found in the app state, a 400 error is raised
+        HTTPException: If no log columns are found in the workspace, a 400 error is raised
         with a message indicating that no log columns were found. The user should
         upload a log first.
     """
-    if not request.app.state.current_log_columns:
+    if not workspace.state.current_log_columns:
         raise HTTPException(
             status_code=400,
             detail="No log columns found. Please upload a log first.",
         )
     return {
-        "columns": request.app.state.current_log_columns,
+        "columns": workspace.state.current_log_columns,
     }
@@ -1,41 +1,45 @@
 """Contains the tasks for handling log skeletons and related operations."""
 
-from fastapi import FastAPI
-
 from backend.api.models.schemas.job_models import JobStatus
+from backend.api.workspaces import Workspace
 from backend.celonis_connection.celonis_connection_manager import (
     CelonisConnectionManager,
 )
 from backend.conformance_checking.log_skeleton import LogSkeleton
+from backend.utils.metrics import job_phase, timed_job
 
 
+@timed_job
 def compute_and_store_log_skeleton(
-    app: FastAPI, job_id: str, celonis: CelonisConnectionManager
+    workspace: Workspace, job_id: str, celonis: CelonisConnectionManager
 ) -> None:
-    """Computes the log skeleton and stores it in the app state.
+    """Computes the log skeleton and stores it in the workspace.
 
     Args:
-        app: The FastAPI app instance.
+        workspace: The workspace of the job.
         job_id: The ID of the job to be computed.
         celonis: The CelonisConnectionManager instance.
     """
-    # Get the job record from the app state
-    rec: JobStatus = app.state.jobs[job_id]
+    # Get the job record from the workspace
+    rec: JobStatus = workspace.state.jobs[job_id]
     try:
         rec.status = "running"
 
         # Get the log from Celonis
-        df = celonis.get_basic_dataframe_from_celonis()
+        with job_phase(rec, "extract"):
+            df = celonis.get_basic_dataframe_from_celonis()
 
         if df is None:
             rec.status = "failed"
             return
 
         # Compute the log skeleton
-        ls = LogSkeleton(df)
-        ls.compute_skeleton()
+        with job_phase(rec, "compute"):
+            ls = LogSkeleton(df)
+            ls.compute_skeleton()
 
-        rec.result = ls.get_skeleton()
+        with job_phase(rec, "serialize"):
+            rec.result = ls.get_skeleton()
         rec.status = "complete"
     except Exception as e:
         rec.status = "failed"
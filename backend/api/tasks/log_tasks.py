@@ -0,0 +1,279 @@
+"""Contains the tasks for committing logs to Celonis."""
+
+import os
+from typing import Optional, Tuple
+
+import pandas as pd
+
+import backend.utils.file_handlers as file_handlers
+from backend.api.models.schemas.job_models import JobStatus
+from backend.api.workspaces import Workspace
+from backend.api.models.schemas.setup_models import ColumnMapping
+from backend.celonis_connection.celonis_connection_manager import (
+    CelonisConnectionManager,
+    ChunkedUpload,
+)
+from backend.utils.metrics import timed_job
+
+
+def remove_log_cache(workspace: Workspace) -> None:
+    """Removes the cached parsed log of the current log, if there is one."""
+    cache_path = getattr(workspace.state, "current_log_cache", None)
+    if cache_path and os.path.exists(cache_path):
+        os.unlink(cache_path)
+    workspace.state.current_log_cache = None
+
+
+def read_mapped_log(
+    workspace: Workspace,
+    path: str,
+    ext: str,
+    log_format: str,
+    payload: Optional[ColumnMapping],
+) -> pd.DataFrame:
+    """Reads the uploaded log and renames its columns to the XES names.
+
+    XES logs are read from the cached parsed log if there is one. CSV logs
+    are typed while they are read with the mapping.
+
+    Args:
+        workspace: The workspace the log was uploaded to.
+        path: The path to the uploaded log file.
+        ext: The file extension of the log file.
+        log_format: The format of the log, .csv or .xes.
+        payload: The column mapping for CSV logs.
+
+    Returns:
+        The log as a DataFrame.
+
+    Raises:
+        ValueError: If the log cannot be processed.
+    """
+    cache_path = getattr(workspace.state, "current_log_cache", None)
+    try:
+        if cache_path and os.path.exists(cache_path):
+            # The log was already parsed after the upload
+            df = file_handlers.read_log_cache(cache_path)
+        elif log_format == ".csv" and payload:
+            # With the mapping known, the CSV is typed while it is read
+            df = file_handlers.read_csv_typed(
+                path,
+                ext,
+                case_id_col=payload.case_id_column,
+                activity_col=payload.activity_column,
+                timestamp_col=payload.timestamp_column,
+                resource_col=payload.resource_1_column,
+                group_col=payload.group_column,
+                timestamp_format=payload.timestamp_format,
+            )
+        else:
+            # Stream the log from its path instead of loading it as bytes
+            df = file_handlers.read_log_file(path, ext)
+    except ValueError as e:
+        raise ValueError(f"Error processing file: {str(e)}")
+
+    # Rename the columns according to the mapping if specified
+    if payload:
+        df = df.rename(
+            columns={
+                payload.case_id_column: "case:concept:name",
+                payload.activity_column: "concept:name",
+                payload.timestamp_column: "time:timestamp",
+                payload.resource_1_column: "org:resource",
+                payload.group_column: "org:group",
+            }
+        )
+        # Parse the timestamps, unless this was already done while reading
+        df = file_handlers.convert_log_columns(
+            df, "time:timestamp", timestamp_format=payload.timestamp_format
+        )
+        # Celonis infers the column types from plain dtypes
+        df = file_handlers.to_plain_dtypes(df)
+    return df
+
+
+def mark_results_stale(workspace: Workspace, module: str) -> None:
+    """Marks the complete jobs of a workspace as stale after a commit.
+
+    Args:
+        workspace: The workspace of the commit.
+        module: The module of the commit jobs, which are not marked.
+    """
+    for job in workspace.state.jobs.values():
+        if job.status == "complete" and job.module != module and not job.stale:
+            job.stale = True
+
+
+def _upload_source(
+    celonis: CelonisConnectionManager,
+    path: str,
+    payload: Optional[ColumnMapping],
+    mode: str,
+    chunk_size: Optional[int],
+) -> str:
+    """Returns what identifies the chunked upload of a commit."""
+    mapping = payload.model_dump_json() if payload else ""
+    return "|".join(
+        str(part)
+        for part in (
+            getattr(celonis, "base_url", ""),
+            getattr(celonis, "data_pool_name", ""),
+            getattr(celonis, "data_model_name", ""),
+            path,
+            mapping,
+            mode,
+            chunk_size,
+        )
+    )
+
+
+def take_pending_upload(workspace: Workspace, source: str) -> Optional[ChunkedUpload]:
+    """Returns the failed chunked upload of a commit, if there is one.
+
+    A pending upload of another commit, e.g. of a previous log, is
+    deleted instead.
+
+    Args:
+        workspace: The workspace of the commit.
+        source: What identifies the upload, see _upload_source.
+
+    Returns:
+        The pending upload or None.
+    """
+    upload: Optional[ChunkedUpload] = workspace.state.pending_upload
+    workspace.state.pending_upload = None
+    if upload is not None and upload.source != source:
+        upload.cleanup()
+        return None
+    return upload
+
+
+@timed_job
+def commit_log_and_store_result(
+    workspace: Workspace,
+    job_id: str,
+    celonis: CelonisConnectionManager,
+    path: str,
+    payload: Optional[ColumnMapping],
+    mode: str,
+    chunk_size: Optional[int] = None,
+    max_workers: int = 4,
+) -> None:
+    """Commits the uploaded log to Celonis and stores the outcome in the job.
+
+    The job passes the phases "parse", "upload", "configure" and "reload".
+    Its progress is the completed fraction of the current phase.
+
+    If a chunk of a chunked upload fails, the spooled chunks are kept in
+    the workspace, so they outlive the pooled manager. Committing the same
+    log again then resumes the upload with the failed chunks, without
+    parsing the log again.
+
+    Args:
+        workspace: The workspace of the job.
+        job_id: The ID of the job.
+        celonis: The CelonisConnectionManager instance.
+        path: The path to the uploaded log file.
+        payload: The column mapping for CSV logs.
+        mode: How the log is committed, "replace", "new_events" or
+          "new_cases".
+        chunk_size: Number of rows per chunk of the table upload.
+        max_workers: Number of chunks uploaded in parallel.
+    """
+    # Get the job record from the workspace
+    rec: JobStatus = workspace.state.jobs[job_id]
+
+    def on_progress(phase: str, progress: float) -> None:
+        rec.phase = phase
+        rec.progress = progress
+
+    source = _upload_source(celonis, path, payload, mode, chunk_size)
+    try:
+        rec.status = "running"
+
+        pending = take_pending_upload(workspace, source)
+        if pending is None:
+            on_progress("parse", 0.0)
+            ext = file_handlers.get_file_extension(path)
+            log_format = file_handlers.get_log_format(path, ext)
+            df = read_mapped_log(workspace, path, ext, log_format, payload)
+            on_progress("parse", 1.0)
+
+        # Upload to Celonis. The manager is shared by the workspaces with
+        # the same connection, so its data frame is held for the commit.
+        with celonis.commit_lock:
+            # The number of appended events and affected cases, or None if
+            # the table was replaced
+            appended: Optional[Tuple[int, int]] = None
+            try:
+                if pending is not None:
+                    celonis.pending_upload = pending
+                    celonis.resume_upload(
+                        max_workers=max_workers, on_progress=on_progress
+                    )
+                    if pending.append:
+                        appended = (pending.rows, pending.cases)
+                else:
+                    celonis.add_dataframe(df)
+                    delta = None
+                    if mode != "replace":
+                        delta = celonis.append_to_table(
+                            mode=mode,
+                            chunk_size=chunk_size,
+                            max_workers=max_workers,
+                            on_progress=on_progress,
+                        )
+                    if delta is not None:
+                        appended = (
+                            len(delta),
+                            int(delta["case:concept:name"].nunique()),
+                        )
+                    else:
+                        celonis.create_table(
+                            chunk_size=chunk_size,
+                            max_workers=max_workers,
+                            on_progress=on_progress,
+                        )
+            finally:
+                upload = getattr(celonis, "pending_upload", None)
+                if isinstance(upload, ChunkedUpload):
+                    upload.source = source
+                    workspace.state.pending_upload = upload
+                    celonis.pending_upload = None
+
+        # Clean up the temporary files, unless another log was uploaded since
+        if workspace.state.current_log == path:
+            os.unlink(path)
+            remove_log_cache(workspace)
+            workspace.state.current_log = None
+            workspace.state.current_log_columns = []
+
+        if appended is not None:
+            # The cached structures are built from the whole extract, so they
+            # are only outdated if an event was appended
+            appended_events, affected_cases = appended
+            if appended_events:
+                workspace.state.extract_cache.clear()
+                mark_results_stale(workspace, rec.module)
+            rec.result = {
+                "message": f"Appended {appended_events} events of "
+                f"{affected_cases} cases",
+                "appended_events": appended_events,
+                "affected_cases": affected_cases,
+            }
+        else:
+            # Everything derived from the previous extract is outdated now
+            workspace.state.extract_cache.clear()
+            mark_results_stale(workspace, rec.module)
+            rec.result = {"message": "Table created successfully"}
+        rec.status = "complete"
+    except Exception as e:
+        error = str(e)
+        upload = workspace.state.pending_upload
+        if upload is not None:
+            error += (
+                f" Uploaded {len(upload.completed)} of {len(upload.chunk_paths)} "
+                "chunks, commit the log again to resume the upload."
+            )
+        rec.status = "failed"
+        rec.error = error
@@ -2,9 +2,9 @@
 
 from typing import Any, Dict, List
 
-from fastapi import FastAPI
 
 from backend.api.models.schemas.job_models import JobStatus
+from backend.api.workspaces import Workspace
 from backend.celonis_connection.celonis_connection_manager import (
     CelonisConnectionManager,
 )
@@ -12,6 +12,8 @@ from backend.conformance_checking.resource_based import (
     ResourceBased,
     SocialNetworkAnalysisType,
 )
+from backend.conformance_checking.role_discovery import DEFAULT_ROLES_THRESHOLD
+from backend.utils.metrics import job_phase, timed_job
 
 
 def _serialize_sna_connections(
@@ -23,28 +25,33 @@ def _serialize_sna_connections(
     ]
 
 
+@timed_job
 def compute_and_store_resource_based_metrics(
-    app: FastAPI,
+    workspace: Workspace,
     job_id: str,
     celonis_connection: CelonisConnectionManager,
+    roles_threshold: float = DEFAULT_ROLES_THRESHOLD,
 ) -> None:
-    """Computes the resource-based metrics and stores it in the app state.
+    """Computes the resource-based metrics and stores it in the workspace.
 
     Args:
-        app: The FastAPI application instance.
+        workspace: The workspace of the job.
         job_id: The job ID for tracking the task.
         celonis_connection: The CelonisConnectionManager instance.
+        roles_threshold: The similarity two roles need to exceed to be
+          merged by the organizational role discovery.
         resource_column_name: The name of the resource column in the DataFrame.
 
     Raises:
         RuntimeError: If the DataFrame is empty.
     """
-    rec: JobStatus = app.state.jobs[job_id]
+    rec: JobStatus = workspace.state.jobs[job_id]
 
     try:
         rec.status = "running"
-        app.state.jobs[job_id] = rec
-        df = celonis_connection.get_dataframe_with_resource_group_from_celonis()
+        workspace.state.jobs[job_id] = rec
+        with job_phase(rec, "extract"):
+            df = celonis_connection.get_dataframe_with_resource_group_from_celonis()
 
         if df is None or df.empty:
             rec.status = "failed"
@@ -56,44 +63,52 @@ def compute_and_store_resource_based_metrics(
         if df["case:concept:name"].dtype != "string":
             df["case:concept:name"] = df["case:concept:name"].astype("string")
 
-        rb = ResourceBased(df, resource_col="org:resource", group_col="org:group")
-
-        rb.compute_handover_of_work()
-        rb.compute_subcontracting()
-        rb.compute_working_together()
-        rb.compute_similar_activities()
-
-        rb.compute_organizational_roles()
-
-        rb.compute_organizational_diagnostics()
-
-        rec.result = {
-            "handover_of_work": {
-                "values": _serialize_sna_connections(rb.get_handover_of_work_values()),
-                "is_directed": rb.is_handover_of_work_directed(),
-            },
-            "subcontracting": {
-                "values": _serialize_sna_connections(rb.get_subcontracting_values()),
-                "is_directed": rb.is_subcontracting_directed(),
-            },
-            "working_together": {
-                "values": _serialize_sna_connections(rb.get_working_together_values()),
-                "is_directed": rb.is_working_together_directed(),
-            },
-            "similar_activities": {
-                "values": _serialize_sna_connections(
-                    rb.get_similar_activities_values()
-                ),
-                "is_directed": rb.is_similar_activities_directed(),
-            },
-            "organizational_roles": rb.get_organizational_roles(),
-            "organizational_diagnostics": {
-                "group_relative_focus": rb.get_group_relative_focus(),
-                "group_relative_stake": rb.get_group_relative_stake(),
-                "group_coverage": rb.get_group_coverage(),
-                "group_member_contribution": rb.get_group_member_contribution(),
-            },
-        }
+        with job_phase(rec, "compute"):
+            rb = ResourceBased(df, resource_col="org:resource", group_col="org:group")
+
+            rb.compute_handover_of_work()
+            rb.compute_subcontracting()
+            rb.compute_working_together()
+            rb.compute_similar_activities()
+
+            rb.compute_organizational_roles(threshold=roles_threshold)
+
+            rb.compute_organizational_diagnostics()
+
+        with job_phase(rec, "serialize"):
+            rec.result = {
+                "handover_of_work": {
+                    "values": _serialize_sna_connections(
+                        rb.get_handover_of_work_values()
+                    ),
+                    "is_directed": rb.is_handover_of_work_directed(),
+                },
+                "subcontracting": {
+                    "values": _serialize_sna_connections(
+                        rb.get_subcontracting_values()
+                    ),
+                    "is_directed": rb.is_subcontracting_directed(),
+                },
+                "working_together": {
+                    "values": _serialize_sna_connections(
+                        rb.get_working_together_values()
+                    ),
+                    "is_directed": rb.is_working_together_directed(),
+                },
+                "similar_activities": {
+                    "values": _serialize_sna_connections(
+                        rb.get_similar_activities_values()
+                    ),
+                    "is_directed": rb.is_similar_activities_directed(),
+                },
+                "organizational_roles": rb.get_organizational_roles(),
+                "organizational_diagnostics": {
+                    "group_relative_focus": rb.get_group_relative_focus(),
+                    "group_relative_stake": rb.get_group_relative_stake(),
+                    "group_coverage": rb.get_group_coverage(),
+                    "group_member_contribution": rb.get_group_member_contribution(),
+                },
+            }
         rec.status = "complete"
         rec.error = None
 
@@ -103,4 +118,4 @@ def compute_and_store_resource_based_metrics(
         raise e
 
     finally:
-        app.state.jobs[job_id] = rec
+        workspace.state.jobs[job_id] = rec
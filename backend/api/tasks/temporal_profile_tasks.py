@@ -1,8 +1,13 @@
 """Contains the tasks for temporal profile based conformance checking."""
 
-from fastapi import FastAPI
+import os
+import tempfile
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import pandas as pd
 
 from backend.api.models.schemas.job_models import JobStatus
+from backend.api.workspaces import Workspace
 from backend.celonis_connection.celonis_connection_manager import (
     CelonisConnectionManager,
 )
@@ -10,43 +15,89 @@ from backend.conformance_checking.temporal_profile import (
     ConformanceResultType,
     TemporalProfile,
 )
+from backend.utils.metrics import job_phase, timed_job
+
+
+def _spool_batches(
+    batches: Iterable[pd.DataFrame], directory: str, paths: List[str]
+) -> Iterator[pd.DataFrame]:
+    """Yields the batches and writes each of them to a Parquet file.
+
+    The spooled batches can be read again for a second pass, without
+    extracting them from Celonis again.
+
+    Args:
+        batches: The batches of the log.
+        directory: The directory of the Parquet files.
+        paths: The list the paths of the Parquet files are appended to.
+    """
+    for batch in batches:
+        path = os.path.join(directory, f"batch-{len(paths)}.parquet")
+        batch.to_parquet(path)
+        paths.append(path)
+        yield batch
 
 
+@timed_job
 def compute_and_store_temporal_conformance_result(
-    app: FastAPI, job_id: str, celonis_connection: CelonisConnectionManager, zeta: float
+    workspace: Workspace,
+    job_id: str,
+    celonis_connection: CelonisConnectionManager,
+    zeta: float,
+    extract_filters: Optional[Dict[str, Any]] = None,
 ) -> None:
-    """Computes the temporal conformance result and stores it in the app state.
+    """Computes the temporal conformance result and stores it in the workspace.
+
+    The log is streamed from Celonis in pages of whole cases, so it is
+    never held in memory as a whole. The profile is discovered in a first
+    pass and the pages are spooled to disk for the conformance check in
+    the second pass. The extraction of the pages is part of the discover
+    phase, its share is recorded by the extraction metrics.
 
     Args:
-        app (FastAPI): The FastAPI application instance.
+        workspace (Workspace): The workspace of the job.
         job_id: The ID of the job.
         celonis_connection: The Celonis connection manager instance.
         zeta: The zeta value used for temporal profile conformance checking.
+        extract_filters (optional): The filters of the extract, see
+          CelonisConnectionManager.iter_dataframes_from_celonis.
 
     Raises:
         RuntimeError: If the DataFrame is empty.
     """
-    rec: JobStatus = app.state.jobs[job_id]
+    rec: JobStatus = workspace.state.jobs[job_id]
 
     try:
         rec.status = "running"
-        app.state.jobs[job_id] = rec
-        df = celonis_connection.get_basic_dataframe_from_celonis()
+        workspace.state.jobs[job_id] = rec
+        batches = celonis_connection.iter_dataframes_from_celonis(
+            ["case:concept:name", "concept:name", "time:timestamp"],
+            **(extract_filters or {}),
+        )
 
-        if df is None or df.empty:
-            rec.status = "failed"
-            raise RuntimeError(
-                "The DataFrame is empty. Please check the Celonis connection and the data."
-            )
+        with tempfile.TemporaryDirectory() as directory:
+            paths: List[str] = []
+            tp = TemporalProfile(pd.DataFrame())
+            with job_phase(rec, "discover"):
+                tp.discover_temporal_profile_from_batches(
+                    _spool_batches(batches, directory, paths)
+                )
 
-        tp = TemporalProfile(df)
-        tp.discover_temporal_profile()
-        tp.check_temporal_conformance(zeta=zeta)
-        tp_conformance_result: ConformanceResultType = (
-            tp.get_temporal_conformance_result()
-        )
+            if not paths:
+                rec.status = "failed"
+                raise RuntimeError(
+                    "The DataFrame is empty. Please check the Celonis connection and the data."
+                )
 
-        rec.result = {"temporal_conformance_result": tp_conformance_result}
+            with job_phase(rec, "check"):
+                tp.check_temporal_conformance_of_batches(
+                    (pd.read_parquet(path) for path in paths), zeta=zeta
+                )
+        with job_phase(rec, "serialize"):
+            tp_conformance_result: ConformanceResultType = (
+                tp.get_temporal_conformance_result()
+            )
+            rec.result = {"temporal_conformance_result": tp_conformance_result}
         rec.status = "complete"
         rec.error = None
 
@@ -55,4 +106,4 @@ def compute_and_store_temporal_conformance_result(
         rec.error = str(e)
 
     finally:
-        app.state.jobs[job_id] = rec
+        workspace.state.jobs[job_id] = rec
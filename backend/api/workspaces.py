@@ -0,0 +1,664 @@
+"""Contains the workspaces that separate the users of one backend.
+
+Every workspace has its own Celonis connection, uploaded log, caches and
+jobs. They are kept in the state of the workspace under the same names
+the application state used before, e.g. `workspace.state.jobs`. Requests
+without the X-Workspace-ID header use the default workspace, whose state
+is the application state, so a single user does not have to know about
+workspaces.
+
+Other workspaces are created with POST /api/workspaces, which returns an
+unguessable workspace ID. The ID is signed with WORKSPACE_SECRET, so it
+acts as the access token of the workspace and every process that shares
+the secret accepts it. Requests select their workspace by sending the ID
+in the X-Workspace-ID header. Listing all workspaces and deleting other
+workspaces requires the ADMIN_TOKEN in the X-Admin-Token header.
+
+A client can only hold a few workspaces at a time, and workspaces that
+were not used for a while are closed when the next one is created, so
+no client can take up all workspaces for good. A request with the ID of
+a closed workspace starts it again, but without its log and caches.
+
+The limits of every workspace are configured with the environment
+variables or the .env file:
+
+    WORKSPACE_MAX_CONCURRENT_JOBS=8   # More pending or running jobs get 429
+    WORKSPACE_MAX_CACHE_MB=1024       # Older extract cache entries are dropped
+    MAX_WORKSPACES=64                 # More workspaces are rejected with 429
+    MAX_WORKSPACES_PER_CLIENT=8       # Per client address, more get 429
+    WORKSPACE_IDLE_SECONDS=3600       # Idle workspaces without jobs are closed
+    WORKSPACE_SECRET=...              # Signs the IDs, random per process if unset
+    ADMIN_TOKEN=...                   # Admin endpoints are disabled if unset
+
+With a shared job store, see backend/api/job_queue.py, the jobs of a
+workspace are kept in the store instead, so every process sees them.
+"""
+
+import hashlib
+import hmac
+import os
+import re
+import secrets
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from pydantic_settings import BaseSettings, SettingsConfigDict
+from starlette.datastructures import State
+
+from backend.api.models.schemas.job_models import JobStatus
+from backend.api.models.schemas.setup_models import CelonisCredentials
+from backend.utils.job_store import JobMapping, JobStore
+from backend.utils.metrics import estimate_nbytes
+
+router = APIRouter(prefix="/api/workspaces", tags=["Workspaces"])
+
+DEFAULT_WORKSPACE = "default"
+WORKSPACE_HEADER = "X-Workspace-ID"
+ADMIN_HEADER = "X-Admin-Token"
+_WORKSPACE_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+# **************** Workspace Settings ****************
+
+
+class WorkspaceSettings(BaseSettings):
+    """Settings of the workspaces, loaded from the environment or .env."""
+
+    WORKSPACE_MAX_CONCURRENT_JOBS: int = 8
+    WORKSPACE_MAX_CACHE_MB: int = 1024
+    MAX_WORKSPACES: int = 64
+    MAX_WORKSPACES_PER_CLIENT: int = 8
+    WORKSPACE_IDLE_SECONDS: float = 3600.0
+    WORKSPACE_SECRET: str = ""
+    ADMIN_TOKEN: str = ""
+
+    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
+
+
+@lru_cache
+def get_workspace_settings() -> WorkspaceSettings:
+    """Returns the workspace settings, loaded once per process."""
+    return WorkspaceSettings()
+
+
+# **************** Workspaces ****************
+
+
+def init_workspace_state(state: Any) -> None:
+    """Sets the attributes of an empty workspace on a state.
+
+    Args:
+        state: The state of the workspace, e.g. the application state.
+    """
+    # A fixed CelonisConnectionManager, e.g. an offline one. If it is
+    # None, the manager is taken from the connection pool.
+    state.celonis = None
+
+    # The uploaded log and its columns
+    state.current_log = None  # will get path to tmp file
+    state.current_log_columns = []
+    state.current_log_cache = None  # will get path to the parsed log
+
+    # The chunks of a failed chunked upload, resumed by the next commit
+    state.pending_upload = None
+
+    # Structures derived from the current Celonis extract (e.g. the resource
+    # profile cube). They are dropped whenever a new log is committed, see
+    # get_extract_cache.
+    state.extract_cache = {}
+    state.extract_cache_key = None
+
+    state.jobs = {}
+
+
+class Workspace:
+    """A workspace with its own connection, log, caches and jobs.
+
+    Attributes:
+        workspace_id: The ID of the workspace.
+        state: The connection, log, caches and jobs of the workspace.
+        max_concurrent_jobs: The maximum number of pending and running jobs.
+        max_cache_bytes: The maximum size of the extract cache in bytes.
+        credentials: The Celonis credentials of the workspace, or None to
+            use the credentials of the .env file.
+        client: The address of the client that created the workspace, or
+            None if it was not created by POST /api/workspaces here.
+        last_used: The time.monotonic() of the last request of the workspace.
+    """
+
+    workspace_id: str
+    state: Any
+    max_concurrent_jobs: int
+    max_cache_bytes: int
+    credentials: Optional[CelonisCredentials]
+    client: Optional[str]
+    last_used: float
+
+    def __init__(
+        self,
+        workspace_id: str,
+        max_concurrent_jobs: int = 8,
+        max_cache_bytes: int = 1024 * 1024 * 1024,
+        state: Optional[Any] = None,
+        job_store: Optional[JobStore] = None,
+    ) -> None:
+        """Initialize an empty workspace.
+
+        Args:
+            workspace_id: The ID of the workspace.
+            max_concurrent_jobs: The maximum number of pending and running
+              jobs.
+            max_cache_bytes: The maximum size of the extract cache in bytes.
+            state: An initialized state to use, e.g. the application state
+              for the default workspace.
+            job_store: The shared job store, or None to keep the jobs in
+              the state.
+        """
+        self.workspace_id = workspace_id
+        self.max_concurrent_jobs = max_concurrent_jobs
+        self.max_cache_bytes = max_cache_bytes
+        self.credentials = None
+        self.client = None
+        self.last_used = time.monotonic()
+        if state is None:
+            state = State()
+            init_workspace_state(state)
+        if job_store is not None:
+            state.jobs = JobMapping(job_store, workspace_id)
+        self.state = state
+
+    def get_active_jobs(self) -> int:
+        """Returns the number of pending and running jobs."""
+        return sum(
+            job.status in ("pending", "running") for job in self.state.jobs.values()
+        )
+
+    def get_cache_bytes(self) -> int:
+        """Returns the estimated size of the extract cache in bytes."""
+        return sum(
+            estimate_nbytes(value) for value in self.state.extract_cache.values()
+        )
+
+    def get_usage(self) -> Dict[str, Any]:
+        """Returns the log, the jobs and the cache size of the workspace."""
+        return {
+            "workspace_id": self.workspace_id,
+            "has_log": self.state.current_log is not None,
+            "jobs": len(self.state.jobs),
+            "active_jobs": self.get_active_jobs(),
+            "max_concurrent_jobs": self.max_concurrent_jobs,
+            "cache_bytes": self.get_cache_bytes(),
+            "max_cache_bytes": self.max_cache_bytes,
+        }
+
+    def close(self) -> None:
+        """Deletes the uploaded log and the parsed log of the workspace.
+
+        Jobs in a shared job store are kept, other processes may still
+        serve them.
+        """
+        for path in (self.state.current_log, self.state.current_log_cache):
+            if path and os.path.exists(path):
+                os.unlink(path)
+        if self.state.pending_upload is not None:
+            self.state.pending_upload.cleanup()
+        jobs = self.state.jobs
+        init_workspace_state(self.state)
+        if isinstance(jobs, JobMapping):
+            self.state.jobs = jobs
+
+
+class WorkspaceRegistry:
+    """Keeps the workspaces of the application by their ID.
+
+    Attributes:
+        max_workspaces: The maximum number of workspaces.
+        max_per_client: The maximum number of workspaces created by one
+            client.
+        idle_seconds: The time after which a workspace without requests
+            and active jobs is closed.
+        admin_token: The token of the admin endpoints, empty if they are
+            disabled.
+    """
+
+    max_workspaces: int
+    max_per_client: int
+    idle_seconds: float
+    admin_token: str
+
+    def __init__(
+        self,
+        app_state: Any,
+        settings: Optional[WorkspaceSettings] = None,
+        job_store: Optional[JobStore] = None,
+    ) -> None:
+        """Initialize the registry with the default workspace.
+
+        Args:
+            app_state: The initialized application state, which becomes the
+              state of the default workspace.
+            settings: The workspace settings, by default loaded from the
+              environment.
+            job_store: The shared job store, or None to keep the jobs of
+              every workspace in its state.
+        """
+        self._settings = settings or get_workspace_settings()
+        self._job_store = job_store
+        self.max_workspaces = self._settings.MAX_WORKSPACES
+        self.max_per_client = self._settings.MAX_WORKSPACES_PER_CLIENT
+        self.idle_seconds = self._settings.WORKSPACE_IDLE_SECONDS
+        self.admin_token = self._settings.ADMIN_TOKEN
+        # Without a configured secret only this process accepts the IDs
+        self._secret = (
+            self._settings.WORKSPACE_SECRET or secrets.token_hex(32)
+        ).encode()
+        self._lock = threading.Lock()
+        self._workspaces: Dict[str, Workspace] = {}
+        self._workspaces[DEFAULT_WORKSPACE] = self._create(
+            DEFAULT_WORKSPACE, state=app_state
+        )
+
+    def _create(self, workspace_id: str, state: Optional[Any] = None) -> Workspace:
+        return Workspace(
+            workspace_id,
+            max_concurrent_jobs=self._settings.WORKSPACE_MAX_CONCURRENT_JOBS,
+            max_cache_bytes=self._settings.WORKSPACE_MAX_CACHE_MB * 1024 * 1024,
+            state=state,
+            job_store=self._job_store,
+        )
+
+    def _sign(self, nonce: str) -> str:
+        return hmac.new(self._secret, nonce.encode(), hashlib.sha256).hexdigest()[:32]
+
+    def issue_id(self) -> str:
+        """Returns a new unguessable workspace ID signed with the secret."""
+        nonce = secrets.token_hex(16)
+        return nonce + self._sign(nonce)
+
+    def is_valid_id(self, workspace_id: str) -> bool:
+        """Returns whether a workspace ID was issued with the secret.
+
+        Args:
+            workspace_id: The ID of the workspace.
+        """
+        if workspace_id == DEFAULT_WORKSPACE:
+            return True
+        nonce, signature = workspace_id[:32], workspace_id[32:]
+        return len(nonce) == 32 and hmac.compare_digest(
+            signature.encode(), self._sign(nonce).encode()
+        )
+
+    def _pop_idle(self) -> List[Workspace]:
+        """Removes the idle workspaces without active jobs from the registry.
+
+        Must be called with the lock held. The removed workspaces are
+        returned to be closed outside of the lock.
+        """
+        now = time.monotonic()
+        idle = [
+            workspace
+            for workspace_id, workspace in self._workspaces.items()
+            if workspace_id != DEFAULT_WORKSPACE
+            and now - workspace.last_used > self.idle_seconds
+            and workspace.get_active_jobs() == 0
+        ]
+        for workspace in idle:
+            del self._workspaces[workspace.workspace_id]
+        return idle
+
+    def _add(self, workspace_id: str, client: Optional[str] = None) -> Workspace:
+        """Creates a workspace, closing the idle ones first.
+
+        Raises:
+            ValueError: If the maximum number of workspaces, or of the
+            workspaces of the client, is reached.
+        """
+        error = ""
+        with self._lock:
+            idle = self._pop_idle()
+            workspace = self._workspaces.get(workspace_id)
+            own = sum(w.client == client for w in self._workspaces.values())
+            if workspace is None and len(self._workspaces) >= self.max_workspaces:
+                error = f"The maximum of {self.max_workspaces} workspaces is reached."
+            elif (
+                workspace is None and client is not None and own >= self.max_per_client
+            ):
+                error = (
+                    f"The maximum of {self.max_per_client} workspaces per client "
+                    "is reached. Delete one of them first."
+                )
+            elif workspace is None:
+                workspace = self._create(workspace_id)
+                workspace.client = client
+                self._workspaces[workspace_id] = workspace
+        # Closing deletes files, so it is done outside of the lock
+        for old in idle:
+            print(f"Closing idle workspace {old.workspace_id}.")
+            old.close()
+        if workspace is None:
+            raise ValueError(error)
+        return workspace
+
+    def get(self, workspace_id: str) -> Workspace:
+        """Returns a workspace, creating it on its first use.
+
+        Args:
+            workspace_id: The ID of the workspace.
+
+        Returns:
+            The workspace.
+
+        Raises:
+            ValueError: If the workspace does not exist and the maximum
+            number of workspaces is reached.
+        """
+        with self._lock:
+            workspace = self._workspaces.get(workspace_id)
+        if workspace is None:
+            workspace = self._add(workspace_id)
+        workspace.last_used = time.monotonic()
+        return workspace
+
+    def create(self, client: Optional[str] = None) -> Workspace:
+        """Creates a workspace with a new ID.
+
+        Args:
+            client: The address of the client creating the workspace.
+
+        Returns:
+            The workspace.
+
+        Raises:
+            ValueError: If the maximum number of workspaces, or of the
+            workspaces of the client, is reached.
+        """
+        return self._add(self.issue_id(), client)
+
+    def list(self) -> List[Workspace]:
+        """Returns all workspaces, the default one first."""
+        with self._lock:
+            return list(self._workspaces.values())
+
+    def remove(self, workspace_id: str) -> bool:
+        """Removes a workspace and deletes its log files and jobs.
+
+        The default workspace cannot be removed.
+
+        Args:
+            workspace_id: The ID of the workspace.
+
+        Returns:
+            Whether the workspace existed.
+        """
+        if workspace_id == DEFAULT_WORKSPACE:
+            raise ValueError("The default workspace cannot be removed.")
+        with self._lock:
+            workspace = self._workspaces.pop(workspace_id, None)
+        if workspace is None:
+            return False
+        workspace.state.jobs.clear()
+        workspace.close()
+        return True
+
+
+# **************** Dependencies and Helpers ****************
+
+
+def get_workspace_registry(request: Request) -> WorkspaceRegistry:
+    """Returns the workspace registry, creating it if needed.
+
+    Args:
+        request: The FastAPI request object. This is used to access the
+          application state via `request.app.state`.
+
+    Returns:
+        The workspace registry of the application.
+    """
+    registry: Optional[WorkspaceRegistry] = getattr(
+        request.app.state, "workspaces", None
+    )
+    if registry is None:
+        registry = WorkspaceRegistry(
+            request.app.state, job_store=getattr(request.app.state, "job_store", None)
+        )
+        request.app.state.workspaces = registry
+    return registry
+
+
+def get_workspace(request: Request) -> Workspace:
+    """Returns the workspace of a request.
+
+    The workspace is selected with the X-Workspace-ID header, which must
+    be an ID issued by POST /api/workspaces. This function is used as a
+    dependency in the FastAPI application, and by the endpoints that only
+    need the state of the workspace.
+
+    Args:
+        request: The FastAPI request object. This is used to access the
+          header and the workspace registry via `request.app.state`.
+
+    Returns:
+        The workspace, the default one if the header is not given.
+
+    Raises:
+        HTTPException: If the ID is malformed (400), was not issued by
+        this backend (403) or the workspace does not exist and no more
+        workspaces can be created (429).
+    """
+    workspace_id = request.headers.get(WORKSPACE_HEADER) or DEFAULT_WORKSPACE
+    if not _WORKSPACE_ID.match(workspace_id):
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid workspace ID. Use up to 64 letters, digits, '-' or '_'.",
+        )
+    registry = get_workspace_registry(request)
+    if not registry.is_valid_id(workspace_id):
+        raise HTTPException(
+            status_code=403,
+            detail="Unknown workspace ID. POST to /api/workspaces to create one.",
+        )
+    try:
+        return registry.get(workspace_id)
+    except ValueError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+
+
+def is_admin(request: Request) -> bool:
+    """Returns whether a request carries the admin token.
+
+    Args:
+        request: The FastAPI request object.
+
+    Returns:
+        Whether the X-Admin-Token header matches ADMIN_TOKEN. Always False
+        if no ADMIN_TOKEN is configured.
+    """
+    admin_token = get_workspace_registry(request).admin_token
+    given = request.headers.get(ADMIN_HEADER, "")
+    return bool(admin_token) and hmac.compare_digest(
+        given.encode(), admin_token.encode()
+    )
+
+
+def require_admin(request: Request) -> None:
+    """Rejects requests without the admin token.
+
+    Args:
+        request: The FastAPI request object.
+
+    Raises:
+        HTTPException: If the admin token is missing or wrong (403).
+    """
+    if not is_admin(request):
+        raise HTTPException(
+            status_code=403, detail="This endpoint requires the admin token."
+        )
+
+
+def add_job(workspace: Workspace, job_id: str, module: str) -> JobStatus:
+    """Adds a pending job to a workspace.
+
+    Args:
+        workspace: The workspace of the job.
+        job_id: The ID of the job.
+        module: The module of the job, e.g. log_skeleton.
+
+    Returns:
+        The record of the job.
+
+    Raises:
+        HTTPException: If the workspace already has the maximum number of
+        pending and running jobs (429).
+    """
+    if workspace.get_active_jobs() >= workspace.max_concurrent_jobs:
+        raise HTTPException(
+            status_code=429,
+            detail=f"The workspace already runs {workspace.max_concurrent_jobs} "
+            "jobs. Please wait for one of them to finish.",
+        )
+    rec = JobStatus(module=module, status="pending")
+    workspace.state.jobs[job_id] = rec
+    return rec
+
+
+def get_extract_cache(workspace: Workspace, celonis: Any) -> Dict[str, Any]:
+    """Returns the extract cache of a workspace for a Celonis connection.
+
+    The cache is keyed by the connection and its extract version. It is
+    cleared when the workspace switches to another connection, or when a
+    commit of any workspace sharing the pooled manager changed the table.
+
+    Args:
+        workspace: The workspace.
+        celonis: The Celonis connection manager the cache is built from.
+
+    Returns:
+        The extract cache, a dictionary of the cached structures.
+    """
+    key = tuple(
+        getattr(celonis, name, None)
+        for name in ("base_url", "data_pool_name", "data_model_name", "extract_version")
+    )
+    state = workspace.state
+    if state.extract_cache_key is not None and state.extract_cache_key != key:
+        state.extract_cache.clear()
+    state.extract_cache_key = key
+    return state.extract_cache
+
+
+def store_in_cache(workspace: Workspace, key: str, value: Any) -> None:
+    """Stores a structure in the extract cache of a workspace.
+
+    The oldest entries are dropped until the cache fits into the limit of
+    the workspace. A structure larger than the limit is not cached.
+
+    Args:
+        workspace: The workspace.
+        key: The key of the structure in the cache.
+        value: The structure, e.g. a resource profile cube.
+    """
+    cache: Dict[str, Any] = workspace.state.extract_cache
+    cache.pop(key, None)
+    size = estimate_nbytes(value)
+    if size > workspace.max_cache_bytes:
+        return
+    sizes = {k: estimate_nbytes(v) for k, v in cache.items()}
+    total = sum(sizes.values()) + size
+    # Dictionaries keep their insertion order, the oldest entry is first
+    for old_key in list(cache):
+        if total <= workspace.max_cache_bytes:
+            break
+        del cache[old_key]
+        total -= sizes[old_key]
+    cache[key] = value
+
+
+# **************** Endpoints ****************
+
+
+@router.post("", status_code=201)
+async def create_workspace(
+    request: Request,
+    registry: WorkspaceRegistry = Depends(get_workspace_registry),
+) -> Dict[str, str]:
+    """Creates a workspace with a new unguessable ID.
+
+    Args:
+        request: The FastAPI request object. This is used to access the
+          address of the client.
+        registry: The workspace registry dependency injection.
+
+    Returns:
+        A dictionary containing the ID of the workspace, which is sent in
+        the X-Workspace-ID header of its requests.
+
+    Raises:
+        HTTPException: If no more workspaces can be created, in total or
+        by this client (429).
+    """
+    client = request.client.host if request.client else None
+    try:
+        workspace = registry.create(client)
+    except ValueError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    return {"workspace_id": workspace.workspace_id}
+
+
+@router.get("", dependencies=[Depends(require_admin)])
+async def list_workspaces(
+    registry: WorkspaceRegistry = Depends(get_workspace_registry),
+) -> Dict[str, List[Dict[str, Any]]]:
+    """Lists the workspaces with their jobs and cache sizes.
+
+    Only admins can list the workspaces.
+
+    Args:
+        registry: The workspace registry dependency injection.
+
+    Returns:
+        A dictionary containing the usage of every workspace.
+    """
+    return {"workspaces": [workspace.get_usage() for workspace in registry.list()]}
+
+
+@router.delete("/{workspace_id}")
+async def delete_workspace(
+    workspace_id: str,
+    request: Request,
+    registry: WorkspaceRegistry = Depends(get_workspace_registry),
+) -> Dict[str, str]:
+    """Deletes a workspace with its log, caches and jobs.
+
+    A workspace can be deleted by admins and by requests of the workspace
+    itself.
+
+    Args:
+        workspace_id: The ID of the workspace.
+        request: The FastAPI request object.
+        registry: The workspace registry dependency injection.
+
+    Returns:
+        A dictionary containing a message indicating the success of the
+        operation.
+
+    Raises:
+        HTTPException: If the request may not delete the workspace (403),
+        the workspace is the default one (400) or does not exist (404).
+    """
+    given = request.headers.get(WORKSPACE_HEADER, "")
+    own = hmac.compare_digest(given.encode(), workspace_id.encode())
+    if not (own or is_admin(request)):
+        raise HTTPException(
+            status_code=403, detail="Only admins can delete other workspaces."
+        )
+    try:
+        removed = registry.remove(workspace_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not removed:
+        raise HTTPException(
+            status_code=404, detail=f"Workspace {workspace_id} not found."
+        )
+    return {"message": f"Workspace {workspace_id} deleted."}
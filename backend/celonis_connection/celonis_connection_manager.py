@@ -5,29 +5,290 @@ from Celonis via the help of PQL queries. It relies on the  PyCelonis
 library.
 """
 
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
 from collections.abc import MutableMapping
-from typing import Union
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Union,
+)
 
 import pandas as pd
-from pycelonis import get_celonis
-from pycelonis.ems.data_integration.data_model import DataModel
-from pycelonis.ems.data_integration.data_model_table import DataModelTable
-from pycelonis.ems.data_integration.data_model_table_column import DataModelTableColumn
-from pycelonis.ems.data_integration.data_pool import DataPool
-from pycelonis.pql.data_frame import DataFrame as pqlDataFrame
-from pycelonis_core.base.collection import CelonisCollection
-from pycelonis_core.utils.errors import PyCelonisNotFoundError
-from saolapy.types import SeriesLike
+
+from backend.celonis_connection.pql_profiler import (
+    find_caller,
+    format_query,
+    get_pql_profiler,
+)
+from backend.utils.lazy_import import lazy_import
+from backend.utils.metrics import CELONIS_EXTRACTION_DURATION, timed
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pycelonis.ems.data_integration.data_model import DataModel
+    from pycelonis.ems.data_integration.data_model_table import DataModelTable
+    from pycelonis.ems.data_integration.data_model_table_column import (
+        DataModelTableColumn,
+    )
+    from pycelonis.ems.data_integration.data_pool import DataPool
+    from pycelonis.ems.data_integration.data_pool_table import DataPoolTable
+    from pycelonis_core.base.collection import CelonisCollection
+    from saolapy.types import SeriesLike
+
+pq = lazy_import("pyarrow.parquet")
+pycelonis_errors = lazy_import("pycelonis_core.utils.errors")
+
+# The number of chunks that are uploaded in parallel
+UPLOAD_WORKERS = 4
+
+# The number of attempts per chunk before a chunked upload is paused
+UPLOAD_ATTEMPTS = 3
+
+# The modes of an incremental append, see append_to_table
+APPEND_MODES = ("new_events", "new_cases")
+
+# The maximum number of events and cases per page of a streamed extract
+STREAM_PAGE_EVENTS = 500_000
+STREAM_PAGE_CASES = 10_000
+
+# Called with the phase ("upload", "configure" or "reload") of a table
+# upload and the completed fraction of the phase
+ProgressCallback = Callable[[str, float], None]
+
+
+def get_celonis(**kwargs: Any) -> Any:
+    """Connects to Celonis, pycelonis is imported on the first connection."""
+    from pycelonis import get_celonis as connect
+
+    return connect(**kwargs)
+
+
+def pqlDataFrame(*args: Any, **kwargs: Any) -> Any:  # noqa: N802
+    """Creates a PQL DataFrame of pycelonis, which is imported on first use."""
+    from pycelonis.pql.data_frame import DataFrame
+
+    return DataFrame(*args, **kwargs)
+
+
+class ChunkedUpload:
+    """Class to track the state of a chunked table upload.
+
+    The chunks are spooled to Parquet files, so a failed upload can be
+    resumed without the data frame and only the chunks that were not
+    committed yet are pushed again. The upload may be resumed by another
+    manager of the same connection, e.g. after the pool replaced it.
+
+    An upload in append mode appends all chunks to the existing table
+    instead of creating it, e.g. the delta of append_to_table.
+    """
+
+    source: Optional[str]
+    append: bool
+    rows: int
+    cases: int
+    table_name: str
+    case_id_column: str
+    activity_column: str
+    timestamp_column: str
+    drop_if_exists: bool
+    force: bool
+    directory: str
+    chunk_paths: List[str]
+    completed: Set[int]
+    table: Optional[DataPoolTable]
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        chunk_size: int,
+        table_name: str,
+        case_id_column: str,
+        activity_column: str,
+        timestamp_column: str,
+        drop_if_exists: bool = True,
+        force: bool = True,
+        append: bool = False,
+    ) -> None:
+        """Spool the data frame to Parquet chunks.
+
+        Args:
+            df: DataFrame to upload.
+            chunk_size: Number of rows per chunk.
+            table_name: Name of the table to create.
+            case_id_column: Name of the case ID column.
+            activity_column: Name of the activity column.
+            timestamp_column: Name of the timestamp column.
+            drop_if_exists: If True, drop the table if it already exists.
+            force: If True, force the creation of the table.
+            append: If True, append the chunks to the existing table.
+        """
+        self.append = append
+        self.rows = len(df)
+        # Only reported for an append, counting the cases of a whole log
+        # would take a while
+        self.cases = int(df[case_id_column].nunique()) if append else 0
+        self.table_name = table_name
+        self.case_id_column = case_id_column
+        self.activity_column = activity_column
+        self.timestamp_column = timestamp_column
+        self.drop_if_exists = drop_if_exists
+        self.force = force
+        self.directory = tempfile.mkdtemp(prefix="celonis_upload_")
+        self.chunk_paths = []
+        for i, start in enumerate(range(0, len(df), chunk_size)):
+            path = os.path.join(self.directory, f"chunk_{i:05d}.parquet")
+            df.iloc[start : start + chunk_size].to_parquet(path, index=False)
+            self.chunk_paths.append(path)
+        self.completed = set()
+        self.table = None
+        # Identifies what was spooled, so only the same commit resumes it
+        self.source = None
+
+    @property
+    def pending(self) -> List[int]:
+        """The indices of the chunks that were not committed yet."""
+        return [i for i in range(len(self.chunk_paths)) if i not in self.completed]
+
+    def read_chunk(self, index: int) -> pd.DataFrame:
+        """Read a spooled chunk.
+
+        Args:
+            index: Index of the chunk.
+
+        Returns:
+            DataFrame with the rows of the chunk.
+        """
+        return pq.read_table(self.chunk_paths[index]).to_pandas()
+
+    def cleanup(self) -> None:
+        """Delete the spooled chunks."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def _pql_string(value: str) -> str:
+    """Quote a value as a PQL string literal."""
+    escaped = str(value).replace("\\", "\\\\").replace("'", "\\'")
+    return f"'{escaped}'"
+
+
+def _to_naive_utc(timestamps: pd.Series) -> pd.Series:
+    """Convert timestamps to naive UTC timestamps, as Celonis has them."""
+    timestamps = pd.to_datetime(timestamps)
+    if timestamps.dt.tz is not None:
+        timestamps = timestamps.dt.tz_convert("UTC").dt.tz_localize(None)
+    return timestamps
+
+
+def pql_date(value: str) -> str:
+    """Parse a time and format it as a PQL date literal.
+
+    Times with a time zone are converted to UTC, as the timestamps in
+    Celonis have none.
+
+    Args:
+        value: The time, e.g. "2024-01-01" or "2024-01-01T12:00:00Z".
+
+    Returns:
+        The PQL date literal, e.g. {d'2024-01-01 00:00:00'}.
+
+    Raises:
+        ValueError: If the value is not a valid time.
+    """
+    try:
+        timestamp = pd.Timestamp(value)
+    except (TypeError, ValueError, OverflowError) as e:
+        raise ValueError(f"Invalid time {value!r}: {e}") from e
+    if pd.isna(timestamp):
+        raise ValueError(f"Invalid time {value!r}.")
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.tz_convert("UTC").tz_localize(None)
+    return f"{{d'{timestamp.strftime('%Y-%m-%d %H:%M:%S')}'}}"
+
+
+def build_extract_filters(
+    table_name: str = "ACTIVITIES",
+    start_time: Optional[str] = None,
+    end_time: Optional[str] = None,
+    activities: Optional[List[str]] = None,
+    resources: Optional[List[str]] = None,
+    cases: Optional[List[str]] = None,
+) -> List[str]:
+    """Build the PQL filters of an extract.
+
+    All filters are combined, i.e. only events that pass every filter
+    are extracted. Filters that are None or empty are left out.
+
+    Args:
+        table_name: Name of the table to filter.
+        start_time: Only events at or after this time.
+        end_time: Only events before this time.
+        activities: Only events of these activities.
+        resources: Only events of these resources.
+        cases: Only events of these cases.
+
+    Returns:
+        List of PQL FILTER statements.
+
+    Raises:
+        ValueError: If the start or end time is not a valid time.
+    """
+    filters = []
+    timestamp = f'"{table_name}"."time:timestamp"'
+    if start_time:
+        filters.append(f"FILTER {timestamp} >= {pql_date(start_time)};")
+    if end_time:
+        filters.append(f"FILTER {timestamp} < {pql_date(end_time)};")
+    for column, values in (
+        ("concept:name", activities),
+        ("org:resource", resources),
+        ("case:concept:name", cases),
+    ):
+        if values:
+            literals = ", ".join(_pql_string(value) for value in values)
+            filters.append(f'FILTER "{table_name}"."{column}" IN ({literals});')
+    return filters
+
+
+def _report_progress(
+    on_progress: Optional[ProgressCallback], phase: str, progress: float
+) -> None:
+    """Report the progress of a table upload, if a callback is given."""
+    if on_progress:
+        on_progress(phase, progress)
 
 
 class CelonisConnectionManager:
-    """Class to manage the connection to Celonis."""
+    """Class to manage the connection to Celonis.
+
+    A pooled manager is shared by every workspace with the same
+    connection. The data frame and the pending upload belong to the commit
+    that holds commit_lock, and extract_version changes whenever a commit
+    changed the table, so the structures cached from the extract can be
+    invalidated in every workspace. Requests and jobs acquire the manager
+    while they use it, so the pool only closes it once they released it.
+    """
 
     base_url: str
     api_token: str
     data_pool_name: str
     data_model_name: str
     data_frame: pd.DataFrame
+    pending_upload: Optional[ChunkedUpload]
+    commit_lock: threading.Lock
+    extract_version: str
 
     def __init__(
         self,
@@ -49,6 +310,12 @@ class CelonisConnectionManager:
         self.data_model_name = data_model_name
         self.api_token = api_token
         self.data_frame = pd.DataFrame()
+        self.pending_upload = None
+        self.commit_lock = threading.Lock()
+        self.extract_version = uuid.uuid4().hex
+        self._usage_lock = threading.Lock()
+        self._users = 0
+        self._close_requested = False
         self.celonis = get_celonis(base_url=base_url, api_token=self.api_token)
         self.data_pool = self.find_data_pool(data_pool_name)
         self.data_model = self.find_data_model(data_model_name)
@@ -66,7 +333,7 @@ class CelonisConnectionManager:
         """
         try:
             return self.celonis.data_integration.get_data_pools().find(data_pool_name)
-        except PyCelonisNotFoundError:
+        except pycelonis_errors.PyCelonisNotFoundError:
             print(f"Data pool '{data_pool_name}' not found. Creating a new one.")
             return self.celonis.data_integration.create_data_pool(self.data_pool_name)
 
@@ -87,7 +354,7 @@ class CelonisConnectionManager:
             return None
         try:
             return self.data_pool.get_data_models().find(self.data_model_name)
-        except PyCelonisNotFoundError:
+        except pycelonis_errors.PyCelonisNotFoundError:
             print(f"Data model '{data_model_name}' not found. Creating a new one.")
             return self.data_pool.create_data_model(self.data_model_name)
 
@@ -99,6 +366,9 @@ class CelonisConnectionManager:
         timestamp_column: str = "time:timestamp",
         drop_if_exists: bool = True,
         force: bool = True,
+        chunk_size: Optional[int] = None,
+        max_workers: int = UPLOAD_WORKERS,
+        on_progress: Optional[ProgressCallback] = None,
     ) -> None:
         """Add a table to the data pool.
 
@@ -107,6 +377,9 @@ class CelonisConnectionManager:
         create a new one. The function then uses the specified columns
         to create a process configuration in the data model and reload it.
 
+        If the data frame has more rows than chunk_size, it is uploaded in
+        chunks instead, see resume_upload.
+
         Args:
             table_name: Name of the table to create.
             case_id_column: Name of the case ID column.
@@ -114,6 +387,10 @@ class CelonisConnectionManager:
             timestamp_column: Name of the timestamp column.
             drop_if_exists: If True, drop the table if it already exists.
             force: If True, force the creation of the table.
+            chunk_size: Number of rows per chunk of a chunked upload. Default
+                is None, i.e. the table is uploaded in one piece.
+            max_workers: Number of chunks uploaded in parallel.
+            on_progress: Called with the phase and its progress.
 
         Returns:
             None
@@ -126,34 +403,369 @@ class CelonisConnectionManager:
             print("Data frame is empty. No reason to create a table.")
             return None
 
+        if chunk_size and len(self.data_frame) > chunk_size:
+            if self.pending_upload:
+                self.pending_upload.cleanup()
+            self.pending_upload = ChunkedUpload(
+                self.data_frame,
+                chunk_size,
+                table_name,
+                case_id_column,
+                activity_column,
+                timestamp_column,
+                drop_if_exists,
+                force,
+            )
+            return self.resume_upload(max_workers=max_workers, on_progress=on_progress)
+
         # Create the table in the data pool
+        _report_progress(on_progress, "upload", 0.0)
         table = self.data_pool.create_table(
             df=self.data_frame,
             table_name=table_name,
             drop_if_exists=drop_if_exists,
             force=force,
         )
+        _report_progress(on_progress, "upload", 1.0)
+        self._add_table_to_data_model(
+            table,
+            table_name,
+            case_id_column,
+            activity_column,
+            timestamp_column,
+            on_progress=on_progress,
+        )
+
+    def resume_upload(
+        self,
+        max_workers: int = UPLOAD_WORKERS,
+        on_progress: Optional[ProgressCallback] = None,
+    ) -> None:
+        """Upload the pending chunks of a chunked table upload.
+
+        The first chunk creates the table and the other chunks are appended
+        to it in parallel. Every chunk is tried UPLOAD_ATTEMPTS times. If a chunk still fails, the upload is
+        paused and the error is raised, calling this function again pushes
+        only the chunks that were not committed yet. The table is added to
+        the data model and the data model is reloaded once all chunks are
+        committed. In append mode all chunks are appended to the existing
+        table and only the new rows are loaded into the data model.
+
+        Args:
+            max_workers: Number of chunks uploaded in parallel.
+            on_progress: Called with the phase and its progress.
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: If the table of an append no longer exists.
+            Exception: The error of a chunk that failed in all attempts.
+        """
+        upload = self.pending_upload
+        if not upload:
+            print("No pending upload to resume.")
+            return None
+        if not self.data_pool or not self.data_model:
+            print("Data pool or data model does not exist. Cannot create table.")
+            return None
+
+        total = len(upload.chunk_paths)
+        if upload.table is not None or upload.append:
+            # The table may belong to the closed session of another manager
+            try:
+                upload.table = self.data_pool.get_tables().find(upload.table_name)
+            except pycelonis_errors.PyCelonisNotFoundError:
+                if upload.append:
+                    raise ValueError(
+                        f"Table '{upload.table_name}' does not exist anymore, "
+                        "commit the whole log instead."
+                    )
+                print(f"Table '{upload.table_name}' is gone, uploading all chunks.")
+                upload.table = None
+                upload.completed.clear()
+        _report_progress(on_progress, "upload", len(upload.completed) / total)
+        if upload.table is None:
+            upload.table = self._push_chunk(upload, 0)
+            upload.completed.add(0)
+            _report_progress(on_progress, "upload", len(upload.completed) / total)
+
+        errors: List[Exception] = []
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(self._push_chunk, upload, index): index
+                for index in upload.pending
+            }
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                    upload.completed.add(futures[future])
+                    _report_progress(
+                        on_progress, "upload", len(upload.completed) / total
+                    )
+                except Exception as e:
+                    errors.append(e)
+        print(
+            f"Uploaded {len(upload.completed)} of {len(upload.chunk_paths)} "
+            f"chunks of table '{upload.table_name}'."
+        )
+        if errors:
+            raise errors[0]
+
+        if upload.append:
+            self.extract_version = uuid.uuid4().hex
+            # Only load the appended rows into the data model
+            _report_progress(on_progress, "reload", 0.0)
+            self.data_model.reload(force_complete=False)
+            _report_progress(on_progress, "reload", 1.0)
+        else:
+            self._add_table_to_data_model(
+                upload.table,
+                upload.table_name,
+                upload.case_id_column,
+                upload.activity_column,
+                upload.timestamp_column,
+                on_progress=on_progress,
+            )
+        upload.cleanup()
+        self.pending_upload = None
+
+    def append_to_table(
+        self,
+        table_name: str = "ACTIVITIES",
+        case_id_column: str = "case:concept:name",
+        activity_column: str = "concept:name",
+        timestamp_column: str = "time:timestamp",
+        mode: str = "new_events",
+        chunk_size: Optional[int] = None,
+        max_workers: int = UPLOAD_WORKERS,
+        on_progress: Optional[ProgressCallback] = None,
+    ) -> Union[pd.DataFrame, None]:
+        """Append the new events of the data frame to an existing table.
+
+        Only the delta is pushed to the data pool table and the data model
+        is reloaded partially. In the mode "new_events", the events newer
+        than the latest timestamp in the table are appended, and the events
+        at the latest timestamp that are not in the table yet. In the mode
+        "new_cases", the events of the cases that are not yet in the table
+        are appended. Returns None if the table does not exist yet, so it
+        has to be created with create_table.
+
+        The delta is uploaded as a chunked upload in append mode, see
+        resume_upload, so a failed append can be resumed.
+
+        Args:
+            table_name: Name of the table to append to.
+            case_id_column: Name of the case ID column.
+            activity_column: Name of the activity column.
+            timestamp_column: Name of the timestamp column.
+            mode: Which events are new, "new_events" or "new_cases".
+            chunk_size: Number of rows per chunk of the upload. Default is
+                None, i.e. the delta is uploaded in one chunk.
+            max_workers: Number of chunks uploaded in parallel.
+            on_progress: Called with the phase and its progress.
+
+        Returns:
+            DataFrame with the appended events or None.
+
+        Raises:
+            ValueError: If the mode is unknown.
+            Exception: The error of a chunk that failed in all attempts.
+        """
+        if mode not in APPEND_MODES:
+            raise ValueError(f"Unknown append mode '{mode}'.")
+        if not self.data_pool or not self.data_model:
+            print("Data pool or data model does not exist. Cannot append.")
+            return None
+        if self.get_table(table_name) is None:
+            return None
+
+        df = self.data_frame
+        if mode == "new_events":
+            delta = self._get_new_events(
+                df, table_name, case_id_column, activity_column, timestamp_column
+            )
+        else:
+            cases = self.get_dataframe_from_celonis(
+                {
+                    "Case": f'"{table_name}"."{case_id_column}"',
+                    "Events": f'COUNT("{table_name}"."{case_id_column}")',
+                }
+            )
+            existing = set() if cases is None else set(cases["Case"].astype(str))
+            delta = df[~df[case_id_column].astype(str).isin(existing)]
+
+        if delta.empty:
+            print(f"No new events to append to table '{table_name}'.")
+            return delta
+
+        if self.pending_upload:
+            self.pending_upload.cleanup()
+        self.pending_upload = ChunkedUpload(
+            delta,
+            chunk_size or len(delta),
+            table_name,
+            case_id_column,
+            activity_column,
+            timestamp_column,
+            append=True,
+        )
+        self.resume_upload(max_workers=max_workers, on_progress=on_progress)
+        print(f"Appended {len(delta)} events to table '{table_name}'.")
+        return delta
+
+    def _get_new_events(
+        self,
+        df: pd.DataFrame,
+        table_name: str,
+        case_id_column: str,
+        activity_column: str,
+        timestamp_column: str,
+    ) -> pd.DataFrame:
+        """Return the events of the data frame that are not in the table.
+
+        These are the events after the latest timestamp in the table, and
+        the events at the latest timestamp whose case, activity and
+        timestamp are not in the table yet, e.g. of another case in the
+        same second.
+        """
+        latest = self.get_dataframe_from_celonis(
+            {"Latest": f'MAX("{table_name}"."{timestamp_column}")'}
+        )
+        latest_timestamp = (
+            latest.iloc[0, 0] if latest is not None and len(latest) else None
+        )
+        if latest_timestamp is None or pd.isna(latest_timestamp):
+            return df
+        latest_timestamp = _to_naive_utc(pd.Series([latest_timestamp])).iloc[0]
+
+        # Celonis returns naive timestamps in UTC
+        timestamps = _to_naive_utc(df[timestamp_column])
+        tied = timestamps == latest_timestamp
+        if not tied.any():
+            return df[timestamps > latest_timestamp]
+
+        # The date literal has whole seconds, so the events of that second
+        # are fetched and the tied ones are matched exactly
+        timestamp = f'"{table_name}"."{timestamp_column}"'
+        events = self._run_pql(
+            {
+                "Case": f'"{table_name}"."{case_id_column}"',
+                "Activity": f'"{table_name}"."{activity_column}"',
+                "Timestamp": timestamp,
+            },
+            [f"FILTER {timestamp} >= {pql_date(str(latest_timestamp))};"],
+        )
+        at_latest = events[_to_naive_utc(events["Timestamp"]) == latest_timestamp]
+        existing = set(
+            zip(at_latest["Case"].astype(str), at_latest["Activity"].astype(str))
+        )
+        known = tied.copy()
+        known[tied] = [
+            key in existing
+            for key in zip(
+                df.loc[tied, case_id_column].astype(str),
+                df.loc[tied, activity_column].astype(str),
+            )
+        ]
+        if known.any():
+            print(
+                f"Skipped {int(known.sum())} events at the latest timestamp "
+                f"{latest_timestamp} that are already in table '{table_name}'."
+            )
+        return df[(timestamps > latest_timestamp) | (tied & ~known)]
+
+    def _push_chunk(self, upload: ChunkedUpload, index: int) -> DataPoolTable:
+        """Push one chunk of a chunked upload to the data pool.
+
+        The first chunk creates the table, the others are appended to it.
+        In append mode every chunk is appended.
+
+        Args:
+            upload: The chunked upload.
+            index: Index of the chunk.
+
+        Returns:
+            The table in the data pool.
+
+        Raises:
+            Exception: The error of the last attempt.
+        """
+        attempt = 1
+        while True:
+            try:
+                chunk = upload.read_chunk(index)
+                if index == 0 and not upload.append:
+                    return self.data_pool.create_table(
+                        df=chunk,
+                        table_name=upload.table_name,
+                        drop_if_exists=upload.drop_if_exists,
+                        force=upload.force,
+                    )
+                upload.table.append(chunk)  # type: ignore
+                return upload.table  # type: ignore
+            except Exception as e:
+                print(f"Upload of chunk {index} failed (attempt {attempt}): {e}")
+                if attempt >= UPLOAD_ATTEMPTS:
+                    raise
+                attempt += 1
+
+    def _add_table_to_data_model(
+        self,
+        table: DataPoolTable,
+        table_name: str,
+        case_id_column: str,
+        activity_column: str,
+        timestamp_column: str,
+        on_progress: Optional[ProgressCallback] = None,
+    ) -> None:
+        """Add a data pool table to the data model and reload it.
+
+        Args:
+            table: The table in the data pool.
+            table_name: Alias of the table in the data model.
+            case_id_column: Name of the case ID column.
+            activity_column: Name of the activity column.
+            timestamp_column: Name of the timestamp column.
+            on_progress: Called with the phase and its progress.
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: If the data model does not exist.
+        """
+        data_model = self.data_model
+        if data_model is None:
+            raise ValueError("Data model does not exist. Cannot add the table.")
+
+        _report_progress(on_progress, "configure", 0.0)
         # Check if the table already exists in the data model
         # If it exists, delete it from the data model then add the new one
         # If it does not exist, add it to the data model
         try:
-            table_in_celonis = self.data_model.get_tables().find(table.name)
+            table_in_celonis = data_model.get_tables().find(table.name)
             table_in_celonis.delete()
             print(f"Table '{table.name}' already exists in data model. Deleting it.")
-            act_table = self.data_model.add_table(name=table.name, alias=table_name)
-        except PyCelonisNotFoundError:
+            act_table = data_model.add_table(name=table.name, alias=table_name)
+        except pycelonis_errors.PyCelonisNotFoundError:
             print(f"Table '{table.name}' not found in data model. Adding it.")
-            act_table = self.data_model.add_table(name=table.name, alias=table_name)
+            act_table = data_model.add_table(name=table.name, alias=table_name)
 
-        self.data_model.create_process_configuration(
+        data_model.create_process_configuration(
             activity_table_id=act_table.id,
             case_id_column=case_id_column,
             activity_column=activity_column,
             timestamp_column=timestamp_column,
         )
 
+        _report_progress(on_progress, "configure", 1.0)
+
         # Reload the data model to reflect the changes
-        self.data_model.reload()
+        _report_progress(on_progress, "reload", 0.0)
+        data_model.reload()
+        self.extract_version = uuid.uuid4().hex
+        _report_progress(on_progress, "reload", 1.0)
 
     def add_dataframe(self, df: pd.DataFrame) -> None:
         """Add a DataFrame to the CelonisConnection object.
@@ -186,28 +798,10 @@ class CelonisConnectionManager:
         Returns:
             DataFrame object or None.
         """
-        if not self.data_model:
-            print("Data model does not exist. Cannot get table.")
-            return None
-        try:
-            table = self.data_model.get_tables().find(table_name)
-        except PyCelonisNotFoundError:
-            print(f"Table {table_name} not found in data model.")
-            return None
-
-        activities_columns = table.get_columns()
-
-        df = pqlDataFrame(
-            {
-                "case:concept:name": activities_columns.find("case:concept:name"),
-                "concept:name": activities_columns.find("concept:name"),
-                "time:timestamp": activities_columns.find("time:timestamp"),
-            },
-            data_model=self.data_model,
+        return self.get_filtered_dataframe_from_celonis(
+            ["case:concept:name", "concept:name", "time:timestamp"], table_name
         )
 
-        return df.to_pandas()
-
     def get_dataframe_with_resource_group_from_celonis(
         self, table_name: str = "ACTIVITIES"
     ) -> Union[pd.DataFrame, None]:
@@ -224,31 +818,193 @@ class CelonisConnectionManager:
         Returns:
             DataFrame object or None.
         """
+        pandas_df = self.get_filtered_dataframe_from_celonis(
+            [
+                "case:concept:name",
+                "concept:name",
+                "time:timestamp",
+                "org:resource",
+                "org:group",
+            ],
+            table_name,
+        )
+        if pandas_df is None:
+            return None
+        pandas_df["time:timestamp"] = pandas_df["time:timestamp"].dt.tz_localize("UTC")  # type: ignore
+        return pandas_df
+
+    @timed(CELONIS_EXTRACTION_DURATION, method="get_filtered_dataframe_from_celonis")
+    def get_filtered_dataframe_from_celonis(
+        self,
+        columns: List[str],
+        table_name: str = "ACTIVITIES",
+        start_time: Optional[str] = None,
+        end_time: Optional[str] = None,
+        activities: Optional[List[str]] = None,
+        resources: Optional[List[str]] = None,
+        cases: Optional[List[str]] = None,
+        case_sample: Optional[int] = None,
+        seed: int = 0,
+    ) -> Union[pd.DataFrame, None]:
+        """Get the given columns of the events that pass the filters.
+
+        The column projection and the filters are pushed down to Celonis,
+        so only the requested part of the table is downloaded. A case
+        sample is drawn from the cases that pass the other filters. Returns
+        None if the data model does not exist or the table or a column is
+        not found.
+
+        Args:
+            columns: Names of the columns to get.
+            table_name: Name of the table to get. Default is "ACTIVITIES".
+            start_time: Only events at or after this time.
+            end_time: Only events before this time.
+            activities: Only events of these activities.
+            resources: Only events of these resources.
+            cases: Only events of these cases.
+            case_sample: Only events of this many randomly drawn cases.
+            seed: Seed of the case sample.
+
+        Returns:
+            DataFrame object or None.
+        """
+        query = self._get_column_query(columns, table_name)
+        if query is None:
+            return None
+
+        filters = build_extract_filters(
+            table_name, start_time, end_time, activities, resources, cases
+        )
+        if case_sample is not None:
+            case_sizes = self._get_case_sizes(table_name, filters)
+            if len(case_sizes) > case_sample:
+                case_sizes = case_sizes.sample(case_sample, random_state=seed)
+            if case_sizes.empty:
+                return pd.DataFrame(columns=columns)
+            filters = filters + build_extract_filters(
+                table_name, cases=case_sizes["Case"].astype(str).tolist()
+            )
+
+        return self._run_pql(query, filters)
+
+    def iter_dataframes_from_celonis(
+        self,
+        columns: List[str],
+        table_name: str = "ACTIVITIES",
+        start_time: Optional[str] = None,
+        end_time: Optional[str] = None,
+        activities: Optional[List[str]] = None,
+        resources: Optional[List[str]] = None,
+        case_sample: Optional[int] = None,
+        seed: int = 0,
+        page_events: int = STREAM_PAGE_EVENTS,
+    ) -> Iterator[pd.DataFrame]:
+        """Get the given columns of the events that pass the filters in pages.
+
+        Unlike get_filtered_dataframe_from_celonis, the result is never
+        held in memory as a whole. The events per case are counted first,
+        then the cases are packed into pages of at most page_events events
+        (a single larger case forms its own page) and every page is
+        extracted by its own query. A page always contains whole cases, so
+        per case computations can consume the pages one by one. Nothing is
+        yielded if the data model does not exist or the table or a column
+        is not found.
+
+        Args:
+            columns: Names of the columns to get.
+            table_name: Name of the table to get. Default is "ACTIVITIES".
+            start_time: Only events at or after this time.
+            end_time: Only events before this time.
+            activities: Only events of these activities.
+            resources: Only events of these resources.
+            case_sample: Only events of this many randomly drawn cases.
+            seed: Seed of the case sample.
+            page_events: Maximum number of events per page.
+
+        Yields:
+            DataFrame objects with the events of whole cases.
+        """
+        query = self._get_column_query(columns, table_name)
+        if query is None:
+            return
+
+        filters = build_extract_filters(
+            table_name, start_time, end_time, activities, resources
+        )
+        case_sizes = self._get_case_sizes(table_name, filters)
+        if case_sample is not None and len(case_sizes) > case_sample:
+            case_sizes = case_sizes.sample(case_sample, random_state=seed)
+
+        page: List[str] = []
+        page_size = 0
+        for case, events in zip(case_sizes["Case"].astype(str), case_sizes["Events"]):
+            if page and (
+                page_size + events > page_events or len(page) >= STREAM_PAGE_CASES
+            ):
+                yield self._get_page(query, table_name, filters, page)
+                page, page_size = [], 0
+            page.append(case)
+            page_size += int(events)
+        if page:
+            yield self._get_page(query, table_name, filters, page)
+
+    @timed(CELONIS_EXTRACTION_DURATION, method="iter_dataframes_from_celonis")
+    def _get_page(
+        self,
+        query: Dict[str, DataModelTableColumn],
+        table_name: str,
+        filters: List[str],
+        cases: List[str],
+    ) -> pd.DataFrame:
+        """Extract the events of the given cases that pass the filters."""
+        page_filters = filters + build_extract_filters(table_name, cases=cases)
+        return self._run_pql(query, page_filters)
+
+    def _get_column_query(
+        self, columns: List[str], table_name: str
+    ) -> Union[Dict[str, DataModelTableColumn], None]:
+        """Map the given columns to the columns of the table in the data model.
+
+        Args:
+            columns: Names of the columns.
+            table_name: Name of the table.
+
+        Returns:
+            Dictionary of the column names and columns or None if the data
+            model, the table or a column does not exist.
+        """
         if not self.data_model:
             print("Data model does not exist. Cannot get table.")
             return None
         try:
             table = self.data_model.get_tables().find(table_name)
-        except PyCelonisNotFoundError:
+        except pycelonis_errors.PyCelonisNotFoundError:
             print(f"Table {table_name} not found in data model.")
             return None
 
-        activities_columns = table.get_columns()
+        table_columns = table.get_columns()
+        try:
+            return {column: table_columns.find(column) for column in columns}
+        except pycelonis_errors.PyCelonisNotFoundError:
+            print(f"Columns {columns} not found in table {table_name}.")
+            return None
 
-        pql_df = pqlDataFrame(
-            {
-                "case:concept:name": activities_columns.find("case:concept:name"),
-                "concept:name": activities_columns.find("concept:name"),
-                "time:timestamp": activities_columns.find("time:timestamp"),
-                "org:resource": activities_columns.find("org:resource"),
-                "org:group": activities_columns.find("org:group"),
-            },
-            data_model=self.data_model,
+    def _get_case_sizes(self, table_name: str, filters: List[str]) -> pd.DataFrame:
+        """Count the events per case that pass the filters.
+
+        Args:
+            table_name: Name of the table.
+            filters: PQL filters of the events.
+
+        Returns:
+            DataFrame with the columns "Case" and "Events".
+        """
+        case_column = f'"{table_name}"."case:concept:name"'
+        return self._run_pql(
+            {"Case": case_column, "Events": f"COUNT({case_column})"}, filters
         )
-        pandas_df: pd.DataFrame = pql_df.to_pandas()
-        pandas_df["time:timestamp"] = pandas_df["time:timestamp"].dt.tz_localize("UTC")  # type: ignore
-        return pandas_df
 
+    @timed(CELONIS_EXTRACTION_DURATION, method="get_dataframe_from_celonis")
     def get_dataframe_from_celonis(
         self,
         pql_query: MutableMapping[str, SeriesLike | DataModelTableColumn],
@@ -274,10 +1030,43 @@ class CelonisConnectionManager:
         if not pql_query:
             print("PQL query is empty. Cannot get dataframe.")
             return None
-        df = pqlDataFrame(
-            pql_query,
-            data_model=self.data_model,
+        return self._run_pql(pql_query)
+
+    def _run_pql(
+        self,
+        pql_query: MutableMapping[str, SeriesLike | DataModelTableColumn],
+        filters: Optional[List[str]] = None,
+    ) -> pd.DataFrame:
+        """Run a PQL query against the data model in Celonis and profile it.
+
+        Every query is a round trip to Celonis. Its duration, its size and
+        the function that issued it are recorded by the PQL profiler.
+
+        Args:
+            pql_query: PQL query used to define the dataframe.
+            filters: PQL filters of the query.
+
+        Returns:
+            DataFrame object.
+        """
+        start = time.perf_counter()
+        df = self._execute_pql(pql_query, filters)
+        get_pql_profiler().record(
+            format_query(pql_query, filters),
+            time.perf_counter() - start,
+            rows=len(df),
+            columns=len(df.columns),
+            caller=find_caller(),
         )
+        return df
+
+    def _execute_pql(
+        self,
+        pql_query: MutableMapping[str, SeriesLike | DataModelTableColumn],
+        filters: Optional[List[str]] = None,
+    ) -> pd.DataFrame:
+        """Send a PQL query to Celonis, see _run_pql."""
+        df = pqlDataFrame(pql_query, data_model=self.data_model, filters=filters)
         return df.to_pandas()
 
     def get_table(self, table_name: str = "ACTIVITIES") -> Union[DataModelTable, None]:
@@ -298,7 +1087,7 @@ class CelonisConnectionManager:
             return None
         try:
             return self.data_model.get_tables().find(table_name)
-        except PyCelonisNotFoundError:
+        except pycelonis_errors.PyCelonisNotFoundError:
             print(f"Table {table_name} not found in data model.")
             return None
 
@@ -323,7 +1112,7 @@ class CelonisConnectionManager:
         try:
             table = self.data_model.get_tables().find(table_name)
             return table.get_columns()
-        except PyCelonisNotFoundError:
+        except pycelonis_errors.PyCelonisNotFoundError:
             print(f"Table {table_name} not found in data model.")
             return None
 
@@ -348,3 +1137,42 @@ class CelonisConnectionManager:
             print("Data model does not exist. Cannot get data model.")
             return None
         return self.data_model
+
+    def acquire(self) -> None:
+        """Mark the manager as used, e.g. by a running job.
+
+        Every call must be followed by a call of release.
+        """
+        with self._usage_lock:
+            self._users += 1
+
+    def release(self) -> None:
+        """End a use of the manager.
+
+        If close_when_unused was called meanwhile and this was the last
+        user, the manager is closed now.
+        """
+        with self._usage_lock:
+            self._users -= 1
+            close = self._users == 0 and self._close_requested
+        if close:
+            self.close()
+
+    def close_when_unused(self) -> None:
+        """Close the manager once no request or job uses it anymore."""
+        with self._usage_lock:
+            if self._users > 0:
+                self._close_requested = True
+                return
+        self.close()
+
+    def close(self) -> None:
+        """Close the HTTP session of the Celonis client.
+
+        The client keeps its connections alive between requests, so a
+        manager that is no longer used should be closed.
+        """
+        client = getattr(self.celonis, "client", None)
+        close = getattr(client, "close", None)
+        if callable(close):
+            close()
@@ -0,0 +1,276 @@
+"""The module keeps the connections to Celonis warm between requests.
+
+Creating a CelonisConnectionManager connects to Celonis and looks up the
+data pool and the data model, which takes several seconds. The pool keeps
+one manager per (base URL, data pool, data model), so its HTTP session is
+reused by every request, and creates it ahead of the first request when
+the credentials are known. Managers that were not used for a while are
+closed, and a manager is replaced when the API token of its key changes.
+A removed manager that a request or job still uses is only closed once
+it was released, see CelonisConnectionManager.acquire.
+
+The pool is configured with the environment variables or the .env file:
+
+    CELONIS_POOL_MAX_SIZE=4           # Number of managers that are kept
+    CELONIS_POOL_IDLE_SECONDS=1800    # Unused managers are closed after this
+
+Example:
+    pool = CelonisConnectionPool()
+    pool.warm_up_in_background(base_url, pool_name, model_name, api_token)
+    celonis = pool.get(base_url, pool_name, model_name, api_token)
+"""
+
+import threading
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+from backend.celonis_connection.celonis_connection_manager import (
+    CelonisConnectionManager,
+)
+
+# The base URL, the data pool name and the data model name of a connection
+ConnectionKey = Tuple[str, str, str]
+
+# Creates a manager from the base URL, data pool, data model and API token
+ManagerFactory = Callable[[str, str, str, str], CelonisConnectionManager]
+
+# **************** Settings ****************
+
+
+class ConnectionPoolSettings(BaseSettings):
+    """Settings of the connection pool, loaded from the environment or .env."""
+
+    CELONIS_POOL_MAX_SIZE: int = 4
+    CELONIS_POOL_IDLE_SECONDS: float = 1800.0
+
+    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
+
+
+@lru_cache
+def get_pool_settings() -> ConnectionPoolSettings:
+    """Returns the pool settings, loaded once per process."""
+    return ConnectionPoolSettings()
+
+
+# **************** Pool ****************
+
+
+def _create_manager(
+    base_url: str, data_pool_name: str, data_model_name: str, api_token: str
+) -> CelonisConnectionManager:
+    return CelonisConnectionManager(
+        base_url=base_url,
+        data_pool_name=data_pool_name,
+        data_model_name=data_model_name,
+        api_token=api_token,
+    )
+
+
+@dataclass
+class _PooledConnection:
+    """A manager of the pool and when it was last used."""
+
+    manager: CelonisConnectionManager
+    api_token: str
+    last_used: float = field(default_factory=time.monotonic)
+
+
+class CelonisConnectionPool:
+    """Keeps one CelonisConnectionManager per connection key.
+
+    The pool is safe to use from several threads. Concurrent requests for
+    a key that has no manager yet wait for the same manager instead of
+    each connecting to Celonis.
+
+    Attributes:
+        max_size: The maximum number of managers, the least recently used
+            one is closed when a new one exceeds it.
+        idle_seconds: Managers unused for this long are closed.
+    """
+
+    max_size: int
+    idle_seconds: float
+
+    def __init__(
+        self,
+        max_size: int = 4,
+        idle_seconds: float = 1800.0,
+        factory: ManagerFactory = _create_manager,
+    ) -> None:
+        """Initialize an empty pool.
+
+        Args:
+            max_size: The maximum number of managers.
+            idle_seconds: Managers unused for this long are closed.
+            factory: Creates a manager from the base URL, the data pool
+              and data model names and the API token.
+        """
+        self.max_size = max_size
+        self.idle_seconds = idle_seconds
+        self._factory = factory
+        self._connections: Dict[ConnectionKey, _PooledConnection] = {}
+        self._lock = threading.Lock()
+        self._key_locks: Dict[ConnectionKey, threading.Lock] = {}
+
+    def get(
+        self,
+        base_url: str,
+        data_pool_name: str,
+        data_model_name: str,
+        api_token: str,
+    ) -> CelonisConnectionManager:
+        """Returns the manager of a connection, creating it if needed.
+
+        Args:
+            base_url: Base URL of the Celonis instance.
+            data_pool_name: Name of the data pool.
+            data_model_name: Name of the data model.
+            api_token: API token for the Celonis instance. A manager
+              created with another token is replaced.
+
+        Returns:
+            The manager of the connection.
+        """
+        key = (base_url, data_pool_name, data_model_name)
+        self.evict_idle()
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                conn = self._connections.get(key)
+                if conn is not None and conn.api_token == api_token:
+                    conn.last_used = time.monotonic()
+                    return conn.manager
+            # Connect outside of the pool lock, other keys are not blocked
+            manager = self._factory(
+                base_url, data_pool_name, data_model_name, api_token
+            )
+            with self._lock:
+                replaced = self._connections.pop(key, None)
+                self._connections[key] = _PooledConnection(manager, api_token)
+                evicted = self._evict_over_capacity()
+        if replaced is not None:
+            evicted.append(replaced)
+        self._close(evicted)
+        return manager
+
+    def find(
+        self, base_url: str, data_pool_name: str, data_model_name: str
+    ) -> Optional[CelonisConnectionManager]:
+        """Returns the manager of a connection if the pool has one.
+
+        Unlike get, no API token is needed and no manager is created.
+
+        Args:
+            base_url: Base URL of the Celonis instance.
+            data_pool_name: Name of the data pool.
+            data_model_name: Name of the data model.
+
+        Returns:
+            The manager of the connection, or None if there is none.
+        """
+        self.evict_idle()
+        with self._lock:
+            conn = self._connections.get((base_url, data_pool_name, data_model_name))
+            if conn is None:
+                return None
+            conn.last_used = time.monotonic()
+            return conn.manager
+
+    def warm_up_in_background(
+        self,
+        base_url: str,
+        data_pool_name: str,
+        data_model_name: str,
+        api_token: str,
+    ) -> threading.Thread:
+        """Creates the manager of a connection in a background thread.
+
+        Errors are printed, the next request then retries the connection.
+
+        Args:
+            base_url: Base URL of the Celonis instance.
+            data_pool_name: Name of the data pool.
+            data_model_name: Name of the data model.
+            api_token: API token for the Celonis instance.
+
+        Returns:
+            The started thread.
+        """
+
+        def warm_up() -> None:
+            try:
+                self.get(base_url, data_pool_name, data_model_name, api_token)
+            except Exception as e:
+                print(f"Could not warm up the Celonis connection: {e}")
+
+        thread = threading.Thread(target=warm_up, name="celonis-warm-up", daemon=True)
+        thread.start()
+        return thread
+
+    def evict_idle(self) -> int:
+        """Closes the managers that were not used for idle_seconds.
+
+        Returns:
+            The number of closed managers.
+        """
+        deadline = time.monotonic() - self.idle_seconds
+        with self._lock:
+            idle = [
+                key
+                for key, conn in self._connections.items()
+                if conn.last_used < deadline
+            ]
+            evicted = [self._connections.pop(key) for key in idle]
+        self._close(evicted)
+        return len(evicted)
+
+    def _evict_over_capacity(self) -> List[_PooledConnection]:
+        """Removes the least recently used managers above max_size."""
+        evicted = []
+        while len(self._connections) > max(self.max_size, 1):
+            key = min(self._connections, key=lambda k: self._connections[k].last_used)
+            evicted.append(self._connections.pop(key))
+        return evicted
+
+    @staticmethod
+    def _close(connections: List[_PooledConnection]) -> None:
+        for conn in connections:
+            try:
+                conn.manager.close_when_unused()
+            except Exception as e:
+                print(f"Could not close the Celonis connection: {e}")
+
+    def keys(self) -> List[ConnectionKey]:
+        """Returns the keys of the pooled managers."""
+        with self._lock:
+            return list(self._connections)
+
+    def close(self) -> None:
+        """Closes all managers of the pool."""
+        with self._lock:
+            connections = list(self._connections.values())
+            self._connections.clear()
+        self._close(connections)
+
+
+def create_connection_pool(
+    settings: Optional[ConnectionPoolSettings] = None,
+) -> CelonisConnectionPool:
+    """Returns a pool configured by the settings.
+
+    Args:
+        settings: The pool settings, by default loaded from the environment.
+
+    Returns:
+        The empty pool.
+    """
+    settings = settings or get_pool_settings()
+    return CelonisConnectionPool(
+        max_size=settings.CELONIS_POOL_MAX_SIZE,
+        idle_seconds=settings.CELONIS_POOL_IDLE_SECONDS,
+    )
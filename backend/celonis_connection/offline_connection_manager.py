@@ -0,0 +1,328 @@
+"""The module provides an offline stand-in for the CelonisConnectionManager.
+
+The OfflineCelonisConnectionManager keeps the data pool and the data
+model in memory and answers the PQL queries with the PQLEmulator, so the
+code that queries Celonis can be run, tested and benchmarked without a
+Celonis instance. Every call that would be a round trip to Celonis
+sleeps for a configurable latency.
+
+Example:
+    celonis = OfflineCelonisConnectionManager(latency=0.05)
+    celonis.add_dataframe(df)
+    celonis.create_table()
+    app.state.celonis = celonis
+"""
+
+import itertools
+import threading
+import time
+import uuid
+from collections.abc import MutableMapping
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+from pycelonis_core.base.collection import CelonisCollection
+
+from backend.celonis_connection.celonis_connection_manager import (
+    CelonisConnectionManager,
+)
+from backend.celonis_connection.pql_emulator import PQLEmulator
+
+_table_ids = itertools.count(1)
+
+
+def _round_trip(latency: float) -> None:
+    """Simulates the latency of a round trip to Celonis."""
+    if latency > 0:
+        time.sleep(latency)
+
+
+def _to_celonis_types(df: pd.DataFrame) -> pd.DataFrame:
+    """Converts the columns to the types Celonis returns them in.
+
+    Celonis stores timestamps as naive timestamps in UTC and categories
+    as plain strings.
+
+    Args:
+        df: The DataFrame to upload.
+
+    Returns:
+        The DataFrame as it is stored in Celonis.
+    """
+    df = df.copy()
+    for column in df.columns:
+        if isinstance(df[column].dtype, pd.DatetimeTZDtype):
+            df[column] = df[column].dt.tz_convert("UTC").dt.tz_localize(None)
+        elif isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype(object)
+    return df
+
+
+class OfflineDataPoolTable:
+    """A table of the offline data pool."""
+
+    name: str
+    data: pd.DataFrame
+    latency: float
+
+    def __init__(self, name: str, data: pd.DataFrame, latency: float) -> None:
+        """Initialize the table with its data."""
+        self.name = name
+        self.data = _to_celonis_types(data)
+        self.latency = latency
+
+    def append(self, df: pd.DataFrame) -> None:
+        """Append rows to the table, see DataPoolTable.append."""
+        _round_trip(self.latency)
+        self.data = pd.concat([self.data, _to_celonis_types(df)], ignore_index=True)
+
+
+class OfflineDataPool:
+    """An offline data pool that keeps its tables in memory."""
+
+    name: str
+    tables: Dict[str, OfflineDataPoolTable]
+    latency: float
+
+    def __init__(self, name: str, latency: float) -> None:
+        """Initialize an empty data pool."""
+        self.name = name
+        self.tables = {}
+        self.latency = latency
+
+    def get_tables(self) -> CelonisCollection[OfflineDataPoolTable]:
+        """Return the tables of the data pool."""
+        return CelonisCollection(self.tables.values())
+
+    def create_table(
+        self,
+        df: pd.DataFrame,
+        table_name: str,
+        drop_if_exists: bool = False,
+        force: bool = False,
+    ) -> OfflineDataPoolTable:
+        """Create a table from a DataFrame, see DataPool.create_table.
+
+        Raises:
+            ValueError: If the table exists and drop_if_exists is False.
+        """
+        _round_trip(self.latency)
+        if table_name in self.tables and not drop_if_exists:
+            raise ValueError(f"Table '{table_name}' already exists.")
+        self.tables[table_name] = OfflineDataPoolTable(table_name, df, self.latency)
+        return self.tables[table_name]
+
+
+class OfflineDataModelTableColumn:
+    """A column of a table of the offline data model."""
+
+    name: str
+    table_name: str
+
+    def __init__(self, name: str, table_name: str) -> None:
+        """Initialize the column of the given table."""
+        self.name = name
+        self.table_name = table_name
+
+
+class OfflineDataModelTable:
+    """A table of the offline data model."""
+
+    id: str
+    name: str
+    alias: str
+    data_model: "OfflineDataModel"
+
+    def __init__(self, name: str, alias: str, data_model: "OfflineDataModel") -> None:
+        """Initialize the table with the data pool table it loads."""
+        self.id = f"offline-table-{next(_table_ids)}"
+        self.name = name
+        self.alias = alias
+        self.data_model = data_model
+
+    def get_columns(self) -> CelonisCollection[OfflineDataModelTableColumn]:
+        """Return the columns of the loaded table."""
+        data = self.data_model.loaded_tables.get(self.alias)
+        columns = [] if data is None else data.columns
+        return CelonisCollection(
+            OfflineDataModelTableColumn(column, self.alias) for column in columns
+        )
+
+    def delete(self) -> None:
+        """Remove the table from the data model."""
+        self.data_model.tables.remove(self)
+
+
+class OfflineDataModel:
+    """An offline data model that answers PQL queries with the PQLEmulator.
+
+    Like in Celonis, the data model only sees the data of the data pool
+    tables as of its last reload.
+    """
+
+    name: str
+    data_pool: OfflineDataPool
+    tables: List[OfflineDataModelTable]
+    loaded_tables: Dict[str, pd.DataFrame]
+    process_configuration: Optional[Dict[str, str]]
+    emulator: Optional[PQLEmulator]
+    latency: float
+
+    def __init__(self, name: str, data_pool: OfflineDataPool, latency: float) -> None:
+        """Initialize an empty data model of the data pool."""
+        self.name = name
+        self.data_pool = data_pool
+        self.tables = []
+        self.loaded_tables = {}
+        self.process_configuration = None
+        self.emulator = None
+        self.latency = latency
+
+    def get_tables(self) -> CelonisCollection[OfflineDataModelTable]:
+        """Return the tables of the data model."""
+        return CelonisCollection(self.tables)
+
+    def add_table(self, name: str, alias: str) -> OfflineDataModelTable:
+        """Add a data pool table to the data model."""
+        _round_trip(self.latency)
+        table = OfflineDataModelTable(name, alias or name, self)
+        self.tables.append(table)
+        return table
+
+    def create_process_configuration(
+        self,
+        activity_table_id: str,
+        case_id_column: str,
+        activity_column: str,
+        timestamp_column: str,
+    ) -> None:
+        """Configure the activity table of the data model."""
+        _round_trip(self.latency)
+        self.process_configuration = {
+            "activity_table_id": activity_table_id,
+            "case_id_column": case_id_column,
+            "activity_column": activity_column,
+            "timestamp_column": timestamp_column,
+        }
+
+    def reload(self, force_complete: bool = True) -> None:
+        """Load the data of the data pool tables into the data model."""
+        _round_trip(self.latency)
+        self.loaded_tables = {
+            table.alias: self.data_pool.tables[table.name].data
+            for table in self.tables
+            if table.name in self.data_pool.tables
+        }
+        self.emulator = None
+        config = self.process_configuration
+        for table in self.tables:
+            if config and table.id == config["activity_table_id"]:
+                self.emulator = PQLEmulator(
+                    self.loaded_tables[table.alias],
+                    table_name=table.alias,
+                    case_id_column=config["case_id_column"],
+                    activity_column=config["activity_column"],
+                    timestamp_column=config["timestamp_column"],
+                )
+
+    def evaluate(
+        self, pql_query: MutableMapping[str, Any], filters: Optional[List[str]]
+    ) -> pd.DataFrame:
+        """Evaluate a PQL query over the activity table.
+
+        Raises:
+            ValueError: If there is no loaded activity table.
+        """
+        if self.emulator is None:
+            raise ValueError("The data model has no loaded activity table.")
+        query = {
+            name: (
+                expression
+                if isinstance(expression, str)
+                else f'"{expression.table_name}"."{expression.name}"'
+            )
+            for name, expression in pql_query.items()
+        }
+        return self.emulator.evaluate(query, filters)
+
+
+class OfflineCelonisConnectionManager(CelonisConnectionManager):
+    """Stand-in for the CelonisConnectionManager without a Celonis instance.
+
+    All methods of the CelonisConnectionManager are inherited, only the
+    data pool, the data model and the execution of PQL queries are
+    replaced by offline versions.
+
+    Attributes:
+        latency: Seconds every round trip to Celonis takes.
+        query_count: Number of PQL queries run so far.
+        rows_transferred: Number of rows the PQL queries returned so far.
+        bytes_transferred: In-memory size of the DataFrames the PQL queries
+            returned so far, as an estimate of the transferred data.
+    """
+
+    latency: float
+    query_count: int
+    rows_transferred: int
+    bytes_transferred: int
+
+    def __init__(
+        self,
+        data_pool_name: str = "offline",
+        data_model_name: str = "offline",
+        latency: float = 0.0,
+    ) -> None:
+        """Initialize an empty offline data pool and data model.
+
+        Args:
+            data_pool_name: Name of the data pool.
+            data_model_name: Name of the data model.
+            latency: Seconds every round trip to Celonis takes.
+        """
+        self.base_url = ""
+        self.api_token = ""
+        self.data_pool_name = data_pool_name
+        self.data_model_name = data_model_name
+        self.data_frame = pd.DataFrame()
+        self.pending_upload = None
+        self.commit_lock = threading.Lock()
+        self.extract_version = uuid.uuid4().hex
+        self._usage_lock = threading.Lock()
+        self._users = 0
+        self._close_requested = False
+        self.celonis = None
+        self.latency = latency
+        self.reset_counters()
+        self.data_pool = OfflineDataPool(data_pool_name, latency)  # type: ignore
+        self.data_model = OfflineDataModel(  # type: ignore
+            data_model_name,
+            self.data_pool,  # type: ignore
+            latency,
+        )
+
+    def _execute_pql(
+        self,
+        pql_query: MutableMapping[str, Any],
+        filters: Optional[List[str]] = None,
+    ) -> pd.DataFrame:
+        """Run a PQL query with the PQLEmulator.
+
+        Args:
+            pql_query: PQL query used to define the dataframe.
+            filters: PQL filters of the query.
+
+        Returns:
+            DataFrame object.
+        """
+        self.query_count += 1
+        _round_trip(self.latency)
+        result = self.data_model.evaluate(pql_query, filters)  # type: ignore
+        self.rows_transferred += len(result)
+        self.bytes_transferred += int(result.memory_usage(deep=True).sum())
+        return result
+
+    def reset_counters(self) -> None:
+        """Reset the number of queries and the transferred rows and bytes."""
+        self.query_count = 0
+        self.rows_transferred = 0
+        self.bytes_transferred = 0
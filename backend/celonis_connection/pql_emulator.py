@@ -0,0 +1,736 @@
+"""The module provides a pandas based emulator of the PQL used in this project.
+
+It evaluates PQL queries and filters over an event log held in memory,
+so the code paths that query Celonis can be run and benchmarked without
+a Celonis instance. Only the subset of PQL that is used in
+backend/pql_queries and in the extracts of the CelonisConnectionManager
+is supported:
+
+- columns of the activity table and string, number and date literals,
+- SOURCE and TARGET,
+- COUNT, COUNT DISTINCT, MIN, MAX, SUM and AVG,
+- VARIANT,
+- MATCH_PROCESS with EVENTUALLY and DIRECT connections,
+- MATCH_ACTIVITIES with NODE, EXCLUDING, STARTING and ENDING,
+- CASE WHEN, comparisons, IN, AND, OR, NOT and arithmetic,
+- FILTER statements with these conditions.
+
+Like in Celonis, a query whose columns do not aggregate returns one row
+per record, otherwise the aggregations are grouped by the other columns.
+"""
+
+import operator
+import re
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+    TypeAlias,
+)
+
+import numpy as np
+import pandas as pd
+
+# **************** Type Aliases ****************
+
+# A node of a parsed expression, a tuple of its kind and its operands
+Node: TypeAlias = Tuple[Any, ...]
+Token: TypeAlias = Tuple[str, str]
+
+# **************** Tokenizer ****************
+
+_TOKEN_PATTERN = re.compile(
+    r"""
+    (?P<space>\s+)
+    | (?P<date>\{d'[^']*'\})
+    | (?P<string>'(?:\\.|[^'\\])*')
+    | (?P<identifier>"[^"]*")
+    | (?P<number>\d+(?:\.\d+)?)
+    | (?P<operator>>=|<=|<>|!=|[=<>+\-*/])
+    | (?P<punctuation>[()\[\],.;])
+    | (?P<word>[A-Za-z_][A-Za-z_0-9]*)
+    """,
+    re.VERBOSE,
+)
+
+_COMPARISONS: Dict[str, Callable[[Any, Any], Any]] = {
+    "=": operator.eq,
+    "!=": operator.ne,
+    "<>": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+_ARITHMETIC: Dict[str, Callable[[Any, Any], Any]] = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": operator.truediv,
+}
+
+_AGGREGATIONS = ("COUNT", "MIN", "MAX", "SUM", "AVG")
+
+# The levels an expression can be evaluated at, from coarse to fine. An
+# expression can be broadcast from a coarser to a finer level.
+_SCALAR, _CASE, _EVENT, _PAIR = -1, 0, 1, 2
+# The rows of the result of a query with aggregations
+_GROUP = 3
+
+
+def _tokenize(text: str) -> List[Token]:
+    """Splits a PQL statement into tokens.
+
+    Args:
+        text: The PQL statement.
+
+    Returns:
+        The kind and text of every token, without the whitespace.
+
+    Raises:
+        ValueError: If the statement contains an unknown character.
+    """
+    tokens: List[Token] = []
+    position = 0
+    while position < len(text):
+        match = _TOKEN_PATTERN.match(text, position)
+        if not match:
+            raise ValueError(f"Unexpected character in PQL: {text[position:]!r}")
+        kind = match.lastgroup or ""
+        if kind != "space":
+            tokens.append((kind, match.group()))
+        position = match.end()
+    return tokens
+
+
+def _unquote(literal: str) -> str:
+    """Returns the value of a PQL string literal."""
+    return re.sub(r"\\(.)", r"\1", literal[1:-1])
+
+
+# **************** Parser ****************
+
+
+class _Parser:
+    """Recursive descent parser of PQL expressions and filters."""
+
+    tokens: List[Token]
+    position: int
+
+    def __init__(self, text: str) -> None:
+        """Tokenizes the given PQL statement."""
+        self.tokens = _tokenize(text)
+        self.position = 0
+
+    def parse_expression(self) -> Node:
+        """Parses a single expression that spans the whole statement."""
+        node = self._or()
+        self._expect_end()
+        return node
+
+    def parse_filter(self) -> Node:
+        """Parses a FILTER statement and returns its condition."""
+        self._expect_word("FILTER")
+        node = self._or()
+        self._accept("punctuation", ";")
+        self._expect_end()
+        return node
+
+    # **************** Token Helpers ****************
+
+    def _peek(self, offset: int = 0) -> Token:
+        index = self.position + offset
+        return self.tokens[index] if index < len(self.tokens) else ("end", "")
+
+    def _next(self) -> Token:
+        token = self._peek()
+        if token[0] == "end":
+            raise ValueError("Unexpected end of PQL statement.")
+        self.position += 1
+        return token
+
+    def _is_word(self, *words: str, offset: int = 0) -> bool:
+        kind, text = self._peek(offset)
+        return kind == "word" and text.upper() in words
+
+    def _accept(self, kind: str, text: str) -> bool:
+        if self._peek() == (kind, text):
+            self.position += 1
+            return True
+        return False
+
+    def _accept_word(self, word: str) -> bool:
+        if self._is_word(word):
+            self.position += 1
+            return True
+        return False
+
+    def _expect(self, kind: str, text: str) -> None:
+        if not self._accept(kind, text):
+            raise ValueError(f"Expected '{text}' in PQL, found '{self._peek()[1]}'.")
+
+    def _expect_word(self, word: str) -> None:
+        if not self._accept_word(word):
+            raise ValueError(f"Expected '{word}' in PQL, found '{self._peek()[1]}'.")
+
+    def _expect_end(self) -> None:
+        if self._peek()[0] != "end":
+            raise ValueError(f"Unexpected '{self._peek()[1]}' in PQL.")
+
+    # **************** Grammar ****************
+
+    def _or(self) -> Node:
+        node = self._and()
+        while self._accept_word("OR"):
+            node = ("logical", "OR", node, self._and())
+        return node
+
+    def _and(self) -> Node:
+        node = self._not()
+        while self._accept_word("AND"):
+            node = ("logical", "AND", node, self._not())
+        return node
+
+    def _not(self) -> Node:
+        if self._accept_word("NOT"):
+            return ("not", self._not())
+        return self._comparison()
+
+    def _comparison(self) -> Node:
+        node = self._additive()
+        kind, text = self._peek()
+        if kind == "operator" and text in _COMPARISONS:
+            self.position += 1
+            return ("compare", text, node, self._additive())
+        negated = self._is_word("NOT") and self._is_word("IN", offset=1)
+        if negated:
+            self.position += 1
+        if self._accept_word("IN"):
+            return ("in", node, self._literal_list("(", ")"), negated)
+        return node
+
+    def _additive(self) -> Node:
+        node = self._multiplicative()
+        while self._peek() in (("operator", "+"), ("operator", "-")):
+            node = ("arithmetic", self._next()[1], node, self._multiplicative())
+        return node
+
+    def _multiplicative(self) -> Node:
+        node = self._unary()
+        while self._peek() in (("operator", "*"), ("operator", "/")):
+            node = ("arithmetic", self._next()[1], node, self._unary())
+        return node
+
+    def _unary(self) -> Node:
+        if self._accept("operator", "-"):
+            return ("arithmetic", "-", ("literal", 0), self._unary())
+        return self._primary()
+
+    def _primary(self) -> Node:
+        kind, text = self._next()
+        if kind == "identifier":
+            self._expect("punctuation", ".")
+            column_kind, column = self._next()
+            if column_kind != "identifier":
+                raise ValueError(f"Expected a column name after {text} in PQL.")
+            return ("column", text[1:-1], column[1:-1])
+        if kind == "string":
+            return ("literal", _unquote(text))
+        if kind == "number":
+            return ("literal", float(text) if "." in text else int(text))
+        if kind == "date":
+            return ("literal", pd.Timestamp(text[3:-2]))
+        if (kind, text) == ("punctuation", "("):
+            node = self._or()
+            self._expect("punctuation", ")")
+            return node
+        if kind == "word":
+            return self._word(text.upper())
+        raise ValueError(f"Unexpected '{text}' in PQL.")
+
+    def _word(self, word: str) -> Node:
+        if word == "NULL":
+            return ("literal", None)
+        if word == "CASE":
+            return self._case_when()
+        self._expect("punctuation", "(")
+        if word in _AGGREGATIONS:
+            distinct = word == "COUNT" and self._accept_word("DISTINCT")
+            node: Node = ("aggregate", word, distinct, self._or())
+        elif word in ("SOURCE", "TARGET", "VARIANT"):
+            node = (word.lower(), self._or())
+        elif word == "MATCH_PROCESS":
+            node = self._match_process()
+        elif word == "MATCH_ACTIVITIES":
+            node = self._match_activities()
+        else:
+            raise ValueError(f"Unsupported PQL function '{word}'.")
+        self._expect("punctuation", ")")
+        return node
+
+    def _case_when(self) -> Node:
+        branches = []
+        while self._accept_word("WHEN"):
+            condition = self._or()
+            self._expect_word("THEN")
+            branches.append((condition, self._or()))
+        if not branches:
+            raise ValueError("Expected 'WHEN' after 'CASE' in PQL.")
+        default: Node = ("literal", None)
+        if self._accept_word("ELSE"):
+            default = self._or()
+        self._expect_word("END")
+        return ("case_when", branches, default)
+
+    def _literal_list(self, opening: str, closing: str) -> List[Any]:
+        self._expect("punctuation", opening)
+        values = []
+        while True:
+            node = self._unary()
+            if node[0] != "literal":
+                raise ValueError("Expected a list of literals in PQL.")
+            values.append(node[1])
+            if not self._accept("punctuation", ","):
+                break
+        self._expect("punctuation", closing)
+        return values
+
+    def _optional_column(self) -> Node:
+        """Parses the optional activity column argument of MATCH_* functions."""
+        if self._peek()[0] != "identifier":
+            return ("activity_column",)
+        column = self._primary()
+        self._expect("punctuation", ",")
+        return column
+
+    def _match_process(self) -> Node:
+        column = self._optional_column()
+        nodes: Dict[str, List[Any]] = {}
+        while self._accept_word("NODE"):
+            activities = self._literal_list("[", "]")
+            self._expect_word("AS")
+            nodes[self._next()[1]] = activities
+            self._accept("punctuation", ",")
+        connections = []
+        if self._accept_word("CONNECTED"):
+            self._expect_word("BY")
+            while self._is_word("EVENTUALLY", "DIRECT"):
+                connection = self._next()[1].upper()
+                self._expect("punctuation", "[")
+                source = self._next()[1]
+                self._expect("punctuation", ",")
+                target = self._next()[1]
+                self._expect("punctuation", "]")
+                for name in (source, target):
+                    if name not in nodes:
+                        raise ValueError(f"Unknown node '{name}' in MATCH_PROCESS.")
+                connections.append((connection, source, target))
+                if not self._accept("punctuation", ","):
+                    break
+        return ("match_process", column, nodes, connections)
+
+    def _match_activities(self) -> Node:
+        column = self._optional_column()
+        conditions = []
+        while self._is_word("NODE", "EXCLUDING", "STARTING", "ENDING"):
+            kind = self._next()[1].upper()
+            conditions.append((kind, self._literal_list("[", "]")))
+            if not self._accept("punctuation", ","):
+                break
+        return ("match_activities", column, conditions)
+
+
+def parse_pql(expression: str) -> Node:
+    """Parses a PQL expression.
+
+    Args:
+        expression: The PQL expression, e.g. a column of a query.
+
+    Returns:
+        The parsed expression.
+
+    Raises:
+        ValueError: If the expression is not part of the supported PQL.
+    """
+    return _Parser(expression).parse_expression()
+
+
+def parse_pql_filter(statement: str) -> Node:
+    """Parses a PQL FILTER statement.
+
+    Args:
+        statement: The FILTER statement.
+
+    Returns:
+        The parsed condition of the filter.
+
+    Raises:
+        ValueError: If the statement is not part of the supported PQL.
+    """
+    return _Parser(statement).parse_filter()
+
+
+def _operands(node: Node) -> List[Node]:
+    """Returns the expressions an expression is composed of."""
+    if node[0] == "case_when":
+        return [part for branch in node[1] for part in branch] + [node[2]]
+    if node[0] in ("literal", "column", "activity_column"):
+        return []
+    return [part for part in node[1:] if isinstance(part, tuple)]
+
+
+def _contains_aggregation(node: Node) -> bool:
+    """Checks whether an expression contains an aggregation."""
+    return node[0] == "aggregate" or any(
+        _contains_aggregation(operand) for operand in _operands(node)
+    )
+
+
+# **************** Evaluation ****************
+
+
+class PQLEmulator:
+    """Evaluates PQL queries over an event log held in memory.
+
+    The events of a case are ordered by their timestamp, as in the
+    activity table of a Celonis data model.
+
+    Attributes:
+        table_name: The name of the activity table in the queries.
+        case_id_column: The name of the case ID column.
+        activity_column: The name of the activity column.
+        timestamp_column: The name of the timestamp column.
+        log: The event log, ordered by case and timestamp.
+    """
+
+    table_name: str
+    case_id_column: str
+    activity_column: str
+    timestamp_column: str
+    log: pd.DataFrame
+
+    def __init__(
+        self,
+        log: pd.DataFrame,
+        table_name: str = "ACTIVITIES",
+        case_id_column: str = "case:concept:name",
+        activity_column: str = "concept:name",
+        timestamp_column: str = "time:timestamp",
+    ) -> None:
+        """Initializes the emulator with an event log.
+
+        Args:
+            log: The event log.
+            table_name: The name of the activity table in the queries.
+            case_id_column: The name of the case ID column.
+            activity_column: The name of the activity column.
+            timestamp_column: The name of the timestamp column.
+        """
+        self.table_name = table_name
+        self.case_id_column = case_id_column
+        self.activity_column = activity_column
+        self.timestamp_column = timestamp_column
+        self.log = log.sort_values(
+            [case_id_column, timestamp_column], kind="stable"
+        ).reset_index(drop=True)
+
+    def evaluate(
+        self, query: Mapping[str, str], filters: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """Evaluates a PQL query.
+
+        Args:
+            query: The names and PQL expressions of the columns.
+            filters: PQL FILTER statements, only events that pass every
+              filter are considered.
+
+        Returns:
+            The result of the query.
+
+        Raises:
+            ValueError: If the query is not part of the supported PQL.
+        """
+        events = self.log
+        for statement in filters or []:
+            mask = _Evaluation(self, events).filter_mask(parse_pql_filter(statement))
+            events = events[mask.to_numpy()].reset_index(drop=True)
+        return _Evaluation(self, events).query(
+            {name: parse_pql(expression) for name, expression in query.items()}
+        )
+
+
+class _Evaluation:
+    """Evaluates parsed expressions over the filtered events of the log."""
+
+    emulator: PQLEmulator
+    events: pd.DataFrame
+    cases: pd.Series
+    case_ids: pd.Series
+    sources: np.ndarray
+    targets: np.ndarray
+    group_keys: Optional[pd.DataFrame]
+    dimensions: List[Node]
+    dimension_level: int
+
+    def __init__(self, emulator: PQLEmulator, events: pd.DataFrame) -> None:
+        """Indexes the cases and directly-follows pairs of the events."""
+        self.emulator = emulator
+        self.events = events
+        self.cases = events[emulator.case_id_column]
+        self.case_ids = pd.Series(pd.unique(self.cases))
+        same_case = (self.cases.to_numpy()[:-1] == self.cases.to_numpy()[1:]).nonzero()
+        self.sources = same_case[0]
+        self.targets = self.sources + 1
+        self.group_keys = None
+        self.dimensions = []
+        self.dimension_level = _SCALAR
+
+    def filter_mask(self, condition: Node) -> pd.Series:
+        """Returns which events pass a filter condition."""
+        level = self._level(condition)
+        if level == _PAIR or _contains_aggregation(condition):
+            raise ValueError("Filters must be conditions on events or cases.")
+        return self._evaluate(condition, _EVENT).fillna(False).astype(bool)
+
+    def query(self, columns: Dict[str, Node]) -> pd.DataFrame:
+        """Evaluates the columns of a query."""
+        kpis = {name for name, node in columns.items() if _contains_aggregation(node)}
+        self.dimensions = [node for name, node in columns.items() if name not in kpis]
+        self.dimension_level = max(
+            [self._level(node) for node in self.dimensions], default=_SCALAR
+        )
+        if self.dimensions and self.dimension_level == _SCALAR:
+            self.dimension_level = _CASE
+
+        dimension_values = pd.DataFrame(
+            {
+                name: self._evaluate(node, self.dimension_level)
+                for name, node in columns.items()
+                if name not in kpis
+            },
+            index=pd.RangeIndex(self._size(self.dimension_level)),
+        )
+        if not kpis:
+            return dimension_values
+
+        self.group_keys = dimension_values.drop_duplicates().reset_index(drop=True)
+        if not self.dimensions:
+            self.group_keys = pd.DataFrame(index=pd.RangeIndex(1))
+        result = self.group_keys.copy()
+        for name in kpis:
+            result[name] = self._evaluate(columns[name], _GROUP)
+        return result[list(columns)]
+
+    # **************** Levels ****************
+
+    def _level(self, node: Node) -> int:
+        """Returns the finest level of the records an expression refers to."""
+        kind = node[0]
+        if kind in ("literal", "aggregate"):
+            return _SCALAR
+        if kind in ("column", "activity_column"):
+            return _EVENT
+        if kind in ("source", "target"):
+            return _PAIR
+        if kind in ("variant", "match_process", "match_activities"):
+            return _CASE
+        return max((self._level(part) for part in _operands(node)), default=_SCALAR)
+
+    def _size(self, level: int) -> int:
+        if level == _CASE:
+            return len(self.case_ids)
+        if level == _EVENT:
+            return len(self.events)
+        if level == _PAIR:
+            return len(self.sources)
+        if level == _GROUP:
+            return len(self.group_keys)  # type: ignore
+        return 1
+
+    def _from_events(self, values: pd.Series, level: int) -> pd.Series:
+        """Broadcasts values per event to a finer level."""
+        if level == _EVENT:
+            return values.reset_index(drop=True)
+        if level == _PAIR:
+            # Event columns in a query with SOURCE and TARGET refer to the source
+            return values.iloc[self.sources].reset_index(drop=True)
+        raise ValueError("Columns must be aggregated to be evaluated per case.")
+
+    def _from_cases(self, values: pd.Series, level: int) -> pd.Series:
+        """Broadcasts values per case ID to a finer level."""
+        if level == _CASE:
+            return values.reindex(self.case_ids.to_numpy()).reset_index(drop=True)
+        if level in (_EVENT, _PAIR):
+            return self._from_events(self.cases.map(values), level)
+        raise ValueError("Case functions must be aggregated in a query with KPIs.")
+
+    # **************** Expressions ****************
+
+    def _evaluate(self, node: Node, level: int) -> pd.Series:
+        """Evaluates an expression for every record of the given level."""
+        kind = node[0]
+        if kind == "literal":
+            return pd.Series(
+                [node[1]] * self._size(level), dtype=object
+            ).infer_objects()
+        if kind in ("column", "activity_column"):
+            return self._from_events(self._column(node), level)
+        if kind in ("source", "target"):
+            if level != _PAIR:
+                raise ValueError(f"{kind.upper()} is not allowed here.")
+            values = self._evaluate(node[1], _EVENT)
+            positions = self.sources if kind == "source" else self.targets
+            return values.iloc[positions].reset_index(drop=True)
+        if kind == "variant":
+            activities = self._evaluate(node[1], _EVENT).astype(str)
+            variants = activities.groupby(self.cases.to_numpy(), sort=False).agg(
+                ", ".join
+            )
+            return self._from_cases(variants, level)
+        if kind == "match_process":
+            return self._from_cases(self._match_process(node), level)
+        if kind == "match_activities":
+            return self._from_cases(self._match_activities(node), level)
+        if kind == "aggregate":
+            return self._aggregate(node, level)
+        if kind == "compare":
+            left = self._evaluate(node[2], level)
+            right = self._evaluate(node[3], level)
+            return _COMPARISONS[node[1]](left, right) & left.notna() & right.notna()
+        if kind == "arithmetic":
+            left = self._evaluate(node[2], level)
+            return _ARITHMETIC[node[1]](left, self._evaluate(node[3], level))
+        if kind == "logical":
+            left = self._evaluate(node[2], level).fillna(False).astype(bool)
+            right = self._evaluate(node[3], level).fillna(False).astype(bool)
+            return left & right if node[1] == "AND" else left | right
+        if kind == "not":
+            return ~self._evaluate(node[1], level).fillna(False).astype(bool)
+        if kind == "in":
+            values = self._evaluate(node[1], level)
+            matches = values.isin(node[2])
+            return ~matches & values.notna() if node[3] else matches
+        if kind == "case_when":
+            conditions = [
+                self._evaluate(condition, level).fillna(False).astype(bool).to_numpy()
+                for condition, _ in node[1]
+            ]
+            choices = [self._evaluate(value, level) for _, value in node[1]]
+            default = self._evaluate(node[2], level).to_numpy()
+            return pd.Series(
+                np.select(conditions, [c.to_numpy() for c in choices], default)
+            ).infer_objects()
+        raise ValueError(f"Unsupported PQL expression '{kind}'.")
+
+    def _column(self, node: Node) -> pd.Series:
+        if node[0] == "activity_column":
+            return self.events[self.emulator.activity_column]
+        _, table, column = node
+        if table != self.emulator.table_name:
+            raise ValueError(f"Table '{table}' not found.")
+        if column not in self.events.columns:
+            raise ValueError(f"Column '{column}' not found in table '{table}'.")
+        return self.events[column]
+
+    def _aggregate(self, node: Node, level: int) -> pd.Series:
+        """Evaluates an aggregation for every group of the query result."""
+        if level != _GROUP:
+            raise ValueError("Aggregations are not allowed here.")
+        _, function, distinct, argument = node
+        # The values are aggregated at the finer level of them and the groups
+        argument_level = max(self._level(argument), self.dimension_level)
+        if argument_level == _SCALAR:
+            argument_level = _EVENT
+        frame = pd.DataFrame(
+            {
+                f"dimension_{i}": self._evaluate(dimension, argument_level)
+                for i, dimension in enumerate(self.dimensions)
+            },
+            index=pd.RangeIndex(self._size(argument_level)),
+        )
+        frame["value"] = self._evaluate(argument, argument_level)
+
+        if distinct:
+            method = "nunique"
+        else:
+            method = {"COUNT": "count", "AVG": "mean"}.get(function, function.lower())
+        if not self.dimensions:
+            aggregated = getattr(frame["value"], method)()
+            return pd.Series([aggregated])
+
+        keys = list(frame.columns[:-1])
+        aggregated = (
+            frame.groupby(keys, sort=False, dropna=False)["value"]
+            .agg(method)
+            .reset_index()
+        )
+        group_keys = self.group_keys.copy()  # type: ignore
+        group_keys.columns = keys
+        values = group_keys.merge(aggregated, on=keys, how="left")["value"]
+        if function == "COUNT":
+            values = values.fillna(0).astype(int)
+        return values.reset_index(drop=True)
+
+    def _positions(self) -> pd.Series:
+        """Returns the position of every event within its case."""
+        return self.events.groupby(self.cases.to_numpy(), sort=False).cumcount()
+
+    def _match_process(self, node: Node) -> pd.Series:
+        """Checks per case whether the nodes and their connections occur.
+
+        Every connection is checked on its own, i.e. the occurrences of a
+        node do not have to be the same across connections.
+        """
+        _, column, nodes, connections = node
+        activities = self._evaluate(column, _EVENT)
+        positions = self._positions()
+        matches = pd.Series(True, index=self.case_ids.to_numpy())
+        connected: Set[str] = set()
+        for connection, source, target in connections:
+            connected.update((source, target))
+            is_source = activities.isin(nodes[source]).to_numpy()
+            is_target = activities.isin(nodes[target]).to_numpy()
+            if connection == "DIRECT":
+                pairs = is_source[self.sources] & is_target[self.targets]
+                matched = set(self.cases.to_numpy()[self.sources[pairs]])
+                found = pd.Series(self.case_ids.isin(matched).to_numpy(), matches.index)
+            else:
+                first_source = positions[is_source].groupby(self.cases[is_source]).min()
+                last_target = positions[is_target].groupby(self.cases[is_target]).max()
+                found = (
+                    first_source < last_target.reindex(first_source.index)
+                ).reindex(matches.index, fill_value=False)
+            matches &= found.astype(bool)
+        for name, node_activities in nodes.items():
+            if name not in connected:
+                matches &= self._contains(activities, node_activities)
+        return matches.astype(int)
+
+    def _match_activities(self, node: Node) -> pd.Series:
+        """Checks per case whether the activities match the conditions."""
+        _, column, conditions = node
+        activities = self._evaluate(column, _EVENT)
+        per_case = activities.groupby(self.cases.to_numpy(), sort=False)
+        matches = pd.Series(True, index=self.case_ids.to_numpy())
+        for kind, values in conditions:
+            if kind == "NODE":
+                for value in values:
+                    matches &= self._contains(activities, [value])
+            elif kind == "EXCLUDING":
+                matches &= ~self._contains(activities, values)
+            elif kind == "STARTING":
+                matches &= per_case.first().reindex(matches.index).isin(values)
+            else:
+                matches &= per_case.last().reindex(matches.index).isin(values)
+        return matches.astype(int)
+
+    def _contains(self, activities: pd.Series, values: List[Any]) -> pd.Series:
+        """Checks per case whether one of the activities occurs."""
+        found = activities.isin(values).groupby(self.cases.to_numpy(), sort=False).any()
+        return found.reindex(self.case_ids.to_numpy(), fill_value=False)
@@ -0,0 +1,266 @@
+"""The module profiles the PQL queries that are sent to Celonis.
+
+Every query run by the CelonisConnectionManager is recorded with a hash
+of its text, its duration, the number of rows and columns it returned
+and the function that issued it. The profiler keeps the latest queries in
+a rolling window, which is summarized per query at /api/debug/pql-stats.
+Queries slower than a threshold are written to the slow-query log.
+
+The profiler is configured with the environment variables or the .env
+file:
+
+    PQL_PROFILE_WINDOW=1000       # Number of queries in the rolling window
+    PQL_SLOW_QUERY_SECONDS=1.0    # Queries at least this slow are logged
+    PQL_SLOW_QUERY_LOG=slow.jsonl # Optional file the slow queries are appended to
+"""
+
+import hashlib
+import json
+import sys
+import threading
+from collections import deque
+from collections.abc import MutableMapping
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Deque, Dict, List, Optional
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+# Modules whose frames are skipped when the caller of a query is searched
+_INTERNAL_MODULES = (
+    "backend.celonis_connection.",
+    "backend.utils.metrics",
+    "contextlib",
+    "functools",
+)
+
+# **************** Settings ****************
+
+
+class ProfilerSettings(BaseSettings):
+    """Settings of the PQL profiler, loaded from the environment or .env."""
+
+    PQL_PROFILE_WINDOW: int = 1000
+    PQL_SLOW_QUERY_SECONDS: float = 1.0
+    PQL_SLOW_QUERY_LOG: Optional[str] = None
+
+    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
+
+
+@lru_cache
+def get_profiler_settings() -> ProfilerSettings:
+    """Returns the profiler settings, loaded once per process."""
+    return ProfilerSettings()
+
+
+# **************** Profiler ****************
+
+
+@dataclass
+class QueryRecord:
+    """A single PQL query run against Celonis."""
+
+    query_hash: str
+    query: str
+    duration_s: float
+    rows: int
+    columns: int
+    caller: str
+    timestamp: str
+
+
+def format_query(
+    pql_query: MutableMapping[str, Any], filters: Optional[List[str]] = None
+) -> str:
+    """Returns the text of a PQL query and its filters.
+
+    Columns of the data model are written as "TABLE"."column".
+
+    Args:
+        pql_query: The PQL query by column name.
+        filters: The PQL filters of the query.
+
+    Returns:
+        One line per column and filter.
+    """
+    lines = []
+    for name, expression in pql_query.items():
+        if not isinstance(expression, str):
+            table = getattr(expression, "table_name", None) or "?"
+            expression = f'"{table}"."{getattr(expression, "name", expression)}"'
+        lines.append(f"{name}: {' '.join(str(expression).split())}")
+    lines.extend(f"FILTER {' '.join(f.split())}" for f in filters or [])
+    return "\n".join(lines)
+
+
+def hash_query(query: str) -> str:
+    """Returns a short hash of the query text."""
+    return hashlib.sha1(query.encode("utf-8")).hexdigest()[:12]
+
+
+def find_caller() -> str:
+    """Returns the function outside of the connection code that runs a query.
+
+    Returns:
+        The module and the name of the function, e.g.
+        "backend.pql_queries.general_queries.get_number_of_cases".
+    """
+    frame = sys._getframe(1)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if not module.startswith(_INTERNAL_MODULES) and module != __name__:
+            return f"{module}.{frame.f_code.co_name}"
+        frame = frame.f_back  # type: ignore
+    return "unknown"
+
+
+class PQLProfiler:
+    """Keeps the latest PQL queries and logs the slow ones.
+
+    Attributes:
+        window: The maximum number of queries that are kept.
+        slow_query_seconds: Queries at least this slow are logged.
+        slow_query_log: The file the slow queries are appended to as JSON
+            lines, or None to only print them.
+    """
+
+    window: int
+    slow_query_seconds: float
+    slow_query_log: Optional[str]
+
+    def __init__(
+        self,
+        window: int = 1000,
+        slow_query_seconds: float = 1.0,
+        slow_query_log: Optional[str] = None,
+    ) -> None:
+        """Initialize an empty profiler.
+
+        Args:
+            window: The maximum number of queries that are kept.
+            slow_query_seconds: Queries at least this slow are logged.
+            slow_query_log: The file the slow queries are appended to.
+        """
+        self.window = window
+        self.slow_query_seconds = slow_query_seconds
+        self.slow_query_log = slow_query_log
+        self._records: Deque[QueryRecord] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        query: str,
+        duration_s: float,
+        rows: int,
+        columns: int,
+        caller: str,
+    ) -> QueryRecord:
+        """Records a query and logs it if it is slow.
+
+        Args:
+            query: The text of the query, see format_query.
+            duration_s: The duration of the round trip in seconds.
+            rows: The number of returned rows.
+            columns: The number of returned columns.
+            caller: The function that issued the query.
+
+        Returns:
+            The record of the query.
+        """
+        rec = QueryRecord(
+            query_hash=hash_query(query),
+            query=query,
+            duration_s=duration_s,
+            rows=rows,
+            columns=columns,
+            caller=caller,
+            timestamp=datetime.now(timezone.utc).isoformat(),
+        )
+        with self._lock:
+            self._records.append(rec)
+        if duration_s >= self.slow_query_seconds:
+            self._log_slow_query(rec)
+        return rec
+
+    def _log_slow_query(self, rec: QueryRecord) -> None:
+        """Prints a slow query and appends it to the slow-query log."""
+        print(
+            f"Slow PQL query {rec.query_hash} from {rec.caller}: "
+            f"{rec.duration_s:.3f} s, {rec.rows} rows"
+        )
+        if not self.slow_query_log:
+            return
+        try:
+            with self._lock, open(self.slow_query_log, "a") as f:
+                f.write(json.dumps(asdict(rec)) + "\n")
+        except OSError as e:
+            print(f"Could not write the slow-query log: {e}")
+
+    def get_records(self) -> List[QueryRecord]:
+        """Returns the queries in the window, the oldest first."""
+        with self._lock:
+            return list(self._records)
+
+    def get_stats(self, limit: Optional[int] = None) -> Dict[str, Any]:
+        """Summarizes the queries in the window per query text.
+
+        Args:
+            limit: The maximum number of queries to return.
+
+        Returns:
+            The size of the window, the slow-query threshold, the number
+            and total duration of the queries, and per query its text, its
+            callers, the number of runs, the total, mean and maximum
+            duration and the rows and columns of its last run. The queries
+            are sorted by their total duration, the slowest first.
+        """
+        records = self.get_records()
+        queries: Dict[str, Dict[str, Any]] = {}
+        for rec in records:
+            stats = queries.setdefault(
+                rec.query_hash,
+                {
+                    "query_hash": rec.query_hash,
+                    "query": rec.query,
+                    "callers": [],
+                    "count": 0,
+                    "total_duration_s": 0.0,
+                    "max_duration_s": 0.0,
+                },
+            )
+            if rec.caller not in stats["callers"]:
+                stats["callers"].append(rec.caller)
+            stats["count"] += 1
+            stats["total_duration_s"] += rec.duration_s
+            stats["max_duration_s"] = max(stats["max_duration_s"], rec.duration_s)
+            stats["rows"] = rec.rows
+            stats["columns"] = rec.columns
+        for stats in queries.values():
+            stats["mean_duration_s"] = stats["total_duration_s"] / stats["count"]
+        ranked = sorted(
+            queries.values(), key=lambda s: s["total_duration_s"], reverse=True
+        )
+        return {
+            "window": self.window,
+            "slow_query_seconds": self.slow_query_seconds,
+            "query_count": len(records),
+            "total_duration_s": sum(rec.duration_s for rec in records),
+            "queries": ranked[:limit] if limit is not None else ranked,
+        }
+
+    def clear(self) -> None:
+        """Removes all queries from the window."""
+        with self._lock:
+            self._records.clear()
+
+
+@lru_cache
+def get_pql_profiler() -> PQLProfiler:
+    """Returns the profiler of the process, configured by the settings."""
+    settings = get_profiler_settings()
+    return PQLProfiler(
+        window=settings.PQL_PROFILE_WINDOW,
+        slow_query_seconds=settings.PQL_SLOW_QUERY_SECONDS,
+        slow_query_log=settings.PQL_SLOW_QUERY_LOG,
+    )
@@ -0,0 +1,267 @@
+"""Contains a bitmap index of the resources involved in each case.
+
+This module defines the CaseResourceIndex class. It stores for every
+resource a bit-packed bitmap of the cases it was involved in, with the
+cases ordered by their end time, and the events ordered by their
+timestamp. The interaction and social position metrics are then
+answered by bitmap operations on a contiguous range of cases or events
+instead of per-row set membership tests.
+"""
+
+from typing import List, Literal, Tuple
+
+import numpy as np
+import pandas as pd
+
+from backend.conformance_checking.resource_profile_cube import to_utc_naive
+
+# The number of cases that are unpacked at once when computing the
+# interaction matrix, bounds the memory to resources x chunk bytes
+_MATRIX_CHUNK_SIZE = 1 << 16
+
+
+class CaseResourceIndex:
+    """Represents the case x resource involvement of an event log.
+
+    Bit i of the bitmap of a resource is set if the resource was involved
+    in the case with the i-th earliest end time. Cases completed in a
+    time window therefore form a contiguous bit range, found by binary
+    search on the sorted case ends.
+
+    Attributes:
+        resources: The resources of the log, indexed by their code.
+        _resource_codes: Maps a resource to its code.
+        _case_ends: The end time of every case, sorted ascending.
+        _bitmaps: The bit-packed case bitmaps, one row per resource.
+        _event_times: The timestamp of every event, sorted ascending.
+        _event_cases: The case position of every event in that order.
+        _event_resources: The resource code of every event in that order.
+    """
+
+    def __init__(
+        self,
+        log: pd.DataFrame,
+        case_id_col: str = "case:concept:name",
+        timestamp_col: str = "time:timestamp",
+        resource_col: str = "org:resource",
+    ) -> None:
+        """Builds the index from an event log.
+
+        Args:
+            log: The event log.
+            case_id_col (optional): The name of the Case ID column. Defaults
+              to "case:concept:name".
+            timestamp_col (optional): The name of the Timestamp column.
+              Defaults to "time:timestamp".
+            resource_col (optional): The name of the Resource column. Defaults
+              to "org:resource".
+        """
+        log = log[log[timestamp_col].notna() & log[case_id_col].notna()]
+        timestamps = to_utc_naive(log[timestamp_col]).to_numpy(  # type: ignore
+            dtype="datetime64[ns]"
+        )
+        case_codes, _ = pd.factorize(log[case_id_col])
+        resource_codes, resources = pd.factorize(log[resource_col])
+        self.resources: List[str] = list(resources)
+        self._resource_codes = {r: i for i, r in enumerate(self.resources)}
+
+        # Cases ordered by their end time, ties by first appearance
+        num_cases = int(case_codes.max()) + 1 if len(case_codes) else 0
+        case_ends = (
+            pd.Series(timestamps).groupby(case_codes).max().to_numpy()
+            if num_cases
+            else np.empty(0, dtype="datetime64[ns]")
+        )
+        case_order = np.argsort(case_ends, kind="stable")
+        case_positions = np.empty(num_cases, dtype=np.int64)
+        case_positions[case_order] = np.arange(num_cases)
+        self._case_ends: np.ndarray = case_ends[case_order]
+
+        # One bit per (resource, case) pair, set bits are unique per pair,
+        # so summing the bit values of a byte equals OR-ing them
+        num_bytes = (num_cases + 7) // 8
+        involved = resource_codes >= 0
+        pairs = np.unique(
+            resource_codes[involved].astype(np.int64) * max(num_cases, 1)
+            + case_positions[case_codes[involved]]
+        )
+        pair_resources = pairs // max(num_cases, 1)
+        pair_positions = pairs % max(num_cases, 1)
+        byte_keys = pair_resources * num_bytes + (pair_positions >> 3)
+        bits = np.left_shift(1, 7 - (pair_positions & 7))
+        self._bitmaps: np.ndarray = (
+            np.bincount(
+                byte_keys, weights=bits, minlength=len(self.resources) * num_bytes
+            )
+            .astype(np.uint8)
+            .reshape(len(self.resources), num_bytes)
+        )
+
+        event_order = np.argsort(timestamps, kind="stable")
+        self._event_times: np.ndarray = timestamps[event_order]
+        self._event_cases: np.ndarray = case_positions[case_codes[event_order]]
+        self._event_resources: np.ndarray = resource_codes[event_order]
+
+    # **************** Helpers ****************
+
+    @staticmethod
+    def _bounds(
+        start_time: str, end_time: str, inclusive_end: bool
+    ) -> Tuple[np.datetime64, np.datetime64, Literal["left", "right"]]:
+        """Converts a time window to numpy bounds and the side of its end."""
+        start = np.datetime64(to_utc_naive(start_time), "ns")
+        end = np.datetime64(to_utc_naive(end_time), "ns")
+        return start, end, "right" if inclusive_end else "left"
+
+    def _case_range(
+        self, start_time: str, end_time: str, inclusive_end: bool
+    ) -> Tuple[int, int]:
+        """Returns the positions of the cases that ended inside the window."""
+        start, end, side = self._bounds(start_time, end_time, inclusive_end)
+        lo = int(np.searchsorted(self._case_ends, start, side="left"))
+        hi = int(np.searchsorted(self._case_ends, end, side=side))
+        return lo, max(lo, hi)
+
+    def _event_range(
+        self, start_time: str, end_time: str, inclusive_end: bool
+    ) -> Tuple[int, int]:
+        """Returns the positions of the events that happened inside the window."""
+        start, end, side = self._bounds(start_time, end_time, inclusive_end)
+        lo = int(np.searchsorted(self._event_times, start, side="left"))
+        hi = int(np.searchsorted(self._event_times, end, side=side))
+        return lo, max(lo, hi)
+
+    def _unpack(self, bitmaps: np.ndarray, lo: int, hi: int) -> np.ndarray:
+        """Unpacks the bits [lo, hi) of one or more bitmaps."""
+        offset = lo & 7
+        packed = bitmaps[..., lo >> 3 : (hi + 7) >> 3]
+        return np.unpackbits(packed, axis=-1)[..., offset : offset + hi - lo]
+
+    # **************** Resource Profiles ****************
+
+    def get_interaction_two_resources(
+        self,
+        start_time: str,
+        end_time: str,
+        resource1: str,
+        resource2: str,
+        inclusive_end: bool = False,
+    ) -> int:
+        """Calculates the interaction between two resources.
+
+        The number of cases completed during a given time slot in which
+        two given resources were involved.
+
+        Args:
+            start_time: The start time of the interval.
+            end_time: The end time of the interval.
+            resource1: The first resource.
+            resource2: The second resource.
+            inclusive_end (optional): If True, cases completed exactly at the
+              end time are included. Defaults to False.
+
+        Returns:
+            An integer indicating the number of shared completed cases.
+        """
+        code1 = self._resource_codes.get(resource1)
+        code2 = self._resource_codes.get(resource2)
+        if code1 is None or code2 is None:
+            return 0
+        lo, hi = self._case_range(start_time, end_time, inclusive_end)
+        if lo == hi:
+            return 0
+        shared = self._bitmaps[code1] & self._bitmaps[code2]
+        return int(self._unpack(shared, lo, hi).sum())
+
+    def get_interaction_matrix(
+        self, start_time: str, end_time: str, inclusive_end: bool = False
+    ) -> pd.DataFrame:
+        """Calculates the interaction between all pairs of resources.
+
+        Args:
+            start_time: The start time of the interval.
+            end_time: The end time of the interval.
+            inclusive_end (optional): If True, cases completed exactly at the
+              end time are included. Defaults to False.
+
+        Returns:
+            A symmetric DataFrame with the resources as index and columns.
+            The diagonal holds the number of completed cases per resource.
+        """
+        num_resources = len(self.resources)
+        matrix = np.zeros((num_resources, num_resources), dtype=np.int64)
+        lo, hi = self._case_range(start_time, end_time, inclusive_end)
+        for chunk_lo in range(lo, hi, _MATRIX_CHUNK_SIZE):
+            chunk_hi = min(chunk_lo + _MATRIX_CHUNK_SIZE, hi)
+            involvement = self._unpack(self._bitmaps, chunk_lo, chunk_hi).astype(
+                np.float32
+            )
+            matrix += np.rint(involvement @ involvement.T).astype(np.int64)
+        return pd.DataFrame(matrix, index=self.resources, columns=self.resources)
+
+    def get_social_position(
+        self,
+        start_time: str,
+        end_time: str,
+        resource: str,
+        inclusive_end: bool = False,
+    ) -> float:
+        """Calculates the social position as defined by PM4Py.
+
+        The number of cases a given resource was active in during a time
+        slot with respect to the number of cases active during that slot.
+
+        Args:
+            start_time: The start time of the interval.
+            end_time: The end time of the interval.
+            resource: The resource for which to calculate the social position.
+            inclusive_end (optional): If True, events exactly at the end time
+              are included. Defaults to False.
+
+        Returns:
+            A float indicating the social position of the resource.
+        """
+        lo, hi = self._event_range(start_time, end_time, inclusive_end)
+        cases = self._event_cases[lo:hi]
+        active_cases = np.unique(cases).size
+        resource_code = self._resource_codes.get(resource)
+        if active_cases == 0 or resource_code is None:
+            return 0.0
+        resource_cases = np.unique(cases[self._event_resources[lo:hi] == resource_code])
+        return float(resource_cases.size) / float(active_cases)
+
+    def get_connected_resources(
+        self,
+        start_time: str,
+        end_time: str,
+        resource: str,
+        inclusive_end: bool = True,
+    ) -> Tuple[int, int]:
+        """Counts the resources sharing cases with a resource during a slot.
+
+        The cases of the resource in the slot are marked in a case bitmap,
+        every other resource with an event in a marked case is connected.
+
+        Args:
+            start_time: The start time of the interval.
+            end_time: The end time of the interval.
+            resource: The resource for which to count the connections.
+            inclusive_end (optional): If True, events exactly at the end time
+              are included. Defaults to True.
+
+        Returns:
+            A tuple of the number of connected resources and the number of
+            resources active during the slot.
+        """
+        lo, hi = self._event_range(start_time, end_time, inclusive_end)
+        cases = self._event_cases[lo:hi]
+        resources = self._event_resources[lo:hi]
+        active = np.unique(resources[resources >= 0])
+        resource_code = self._resource_codes.get(resource)
+        if resource_code is None:
+            return 0, int(active.size)
+
+        case_mask = np.zeros(len(self._case_ends), dtype=bool)
+        case_mask[cases[resources == resource_code]] = True
+        connected = np.unique(resources[case_mask[cases] & (resources >= 0)])
+        return int(np.count_nonzero(connected != resource_code)), int(active.size)
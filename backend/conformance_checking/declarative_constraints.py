@@ -8,8 +8,11 @@ based on the discovered declarative profiles.
 from typing import Any, Dict, List, Optional, TypeAlias, Union
 
 import pandas as pd  # type: ignore
-import pm4py  # type: ignore
-from pm4py.algo.conformance.declare import algorithm as dc  # type: ignore
+
+from backend.utils.lazy_import import lazy_import
+
+pm4py = lazy_import("pm4py")
+dc = lazy_import("pm4py.algo.conformance.declare.algorithm")
 
 # **************** Type Aliases ****************
 
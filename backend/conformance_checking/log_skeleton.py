@@ -7,8 +7,11 @@ to compute various metrics related to the log skeleton.
 from typing import Any, Dict, List, Optional, Set, Tuple
 
 import pandas as pd
-from pm4py.algo.conformance.log_skeleton import algorithm as lsk_conf  # type: ignore
-from pm4py.algo.discovery.log_skeleton import algorithm as lsk_discovery  # type: ignore
+
+from backend.utils.lazy_import import lazy_import
+
+lsk_conf = lazy_import("pm4py.algo.conformance.log_skeleton.algorithm")
+lsk_discovery = lazy_import("pm4py.algo.discovery.log_skeleton.algorithm")
 
 
 class LogSkeleton:
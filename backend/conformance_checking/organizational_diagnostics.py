@@ -0,0 +1,248 @@
+"""Contains a vectorized engine for the organizational diagnostics.
+
+This module defines the OrganizationalDiagnostics class. It aggregates an
+event log once into a sparse group x resource x activity count tensor and
+derives the Group Relative Focus, Group Relative Stake, Group Coverage and
+Group Member Contribution from sparse matrix products of that tensor.
+"""
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from backend.utils.lazy_import import lazy_import
+
+sparse = lazy_import("scipy.sparse")
+
+
+class OrganizationalDiagnostics:
+    """Represents the group x resource x activity counts of an event log.
+
+    Only the non-empty cells of the tensor are stored, as (group, resource,
+    activity, count) quadruples, so memory grows with the number of
+    observed combinations instead of their cross product.
+
+    Groups are related to activities in one of two ways. By membership, as
+    done by PM4Py, a resource belongs to every group it has an event in and
+    all its events count for each of these groups. Otherwise, every event
+    only counts for the group it was recorded with, as done by the PQL
+    queries.
+
+    Attributes:
+        groups: The groups of the log, sorted.
+        resources: The resources of the log, sorted.
+        activities: The activities of the log, sorted.
+        by_membership: Whether groups are related to activities by membership.
+        _resource_activity: The number of events per resource and activity.
+        _group_resource: The number of events per group and resource.
+        _group_activity: The number of events per group and activity.
+    """
+
+    def __init__(
+        self,
+        log: pd.DataFrame,
+        group_col: str = "org:group",
+        resource_col: str = "org:resource",
+        activity_col: str = "concept:name",
+        count_col: Optional[str] = None,
+        by_membership: bool = True,
+    ) -> None:
+        """Aggregates the count tensor of an event log.
+
+        Events missing a group, resource or activity are ignored.
+
+        Args:
+            log: The event log, or already aggregated counts if count_col is
+              given.
+            group_col (optional): The name of the Group column. Defaults to
+              "org:group".
+            resource_col (optional): The name of the Resource column. Defaults
+              to "org:resource".
+            activity_col (optional): The name of the Activity column. Defaults
+              to "concept:name".
+            count_col (optional): The name of a column holding the number of
+              events per row. Defaults to None, i.e. every row is one event.
+            by_membership (optional): Whether groups are related to activities
+              by membership. Defaults to True.
+        """
+        self.by_membership = by_membership
+        log = log[
+            log[group_col].notna()
+            & log[resource_col].notna()
+            & log[activity_col].notna()
+        ]
+        group_codes, groups = pd.factorize(log[group_col], sort=True)
+        resource_codes, resources = pd.factorize(log[resource_col], sort=True)
+        activity_codes, activities = pd.factorize(log[activity_col], sort=True)
+        self.groups: List[Any] = list(groups)
+        self.resources: List[Any] = list(resources)
+        self.activities: List[Any] = list(activities)
+
+        counts = (
+            log[count_col].to_numpy(dtype=np.int64)
+            if count_col is not None
+            else np.ones(len(log), dtype=np.int64)
+        )
+        num_groups = len(self.groups)
+        num_resources = len(self.resources)
+        num_activities = len(self.activities)
+
+        # The sparse tensor, summing duplicate cells on conversion
+        self._resource_activity = sparse.csr_matrix(
+            (counts, (resource_codes, activity_codes)),
+            shape=(num_resources, num_activities),
+            dtype=np.int64,
+        )
+        self._group_resource = sparse.csr_matrix(
+            (counts, (group_codes, resource_codes)),
+            shape=(num_groups, num_resources),
+            dtype=np.int64,
+        )
+        if by_membership:
+            membership = (self._group_resource > 0).astype(np.int64)
+            self._group_activity = membership @ self._resource_activity
+        else:
+            self._group_activity = sparse.csr_matrix(
+                (counts, (group_codes, activity_codes)),
+                shape=(num_groups, num_activities),
+                dtype=np.int64,
+            )
+
+    # **************** Helpers ****************
+
+    @staticmethod
+    def _divide(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+        """Divides element-wise, yielding 0 where the denominator is 0."""
+        numerator, denominator = np.broadcast_arrays(numerator, denominator)
+        return np.divide(
+            numerator,
+            denominator,
+            out=np.zeros(numerator.shape, dtype=float),
+            where=denominator != 0,
+        )
+
+    # **************** Diagnostics ****************
+
+    def get_group_relative_focus(self) -> pd.DataFrame:
+        """Returns the Group Relative Focus.
+
+        The share of the events of an activity that were performed by
+        a group.
+
+        Returns:
+            A DataFrame with the groups as index and the activities as
+            columns.
+        """
+        group_activity = self._group_activity.toarray()
+        totals = np.asarray(self._resource_activity.sum(axis=0)).ravel()
+        return pd.DataFrame(
+            self._divide(group_activity, totals[np.newaxis, :]),
+            index=pd.Index(self.groups, name="Group"),
+            columns=pd.Index(self.activities, name="Activity"),
+        )
+
+    def get_group_relative_stake(self) -> pd.DataFrame:
+        """Returns the Group Relative Stake.
+
+        The share of the events of a group that belong to an activity.
+
+        Returns:
+            A DataFrame with the groups as index and the activities as
+            columns.
+        """
+        group_activity = self._group_activity.toarray()
+        totals = group_activity.sum(axis=1)
+        return pd.DataFrame(
+            self._divide(group_activity, totals[:, np.newaxis]),
+            index=pd.Index(self.groups, name="Group"),
+            columns=pd.Index(self.activities, name="Activity"),
+        )
+
+    def get_group_coverage(self) -> pd.DataFrame:
+        """Returns the Group Coverage.
+
+        The share of the events of a group that were performed by a member.
+
+        Returns:
+            A DataFrame with the groups as index and the resources as columns.
+        """
+        group_resource = self._group_resource.toarray()
+        totals = group_resource.sum(axis=1)
+        return pd.DataFrame(
+            self._divide(group_resource, totals[:, np.newaxis]),
+            index=pd.Index(self.groups, name="Group"),
+            columns=pd.Index(self.resources, name="Resource"),
+        )
+
+    def get_resource_activity_counts(self) -> pd.DataFrame:
+        """Returns the number of events per resource and activity.
+
+        Returns:
+            A DataFrame with the resources as index and the activities as
+            columns.
+        """
+        return pd.DataFrame(
+            self._resource_activity.toarray(),
+            index=pd.Index(self.resources, name="Resource"),
+            columns=pd.Index(self.activities, name="Activity"),
+        )
+
+    def get_group_member_contribution(self) -> Dict[Any, Dict[Any, Dict[Any, int]]]:
+        """Returns the Group Member Contribution.
+
+        The number of events per activity of every member of a group.
+
+        Returns:
+            A dictionary mapping each group to its members and each member to
+            its event count per activity, leaving out activities it never
+            performed.
+        """
+        resource_activity = self._resource_activity.tocoo()
+        per_resource: Dict[Any, Dict[Any, int]] = {r: {} for r in self.resources}
+        for row, col, count in zip(
+            resource_activity.row, resource_activity.col, resource_activity.data
+        ):
+            per_resource[self.resources[row]][self.activities[col]] = int(count)
+
+        group_resource = self._group_resource.tocoo()
+        contribution: Dict[Any, Dict[Any, Dict[Any, int]]] = {
+            g: {} for g in self.groups
+        }
+        for row, col in sorted(zip(group_resource.row, group_resource.col)):
+            resource = self.resources[col]
+            contribution[self.groups[row]][resource] = per_resource[resource]
+        return contribution
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Returns all diagnostics in the format of PM4Py's local diagnostics.
+
+        Returns:
+            A dictionary with the keys "group_relative_focus",
+            "group_relative_stake", "group_coverage" and
+            "group_member_contribution". Coverage and contribution only
+            contain the members of each group.
+        """
+        coverage = self.get_group_coverage()
+        members = self._group_resource.toarray() > 0
+        return {
+            "group_relative_focus": _frame_to_dict(self.get_group_relative_focus()),
+            "group_relative_stake": _frame_to_dict(self.get_group_relative_stake()),
+            "group_coverage": {
+                group: {
+                    resource: float(coverage.iat[i, j])
+                    for j, resource in enumerate(self.resources)
+                    if members[i, j]
+                }
+                for i, group in enumerate(self.groups)
+            },
+            "group_member_contribution": self.get_group_member_contribution(),
+        }
+
+
+def _frame_to_dict(frame: pd.DataFrame) -> Dict[Any, Dict[Any, float]]:
+    """Converts a DataFrame to a nested dictionary of row -> column -> value."""
+    return {
+        index: dict(zip(frame.columns, map(float, values)))
+        for index, values in zip(frame.index, frame.to_numpy())
+    }
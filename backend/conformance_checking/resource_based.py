@@ -4,17 +4,31 @@ This module defines the ResourceBased class which uses PM4Py to discover
 resource-based conformance checking metrics from event logs.
 """
 
-from typing import Any, Dict, List, Optional, Tuple, TypeAlias
+from collections import Counter
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple, TypeAlias
 
 import pandas as pd
-import pm4py  # type: ignore
-from pm4py.algo.organizational_mining.local_diagnostics import (  # type: ignore
-    algorithm as org_algorithm,  # type: ignore
+
+from backend.conformance_checking.case_resource_index import CaseResourceIndex
+from backend.conformance_checking.multitasking import MultitaskingIndex
+from backend.conformance_checking.organizational_diagnostics import (
+    OrganizationalDiagnostics,
+)
+from backend.conformance_checking.role_discovery import (
+    DEFAULT_ROLES_THRESHOLD,
+    RoleDiscovery,
 )
-from pm4py.algo.organizational_mining.resource_profiles import (  # type: ignore
-    algorithm as rp_algorithm,  # type: ignore
+from backend.utils.lazy_import import lazy_import
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pm4py.objects.org.sna.obj import SNA  # type: ignore
+
+pm4py = lazy_import("pm4py")
+stats = lazy_import("scipy.stats")
+rp_algorithm = lazy_import(
+    "pm4py.algo.organizational_mining.resource_profiles.algorithm"
 )
-from pm4py.objects.org.sna.obj import SNA  # type: ignore
+sna_obj = lazy_import("pm4py.objects.org.sna.obj")
 
 SocialNetworkAnalysisType: TypeAlias = Dict[Tuple[str, str], float]
 
@@ -40,6 +54,10 @@ class ResourceBased:
             to None.
         _organizational_diagnostics: The Organizational Diagnostics of the log.
             Defaults to None.
+        _multitasking_index: The interval overlaps used for the multitasking
+            metric. Built on first use. Defaults to None.
+        _case_resource_index: The case bitmaps used for the interaction and
+            social position metrics. Built on first use. Defaults to None.
     """
 
     def __init__(
@@ -66,12 +84,14 @@ class ResourceBased:
             group_col (optional): The name of the Group column. Defaults to None.
         """
         self.log = log
-        self._handover_of_work: Optional[SNA] = None
-        self._subcontracting: Optional[SNA] = None
-        self._working_together: Optional[SNA] = None
-        self._similar_activities: Optional[SNA] = None
-        self._organizational_roles: Optional[List[Any]] = None
+        self._handover_of_work: Optional["SNA"] = None
+        self._subcontracting: Optional["SNA"] = None
+        self._working_together: Optional["SNA"] = None
+        self._similar_activities: Optional["SNA"] = None
+        self._organizational_roles: Optional[List[Dict[str, Any]]] = None
         self._organizational_diagnostics: Optional[Dict[str, Any]] = None
+        self._multitasking_index: Optional[MultitaskingIndex] = None
+        self._case_resource_index: Optional[CaseResourceIndex] = None
         self.case_id_col: Optional[str] = case_id_col
         self.activity_col: Optional[str] = activity_col
         self.timestamp_col: Optional[str] = timestamp_col
@@ -92,6 +112,37 @@ class ResourceBased:
         """
         self._handover_of_work = pm4py.discover_handover_of_work_network(self.log)
 
+    def compute_handover_of_work_from_batches(
+        self, batches: Iterable[pd.DataFrame]
+    ) -> None:
+        """Calculates the Handover of Work metric from batches of the log.
+
+        Every batch must contain whole cases. Only the number of handovers
+        per pair of individuals is kept between the batches. The events of
+        a case are ordered by their timestamp, so the result equals
+        compute_handover_of_work on the concatenated batches if these are
+        ordered by time within each case.
+
+        Args:
+            batches: The batches of the log.
+        """
+        case_id_col = self.case_id_col or "case:concept:name"
+        timestamp_col = self.timestamp_col or "time:timestamp"
+        resource_col = self.resource_col or "org:resource"
+        handovers: Counter = Counter()
+        for batch in batches:
+            ordered = batch.sort_values([case_id_col, timestamp_col], kind="stable")
+            following = ordered.groupby(case_id_col, sort=False)[resource_col].shift(-1)
+            pairs = pd.DataFrame(
+                {"source": ordered[resource_col], "target": following}
+            ).dropna()
+            handovers.update(pairs.value_counts().to_dict())
+
+        total = sum(handovers.values())
+        self._handover_of_work = sna_obj.SNA(
+            {pair: count / total for pair, count in handovers.items()}, True
+        )
+
     def get_handover_of_work_values(self) -> SocialNetworkAnalysisType:
         """Returns the Handover of Work metric.
 
@@ -235,6 +286,37 @@ class ResourceBased:
             self.log
         )
 
+    def compute_similar_activities_from_batches(
+        self, batches: Iterable[pd.DataFrame]
+    ) -> None:
+        """Calculates the Similar Activities metric from batches of the log.
+
+        Only the number of executions per individual and activity is kept
+        between the batches, the result equals compute_similar_activities
+        on the concatenated batches.
+
+        Args:
+            batches: The batches of the log.
+        """
+        resource_col = self.resource_col or "org:resource"
+        activity_col = self.activity_col or "concept:name"
+        executions: Optional[pd.Series] = None
+        for batch in batches:
+            counts = batch.groupby([resource_col, activity_col]).size()
+            executions = (
+                counts if executions is None else executions.add(counts, fill_value=0)
+            )
+
+        connections: SocialNetworkAnalysisType = {}
+        if executions is not None:
+            matrix = executions.unstack(fill_value=0).sort_index().sort_index(axis=1)
+            for source in matrix.index:
+                for target in matrix.index:
+                    if source != target:
+                        r, _ = stats.pearsonr(matrix.loc[source], matrix.loc[target])
+                        connections[(source, target)] = r
+        self._similar_activities = sna_obj.SNA(connections, False)
+
     def get_similar_activities_values(self) -> SocialNetworkAnalysisType:
         """Returns the Similar Activities metric.
 
@@ -273,7 +355,9 @@ class ResourceBased:
 
     # **************** Role Discovery ****************
 
-    def compute_organizational_roles(self) -> None:
+    def compute_organizational_roles(
+        self, threshold: float = DEFAULT_ROLES_THRESHOLD
+    ) -> None:
         """Calculates the organizational roles.
 
         A role is a set of activities in the log that are executed by a similar
@@ -292,8 +376,20 @@ class ResourceBased:
         activity groups, where each group associates a list of activities
         with a dictionary of originators and their corresponding
         importance scores.
+
+        Activities with identical originator profiles are merged up front
+        and only roles sharing an originator are compared, which yields
+        the same roles as PM4Py without comparing all pairs of roles.
+
+        Args:
+            threshold (optional): The similarity two roles need to exceed to
+              be merged. Defaults to 0.65, as in PM4Py.
         """
-        self._organizational_roles = pm4py.discover_organizational_roles(self.log)
+        self._organizational_roles = RoleDiscovery(
+            self.log,
+            activity_col=self.activity_col or "concept:name",
+            resource_col=self.resource_col or "org:resource",
+        ).discover(threshold)
 
     def get_organizational_roles(self) -> List[Dict[str, Any]]:
         """Returns the organizational roles.
@@ -322,14 +418,7 @@ class ResourceBased:
                 "Organizational roles have not been calculated yet. "
                 "Please call compute_organizational_roles() first."
             )
-        structured_roles = [
-            {
-                "activities": role.activities,
-                "originators_importance": role.originator_importance,
-            }
-            for role in self._organizational_roles
-        ]
-        return structured_roles
+        return self._organizational_roles
 
     # **************** Resource Profiles ****************
 
@@ -482,7 +571,27 @@ class ResourceBased:
             A float indicating the multitasking of the given resource
             in the given time interval.
         """
-        return rp_algorithm.multitasking(self.log, start_time, end_time, resource)
+        return self.get_multitasking_index().get_multitasking(
+            start_time, end_time, resource
+        )
+
+    def get_multitasking_index(self) -> MultitaskingIndex:
+        """Returns the interval index used for the multitasking metric.
+
+        The index is built once per log, so repeated multitasking queries
+        for other resources or time windows do not rebuild any intervals.
+
+        Returns:
+            The MultitaskingIndex of the log.
+        """
+        if self._multitasking_index is None:
+            self._multitasking_index = MultitaskingIndex(
+                self.log,
+                case_id_col=self.case_id_col or "case:concept:name",
+                timestamp_col=self.timestamp_col or "time:timestamp",
+                resource_col=self.resource_col or "org:resource",
+            )
+        return self._multitasking_index
 
     def get_average_activity_duration(
         self, start_time: str, end_time: str, resource: str, activity: str
@@ -551,8 +660,8 @@ class ResourceBased:
             in the given time interval.
         """
         return float(
-            rp_algorithm.interaction_two_resources(
-                self.log, start_time, end_time, resource1, resource2
+            self.get_case_resource_index().get_interaction_two_resources(
+                start_time, end_time, resource1, resource2
             )
         )
 
@@ -575,7 +684,27 @@ class ResourceBased:
             A float indicating the social position of the given resource
             in the given time interval.
         """
-        return rp_algorithm.social_position(self.log, start_time, end_time, resource)
+        return self.get_case_resource_index().get_social_position(
+            start_time, end_time, resource
+        )
+
+    def get_case_resource_index(self) -> CaseResourceIndex:
+        """Returns the case bitmaps used for interaction and social position.
+
+        The index is built once per log, so repeated queries for other
+        resources or time windows only combine the stored bitmaps.
+
+        Returns:
+            The CaseResourceIndex of the log.
+        """
+        if self._case_resource_index is None:
+            self._case_resource_index = CaseResourceIndex(
+                self.log,
+                case_id_col=self.case_id_col or "case:concept:name",
+                timestamp_col=self.timestamp_col or "time:timestamp",
+                resource_col=self.resource_col or "org:resource",
+            )
+        return self._case_resource_index
 
     # **************** Organizational Mining ****************
 
@@ -584,7 +713,8 @@ class ResourceBased:
 
         Provides the local diagnostics for the organizational model
         starting from a log object and considering the resource group
-        specified by the attribute. It is stored in a dictionary where the keys are
+        specified by the attribute. All four metrics are derived from one
+        sparse group x resource x activity count tensor. It is stored in a dictionary where the keys are
         the names of the group-related metrics and the values are the
         corresponding diagnostic values.
 
@@ -601,12 +731,12 @@ class ResourceBased:
                 "Group column name is not provided. Please provide a group column name."
             )
 
-        self._organizational_diagnostics = org_algorithm.apply_from_group_attribute(
+        self._organizational_diagnostics = OrganizationalDiagnostics(
             self.log,
-            parameters={
-                org_algorithm.Parameters.GROUP_KEY: self.group_col,
-            },
-        )
+            group_col=self.group_col,
+            resource_col=self.resource_col,
+            activity_col=self.activity_col or "concept:name",
+        ).to_dict()
 
     def get_group_relative_focus(self) -> Dict[str, Dict[str, float]]:
         """Returns the Group Relative Focus metric.
@@ -0,0 +1,234 @@
+"""Contains a pruned implementation of the organizational role discovery.
+
+This module defines the RoleDiscovery class. It follows the role
+aggregation of PM4Py (Burattin et al., 2013): every activity starts as its
+own role with the multiset of its originators, and the two most similar
+roles are merged while their similarity exceeds a threshold. Instead of
+comparing all pairs of roles in every iteration, activities with identical
+originator profiles are merged up front via hashing, and similarities are
+only computed among roles that share at least one originator.
+"""
+
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from backend.utils.lazy_import import lazy_import
+
+if TYPE_CHECKING:  # pragma: no cover
+    from scipy.sparse import csr_matrix
+
+sparse = lazy_import("scipy.sparse")
+csgraph = lazy_import("scipy.sparse.csgraph")
+
+# The default similarity threshold of PM4Py
+DEFAULT_ROLES_THRESHOLD = 0.65
+
+
+class RoleDiscovery:
+    """Represents the activity x originator counts used to discover roles.
+
+    The similarity of two roles is the weighted Jaccard similarity of
+    their normalized originator multisets. Roles without a shared
+    originator have a similarity of 0 and can never be merged, so the
+    roles are partitioned into components of activities connected by
+    shared originators, which are aggregated independently.
+
+    Attributes:
+        activities: The activities of the log, sorted.
+        resources: The resources of the log, sorted.
+        _counts: The sparse activity x resource count matrix.
+    """
+
+    def __init__(
+        self,
+        log: pd.DataFrame,
+        activity_col: str = "concept:name",
+        resource_col: str = "org:resource",
+    ) -> None:
+        """Builds the activity x resource count matrix from an event log.
+
+        Args:
+            log: The event log.
+            activity_col (optional): The name of the Activity column. Defaults
+              to "concept:name".
+            resource_col (optional): The name of the Resource column. Defaults
+              to "org:resource".
+        """
+        log = log[log[activity_col].notna() & log[resource_col].notna()]
+        activity_codes, activities = pd.factorize(log[activity_col], sort=True)
+        resource_codes, resources = pd.factorize(log[resource_col], sort=True)
+        self.activities: List[Any] = list(activities)
+        self.resources: List[Any] = list(resources)
+        self._counts = sparse.csr_matrix(
+            (np.ones(len(log), dtype=np.int64), (activity_codes, resource_codes)),
+            shape=(len(self.activities), len(self.resources)),
+            dtype=np.int64,
+        )
+
+    def discover(
+        self, threshold: float = DEFAULT_ROLES_THRESHOLD
+    ) -> List[Dict[str, Any]]:
+        """Discovers the organizational roles.
+
+        Args:
+            threshold (optional): The similarity two roles need to exceed to
+              be merged. Defaults to 0.65, as in PM4Py.
+
+        Returns:
+            A list of roles, each a dictionary with the sorted "activities"
+            of the role and the "originators_importance", i.e. the number of
+            events of these activities per originator. The roles are ordered
+            as by PM4Py, largest first.
+        """
+        counts, activity_sets = self._merge_identical_profiles()
+
+        # Activities sharing an originator are connected
+        involvement = (counts > 0).astype(np.int64)
+        _, components = csgraph.connected_components(
+            involvement @ involvement.T, directed=False
+        )
+
+        roles: List[Tuple[List[Any], np.ndarray]] = []
+        for component in np.unique(components):
+            members = np.flatnonzero(components == component)
+            roles.extend(
+                _aggregate_component(
+                    counts[members],
+                    [activity_sets[i] for i in members],
+                    threshold,
+                )
+            )
+
+        structured_roles = [
+            {
+                "activities": activities,
+                "originators_importance": {
+                    self.resources[j]: int(profile[j]) for j in np.flatnonzero(profile)
+                },
+            }
+            for activities, profile in roles
+        ]
+        structured_roles.sort(
+            key=lambda role: (
+                len(role["activities"]),
+                len(role["originators_importance"]),
+                ",".join(map(str, role["activities"])),
+            ),
+            reverse=True,
+        )
+        return structured_roles
+
+    def _merge_identical_profiles(self) -> Tuple["csr_matrix", List[List[Any]]]:
+        """Merges the activities whose normalized originator profiles are equal.
+
+        Equal profiles have a similarity of 1, so they would be merged
+        before any other pair anyway.
+
+        Returns:
+            The count matrix with one row per distinct profile and the
+            sorted activities of every row.
+        """
+        counts = self._counts
+        keys: Dict[Tuple[Any, ...], int] = {}
+        profile_codes = np.empty(len(self.activities), dtype=np.int64)
+        for i in range(len(self.activities)):
+            # Reducing the counts by their gcd gives an exact key per ratio
+            start, end = counts.indptr[i], counts.indptr[i + 1]
+            order = np.argsort(counts.indices[start:end])
+            indices = counts.indices[start:end][order]
+            data = counts.data[start:end][order]
+            key = (tuple(indices), tuple(data // np.gcd.reduce(data)))
+            profile_codes[i] = keys.setdefault(key, len(keys))
+
+        merge = sparse.csr_matrix(
+            (
+                np.ones(len(self.activities), dtype=np.int64),
+                (profile_codes, np.arange(len(self.activities))),
+            ),
+            shape=(len(keys), len(self.activities)),
+        )
+        activity_sets: List[List[Any]] = [[] for _ in range(len(keys))]
+        for activity, code in zip(self.activities, profile_codes):
+            activity_sets[code].append(activity)
+        return (merge @ counts).tocsr(), activity_sets
+
+
+def _aggregate_component(
+    counts: "csr_matrix", activity_sets: List[List[Any]], threshold: float
+) -> List[Tuple[List[Any], np.ndarray]]:
+    """Greedily merges the most similar roles of one component.
+
+    Args:
+        counts: The count matrix of the roles of the component.
+        activity_sets: The activities of every role.
+        threshold: The similarity two roles need to exceed to be merged.
+
+    Returns:
+        A list of (activities, originator counts) tuples, one per final role.
+        The counts are indexed by all resources of the log.
+    """
+    dense_counts = counts.toarray().astype(float)
+    columns = np.flatnonzero(dense_counts.sum(axis=0))
+    profiles = dense_counts[:, columns]
+    activity_sets = [sorted(activities) for activities in activity_sets]
+    alive = np.ones(len(activity_sets), dtype=bool)
+
+    similarities = np.full((len(activity_sets), len(activity_sets)), -1.0)
+    for i in range(len(activity_sets)):
+        similarities[i, i + 1 :] = _similarity(profiles[i], profiles[i + 1 :])
+
+    while alive.sum() > 1:
+        best = similarities.max()
+        if best <= threshold:
+            break
+        # Ties are broken by the activity names, as in PM4Py
+        candidates = np.argwhere(similarities == best)
+        i, j = min(
+            candidates,
+            key=lambda pair: sorted(
+                (
+                    ",".join(map(str, activity_sets[pair[0]])),
+                    ",".join(map(str, activity_sets[pair[1]])),
+                )
+            ),
+        )
+        profiles[i] += profiles[j]
+        activity_sets[i] = sorted(activity_sets[i] + activity_sets[j])
+        alive[j] = False
+        similarities[j, :] = -1.0
+        similarities[:, j] = -1.0
+
+        others = np.flatnonzero(alive)
+        others = others[others != i]
+        row_similarities = _similarity(profiles[i], profiles[others])
+        lower, upper = others < i, others > i
+        similarities[others[lower], i] = row_similarities[lower]
+        similarities[i, others[upper]] = row_similarities[upper]
+
+    roles: List[Tuple[List[Any], np.ndarray]] = []
+    for i in np.flatnonzero(alive):
+        profile = np.zeros(counts.shape[1], dtype=np.int64)
+        profile[columns] = np.rint(profiles[i]).astype(np.int64)
+        roles.append((activity_sets[i], profile))
+    return roles
+
+
+def _similarity(profile: np.ndarray, others: np.ndarray) -> np.ndarray:
+    """Computes the weighted Jaccard similarity of normalized profiles.
+
+    Args:
+        profile: The originator counts of one role.
+        others: The originator counts of other roles, one per row.
+
+    Returns:
+        The similarity of the role to every other role.
+    """
+    if len(others) == 0:
+        return np.empty(0)
+    normalized = profile / profile.sum()
+    normalized_others = others / others.sum(axis=1, keepdims=True)
+    intersection = np.minimum(normalized, normalized_others).sum(axis=1)
+    union = np.maximum(normalized, normalized_others).sum(axis=1)
+    return intersection / union
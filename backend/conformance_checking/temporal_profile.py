@@ -5,16 +5,19 @@ discover temporal profiles from event logs and checks conformance based
 on the discovered temporal profiles.
 """
 
-from typing import Any, Dict, List, Optional, Tuple, TypeAlias
+import math
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple, TypeAlias
 
 import pandas as pd
-from pandas.io.formats.style import Styler
-from pm4py.algo.conformance.temporal_profile import (  # type: ignore
-    algorithm as tp_conformance,
-)
-from pm4py.algo.discovery.temporal_profile import (  # type: ignore
-    algorithm as tp_discovery,
-)
+
+from backend.utils.lazy_import import lazy_import
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pandas.io.formats.style import Styler
+
+tp_conformance = lazy_import("pm4py.algo.conformance.temporal_profile.algorithm")
+tp_discovery = lazy_import("pm4py.algo.discovery.temporal_profile.algorithm")
+df_statistics = lazy_import("pm4py.algo.discovery.dfg.adapters.pandas.df_statistics")
 
 TemporalProfileType: TypeAlias = Dict[Tuple[str, str], Tuple[float, float]]
 ConformanceResultType: TypeAlias = List[List[Tuple[Any, ...]]]
@@ -73,6 +76,50 @@ class TemporalProfile:
         """
         self._temporal_profile = tp_discovery.apply(self.log)
 
+    def discover_temporal_profile_from_batches(
+        self, batches: Iterable[pd.DataFrame]
+    ) -> None:
+        """Discovers the temporal profile from batches of the log.
+
+        Every batch must contain whole cases. Only the count, mean and sum
+        of squared deviations of the durations per pair of activities are
+        kept between the batches and merged, so the log is never held in
+        memory as a whole. The result equals discover_temporal_profile on
+        the concatenated batches.
+
+        Args:
+            batches: The batches of the log.
+        """
+        stats: Optional[pd.DataFrame] = None
+        for batch in batches:
+            if batch.empty:
+                continue
+            flows = df_statistics.get_partial_order_dataframe(
+                batch,
+                activity_key="concept:name",
+                timestamp_key="time:timestamp",
+                case_id_glue="case:concept:name",
+                keep_first_following=False,
+            ).groupby(["concept:name", "concept:name_2"])["@@flow_time"]
+            batch_stats = pd.DataFrame(
+                {
+                    "count": flows.count(),
+                    "mean": flows.mean(),
+                    "m2": flows.var(ddof=0) * flows.count(),
+                }
+            )
+            stats = (
+                batch_stats if stats is None else _merge_flow_stats(stats, batch_stats)
+            )
+
+        self._temporal_profile = {}
+        if stats is not None:
+            for pair, row in stats.iterrows():
+                std = (
+                    math.sqrt(row["m2"] / (row["count"] - 1)) if row["count"] > 1 else 0
+                )
+                self._temporal_profile[pair] = (row["mean"], std)  # type: ignore
+
     def check_temporal_conformance(self, zeta: float = 0.5) -> None:
         """Checks conformance of the log against the temporal profile.
 
@@ -99,6 +146,36 @@ class TemporalProfile:
             self.log, self._temporal_profile, parameters={"zeta": zeta}
         )
 
+    def check_temporal_conformance_of_batches(
+        self, batches: Iterable[pd.DataFrame], zeta: float = 0.5
+    ) -> None:
+        """Checks conformance of batches of the log against the temporal profile.
+
+        Every batch must contain whole cases. The deviations of the cases
+        are collected in the order of the batches.
+
+        Args:
+            batches: The batches of the log.
+            zeta: Multiplier for the standard deviation.
+
+        Raises:
+            ValueError: If the temporal profile has not been discovered yet.
+        """
+        if not self._temporal_profile:
+            raise ValueError(
+                "Temporal Profile not discovered. Please run discover_temporal_profile() first."
+            )
+        self._zeta = zeta
+        self._temporal_conformance_result = []
+        for batch in batches:
+            if batch.empty:
+                continue
+            self._temporal_conformance_result.extend(
+                tp_conformance.apply(
+                    batch, self._temporal_profile, parameters={"zeta": zeta}
+                )
+            )
+
     def get_temporal_profile(self) -> TemporalProfileType:
         """Returns the discovered temporal profile.
 
@@ -173,7 +250,7 @@ class TemporalProfile:
         )
         return diagnostics_dataframe
 
-    def get_sorted_coloured_diagnostics(self) -> Styler:
+    def get_sorted_coloured_diagnostics(self) -> "Styler":
         """Returns the diagnostics DataFrame with sorting and styling.
 
         Sorts the diagnostics DataFrame in descending order of the number of standard deviations (num_st_devs)
@@ -196,3 +273,32 @@ class TemporalProfile:
             return [f"border-left: 5px solid {strip_color};"] + [""] * (len(row) - 1)  # type: ignore
 
         return sorted_diagnostics.style.apply(apply_color_strip, axis=1)  # type: ignore
+
+
+def _merge_flow_stats(left: pd.DataFrame, right: pd.DataFrame) -> pd.DataFrame:
+    """Merges the duration statistics of two batches per pair of activities.
+
+    Uses the pairwise update of Chan et al. for the sum of squared
+    deviations, which stays accurate for large durations.
+
+    Args:
+        left: The count, mean and m2 per pair of the first batches.
+        right: The count, mean and m2 per pair of the next batch.
+
+    Returns:
+        The merged count, mean and m2 per pair.
+    """
+    index = left.index.union(right.index)
+    left = left.reindex(index).fillna(0)
+    right = right.reindex(index).fillna(0)
+    count = left["count"] + right["count"]
+    delta = right["mean"] - left["mean"]
+    return pd.DataFrame(
+        {
+            "count": count,
+            "mean": left["mean"] + delta * right["count"] / count,
+            "m2": left["m2"]
+            + right["m2"]
+            + delta**2 * left["count"] * right["count"] / count,
+        }
+    )
@@ -4,15 +4,20 @@ This module initializes the FastAPI application, sets up middleware, and
 includes the API routers.
 """
 
+import time
 from contextlib import asynccontextmanager
-from typing import Dict
+from typing import Awaitable, Callable, Dict
 
 from dotenv import load_dotenv
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 
+from backend.api.celonis import warm_up_celonis_connection
+from backend.api.debug import router as debug_router
+from backend.api.job_queue import create_job_store, start_job_workers
 from backend.api.jobs import router as jobs_router
 from backend.api.log import router as log_router
+from backend.api.metrics import router as metrics_router
 from backend.api.modules.declarative_router import router as declarative_router
 from backend.api.modules.general_router import router as general_router
 from backend.api.modules.log_skeleton_router import router as log_skeleton_router
@@ -21,38 +26,60 @@ from backend.api.modules.temporal_profile_router import (
     router as temporal_profile_router,
 )
 from backend.api.setup import router as setup_router
+from backend.api.workspaces import (
+    DEFAULT_WORKSPACE,
+    WorkspaceRegistry,
+    init_workspace_state,
+)
+from backend.api.workspaces import router as workspaces_router
+from backend.celonis_connection.connection_pool import create_connection_pool
+from backend.utils.metrics import REQUEST_DURATION
 
 # **************** Startup and Shutdown ****************
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Initializes the CelonisConnectionManager and stores it in the app state.
+    """Initializes the connection pool, workspaces and job workers.
 
     This function is used as a context manager to ensure that the
-    CelonisConnectionManager is properly initialized.
+    connection pool is properly initialized and warmed up, and that its
+    connections are closed on shutdown.
 
     Args:
         app: The FastAPI application instance. This is used to store the
-          CelonisConnectionManager instance in the application state.
+          connection pool and the workspaces in the application state.
     """
     # Load environment variables from .env file
     load_dotenv()
 
-    # Initialize the CelonisConnectionManager
-    # It is handled by the get_celonis_connection DI
-    app.state.celonis = None
-
-    # Store the log's columns in the app state
-    app.state.current_log = None  # will get path to tmp file
-    app.state.current_log_columns = []
-
-    # *** Log Skeleton ***
-    app.state.jobs = {}
+    # The application state is the state of the default workspace, i.e.
+    # it holds the connection, the log, the caches and the jobs of the
+    # requests without a workspace header
+    init_workspace_state(app.state)
+    # With a shared job store the jobs are kept and queued in the store,
+    # so they can be run and polled by any worker process
+    app.state.job_store = create_job_store()
+    app.state.workspaces = WorkspaceRegistry(app.state, job_store=app.state.job_store)
+
+    # The CelonisConnectionManagers of all workspaces are kept in the
+    # connection pool and handed out by the get_celonis_connection DI
+    app.state.celonis_pool = create_connection_pool()
+    # Connect ahead of the first request if the credentials are known
+    warm_up_celonis_connection(app)
+
+    app.state.job_workers = []
+    if app.state.job_store is not None:
+        app.state.job_workers = start_job_workers(app, app.state.job_store)
 
     yield
     # *** Shutdown ***
-    # Potentially add something here, if we need to
+    for worker in app.state.job_workers:
+        worker.stop(timeout=30)
+    app.state.celonis_pool.close()
+    for workspace in app.state.workspaces.list():
+        if workspace.workspace_id != DEFAULT_WORKSPACE:
+            workspace.close()
 
 
 # **************** Create Application ****************
@@ -71,6 +98,31 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def record_request_duration(
+    request: Request, call_next: Callable[[Request], Awaitable[Response]]
+) -> Response:
+    """Records the duration of every request by route.
+
+    The route is the path template, e.g. /api/jobs/{job_id}, so the
+    requests of a route share one series.
+    """
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        REQUEST_DURATION.observe(
+            time.perf_counter() - start,
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=status,
+        )
+
+
 # 'Empty' route
 @app.get("/")
 def home() -> Dict[str, str]:
@@ -81,7 +133,10 @@ def home() -> Dict[str, str]:
 # **************** Routers ****************
 
 app.include_router(jobs_router)
+app.include_router(metrics_router)
+app.include_router(debug_router)
 app.include_router(setup_router)
+app.include_router(workspaces_router)
 app.include_router(log_router)
 
 app.include_router(general_router)
@@ -1,17 +1,27 @@
 """Queries that can be used to get resource related data from celonis."""
 
 from collections import Counter, defaultdict
-from itertools import product
+from typing import Optional
 
 import numpy as np
 import pandas as pd
 from pandas import DataFrame
-from pycelonis_core.utils.errors import PyCelonisNotFoundError
-from scipy.stats import pearsonr  # type: ignore
 
 from backend.celonis_connection.celonis_connection_manager import (
     CelonisConnectionManager,
 )
+from backend.conformance_checking.case_resource_index import CaseResourceIndex
+from backend.conformance_checking.organizational_diagnostics import (
+    OrganizationalDiagnostics,
+)
+from backend.conformance_checking.resource_profile_cube import (
+    Granularity,
+    ResourceProfileCube,
+)
+from backend.utils.lazy_import import lazy_import
+
+stats = lazy_import("scipy.stats")
+pycelonis_errors = lazy_import("pycelonis_core.utils.errors")
 
 
 def get_number_of_resources(celonis: CelonisConnectionManager) -> DataFrame:
@@ -58,7 +68,7 @@ def get_resource_for_activity(celonis: CelonisConnectionManager) -> DataFrame:
                 "Activity": table_columns.find("concept:name"),
                 "Resource": table_columns.find("org:resource"),
             }
-        except PyCelonisNotFoundError:
+        except pycelonis_errors.PyCelonisNotFoundError:
             print("Table columns not found in data model.")
     return celonis.get_dataframe_from_celonis(query)  # type: ignore
 
@@ -257,7 +267,7 @@ def get_similar_activities_values(celonis: CelonisConnectionManager) -> DataFram
             rsc_act_matrix.shape[0],  # type: ignore
         ):  # Only one direction, avoid repeats
             vect_j = rsc_act_matrix[j, :]  # type: ignore
-            r, _ = pearsonr(vect_i, vect_j)  # type: ignore
+            r, _ = stats.pearsonr(vect_i, vect_j)  # type: ignore
             records.append(  # type: ignore
                 {
                     "Source": resources_keys[i],
@@ -310,6 +320,67 @@ def get_organizational_roles(celonis: CelonisConnectionManager) -> DataFrame:
 # **************** Resource Profiles ****************
 
 
+def get_resource_profile_cube(
+    celonis: CelonisConnectionManager, granularity: Granularity = "day"
+) -> ResourceProfileCube:
+    """Builds the resource profile cube from a single PQL query.
+
+    The cube answers the windowed resource profile metrics (distinct
+    activities, activity frequency, activity completions, case completions
+    and fraction of case completions) by prefix-sum lookups, so it only
+    has to be built once per extract.
+
+    Args:
+        celonis (CelonisConnectionManager): The Celonis connection
+        granularity (str): The size of a time bucket, "hour" or "day".
+
+    Returns:
+        The resource profile cube of the event log.
+    """
+    event_query = {
+        "Case": '"ACTIVITIES"."case:concept:name"',
+        "Activity": '"ACTIVITIES"."concept:name"',
+        "Resource": '"ACTIVITIES"."org:resource"',
+        "Timestamp": '"ACTIVITIES"."time:timestamp"',
+    }
+    dataframe = celonis.get_dataframe_from_celonis(event_query)  # type: ignore
+    return ResourceProfileCube(
+        dataframe,  # type: ignore
+        granularity=granularity,
+        case_id_col="Case",
+        activity_col="Activity",
+        timestamp_col="Timestamp",
+        resource_col="Resource",
+    )
+
+
+def get_case_resource_index(celonis: CelonisConnectionManager) -> CaseResourceIndex:
+    """Builds the case/resource bitmap index from a single PQL query.
+
+    The index answers the interaction between two resources and the
+    social position by bitmap operations on the cases or events of a
+    time window, so it only has to be built once per extract.
+
+    Args:
+        celonis (CelonisConnectionManager): The Celonis connection
+
+    Returns:
+        The case/resource index of the event log.
+    """
+    event_query = {
+        "Case": '"ACTIVITIES"."case:concept:name"',
+        "Resource": '"ACTIVITIES"."org:resource"',
+        "Timestamp": '"ACTIVITIES"."time:timestamp"',
+    }
+    dataframe = celonis.get_dataframe_from_celonis(event_query)  # type: ignore
+    return CaseResourceIndex(
+        dataframe,  # type: ignore
+        case_id_col="Case",
+        timestamp_col="Timestamp",
+        resource_col="Resource",
+    )
+
+
 def get_number_of_distinct_activities(
     celonis: CelonisConnectionManager, start_time: str, end_time: str, resource: str
 ) -> int:
@@ -677,6 +748,7 @@ def get_interaction_two_resources(
     end_time: str,
     resource1: str,
     resource2: str,
+    index: Optional[CaseResourceIndex] = None,
 ) -> float:
     """Calculates the interaction between two resources.
 
@@ -691,35 +763,18 @@ def get_interaction_two_resources(
             interaction.
         resource2 (str): The second resource for which to calculate the
             interaction.
+        index (Optional[CaseResourceIndex]): A cached case/resource index
+            of the extract. Built with a PQL query if not given.
 
     Returns:
         A float indicating the interaction between the two resources
         in the given time interval.
     """
-    case_query = {
-        "Case": '"ACTIVITIES"."case:concept:name"',
-        "Case End": 'MAX("ACTIVITIES"."time:timestamp")',
-    }
-    case_df = celonis.get_dataframe_from_celonis(case_query)  # type: ignore
-
-    resource_query = {
-        "Case": '"ACTIVITIES"."case:concept:name"',
-        "Resource": '"ACTIVITIES"."org:resource"',
-    }
-    resource_df = celonis.get_dataframe_from_celonis(resource_query)  # type: ignore
-
-    resource_set = resource_df.groupby("Case")["Resource"].apply(set).reset_index()  # type: ignore
-
-    merged_df = pd.merge(case_df, resource_set, on="Case", how="inner")  # type: ignore
-
-    merged_df["Case End"] = pd.to_datetime(merged_df["Case End"])  # type: ignore
-    mask = (
-        (merged_df["Case End"] >= pd.to_datetime(start_time))  # type: ignore
-        & (merged_df["Case End"] <= pd.to_datetime(end_time))  # type: ignore
-        & (merged_df["Resource"].apply(lambda x: resource1 in x and resource2 in x))  # type: ignore
+    if index is None:
+        index = get_case_resource_index(celonis)
+    interaction_count = index.get_interaction_two_resources(
+        start_time, end_time, resource1, resource2, inclusive_end=True
     )
-
-    interaction_count = merged_df.loc[mask, "Case"].nunique()
     return float(interaction_count)
 
 
@@ -728,6 +783,7 @@ def get_social_position(
     start_time: str,
     end_time: str,
     resource: str,
+    index: Optional[CaseResourceIndex] = None,
 ) -> float:
     """Calculates the social position of a resource.
 
@@ -742,42 +798,60 @@ def get_social_position(
         end_time (str): The end time of the interval.
         resource (str): The resource for which to calculate the social
             position.
+        index (Optional[CaseResourceIndex]): A cached case/resource index
+            of the extract. Built with a PQL query if not given.
 
     Returns:
         A float indicating the social position of the resource in the
         given time interval.
     """
-    event_query = {
-        "Case": '"ACTIVITIES"."case:concept:name"',
-        "Resource": '"ACTIVITIES"."org:resource"',
-        "Timestamp": '"ACTIVITIES"."time:timestamp"',
-    }
-    dataframe = celonis.get_dataframe_from_celonis(event_query)  # type: ignore
-    dataframe["Timestamp"] = pd.to_datetime(dataframe["Timestamp"])  # type: ignore
-
-    dataframe = dataframe[  # type: ignore
-        (dataframe["Timestamp"] >= pd.to_datetime(start_time))  # type: ignore
-        & (dataframe["Timestamp"] <= pd.to_datetime(end_time))  # type: ignore
-    ]
-
-    all_active_resources = set(dataframe["Resource"].unique())  # type: ignore
-
-    target_cases = set(dataframe[dataframe["Resource"] == resource]["Case"].unique())  # type: ignore
-
-    resources_in_same_cases = set(  # type: ignore
-        dataframe[dataframe["Case"].isin(target_cases)]["Resource"].unique()  # type: ignore
+    if index is None:
+        index = get_case_resource_index(celonis)
+    connected_resources, active_resources = index.get_connected_resources(
+        start_time, end_time, resource, inclusive_end=True
     )
-    resources_in_same_cases.discard(resource)  # type: ignore
 
-    if not all_active_resources:
+    if not active_resources:
         return 0.0
-    social_position = round(len(resources_in_same_cases) / len(all_active_resources))  # type: ignore
+    social_position = round(connected_resources / active_resources)
     return float(social_position)
 
 
 # ***************** Organizational Mining ****************
 
 
+def get_organizational_diagnostics(
+    celonis: CelonisConnectionManager,
+) -> OrganizationalDiagnostics:
+    """Builds the organizational diagnostics from a single PQL query.
+
+    The query aggregates the number of events per group, resource and
+    activity. All four group diagnostics are derived from these counts,
+    attributing every event to the group it was recorded with.
+
+    Args:
+        celonis (CelonisConnectionManager): The Celonis connection
+
+    Returns:
+        The organizational diagnostics of the event log.
+    """
+    count_query = {
+        "Group": '"ACTIVITIES"."org:group"',
+        "Resource": '"ACTIVITIES"."org:resource"',
+        "Activity": '"ACTIVITIES"."concept:name"',
+        "Activity Count": 'COUNT("ACTIVITIES"."case:concept:name")',
+    }
+    count_df = celonis.get_dataframe_from_celonis(count_query)  # type: ignore
+    return OrganizationalDiagnostics(
+        count_df,  # type: ignore
+        group_col="Group",
+        resource_col="Resource",
+        activity_col="Activity",
+        count_col="Activity Count",
+        by_membership=False,
+    )
+
+
 def get_group_relative_focus(
     celonis: CelonisConnectionManager,
 ) -> DataFrame:
@@ -797,43 +871,8 @@ def get_group_relative_focus(
         A DataFrame containing the Group Relative Focus for each group
         and activity.
     """
-    activity_query = {
-        "Group": '"ACTIVITIES"."org:group"',
-        "Activity": '"ACTIVITIES"."concept:name"',
-        "Activity Count": 'COUNT("ACTIVITIES"."case:concept:name")',
-    }
-    activity_df = celonis.get_dataframe_from_celonis(activity_query)  # type: ignore
-
-    total_per_activity_query = {
-        "Activity": '"ACTIVITIES"."concept:name"',
-        "Total Activity Count": 'COUNT("ACTIVITIES"."case:concept:name")',
-    }
-    total_per_activity_df = celonis.get_dataframe_from_celonis(total_per_activity_query)  # type: ignore
-
-    merged_df = activity_df.merge(total_per_activity_df, on="Activity")  # type: ignore
-    merged_df["Group Relative Focus"] = (
-        merged_df["Activity Count"] / merged_df["Total Activity Count"]
-    )
-
-    all_groups = merged_df["Group"].unique()  # type: ignore
-    all_activities = merged_df["Activity"].unique()  # type: ignore
-
-    all_combinations = pd.DataFrame(
-        list(product(all_groups, all_activities)),  # type: ignore
-        columns=["Group", "Activity"],  # type: ignore
-    )
-
-    result_df = all_combinations.merge(
-        merged_df[["Group", "Activity", "Group Relative Focus"]],
-        on=["Group", "Activity"],
-        how="left",
-    )
-
-    result_df["Group Relative Focus"] = result_df["Group Relative Focus"].fillna(0)  # type: ignore
-
-    return result_df.pivot(
-        index="Group", columns="Activity", values="Group Relative Focus"
-    )
+    diagnostics = get_organizational_diagnostics(celonis)
+    return diagnostics.get_group_relative_focus()
 
 
 def get_group_relative_stake(
@@ -855,43 +894,8 @@ def get_group_relative_stake(
         A DataFrame containing the Group Relative Stake for each group
         and activity.
     """
-    activity_query = {
-        "Group": '"ACTIVITIES"."org:group"',
-        "Activity": '"ACTIVITIES"."concept:name"',
-        "Activity Count": 'COUNT("ACTIVITIES"."case:concept:name")',
-    }
-    activity_df = celonis.get_dataframe_from_celonis(activity_query)  # type: ignore
-
-    total_per_group_query = {
-        "Group": '"ACTIVITIES"."org:group"',
-        "Total Group Activities": 'COUNT("ACTIVITIES"."case:concept:name")',
-    }
-    total_per_group_df = celonis.get_dataframe_from_celonis(total_per_group_query)  # type: ignore
-
-    merged_df = activity_df.merge(total_per_group_df, on="Group")  # type: ignore
-    merged_df["Group Relative Stake"] = (
-        merged_df["Activity Count"] / merged_df["Total Group Activities"]
-    )
-
-    all_groups = merged_df["Group"].unique()  # type: ignore
-    all_activities = merged_df["Activity"].unique()  # type: ignore
-
-    all_combinations = pd.DataFrame(
-        list(product(all_groups, all_activities)),  # type: ignore
-        columns=["Group", "Activity"],  # type: ignore
-    )
-
-    result_df = all_combinations.merge(
-        merged_df[["Group", "Activity", "Group Relative Stake"]],
-        on=["Group", "Activity"],
-        how="left",
-    )
-
-    result_df["Group Relative Stake"] = result_df["Group Relative Stake"].fillna(0)  # type: ignore
-
-    return result_df.pivot(
-        index="Group", columns="Activity", values="Group Relative Stake"
-    )
+    diagnostics = get_organizational_diagnostics(celonis)
+    return diagnostics.get_group_relative_stake()
 
 
 def get_group_coverage(
@@ -908,31 +912,8 @@ def get_group_coverage(
         and the values are dictionaries containing resources and the
         Group Coverage metric.
     """
-    resource_query = {
-        "Group": '"ACTIVITIES"."org:group"',
-        "Resource": '"ACTIVITIES"."org:resource"',
-        "Resource Activity Count": 'COUNT("ACTIVITIES"."case:concept:name")',
-    }
-    resource_df = celonis.get_dataframe_from_celonis(resource_query)  # type: ignore
-
-    total_per_group_query = {
-        "Group": '"ACTIVITIES"."org:group"',
-        "Total Group Activities": 'COUNT("ACTIVITIES"."case:concept:name")',
-    }
-    total_per_group_df = celonis.get_dataframe_from_celonis(total_per_group_query)  # type: ignore
-
-    merged_df = resource_df.merge(total_per_group_df, on="Group")  # type: ignore
-    merged_df["Group Coverage"] = (
-        merged_df["Resource Activity Count"] / merged_df["Total Group Activities"]
-    )
-
-    result_df = merged_df.pivot(
-        index="Resource", columns="Group", values="Group Coverage"
-    )
-
-    result_df = result_df.fillna(0)  # type: ignore
-
-    return result_df
+    diagnostics = get_organizational_diagnostics(celonis)
+    return diagnostics.get_group_coverage().T
 
 
 def get_group_member_interaction(
@@ -949,42 +930,5 @@ def get_group_member_interaction(
     Args:
         celonis (CelonisConnectionManager): The Celonis connection
     """
-    member_activity_query = {
-        "Group": '"ACTIVITIES"."org:group"',
-        "Resource": '"ACTIVITIES"."org:resource"',
-        "Activity": '"ACTIVITIES"."concept:name"',
-        "Activity Count": 'COUNT("ACTIVITIES"."case:concept:name")',
-    }
-    member_activity_df = celonis.get_dataframe_from_celonis(member_activity_query)  # type: ignore
-
-    all_resources = member_activity_df["Resource"].unique()  # type: ignore
-    all_activities = member_activity_df["Activity"].unique()  # type: ignore
-
-    all_combinations = pd.DataFrame(
-        list(product(all_resources, all_activities)),  # type: ignore
-        columns=["Resource", "Activity"],
-    )
-
-    aggregated_df = (
-        member_activity_df.groupby(["Resource", "Activity"])["Activity Count"]  # type: ignore
-        .sum()
-        .reset_index()
-    )
-
-    result_df = all_combinations.merge(
-        aggregated_df,
-        on=["Resource", "Activity"],
-        how="left",
-    )
-
-    result_df["Activity Count"] = result_df["Activity Count"].fillna(0)  # type: ignore
-
-    final_df = result_df.pivot(
-        index="Resource",
-        columns="Activity",
-        values="Activity Count",
-    )
-
-    final_df = final_df.fillna(0)  # type: ignore
-
-    return final_df
+    diagnostics = get_organizational_diagnostics(celonis)
+    return diagnostics.get_resource_activity_counts()
@@ -1,24 +1,48 @@
 """Contains utility functions for handling file uploads."""
 
+import gzip
 import io
 import os
-import tempfile
+import re
+import time
+import warnings
+import xml.etree.ElementTree as ET
+import zipfile
+from contextlib import ExitStack, contextmanager
+from typing import (
+    IO,
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+    cast,
+)
 
 import pandas as pd
-import pm4py  # type: ignore
-import pm4py.objects.conversion.log.variants as log_variants  # type: ignore
+import pyarrow as pa  # type: ignore
+import pyarrow.csv as pa_csv  # type: ignore
+import pyarrow.feather as feather  # type: ignore
+from pandas.api.types import (
+    CategoricalDtype,
+    is_datetime64_any_dtype,
+    union_categoricals,
+)
+from pandas.tseries.api import guess_datetime_format
 
 
 def process_xes_file(file_content: bytes) -> pd.DataFrame:
     """Processes XES file content and converts it to a DataFrame.
 
-    This function is needed, as the transferred file via the API is in bytes,
-    and pm4py does not support reading from bytes directly. Therefore, we
-    create a temporary file to store the uploaded content and then read it
-    using pm4py.
+    The content is parsed incrementally by read_xes, so neither a temporary
+    file nor an intermediate object log is created.
 
     Args:
-        file_content: Binary content of the XES file.
+        file_content: Binary content of the XES file, may be gzip compressed.
 
     Returns:
         A pandas DataFrame containing the event log.
@@ -26,48 +50,793 @@ def process_xes_file(file_content: bytes) -> pd.DataFrame:
     Raises:
         ValueError: If the file cannot be processed.
     """
-    # Create a temporary file to store the uploaded content
-    tmp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".xes")
+    return read_xes(io.BytesIO(file_content))
+
+
+def process_csv_file(file_content: bytes) -> pd.DataFrame:
+    """Processes CSV file content and converts it to a Pandas DataFrame.
+
+    Args:
+        file_content: The binary content of the CSV file.
+
+    Returns:
+        A pandas DataFrame containing the CSV data.
+
+    Raises:
+        ValueError: If the file cannot be processed.
+    """
     try:
-        tmp_file.write(file_content)
-        tmp_file.close()  # Close the file before reading it
-        tmp_path = tmp_file.name
+        return pd.read_csv(io.BytesIO(file_content))  # type: ignore
+    except Exception as e:
+        raise ValueError(f"Failed to process CSV file: {str(e)}") from e
+
+
+# **************** Compressed Logs ****************
+
+# The extensions of the supported uncompressed logs
+LOG_EXTENSIONS = (".csv", ".xes")
+
+# The extensions of the supported compressed logs, a zip archive must
+# contain exactly one .csv or .xes file
+COMPRESSED_LOG_EXTENSIONS = (".csv.gz", ".xes.gz", ".zip")
+
+
+def get_file_extension(filename: str) -> str:
+    """Returns the lowercase extension of a file name.
+
+    Unlike os.path.splitext, the extension of a gzip compressed log
+    includes the extension of the log, e.g. ".xes.gz".
+
+    Args:
+        filename: The name or path of the file.
+
+    Returns:
+        The extension of the file, including the leading dot.
+    """
+    name = filename.lower()
+    for extension in (".csv.gz", ".xes.gz"):
+        if name.endswith(extension):
+            return extension
+    return os.path.splitext(name)[1]
+
+
+def _find_zip_member(archive: zipfile.ZipFile) -> str:
+    """Returns the name of the only log in a zip archive.
+
+    Args:
+        archive: The opened zip archive.
+
+    Returns:
+        The name of the .csv or .xes member.
+
+    Raises:
+        ValueError: If the archive does not contain exactly one log.
+    """
+    members = [
+        info.filename
+        for info in archive.infolist()
+        if not info.is_dir()
+        and not info.filename.startswith("__MACOSX/")
+        and get_file_extension(info.filename) in LOG_EXTENSIONS
+    ]
+    if len(members) != 1:
+        raise ValueError(
+            "A zip archive must contain exactly one .csv or .xes file, "
+            f"found {len(members)}."
+        )
+    return members[0]
+
+
+def get_log_format(source: Union[str, IO[bytes]], file_extension: str) -> str:
+    """Returns the format of a possibly compressed log.
+
+    Args:
+        source: The path to the log or a binary file object. It is only read
+          for zip archives, to find the log inside.
+        file_extension: The extension as returned by get_file_extension.
+
+    Returns:
+        The extension of the uncompressed log, ".csv" or ".xes".
+
+    Raises:
+        ValueError: If the archive cannot be read or contains no single log.
+    """
+    file_extension = file_extension.lower()
+    if file_extension == ".zip":
+        try:
+            with zipfile.ZipFile(source) as archive:
+                return get_file_extension(_find_zip_member(archive))
+        except (OSError, zipfile.BadZipFile) as e:
+            raise ValueError(f"Failed to open the zip archive: {str(e)}") from e
+    if file_extension in COMPRESSED_LOG_EXTENSIONS:
+        return file_extension.removesuffix(".gz")
+    return file_extension
+
+
+@contextmanager
+def open_log(
+    source: Union[str, IO[bytes]], file_extension: str
+) -> Iterator[Tuple[IO[bytes], str]]:
+    """Opens a possibly compressed log for reading.
+
+    Compressed logs are decompressed on the fly while they are read, so the
+    uncompressed log is neither written to disk nor held in memory.
+
+    Args:
+        source: The path to the log or a binary file object.
+        file_extension: The extension as returned by get_file_extension.
+
+    Yields:
+        A binary stream of the uncompressed log and its format, ".csv" or
+        ".xes".
+
+    Raises:
+        ValueError: If the file type is unsupported or the archive cannot be
+        opened.
+    """
+    file_extension = file_extension.lower()
+    if file_extension not in LOG_EXTENSIONS + COMPRESSED_LOG_EXTENSIONS:
+        raise ValueError(
+            f"Unsupported file extension: {file_extension}. "
+            "Only .csv, .xes, .csv.gz, .xes.gz and .zip are supported."
+        )
+
+    with ExitStack() as stack:
+        try:
+            if file_extension == ".zip":
+                archive = stack.enter_context(zipfile.ZipFile(source))
+                member = _find_zip_member(archive)
+                stream: IO[bytes] = stack.enter_context(archive.open(member))
+                log_format = get_file_extension(member)
+            else:
+                stream = (
+                    stack.enter_context(open(source, "rb"))
+                    if isinstance(source, str)
+                    else source
+                )
+                log_format = file_extension.removesuffix(".gz")
+                if file_extension.endswith(".gz"):
+                    gzip_stream = cast(IO[bytes], gzip.GzipFile(fileobj=stream))
+                    stream = stack.enter_context(gzip_stream)
+        except (OSError, zipfile.BadZipFile) as e:
+            raise ValueError(f"Failed to open the log: {str(e)}") from e
+        yield stream, log_format
+
+
+# **************** Column Detection ****************
+
+# The XES elements that describe a simple (non-nested) attribute
+XES_ATTRIBUTE_TAGS = {"string", "date", "int", "float", "boolean", "id"}
+
+# The number of events inspected to detect the columns of a XES file
+XES_COLUMN_SAMPLE_EVENTS = 100
+
 
-        # Read the XES file using pm4py
-        log = pm4py.read_xes(tmp_path)  # type: ignore
+def read_csv_columns(source: Union[str, IO[bytes]]) -> List[str]:
+    """Reads the column names of a CSV file from its header only.
 
-        # Check if the log is already a DataFrame, if not convert it
-        if not isinstance(log, pd.DataFrame):
-            # Convert the log to a DataFrame
-            log = log_variants.to_data_frame.apply(log)  # type: ignore
+    Args:
+        source: The path to the CSV file or a binary file object.
+
+    Returns:
+        The column names of the CSV file.
 
-        return log  # type: ignore
+    Raises:
+        ValueError: If the header cannot be read.
+    """
+    try:
+        return pd.read_csv(source, nrows=0).columns.tolist()  # type: ignore
     except Exception as e:
+        raise ValueError(f"Failed to process CSV file: {str(e)}") from e
+
+
+def read_xes_columns(
+    source: Union[str, IO[bytes]], max_events: int = XES_COLUMN_SAMPLE_EVENTS
+) -> List[str]:
+    """Reads the column names of a XES file from its first events.
+
+    The file is parsed incrementally and parsing stops after max_events
+    events. The columns are named as in the DataFrame returned by pm4py,
+    i.e. trace attributes are prefixed with "case:".
+
+    Args:
+        source: The path to the XES file or a binary file object.
+        max_events (optional): The number of events to inspect. Defaults to
+          XES_COLUMN_SAMPLE_EVENTS.
+
+    Returns:
+        The column names of the event log.
+
+    Raises:
+        ValueError: If the file cannot be parsed.
+    """
+    event_columns: Dict[str, None] = {}
+    case_columns: Dict[str, None] = {}
+    tags: List[str] = []
+    num_events = 0
+    try:
+        for action, elem in ET.iterparse(source, events=("start", "end")):
+            tag = elem.tag.rsplit("}", 1)[-1]
+            if action == "start":
+                tags.append(tag)
+                continue
+            tags.pop()
+            parent = tags[-1] if tags else None
+            if tag in XES_ATTRIBUTE_TAGS and "key" in elem.attrib:
+                if parent == "event":
+                    event_columns[elem.attrib["key"]] = None
+                elif parent == "trace":
+                    case_columns[f"case:{elem.attrib['key']}"] = None
+            elif tag == "event":
+                num_events += 1
+                elem.clear()
+                if num_events >= max_events:
+                    break
+    except (ET.ParseError, OSError) as e:
+        raise ValueError(f"Failed to process XES file {str(e)}") from e
+
+    return list(event_columns) + list(case_columns)
+
+
+def read_columns(path: str, file_extension: str) -> List[str]:
+    """Reads the column names of a log file without parsing the whole file.
+
+    Compressed logs are only decompressed as far as needed.
+
+    Args:
+        path: The path to the log file.
+        file_extension: The extension as returned by get_file_extension.
+
+    Returns:
+        The column names of the log.
+
+    Raises:
+        ValueError: If the file cannot be processed or if the file type is unsupported.
+    """
+    with open_log(path, file_extension) as (stream, log_format):
+        if log_format == ".csv":
+            return read_csv_columns(stream)
+        return read_xes_columns(stream)
+
+
+# **************** Streaming XES Reader ****************
+
+# The number of events per record batch emitted by iter_xes_batches
+XES_BATCH_SIZE = 50_000
+
+# The UTC offset of a XES date, which is dropped as done by pm4py
+_XES_DATE_OFFSET = re.compile(r"(Z|[+-]\d{2}:?\d{2})$")
+
+# Converts the value of a typed XES attribute, dates are converted per batch
+_XES_VALUE_PARSERS: Dict[str, Callable[[str], Any]] = {
+    "int": int,
+    "float": float,
+    "boolean": lambda value: value.lower() == "true",
+}
+
+
+def _open_xes(source: Union[str, IO[bytes]]) -> IO[bytes]:
+    """Opens a XES source, decompressing it if it is gzip compressed.
+
+    Args:
+        source: The path to the file or a binary file object.
+
+    Returns:
+        A binary file object yielding the XML of the log.
+    """
+    f = open(source, "rb") if isinstance(source, str) else source
+    magic = f.read(2)
+    f.seek(0)
+    if magic == b"\x1f\x8b":
+        return gzip.GzipFile(fileobj=f)  # type: ignore
+    return f
+
+
+def _to_record_batch(
+    rows: List[Dict[str, Any]], columns: List[str], date_columns: Set[str]
+) -> pa.RecordBatch:
+    """Converts buffered events to a record batch.
+
+    Args:
+        rows: The events, each a mapping of column to value.
+        columns: The columns of the batch, in order.
+        date_columns: The columns holding XES dates.
+
+    Returns:
+        A record batch with one row per event.
+    """
+    arrays = []
+    for column in columns:
+        values = [row.get(column) for row in rows]
+        if column in date_columns:
+            # The wall-clock time is kept and read as UTC, as done by pm4py
+            dates = pd.Series(values, dtype=object).str.replace(
+                _XES_DATE_OFFSET, "", regex=True
+            )
+            arrays.append(
+                pa.array(pd.to_datetime(dates, format="ISO8601").dt.tz_localize("UTC"))
+            )
+            continue
+        try:
+            arrays.append(pa.array(values))
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # Attributes with mixed types are kept as strings
+            arrays.append(pa.array([None if v is None else str(v) for v in values]))
+    return pa.RecordBatch.from_arrays(arrays, names=columns)
+
+
+def iter_xes_batches(
+    source: Union[str, IO[bytes]],
+    columns: Optional[List[str]] = None,
+    batch_size: int = XES_BATCH_SIZE,
+) -> Iterator[pa.RecordBatch]:
+    """Parses a XES log incrementally into Arrow record batches.
+
+    Every event becomes one row holding its attributes and the attributes
+    of its trace, prefixed with "case:", as in the DataFrame returned by
+    pm4py. Parsed traces are cleared from the XML tree, so memory is
+    bounded by the batch size instead of the log size. Nested attributes
+    are skipped.
+
+    Args:
+        source: The path to the .xes or .xes.gz file, or a binary file object.
+        columns (optional): The columns to read, e.g. "concept:name" or
+          "case:concept:name". All other attributes are skipped without
+          being converted. Defaults to None, i.e. all columns.
+        batch_size (optional): The minimum number of events per batch, only
+          complete traces are emitted. Defaults to XES_BATCH_SIZE.
+
+    Yields:
+        Record batches with the columns seen so far, in the order of their
+        first appearance. Columns first seen in a later batch are missing in
+        the earlier ones.
+
+    Raises:
+        ValueError: If the file cannot be parsed.
+    """
+    wanted = set(columns) if columns is not None else None
+    known_columns: Dict[str, None] = {}
+    date_columns: Set[str] = set()
+    tags: List[str] = []
+    rows: List[Dict[str, Any]] = []
+    trace_attributes: Dict[str, Any] = {}
+    trace_events: List[Dict[str, Any]] = []
+    event: Dict[str, Any] = {}
+    root = None
+
+    f = _open_xes(source)
+    try:
+        for action, elem in ET.iterparse(f, events=("start", "end")):
+            tag = elem.tag.rsplit("}", 1)[-1]
+            if action == "start":
+                if root is None:
+                    root = elem
+                tags.append(tag)
+                continue
+            tags.pop()
+            parent = tags[-1] if tags else None
+
+            if tag in XES_ATTRIBUTE_TAGS and parent in ("event", "trace"):
+                key = elem.attrib.get("key")
+                if key is None:
+                    continue
+                column = key if parent == "event" else f"case:{key}"
+                if wanted is not None and column not in wanted:
+                    continue
+                value = elem.attrib.get("value")
+                parser = _XES_VALUE_PARSERS.get(tag)
+                if parser is not None and value is not None:
+                    value = parser(value)
+                if tag == "date":
+                    date_columns.add(column)
+                if parent == "event":
+                    event[column] = value
+                else:
+                    trace_attributes[column] = value
+            elif tag == "event" and parent == "trace":
+                trace_events.append(event)
+                event = {}
+                elem.clear()
+            elif tag == "trace":
+                # Trace attributes may also follow the events of the trace
+                for trace_event in trace_events:
+                    trace_event.update(trace_attributes)
+                    known_columns.update(dict.fromkeys(trace_event))
+                rows.extend(trace_events)
+                trace_attributes, trace_events = {}, []
+                root.clear()  # type: ignore
+                if len(rows) >= batch_size:
+                    yield _to_record_batch(rows, list(known_columns), date_columns)
+                    rows = []
+    except (ET.ParseError, OSError, ValueError) as e:
         raise ValueError(f"Failed to process XES file {str(e)}") from e
     finally:
-        # Clean up the temporary file
-        if os.path.exists(tmp_file.name):
-            os.unlink(tmp_file.name)
+        if isinstance(source, str):
+            f.close()
 
+    if rows:
+        yield _to_record_batch(rows, list(known_columns), date_columns)
 
-def process_csv_file(file_content: bytes) -> pd.DataFrame:
-    """Processes CSV file content and converts it to a Pandas DataFrame.
+
+def read_xes(
+    source: Union[str, IO[bytes]], columns: Optional[List[str]] = None
+) -> pd.DataFrame:
+    """Reads a XES log into a DataFrame using the streaming reader.
 
     Args:
-        file_content: The binary content of the CSV file.
+        source: The path to the .xes or .xes.gz file, or a binary file object.
+        columns (optional): The columns to read. Defaults to None, i.e. all
+          columns.
 
     Returns:
-        A pandas DataFrame containing the CSV data.
+        A pandas DataFrame containing the event log, with the events in the
+        order of the file.
 
     Raises:
-        ValueError: If the file cannot be processed.
+        ValueError: If the file cannot be parsed.
     """
+    batches = list(iter_xes_batches(source, columns=columns))
+    if not batches:
+        return pd.DataFrame(columns=columns or [])
+    table = pa.concat_tables(
+        [pa.Table.from_batches([batch]) for batch in batches],
+        promote_options="permissive",
+    )
+    return table.to_pandas()  # type: ignore
+
+
+# **************** Typed CSV Ingestion ****************
+
+# The number of bytes per chunk read by the pyarrow CSV reader, column types
+# are inferred from the first chunk
+CSV_BLOCK_SIZE = 64 * 1024 * 1024
+
+# The number of rows per chunk read by the pandas CSV reader
+CSV_CHUNK_ROWS = 500_000
+
+# The number of timestamps used to detect and verify the timestamp format
+TIMESTAMP_SAMPLE_SIZE = 1000
+
+
+def detect_timestamp_format(values: pd.Series) -> Optional[str]:
+    """Detects the strptime format of timestamp strings.
+
+    The format is guessed from the first timestamp and verified on a sample
+    spread over all values.
+
+    Args:
+        values: The timestamp strings.
+
+    Returns:
+        The detected format, or None if no single format fits the sample.
+    """
+    non_null = values.dropna()
+    if non_null.empty:
+        return None
+    sample = non_null.iloc[:: max(1, len(non_null) // TIMESTAMP_SAMPLE_SIZE)]
+    with warnings.catch_warnings():
+        # The guess is verified below, so its dayfirst hints are not needed
+        warnings.simplefilter("ignore", UserWarning)
+        timestamp_format = guess_datetime_format(str(sample.iloc[0]))
+    if timestamp_format is None:
+        return None
     try:
-        return pd.read_csv(io.BytesIO(file_content))  # type: ignore
+        pd.to_datetime(sample, format=timestamp_format, utc="%z" in timestamp_format)
+    except (ValueError, TypeError):
+        return None
+    return timestamp_format
+
+
+def convert_log_columns(
+    df: pd.DataFrame,
+    timestamp_col: str,
+    categorical_cols: Optional[List[str]] = None,
+    timestamp_format: Optional[str] = None,
+) -> pd.DataFrame:
+    """Converts the columns of a log to their types.
+
+    Columns that already have their type are left as they are.
+
+    Args:
+        df: The event log.
+        timestamp_col: The name of the Timestamp column.
+        categorical_cols (optional): The names of the columns to store as
+          categories, e.g. the case, activity, resource and group columns.
+          Defaults to None.
+        timestamp_format (optional): The strptime format of the timestamps.
+          Defaults to None, i.e. it is detected. If no format fits, the
+          format is inferred per value.
+
+    Returns:
+        The event log with typed columns. Unparsable timestamps are NaT, and
+        timestamps with UTC offsets are converted to UTC.
+    """
+    if timestamp_col in df.columns and not is_datetime64_any_dtype(df[timestamp_col]):
+        if timestamp_format is None:
+            timestamp_format = detect_timestamp_format(df[timestamp_col])
+        if timestamp_format is None:
+            df[timestamp_col] = pd.to_datetime(df[timestamp_col], errors="coerce")  # type: ignore
+        else:
+            df[timestamp_col] = pd.to_datetime(
+                df[timestamp_col],
+                format=timestamp_format,
+                errors="coerce",
+                utc="%z" in timestamp_format,
+            )
+    for col in categorical_cols or []:
+        if col in df.columns and not isinstance(df[col].dtype, CategoricalDtype):
+            df[col] = df[col].astype("category")
+    return df
+
+
+def to_plain_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """Converts the categorical columns of a log back to their values' dtype.
+
+    Args:
+        df: The event log.
+
+    Returns:
+        The event log without categorical columns.
+    """
+    categorical = df.select_dtypes("category").columns
+    return df.astype({col: df[col].cat.categories.dtype for col in categorical})
+
+
+def _iter_arrow_csv_chunks(
+    path: str, file_extension: str, timestamp_col: str
+) -> Iterator[pd.DataFrame]:
+    """Reads a CSV file in chunks with the multithreaded pyarrow reader.
+
+    The file is opened as a native Arrow stream, gzip files are decompressed
+    by Arrow while they are read.
+
+    Args:
+        path: The path to the .csv or .csv.gz file.
+        file_extension: The extension as returned by get_file_extension.
+        timestamp_col: The name of the Timestamp column, which is kept as
+          strings to be parsed with an explicit format.
+
+    Yields:
+        The chunks of the CSV file.
+    """
+    compression = "gzip" if file_extension.endswith(".gz") else None
+    reader = pa_csv.open_csv(
+        pa.input_stream(path, compression=compression),
+        read_options=pa_csv.ReadOptions(block_size=CSV_BLOCK_SIZE),
+        convert_options=pa_csv.ConvertOptions(
+            column_types={timestamp_col: pa.string()}
+        ),
+    )
+    for batch in reader:
+        yield batch.to_pandas()
+
+
+def _iter_pandas_csv_chunks(
+    source: Union[str, IO[bytes]], file_extension: str, timestamp_col: str
+) -> Iterator[pd.DataFrame]:
+    """Reads a possibly compressed CSV file in chunks with pandas.
+
+    Args:
+        source: The path to the log file or a binary file object.
+        file_extension: The extension as returned by get_file_extension.
+        timestamp_col: The name of the Timestamp column, which is kept as
+          strings to be parsed with an explicit format.
+
+    Yields:
+        The chunks of the CSV file.
+    """
+    with open_log(source, file_extension) as (stream, _):
+        yield from pd.read_csv(  # type: ignore
+            stream, chunksize=CSV_CHUNK_ROWS, dtype={timestamp_col: str}
+        )
+
+
+def _read_csv_chunks(
+    chunks: Iterator[pd.DataFrame],
+    required_cols: List[str],
+    timestamp_col: str,
+    categorical_cols: List[str],
+    timestamp_format: Optional[str],
+) -> pd.DataFrame:
+    """Types the chunks of a CSV file and combines them.
+
+    Args:
+        chunks: The untyped chunks.
+        required_cols: The columns every chunk must contain.
+        timestamp_col: The name of the Timestamp column.
+        categorical_cols: The names of the columns to store as categories.
+        timestamp_format: The strptime format of the timestamps, or None to
+          detect it on the first chunk.
+
+    Returns:
+        A pandas DataFrame containing the typed event log.
+
+    Raises:
+        ValueError: If a required column is missing.
+    """
+    typed_chunks: List[pd.DataFrame] = []
+    total_rows, total_seconds = 0, 0.0
+    start = time.perf_counter()
+    for i, chunk in enumerate(chunks):
+        missing = [col for col in required_cols if col not in chunk.columns]
+        if missing:
+            raise ValueError(f"Columns not found in the CSV file: {missing}")
+        if timestamp_format is None:
+            timestamp_format = detect_timestamp_format(chunk[timestamp_col])
+        chunk = convert_log_columns(
+            chunk, timestamp_col, categorical_cols, timestamp_format
+        )
+        typed_chunks.append(chunk)
+
+        seconds = time.perf_counter() - start
+        total_rows += len(chunk)
+        total_seconds += seconds
+        print(
+            f"CSV chunk {i}: {len(chunk)} rows in {seconds:.2f}s "
+            f"({len(chunk) / max(seconds, 1e-9):,.0f} rows/s)"
+        )
+        start = time.perf_counter()
+
+    if not typed_chunks:
+        return pd.DataFrame(columns=required_cols)
+    print(
+        f"Read {total_rows} CSV rows in {total_seconds:.2f}s "
+        f"({total_rows / max(total_seconds, 1e-9):,.0f} rows/s)"
+    )
+
+    # Concatenating categoricals with different categories yields objects
+    categories = {
+        col: union_categoricals([chunk[col] for chunk in typed_chunks])
+        for col in categorical_cols
+    }
+    columns = typed_chunks[0].columns
+    df = pd.concat(
+        [chunk.drop(columns=categorical_cols) for chunk in typed_chunks],
+        ignore_index=True,
+    )
+    for col, values in categories.items():
+        df[col] = values
+    return df[columns]
+
+
+def read_csv_typed(
+    source: Union[str, IO[bytes]],
+    file_extension: str,
+    case_id_col: str,
+    activity_col: str,
+    timestamp_col: str,
+    resource_col: Optional[str] = None,
+    group_col: Optional[str] = None,
+    timestamp_format: Optional[str] = None,
+) -> pd.DataFrame:
+    """Reads a CSV log in chunks and types its columns while reading.
+
+    The case, activity, resource and group columns are stored as categories
+    and the timestamps are parsed with one format for all chunks. Plain and
+    gzip compressed files on disk are read by the multithreaded pyarrow
+    reader, other sources or files whose later chunks do not fit the types
+    inferred from the first chunk by pandas. The throughput of every chunk
+    is printed.
+
+    Args:
+        source: The path to the log file or a binary file object.
+        file_extension: The extension as returned by get_file_extension.
+        case_id_col: The name of the Case ID column.
+        activity_col: The name of the Activity column.
+        timestamp_col: The name of the Timestamp column.
+        resource_col (optional): The name of the Resource column. Defaults
+          to None.
+        group_col (optional): The name of the Group column. Defaults to None.
+        timestamp_format (optional): The strptime format of the timestamps.
+          Defaults to None, i.e. it is detected on the first chunk.
+
+    Returns:
+        A pandas DataFrame containing the typed event log, with the original
+        column names.
+
+    Raises:
+        ValueError: If the file cannot be processed or a mapped column is
+        missing.
+    """
+    required_cols = [case_id_col, activity_col, timestamp_col]
+    categorical_cols = [
+        col for col in (case_id_col, activity_col, resource_col, group_col) if col
+    ]
+    categorical_cols = list(dict.fromkeys(categorical_cols))
+    file_extension = file_extension.lower()
+
+    try:
+        if isinstance(source, str) and file_extension in (".csv", ".csv.gz"):
+            try:
+                return _read_csv_chunks(
+                    _iter_arrow_csv_chunks(source, file_extension, timestamp_col),
+                    required_cols,
+                    timestamp_col,
+                    categorical_cols,
+                    timestamp_format,
+                )
+            except pa.ArrowInvalid as e:
+                print(f"Falling back to the pandas CSV reader: {e}")
+        return _read_csv_chunks(
+            _iter_pandas_csv_chunks(source, file_extension, timestamp_col),
+            required_cols,
+            timestamp_col,
+            categorical_cols,
+            timestamp_format,
+        )
     except Exception as e:
         raise ValueError(f"Failed to process CSV file: {str(e)}") from e
 
 
+# **************** Parsed Log Cache ****************
+
+# The suffix of the Arrow IPC file holding the parsed version of a log
+LOG_CACHE_SUFFIX = ".arrow"
+
+
+def read_log_file(source: Union[str, IO[bytes]], file_extension: str) -> pd.DataFrame:
+    """Parses a possibly compressed log into a DataFrame.
+
+    Unlike process_file, the file is read from its path directly, so it is
+    neither loaded into memory as bytes nor copied to another temp file.
+    Compressed logs are decompressed while they are parsed.
+
+    Args:
+        source: The path to the log file or a binary file object.
+        file_extension: The extension as returned by get_file_extension.
+
+    Returns:
+        A pandas DataFrame containing the event log.
+
+    Raises:
+        ValueError: If the file cannot be processed or if the file type is unsupported.
+    """
+    with open_log(source, file_extension) as (stream, log_format):
+        if log_format == ".xes":
+            return read_xes(stream)
+        try:
+            return pd.read_csv(stream)  # type: ignore
+        except Exception as e:
+            raise ValueError(f"Failed to process CSV file: {str(e)}") from e
+
+
+def write_log_cache(df: pd.DataFrame, cache_path: str) -> None:
+    """Stores a parsed log as an uncompressed Arrow IPC file.
+
+    The file is written under a temporary name and renamed afterwards, so
+    a reader never sees a partially written cache.
+
+    Args:
+        df: The parsed event log.
+        cache_path: The path of the cache file.
+
+    Raises:
+        ValueError: If the DataFrame cannot be converted to Arrow.
+    """
+    tmp_path = f"{cache_path}.tmp"
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        feather.write_feather(table, tmp_path, compression="uncompressed")
+        os.replace(tmp_path, cache_path)
+    except Exception as e:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise ValueError(f"Failed to cache the parsed log: {str(e)}") from e
+
+
+def read_log_cache(cache_path: str) -> pd.DataFrame:
+    """Reads a parsed log from its memory-mapped Arrow IPC file.
+
+    Args:
+        cache_path: The path of the cache file.
+
+    Returns:
+        A pandas DataFrame containing the event log.
+    """
+    table = feather.read_table(cache_path, memory_map=True)
+    return table.to_pandas()  # type: ignore
+
+
 # **************** Generic Function for Dispatching ****************
 
 
@@ -79,7 +848,7 @@ def process_file(file_content: bytes, file_extension: str) -> pd.DataFrame:
 
     Args:
         file_content: Binary content of the file.
-        file_extension: The file extension (e.g., ".csv" or ".xes").
+        file_extension: The file extension (e.g., ".csv", ".xes" or ".xes.gz").
 
     Returns:
         A pandas DataFrame containing the processed data.
@@ -98,7 +867,5 @@ def process_file(file_content: bytes, file_extension: str) -> pd.DataFrame:
     elif file_extension == ".xes":
         return process_xes_file(file_content)
     else:
-        raise ValueError(
-            f"Unsupported file extension: {file_extension}. "
-            "Only .csv and .xes are supported."
-        )
+        # Compressed logs are decompressed while they are parsed
+        return read_log_file(io.BytesIO(file_content), file_extension)
@@ -0,0 +1,393 @@
+"""Contains the stores that share the jobs between processes.
+
+A job store keeps the job records and the queue of jobs waiting to run,
+so the job of one worker process can be run and polled by any other.
+SQLiteJobStore keeps both in a SQLite file, which is enough for several
+workers on one machine or on nodes with a shared file system. An
+external broker is plugged in by implementing JobStore.
+
+The records of a workspace are used like a dictionary via JobMapping.
+Records read from it write every change of an attribute back to the
+store, so the tasks can update their job as before, e.g.
+`rec.status = "running"`. Only the progress within a phase is written at
+most once per PROGRESS_SAVE_SECONDS.
+
+A claimed job is leased to its worker, which renews the lease while the
+job runs. If the worker dies, its lease expires and the job is claimed
+by another worker. A job can be pinned to the process that queued it,
+e.g. when only that process knows its API token, so the workers of other
+processes leave it in the queue.
+
+Example:
+    store = SQLiteJobStore("jobs.sqlite3")
+    jobs = JobMapping(store, "default")
+    jobs[job_id] = JobStatus(module="log_skeleton", status="pending")
+    store.enqueue(QueuedJob("default", job_id, "backend.api.tasks...."))
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import MutableMapping
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import PrivateAttr
+
+from backend.api.models.schemas.job_models import JobStatus
+
+# Progress updates within a phase are saved at most this often
+PROGRESS_SAVE_SECONDS = 1.0
+
+# **************** Records ****************
+
+
+@dataclass
+class QueuedJob:
+    """A job waiting in the queue for a worker.
+
+    Attributes:
+        namespace: The workspace of the job.
+        job_id: The ID of the job.
+        task: The full name of the task, e.g.
+            "backend.api.tasks.log_skeleton_tasks.compute_and_store_log_skeleton".
+        args: The encoded arguments after the workspace and the job ID.
+        kwargs: The encoded keyword arguments.
+        profile: Whether the job is profiled.
+        process: The only process whose workers may run the job, or None
+            if any worker may run it.
+    """
+
+    namespace: str
+    job_id: str
+    task: str
+    args: List[Any] = field(default_factory=list)
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+    profile: bool = False
+    process: Optional[str] = None
+
+
+def encode_job(rec: JobStatus) -> str:
+    """Returns a job record as JSON, including its profile."""
+    return json.dumps(jsonable_encoder({**rec.model_dump(), "profile": rec.profile}))
+
+
+def decode_job(data: str) -> Dict[str, Any]:
+    """Returns the fields of a job record encoded by encode_job."""
+    return json.loads(data)
+
+
+class StoredJobStatus(JobStatus):
+    """A job record that saves the changes of its attributes to its store.
+
+    The progress is saved when a phase starts or ends, and otherwise at
+    most once per PROGRESS_SAVE_SECONDS, so a task can report every step.
+    """
+
+    _save: Optional[Callable[[JobStatus], None]] = PrivateAttr(default=None)
+    _saved_at: float = PrivateAttr(default=0.0)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        """Sets the attribute and saves the record if needed."""
+        super().__setattr__(name, value)
+        if name.startswith("_") or self._save is None:
+            return
+        now = time.monotonic()
+        if (
+            name == "progress"
+            and value not in (None, 0.0, 1.0)
+            and now - self._saved_at < PROGRESS_SAVE_SECONDS
+        ):
+            return
+        self._saved_at = now
+        self._save(self)
+
+
+# **************** Stores ****************
+
+
+class JobStore(ABC):
+    """Interface of the stores of the job records and the job queue.
+
+    The records are kept per namespace, i.e. per workspace. All methods
+    must be safe to call from several threads and processes.
+    """
+
+    def __init__(self, url: str) -> None:
+        """Initialize the store.
+
+        Args:
+            url: The location of the store, i.e. JOB_STORE_URL.
+        """
+
+    @abstractmethod
+    def get(self, namespace: str, job_id: str) -> Optional[str]:
+        """Returns the encoded record of a job, or None if there is none."""
+
+    @abstractmethod
+    def save(self, namespace: str, job_id: str, data: str) -> None:
+        """Saves the encoded record of a job."""
+
+    @abstractmethod
+    def delete(self, namespace: str, job_id: str) -> None:
+        """Deletes the record of a job and removes it from the queue."""
+
+    @abstractmethod
+    def list(self, namespace: str) -> Dict[str, str]:
+        """Returns the encoded records of a namespace by job ID."""
+
+    @abstractmethod
+    def enqueue(self, job: QueuedJob) -> None:
+        """Adds a job to the end of the queue."""
+
+    @abstractmethod
+    def claim(
+        self,
+        worker: str,
+        lease_seconds: float = 60.0,
+        process: Optional[str] = None,
+    ) -> Optional[QueuedJob]:
+        """Takes the oldest unclaimed job or job with an expired lease.
+
+        Jobs pinned to another process are skipped.
+
+        Args:
+            worker: The name of the claiming worker.
+            lease_seconds: The time until the lease of the job expires,
+              unless the worker renews it.
+            process: The process of the worker.
+
+        Returns:
+            The job, which no other worker can claim while its lease lasts,
+            or None if the queue is empty.
+        """
+
+    @abstractmethod
+    def renew(
+        self, namespace: str, job_id: str, worker: str, lease_seconds: float = 60.0
+    ) -> bool:
+        """Extends the lease of a claimed job.
+
+        Args:
+            namespace: The workspace of the job.
+            job_id: The ID of the job.
+            worker: The name of the worker holding the lease.
+            lease_seconds: The time from now until the lease expires.
+
+        Returns:
+            Whether the worker still held the lease.
+        """
+
+    @abstractmethod
+    def finish(self, namespace: str, job_id: str) -> None:
+        """Removes a claimed job from the queue once it has run."""
+
+
+class SQLiteJobStore(JobStore):
+    """Keeps the job records and the queue in a SQLite file.
+
+    Every operation opens its own connection, so the store can be shared
+    by threads and processes. The write-ahead log lets readers poll the
+    jobs while a worker updates them.
+
+    Attributes:
+        path: The path of the SQLite file.
+    """
+
+    path: str
+
+    def __init__(self, path: str) -> None:
+        """Initialize the store and create its tables if needed.
+
+        Args:
+            path: The path of the SQLite file.
+        """
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs (namespace TEXT, job_id TEXT, "
+                "data TEXT, updated REAL, PRIMARY KEY (namespace, job_id))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS queue (id INTEGER PRIMARY KEY "
+                "AUTOINCREMENT, namespace TEXT, job_id TEXT, data TEXT, "
+                "claimed_by TEXT, claimed_at REAL, lease_expires REAL, "
+                "process TEXT)"
+            )
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(queue)")]
+            # Queues created before the leases and the pinned jobs
+            for column in ("lease_expires REAL", "process TEXT"):
+                if column.split()[0] not in columns:
+                    conn.execute(f"ALTER TABLE queue ADD COLUMN {column}")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def get(self, namespace: str, job_id: str) -> Optional[str]:
+        """Returns the encoded record of a job, or None if there is none."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT data FROM jobs WHERE namespace = ? AND job_id = ?",
+                (namespace, job_id),
+            ).fetchone()
+        return None if row is None else row[0]
+
+    def save(self, namespace: str, job_id: str, data: str) -> None:
+        """Saves the encoded record of a job."""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?)",
+                (namespace, job_id, data, time.time()),
+            )
+
+    def delete(self, namespace: str, job_id: str) -> None:
+        """Deletes the record of a job and removes it from the queue."""
+        with self._connect() as conn:
+            for table in ("jobs", "queue"):
+                conn.execute(
+                    f"DELETE FROM {table} WHERE namespace = ? AND job_id = ?",
+                    (namespace, job_id),
+                )
+
+    def list(self, namespace: str) -> Dict[str, str]:
+        """Returns the encoded records of a namespace by job ID."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT job_id, data FROM jobs WHERE namespace = ? ORDER BY updated",
+                (namespace,),
+            ).fetchall()
+        return dict(rows)
+
+    def enqueue(self, job: QueuedJob) -> None:
+        """Adds a job to the end of the queue."""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO queue (namespace, job_id, data, process) "
+                "VALUES (?, ?, ?, ?)",
+                (job.namespace, job.job_id, json.dumps(asdict(job)), job.process),
+            )
+
+    def claim(
+        self,
+        worker: str,
+        lease_seconds: float = 60.0,
+        process: Optional[str] = None,
+    ) -> Optional[QueuedJob]:
+        """Takes the oldest unclaimed job or job with an expired lease."""
+        now = time.time()
+        with self._connect() as conn:
+            # The write lock is taken up front, so no other worker claims
+            # the same row in between
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id, data, claimed_by FROM queue WHERE (claimed_by IS NULL "
+                "OR lease_expires < ?) AND (process IS NULL OR process = ?) "
+                "ORDER BY id LIMIT 1",
+                (now, process),
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE queue SET claimed_by = ?, claimed_at = ?, "
+                    "lease_expires = ? WHERE id = ?",
+                    (worker, now, now + lease_seconds, row[0]),
+                )
+            conn.execute("COMMIT")
+        if row is None:
+            return None
+        job = QueuedJob(**json.loads(row[1]))
+        if row[2] is not None:
+            print(f"Lease of {row[2]} on job {job.job_id} expired, rerunning it.")
+        return job
+
+    def renew(
+        self, namespace: str, job_id: str, worker: str, lease_seconds: float = 60.0
+    ) -> bool:
+        """Extends the lease of a claimed job."""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE queue SET lease_expires = ? WHERE namespace = ? "
+                "AND job_id = ? AND claimed_by = ?",
+                (time.time() + lease_seconds, namespace, job_id, worker),
+            )
+        return cursor.rowcount > 0
+
+    def finish(self, namespace: str, job_id: str) -> None:
+        """Removes a claimed job from the queue once it has run."""
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM queue WHERE namespace = ? AND job_id = ?",
+                (namespace, job_id),
+            )
+
+
+# **************** Mapping ****************
+
+
+class JobMapping(MutableMapping):
+    """The job records of a namespace of a store, used like a dictionary.
+
+    Records read from the mapping save every change to the store.
+
+    Attributes:
+        store: The job store.
+        namespace: The namespace of the records, i.e. the workspace.
+    """
+
+    store: JobStore
+    namespace: str
+
+    def __init__(self, store: JobStore, namespace: str) -> None:
+        """Initialize the mapping.
+
+        Args:
+            store: The job store.
+            namespace: The namespace of the records.
+        """
+        self.store = store
+        self.namespace = namespace
+        self._lock = threading.Lock()
+
+    def _save(self, job_id: str, rec: JobStatus) -> None:
+        with self._lock:
+            self.store.save(self.namespace, job_id, encode_job(rec))
+
+    def _load(self, job_id: str, data: str) -> StoredJobStatus:
+        rec = StoredJobStatus(**decode_job(data))
+        rec._save = lambda r: self._save(job_id, r)
+        return rec
+
+    def __getitem__(self, job_id: str) -> StoredJobStatus:
+        """Returns the record of a job, which saves its changes."""
+        data = self.store.get(self.namespace, job_id)
+        if data is None:
+            raise KeyError(job_id)
+        return self._load(job_id, data)
+
+    def __setitem__(self, job_id: str, rec: JobStatus) -> None:
+        """Saves the record of a job."""
+        self._save(job_id, rec)
+
+    def __delitem__(self, job_id: str) -> None:
+        """Deletes the record of a job."""
+        if self.store.get(self.namespace, job_id) is None:
+            raise KeyError(job_id)
+        self.store.delete(self.namespace, job_id)
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterates over the job IDs, the least recently updated first."""
+        return iter(self.store.list(self.namespace))
+
+    def __len__(self) -> int:
+        """Returns the number of jobs."""
+        return len(self.store.list(self.namespace))
+
+    def values(self) -> List[StoredJobStatus]:  # type: ignore
+        """Returns all records with a single read of the store."""
+        return [
+            self._load(job_id, data)
+            for job_id, data in self.store.list(self.namespace).items()
+        ]
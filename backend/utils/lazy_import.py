@@ -0,0 +1,35 @@
+"""Contains a helper to import heavy dependencies on their first use.
+
+pm4py and scipy take seconds to import. The engines refer to them through
+lazy modules, so the API starts without them and a module is imported
+when one of its attributes is used for the first time.
+
+Example:
+    pm4py = lazy_import("pm4py")
+    pm4py.discover_declare(log)  # pm4py is imported here
+"""
+
+import importlib
+from types import ModuleType
+from typing import Any
+
+
+class LazyModule(ModuleType):
+    """A stand-in for a module that imports it on first attribute access."""
+
+    def __getattr__(self, name: str) -> Any:
+        """Imports the module, if needed, and returns its attribute."""
+        return getattr(importlib.import_module(self.__name__), name)
+
+
+def lazy_import(name: str) -> Any:
+    """Returns a module that is imported when it is used.
+
+    Args:
+        name: The full name of the module, e.g.
+          "pm4py.algo.discovery.log_skeleton.algorithm".
+
+    Returns:
+        The lazy module.
+    """
+    return LazyModule(name)
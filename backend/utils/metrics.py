@@ -0,0 +1,401 @@
+"""Contains the metrics of the backend and their Prometheus text format.
+
+The metrics are histograms of the request durations per route, of the
+extractions from Celonis and of the jobs and their phases, and gauges of
+the job queue and the cached data. They are kept in a process wide
+registry and exposed at /metrics.
+
+Example:
+    @timed(CELONIS_EXTRACTION_DURATION, method="get_dataframe_from_celonis")
+    def get_dataframe_from_celonis(...): ...
+
+    with job_phase(rec, "compute"):
+        ...
+"""
+
+import functools
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+import numpy as np
+import pandas as pd
+
+if TYPE_CHECKING:  # pragma: no cover
+    from backend.api.models.schemas.job_models import JobStatus
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# The default buckets of the Prometheus clients, in seconds
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.075,
+    0.1,
+    0.25,
+    0.5,
+    0.75,
+    1.0,
+    2.5,
+    5.0,
+    7.5,
+    10.0,
+    30.0,
+    60.0,
+    300.0,
+)
+
+# **************** Metric Types ****************
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class _Metric(ABC):
+    """Base class of the metrics, a family of series by label values."""
+
+    type_name = ""
+    name: str
+    documentation: str
+    label_names: Tuple[str, ...]
+
+    def __init__(
+        self, name: str, documentation: str, label_names: Sequence[str] = ()
+    ) -> None:
+        """Initialize the metric.
+
+        Args:
+            name: The name of the metric.
+            documentation: The help text of the metric.
+            label_names: The names of the labels of the series.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+
+    def _label_values(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        """Returns the label values in the order of the label names.
+
+        Raises:
+            ValueError: If the labels do not match the label names.
+        """
+        if set(labels) != set(self.label_names):
+            raise ValueError(
+                f"Metric '{self.name}' expects the labels {list(self.label_names)}, "
+                f"got {sorted(labels)}."
+            )
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    @abstractmethod
+    def _samples(self) -> List[str]:
+        """Returns the lines of the series, called with the lock held."""
+
+    def render(self) -> str:
+        """Returns the metric in the Prometheus text format."""
+        with self._lock:
+            samples = self._samples()
+        return "\n".join(
+            [
+                f"# HELP {self.name} {self.documentation}",
+                f"# TYPE {self.name} {self.type_name}",
+                *samples,
+            ]
+        )
+
+
+class Histogram(_Metric):
+    """A histogram of observed values, e.g. durations in seconds."""
+
+    type_name = "histogram"
+    buckets: Tuple[float, ...]
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        """Initialize the histogram.
+
+        Args:
+            name: The name of the metric.
+            documentation: The help text of the metric.
+            label_names: The names of the labels of the series.
+            buckets: The upper bounds of the buckets, +Inf is added.
+        """
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # Per series the counts per bucket, the sum and the count
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        """Records a value in the series of the labels."""
+        key = self._label_values(labels)
+        with self._lock:
+            counts, total = self._series.setdefault(
+                key, ([0] * len(self.buckets), [0.0, 0.0])
+            )
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            total[0] += value
+            total[1] += 1
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        """Records the wall time of the block in the series of the labels."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def get_count(self, **labels: Any) -> int:
+        """Returns the number of observations in the series of the labels."""
+        series = self._series.get(self._label_values(labels))
+        return 0 if series is None else int(series[1][1])
+
+    def _samples(self) -> List[str]:
+        samples = []
+        for key, (counts, (total, count)) in sorted(self._series.items()):
+            for bound, bucket_count in zip(self.buckets, counts):
+                labels = _format_labels(
+                    self.label_names + ("le",), key + (_format_value(bound),)
+                )
+                samples.append(f"{self.name}_bucket{labels} {bucket_count}")
+            labels = _format_labels(self.label_names, key)
+            samples.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            samples.append(f"{self.name}_count{labels} {_format_value(count)}")
+        return samples
+
+
+class Gauge(_Metric):
+    """A value that can go up and down, e.g. the number of pending jobs."""
+
+    type_name = "gauge"
+
+    def __init__(
+        self, name: str, documentation: str, label_names: Sequence[str] = ()
+    ) -> None:
+        """Initialize the gauge.
+
+        Args:
+            name: The name of the metric.
+            documentation: The help text of the metric.
+            label_names: The names of the labels of the series.
+        """
+        super().__init__(name, documentation, label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels: Any) -> None:
+        """Sets the value of the series of the labels."""
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def get(self, **labels: Any) -> Optional[float]:
+        """Returns the value of the series of the labels, if it was set."""
+        return self._values.get(self._label_values(labels))
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+            for key, value in sorted(self._values.items())
+        ]
+
+
+class MetricsRegistry:
+    """A collection of metrics that are rendered together."""
+
+    metrics: List[_Metric]
+
+    def __init__(self) -> None:
+        """Initialize an empty registry."""
+        self.metrics = []
+
+    def register(self, metric: _Metric) -> Any:
+        """Adds a metric to the registry and returns it."""
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Returns all metrics in the Prometheus text format."""
+        return "\n".join(metric.render() for metric in self.metrics) + "\n"
+
+
+# **************** Metrics ****************
+
+REGISTRY = MetricsRegistry()
+
+REQUEST_DURATION: Histogram = REGISTRY.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "Duration of the HTTP requests by route.",
+        ["method", "route", "status"],
+    )
+)
+CELONIS_EXTRACTION_DURATION: Histogram = REGISTRY.register(
+    Histogram(
+        "celonis_extraction_duration_seconds",
+        "Duration of the extractions from Celonis by method.",
+        ["method"],
+    )
+)
+JOB_DURATION: Histogram = REGISTRY.register(
+    Histogram(
+        "job_duration_seconds",
+        "Duration of the background jobs by module and outcome.",
+        ["module", "status"],
+    )
+)
+JOB_PHASE_DURATION: Histogram = REGISTRY.register(
+    Histogram(
+        "job_phase_duration_seconds",
+        "Duration of the phases of the background jobs, e.g. extract, "
+        "compute and serialize.",
+        ["module", "phase"],
+    )
+)
+JOBS: Gauge = REGISTRY.register(
+    Gauge(
+        "jobs",
+        "Number of jobs by status, the queue depth is the pending ones.",
+        ["status"],
+    )
+)
+CACHED_BYTES: Gauge = REGISTRY.register(
+    Gauge("cached_bytes", "Size of the cached logs and extracts in bytes.", ["cache"])
+)
+
+# **************** Instrumentation ****************
+
+
+def timed(histogram: Histogram, **labels: Any) -> Callable[[F], F]:
+    """Decorator that records the wall time of every call of a function.
+
+    Args:
+        histogram: The histogram the durations are recorded in.
+        **labels: The labels of the series.
+
+    Returns:
+        The decorator.
+    """
+
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with histogram.time(**labels):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore
+
+    return decorator
+
+
+def timed_job(func: F) -> F:
+    """Decorator for the compute_and_store_* tasks of the jobs.
+
+    The task is called with the workspace and the job ID as its first
+    arguments. Its duration is recorded with the module and the final
+    status of the job.
+
+    Args:
+        func: The task.
+
+    Returns:
+        The decorated task.
+    """
+
+    @functools.wraps(func)
+    def wrapper(workspace: Any, job_id: str, *args: Any, **kwargs: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            return func(workspace, job_id, *args, **kwargs)
+        finally:
+            rec = workspace.state.jobs.get(job_id)
+            if rec is not None:
+                JOB_DURATION.observe(
+                    time.perf_counter() - start, module=rec.module, status=rec.status
+                )
+
+    return wrapper  # type: ignore
+
+
+@contextmanager
+def job_phase(rec: "JobStatus", phase: str) -> Iterator[None]:
+    """Marks a phase of a job and records its duration.
+
+    Args:
+        rec: The job record, its phase is set for the job status.
+        phase: The name of the phase.
+    """
+    rec.phase = phase
+    with JOB_PHASE_DURATION.time(module=rec.module, phase=phase):
+        yield
+
+
+def estimate_nbytes(obj: Any) -> int:
+    """Estimates the memory of an object and the objects it references.
+
+    DataFrames and arrays are measured with their own methods, containers
+    and plain objects are followed recursively, everything else is
+    measured with sys.getsizeof.
+
+    Args:
+        obj: The object, e.g. an entry of the extract cache.
+
+    Returns:
+        The estimated size in bytes.
+    """
+    seen = set()
+
+    def size(value: Any) -> int:
+        if id(value) in seen:
+            return 0
+        seen.add(id(value))
+        if isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+            return int(np.sum(value.memory_usage(deep=True)))
+        if isinstance(value, np.ndarray):
+            return int(value.nbytes)
+        if isinstance(value, dict):
+            return sys.getsizeof(value) + sum(
+                size(k) + size(v) for k, v in value.items()
+            )
+        if isinstance(value, (list, tuple, set, frozenset)):
+            return sys.getsizeof(value) + sum(size(v) for v in value)
+        if hasattr(value, "__dict__") and not isinstance(value, type):
+            return sys.getsizeof(value) + size(vars(value))
+        return sys.getsizeof(value)
+
+    return size(obj)
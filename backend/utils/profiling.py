@@ -0,0 +1,218 @@
+"""Contains the opt-in CPU and memory profiling of the background jobs.
+
+A profiled job is sampled by a thread that records the stack of the job
+every few milliseconds, and its allocations are traced with tracemalloc.
+The samples are kept as collapsed stacks, the input format of
+flamegraph.pl and speedscope, and the allocations as the lines that
+allocated the most memory.
+
+The peak of the traced memory is process wide. It is thus left out of
+the profile of a job that overlapped with another profiled job.
+
+Example:
+    task = profiled_job(compute_and_store_log_skeleton) if profile else ...
+    background_tasks.add_task(task, workspace, job_id, celonis)
+"""
+
+import functools
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from types import FrameType
+from typing import Any, Callable, Dict, List, Optional, Set, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# The default time between two samples of the stack in seconds
+SAMPLE_INTERVAL = 0.005
+
+# The default number of lines with the most allocated memory
+TOP_ALLOCATIONS = 25
+
+# tracemalloc is process wide, so it is started by the first profiled job
+# and stopped by the last one
+_tracing_lock = threading.Lock()
+_tracing_profilers: Set["JobProfiler"] = set()
+
+
+def _frame_name(frame: FrameType) -> str:
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}.{frame.f_code.co_name}"
+
+
+def _collapse_stack(frame: Optional[FrameType]) -> str:
+    """Returns a stack as the frame names from the root, separated by ';'."""
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class JobProfiler:
+    """Samples the stack and traces the allocations of the current thread.
+
+    The profiler is used as a context manager around the profiled code.
+
+    Attributes:
+        interval: The time between two samples of the stack in seconds.
+        top_allocations: The number of lines with the most allocated memory
+            that are kept.
+        stacks: The number of samples per collapsed stack.
+    """
+
+    interval: float
+    top_allocations: int
+    stacks: Counter
+
+    def __init__(
+        self, interval: float = SAMPLE_INTERVAL, top_allocations: int = TOP_ALLOCATIONS
+    ) -> None:
+        """Initialize the profiler.
+
+        Args:
+            interval: The time between two samples of the stack in seconds.
+            top_allocations: The number of lines with the most allocated
+              memory that are kept.
+        """
+        self.interval = interval
+        self.top_allocations = top_allocations
+        self.stacks = Counter()
+        self._thread_id = 0
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+        self._peak_bytes: Optional[int] = 0
+        self._overlapped = False
+        self._start = 0.0
+        self._duration = 0.0
+
+    def __enter__(self) -> "JobProfiler":
+        """Starts the sampling thread and the tracing of the allocations."""
+        with _tracing_lock:
+            if not _tracing_profilers:
+                tracemalloc.start()
+            # Resetting the peak would spoil the peak of the running jobs
+            self._overlapped = bool(_tracing_profilers)
+            for other in _tracing_profilers:
+                other._overlapped = True
+            if not self._overlapped:
+                tracemalloc.reset_peak()
+            _tracing_profilers.add(self)
+        self._thread_id = threading.get_ident()
+        self._stop.clear()
+        self._sampler = threading.Thread(
+            target=self._sample, name="job-profiler", daemon=True
+        )
+        self._start = time.perf_counter()
+        self._sampler.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        """Stops the sampling and takes the snapshot of the allocations."""
+        self._duration = time.perf_counter() - self._start
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        self._snapshot = tracemalloc.take_snapshot()
+        with _tracing_lock:
+            self._peak_bytes = (
+                None if self._overlapped else tracemalloc.get_traced_memory()[1]
+            )
+            _tracing_profilers.discard(self)
+            if not _tracing_profilers:
+                tracemalloc.stop()
+
+    def _sample(self) -> None:
+        """Records the stack of the profiled thread until it is stopped."""
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is not None:
+                self.stacks[_collapse_stack(frame)] += 1
+
+    def get_collapsed_stacks(self) -> str:
+        """Returns the samples in the collapsed stack format.
+
+        Returns:
+            One line per stack with the frames from the root, separated by
+            ';', and the number of samples, the most frequent stack first.
+        """
+        return "".join(
+            f"{stack} {count}\n" for stack, count in self.stacks.most_common()
+        )
+
+    def get_top_allocations(self) -> List[Dict[str, Any]]:
+        """Returns the lines that allocated the most memory still in use.
+
+        Returns:
+            Per line its file and line number, the allocated bytes and the
+            number of allocated blocks, the largest first.
+        """
+        if self._snapshot is None:
+            return []
+        snapshot = self._snapshot.filter_traces(
+            [tracemalloc.Filter(False, tracemalloc.__file__)]
+        )
+        return [
+            {
+                "file": stat.traceback[0].filename,
+                "line": stat.traceback[0].lineno,
+                "bytes": stat.size,
+                "blocks": stat.count,
+            }
+            for stat in snapshot.statistics("lineno")[: self.top_allocations]
+        ]
+
+    def get_result(self) -> Dict[str, Any]:
+        """Returns the profile of the profiled code.
+
+        Returns:
+            The duration, the sample interval and number of samples, the
+            collapsed stacks, the peak of the traced memory and the top
+            allocations. The peak is None if another profiled job ran at
+            the same time, which the note then says.
+        """
+        result = {
+            "duration_s": self._duration,
+            "sample_interval_s": self.interval,
+            "samples": sum(self.stacks.values()),
+            "collapsed_stacks": self.get_collapsed_stacks(),
+            "peak_traced_bytes": self._peak_bytes,
+            "top_allocations": self.get_top_allocations(),
+        }
+        if self._overlapped:
+            result["peak_note"] = (
+                "The peak is left out, another profiled job ran at the same "
+                "time and the traced memory is shared by the process."
+            )
+        return result
+
+
+def profiled_job(func: F) -> F:
+    """Decorator that profiles a compute_and_store_* task of a job.
+
+    The task is called with the workspace and the job ID as its first
+    arguments. The profile is stored with the job, also if the task
+    fails.
+
+    Args:
+        func: The task.
+
+    Returns:
+        The profiled task.
+    """
+
+    @functools.wraps(func)
+    def wrapper(workspace: Any, job_id: str, *args: Any, **kwargs: Any) -> Any:
+        profiler = JobProfiler()
+        try:
+            with profiler:
+                return func(workspace, job_id, *args, **kwargs)
+        finally:
+            rec = workspace.state.jobs.get(job_id)
+            if rec is not None:
+                rec.profile = profiler.get_result()
+
+    return wrapper  # type: ignore
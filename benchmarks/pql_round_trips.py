@@ -0,0 +1,303 @@
+"""Counts the PQL round trips of every endpoint that queries Celonis.
+
+Every endpoint that depends on the Celonis connection is called once
+against an OfflineCelonisConnectionManager, which records the number of
+PQL queries, the rows they returned and the size of the returned
+DataFrames. The counts are compared with the budgets in pql_budgets.json,
+and the benchmark exits with an error if an endpoint exceeds its budget,
+e.g. because a change turned one query into one query per activity.
+
+The counts do not depend on the machine, only on the log, so the budgets
+are kept per log. With a latency, the wall times show how an endpoint
+would behave against a remote Celonis instance.
+
+Example:
+    python -m benchmarks.pql_round_trips --latency 0.05
+    python -m benchmarks.pql_round_trips --update-budgets
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+from fastapi.dependencies.models import Dependant
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+
+from backend.api.celonis import get_celonis_connection
+from backend.celonis_connection.offline_connection_manager import (
+    OfflineCelonisConnectionManager,
+)
+from backend.main import app
+from benchmarks.run_benchmarks import BUNDLED_LOGS, load_log
+
+BUDGETS_FILE = "benchmarks/pql_budgets.json"
+DEFAULT_OUTPUT = "benchmarks/results/pql_round_trips.json"
+
+# The format pm4py parses the time windows of the resource profiles in
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Endpoints that depend on the Celonis connection but are not measured
+EXCLUDED_ENDPOINTS = {
+    "POST /api/logs/commit-log-to-celonis": (
+        "Uploads the log, its round trips are not PQL queries."
+    ),
+}
+
+# **************** Endpoints ****************
+
+
+def _uses_celonis(dependant: Dependant) -> bool:
+    """Returns whether the dependant depends on the Celonis connection."""
+    return any(
+        dependency.call is get_celonis_connection or _uses_celonis(dependency)
+        for dependency in dependant.dependencies
+    )
+
+
+def get_celonis_endpoints() -> List[APIRoute]:
+    """Returns the routes of the app that depend on the Celonis connection.
+
+    Returns:
+        The routes in the order they are registered, without the excluded
+        ones.
+    """
+    return [
+        route
+        for route in app.routes
+        if isinstance(route, APIRoute)
+        and _uses_celonis(route.dependant)
+        and endpoint_name(route) not in EXCLUDED_ENDPOINTS
+    ]
+
+
+def endpoint_name(route: APIRoute) -> str:
+    """Returns the method and the path of a route, e.g. 'GET /api/...'."""
+    return f"{sorted(route.methods)[0]} {route.path}"
+
+
+def get_query_values(log: pd.DataFrame) -> Dict[str, Any]:
+    """Returns values for the query parameters of the endpoints.
+
+    The most frequent resources and activity are used, and the time
+    window spans the whole log.
+
+    Args:
+        log: The event log.
+
+    Returns:
+        The values by parameter name.
+    """
+    timestamps = pd.to_datetime(log["time:timestamp"])
+    values: Dict[str, Any] = {
+        "activity": str(log["concept:name"].value_counts().index[0]),
+        "start_time": timestamps.min().floor("D").strftime(TIME_FORMAT),
+        "end_time": timestamps.max().ceil("D").strftime(TIME_FORMAT),
+    }
+    if "org:resource" in log.columns:
+        resources = log["org:resource"].value_counts().index
+        values.update(
+            {
+                "resource": str(resources[0]),
+                "resource1": str(resources[0]),
+                "resource2": str(resources[min(1, len(resources) - 1)]),
+                "resources": [str(resources[0])],
+            }
+        )
+    return values
+
+
+# **************** Measurement ****************
+
+
+def measure_endpoints(
+    log_name: str,
+    latency: float = 0.0,
+    synthetic: Optional[Dict[str, int]] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """Calls every endpoint once and counts its PQL round trips.
+
+    Every endpoint is called with empty caches, so its counts do not
+    depend on the endpoints called before. The background jobs the
+    endpoints start are run before the call returns, so they are counted
+    as well.
+
+    Args:
+        log_name: The name of a bundled log or "synthetic".
+        latency: Seconds every round trip to Celonis takes.
+        synthetic: The arguments of generate_log for the synthetic log.
+
+    Returns:
+        The status code, the number of queries, the returned rows and
+        bytes and the wall time by endpoint name.
+    """
+    log = load_log(log_name, synthetic)
+    if "org:group" not in log.columns and "org:resource" in log.columns:
+        # E.g. the running example, every resource is its own group
+        log["org:group"] = log["org:resource"]
+    celonis = OfflineCelonisConnectionManager(latency=latency)
+    celonis.add_dataframe(log)
+    celonis.create_table()
+    values = get_query_values(log)
+
+    results: Dict[str, Dict[str, Any]] = {}
+    with TestClient(app, raise_server_exceptions=False) as client:
+        for route in get_celonis_endpoints():
+            app.state.celonis = celonis
+            app.state.extract_cache = {}
+            app.state.jobs = {}
+            params = {
+                parameter.name: values[parameter.name]
+                for parameter in route.dependant.query_params
+                if parameter.name in values
+            }
+            celonis.reset_counters()
+            start = time.perf_counter()
+            response = client.request(
+                sorted(route.methods)[0], route.path, params=params
+            )
+            wall_time = time.perf_counter() - start
+            body = response.json() if response.status_code < 400 else None
+            job = (
+                app.state.jobs.get(body.get("job_id"))
+                if isinstance(body, dict)
+                else None
+            )
+            results[endpoint_name(route)] = {
+                "status": response.status_code,
+                "job_status": None if job is None else job.status,
+                "queries": celonis.query_count,
+                "rows": celonis.rows_transferred,
+                "bytes": celonis.bytes_transferred,
+                "wall_time_s": wall_time,
+            }
+    return results
+
+
+def check_budgets(
+    results: Dict[str, Dict[str, Any]], budgets: Dict[str, Dict[str, Any]]
+) -> List[str]:
+    """Compares the counts of the endpoints with their budgets.
+
+    Endpoints whose budget has a "skip" reason are not checked.
+
+    Args:
+        results: The counts by endpoint name, see measure_endpoints.
+        budgets: The maximum number of queries and rows by endpoint name.
+
+    Returns:
+        One line per endpoint that failed, has no budget or exceeds it.
+    """
+    violations = []
+    for name, result in results.items():
+        budget = budgets.get(name)
+        if budget is None:
+            violations.append(f"{name}: no budget")
+        elif "skip" in budget:
+            continue
+        elif result["status"] >= 400:
+            violations.append(f"{name}: failed with status {result['status']}")
+        elif result["job_status"] == "failed":
+            violations.append(f"{name}: the job failed")
+        else:
+            for key in ("queries", "rows"):
+                if result[key] > budget[key]:
+                    violations.append(
+                        f"{name}: {result[key]} {key}, budget {budget[key]}"
+                    )
+    return violations
+
+
+def make_budgets(
+    results: Dict[str, Dict[str, Any]], previous: Dict[str, Dict[str, Any]]
+) -> Dict[str, Dict[str, Any]]:
+    """Sets the budgets to the current counts.
+
+    Skipped endpoints keep their reason.
+
+    Args:
+        results: The counts by endpoint name, see measure_endpoints.
+        previous: The budgets so far.
+
+    Returns:
+        The budgets by endpoint name.
+    """
+    budgets: Dict[str, Dict[str, Any]] = {}
+    for name, result in results.items():
+        if "skip" in previous.get(name, {}):
+            budgets[name] = previous[name]
+        else:
+            budgets[name] = {"queries": result["queries"], "rows": result["rows"]}
+    return budgets
+
+
+def _format_result(name: str, result: Dict[str, Any]) -> str:
+    return (
+        f"{name}: {result['queries']} queries, {result['rows']:,} rows, "
+        f"{result['bytes'] / 1024:,.1f} KB, {result['wall_time_s']:.3f} s"
+        + ("" if result["status"] < 400 else f", status {result['status']}")
+        + ("" if result["job_status"] is None else f", job {result['job_status']}")
+    )
+
+
+def _read_budgets(path: Path) -> Dict[str, Any]:
+    return json.loads(path.read_text()) if path.exists() else {}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Runs the benchmark from the command line.
+
+    Returns:
+        1 if an endpoint exceeds its budget, 0 otherwise.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--log",
+        default="running-example",
+        choices=list(BUNDLED_LOGS) + ["synthetic"],
+    )
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--budgets", default=BUDGETS_FILE)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument(
+        "--update-budgets",
+        action="store_true",
+        help="Set the budgets of the log to the current counts.",
+    )
+    parser.add_argument("--cases", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    synthetic = {"cases": args.cases, "seed": args.seed}
+    results = measure_endpoints(args.log, args.latency, synthetic)
+    for name, result in results.items():
+        print(_format_result(name, result))
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({"log": args.log, "results": results}, indent=2))
+    print(f"Results written to {output}")
+
+    budgets_path = Path(args.budgets)
+    budgets = _read_budgets(budgets_path)
+    if args.update_budgets:
+        budgets[args.log] = make_budgets(results, budgets.get(args.log, {}))
+        budgets_path.write_text(json.dumps(budgets, indent=2) + "\n")
+        print(f"Budgets written to {budgets_path}")
+        return 0
+    if args.log not in budgets:
+        print(f"No budgets for the log '{args.log}'.")
+        return 0
+
+    violations = check_budgets(results, budgets[args.log])
+    for line in violations:
+        print(f"Over budget: {line}")
+    return 1 if violations else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
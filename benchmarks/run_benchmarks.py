@@ -0,0 +1,330 @@
+"""Benchmarks the conformance checking modules on bundled and synthetic logs.
+
+Every benchmark runs in a fresh process, so its peak RSS is not skewed
+by earlier benchmarks. The wall time, the peak RSS and the throughput in
+events per second are written to a JSON file, which can be compared with
+the results of another commit.
+
+Example:
+    python -m benchmarks.run_benchmarks --logs running-example synthetic \
+        --cases 10000 --output before.json
+    python -m benchmarks.run_benchmarks --compare before.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import platform
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from backend.conformance_checking.declarative_constraints import (
+    DeclarativeConstraints,
+)
+from backend.conformance_checking.log_skeleton import LogSkeleton
+from backend.conformance_checking.resource_based import ResourceBased
+from backend.conformance_checking.temporal_profile import TemporalProfile
+from backend.utils import file_handlers
+from benchmarks.synthetic_log import generate_log
+
+try:
+    import resource
+except ImportError:  # pragma: no cover, not available on Windows
+    resource = None  # type: ignore
+
+BUNDLED_LOGS = {
+    "running-example": "tests/input_data/running-example.xes",
+    "receipt": "tests/input_data/receipt.csv",
+    "road-traffic": "tests/input_data/Road_Traffic_Fine_Management_Process.xes.gz",
+}
+
+DEFAULT_OUTPUT = "benchmarks/results/latest.json"
+
+# **************** Benchmarks ****************
+
+
+def _run_log_skeleton(log: pd.DataFrame) -> None:
+    skeleton = LogSkeleton(log)
+    skeleton.compute_skeleton()
+    skeleton.check_conformance_traces(log)
+
+
+def _run_declarative_constraints(log: pd.DataFrame) -> None:
+    constraints = DeclarativeConstraints(log)
+    constraints.run_model()
+    constraints.run_all_rules()
+
+
+def _run_temporal_profile(log: pd.DataFrame) -> None:
+    profile = TemporalProfile(log)
+    profile.discover_temporal_profile()
+    profile.check_temporal_conformance()
+
+
+def _run_resource_based(log: pd.DataFrame) -> None:
+    resource_based = ResourceBased(log)
+    resource_based.compute_handover_of_work()
+    resource_based.compute_subcontracting()
+    resource_based.compute_working_together()
+    resource_based.compute_similar_activities()
+    resource_based.compute_organizational_roles()
+
+
+BENCHMARKS: Dict[str, Callable[[pd.DataFrame], None]] = {
+    "log_skeleton": _run_log_skeleton,
+    "declarative_constraints": _run_declarative_constraints,
+    "temporal_profile": _run_temporal_profile,
+    "resource_based": _run_resource_based,
+}
+
+# The columns a benchmark needs besides case, activity and timestamp
+REQUIRED_COLUMNS = {"resource_based": ["org:resource"]}
+
+# **************** Measurement ****************
+
+
+def load_log(name: str, synthetic: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+    """Loads a bundled log or generates the synthetic log.
+
+    The logs are returned with plain dtypes, like the extracts from Celonis
+    the modules run on.
+
+    Args:
+        name: The name of a bundled log or "synthetic".
+        synthetic: The arguments of generate_log for the synthetic log.
+
+    Returns:
+        The event log.
+
+    Raises:
+        ValueError: If the log is unknown.
+    """
+    if name == "synthetic":
+        return generate_log(**(synthetic or {}))
+    if name not in BUNDLED_LOGS:
+        raise ValueError(f"Unknown log '{name}'.")
+    path = BUNDLED_LOGS[name]
+    extension = file_handlers.get_file_extension(path)
+    if file_handlers.get_log_format(path, extension) == ".csv":
+        log = file_handlers.read_csv_typed(
+            path,
+            extension,
+            case_id_col="case:concept:name",
+            activity_col="concept:name",
+            timestamp_col="time:timestamp",
+        )
+    else:
+        log = file_handlers.read_log_file(path, extension)
+    return file_handlers.to_plain_dtypes(log)
+
+
+def _peak_rss_mb() -> Optional[float]:
+    """Returns the peak resident set size of this process in MB."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def measure(
+    log_name: str,
+    benchmark: str,
+    synthetic: Optional[Dict[str, Any]] = None,
+    repeat: int = 1,
+) -> Dict[str, Any]:
+    """Runs a benchmark on a log and measures it.
+
+    The time to load the log is not measured.
+
+    Args:
+        log_name: The name of a bundled log or "synthetic".
+        benchmark: The name of the benchmark, see BENCHMARKS.
+        synthetic: The arguments of generate_log for the synthetic log.
+        repeat: How often the benchmark is run.
+
+    Returns:
+        The sizes of the log, the wall times, the best wall time, the
+        peak RSS after loading the log and in total, and the throughput
+        of the best run in events per second. Benchmarks whose columns are
+        missing in the log are marked as skipped.
+    """
+    log = load_log(log_name, synthetic)
+    result: Dict[str, Any] = {
+        "log": log_name,
+        "benchmark": benchmark,
+        "events": len(log),
+        "cases": int(log["case:concept:name"].nunique()),
+    }
+    missing = [c for c in REQUIRED_COLUMNS.get(benchmark, []) if c not in log.columns]
+    if missing:
+        result["skipped"] = f"Columns {missing} not found."
+        return result
+
+    result["peak_rss_after_load_mb"] = _peak_rss_mb()
+    wall_times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        BENCHMARKS[benchmark](log)
+        wall_times.append(time.perf_counter() - start)
+    best = min(wall_times)
+    result.update(
+        {
+            "wall_times_s": wall_times,
+            "wall_time_s": best,
+            "peak_rss_mb": _peak_rss_mb(),
+            "events_per_s": len(log) / best if best > 0 else None,
+        }
+    )
+    return result
+
+
+def run_benchmarks(
+    logs: List[str],
+    benchmarks: List[str],
+    synthetic: Optional[Dict[str, Any]] = None,
+    repeat: int = 1,
+) -> Dict[str, Any]:
+    """Runs every benchmark on every log, each in a fresh process.
+
+    Args:
+        logs: The names of the logs.
+        benchmarks: The names of the benchmarks.
+        synthetic: The arguments of generate_log for the synthetic log.
+        repeat: How often every benchmark is run.
+
+    Returns:
+        The environment and the results of the benchmarks.
+    """
+    results = []
+    context = multiprocessing.get_context("spawn")
+    for log_name in logs:
+        for benchmark in benchmarks:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                result = executor.submit(
+                    measure, log_name, benchmark, synthetic, repeat
+                ).result()
+            print(_format_result(result))
+            results.append(result)
+    return {
+        "commit": _get_commit(),
+        "created": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "synthetic": synthetic,
+        "results": results,
+    }
+
+
+def _get_commit() -> Optional[str]:
+    """Returns the current git commit, if the code is in a git repository."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _format_result(result: Dict[str, Any]) -> str:
+    name = f"{result['log']} / {result['benchmark']}"
+    if "skipped" in result:
+        return f"{name}: skipped, {result['skipped']}"
+    return (
+        f"{name}: {result['wall_time_s']:.3f} s, "
+        f"{result['events_per_s'] or 0:,.0f} events/s, "
+        f"peak RSS {result['peak_rss_mb'] or 0:.0f} MB"
+    )
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[str]:
+    """Compares the wall times of two benchmark runs.
+
+    Args:
+        baseline: The results of the earlier run.
+        current: The results of the later run.
+
+    Returns:
+        One line per benchmark in both runs with the speedup of the later
+        run, i.e. values above 1 are faster.
+    """
+    before = {
+        (r["log"], r["benchmark"]): r for r in baseline["results"] if "wall_time_s" in r
+    }
+    lines = []
+    for result in current["results"]:
+        previous = before.get((result["log"], result["benchmark"]))
+        if previous is None or "wall_time_s" not in result:
+            continue
+        lines.append(
+            f"{result['log']} / {result['benchmark']}: "
+            f"{previous['wall_time_s']:.3f} s -> {result['wall_time_s']:.3f} s "
+            f"({previous['wall_time_s'] / result['wall_time_s']:.2f}x), "
+            f"peak RSS {previous['peak_rss_mb'] or 0:.0f} MB -> "
+            f"{result['peak_rss_mb'] or 0:.0f} MB"
+        )
+    return lines
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Runs the benchmarks from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--logs",
+        nargs="+",
+        default=list(BUNDLED_LOGS) + ["synthetic"],
+        choices=list(BUNDLED_LOGS) + ["synthetic"],
+    )
+    parser.add_argument(
+        "--benchmarks", nargs="+", default=list(BENCHMARKS), choices=list(BENCHMARKS)
+    )
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--compare", help="JSON results of an earlier run.")
+    synthetic_group = parser.add_argument_group("synthetic log")
+    for name, default in (
+        ("cases", 1000),
+        ("activities", 10),
+        ("trace-length", 10),
+        ("variants", 20),
+        ("resources", 20),
+        ("groups", 4),
+        ("seed", 0),
+    ):
+        synthetic_group.add_argument(f"--{name}", type=int, default=default)
+    args = parser.parse_args(argv)
+
+    synthetic = {
+        "cases": args.cases,
+        "activities": args.activities,
+        "trace_length": args.trace_length,
+        "variants": args.variants,
+        "resources": args.resources,
+        "groups": args.groups,
+        "seed": args.seed,
+    }
+    report = run_benchmarks(args.logs, args.benchmarks, synthetic, args.repeat)
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"Results written to {output}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        for line in compare_results(baseline, report):
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
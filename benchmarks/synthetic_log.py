@@ -0,0 +1,139 @@
+"""Generates synthetic event logs of a given size for the benchmarks.
+
+The logs have the XES column names that the conformance checking modules
+expect, i.e. "case:concept:name", "concept:name", "time:timestamp",
+"org:resource" and "org:group".
+"""
+
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+
+def _mutate(trace: np.ndarray, activities: int, rng: np.random.Generator) -> np.ndarray:
+    """Applies a few random swaps, skips and insertions to a trace.
+
+    Args:
+        trace: The activity codes of the trace.
+        activities: The number of activities.
+        rng: The random number generator.
+
+    Returns:
+        The mutated activity codes.
+    """
+    trace = trace.copy()
+    for _ in range(1 + rng.poisson(1.0)):
+        position = int(rng.integers(0, len(trace)))
+        mutation = rng.integers(0, 3)
+        if mutation == 0 and len(trace) > 1:
+            other = min(position + 1, len(trace) - 1)
+            trace[[position, other]] = trace[[other, position]]
+        elif mutation == 1 and len(trace) > 1:
+            trace = np.delete(trace, position)
+        else:
+            trace = np.insert(trace, position, rng.integers(0, activities))
+    return trace
+
+
+def generate_log(
+    cases: int = 1000,
+    activities: int = 10,
+    trace_length: int = 10,
+    variants: int = 20,
+    resources: int = 20,
+    groups: int = 4,
+    seed: int = 0,
+    start: str = "2024-01-01",
+) -> pd.DataFrame:
+    """Generates a synthetic event log.
+
+    The first variant is a fixed sequence of trace_length activities, the
+    other variants are mutations of it, so the log has a dominant control
+    flow with deviations. The variants are drawn with Zipf distributed
+    frequencies. Every activity is executed by a few resources, and the
+    resources are assigned to the groups round robin. The cases start one
+    hour apart on average and their events two hours apart on average.
+
+    Args:
+        cases: The number of cases.
+        activities: The number of distinct activities.
+        trace_length: The length of the first variant.
+        variants: The maximum number of distinct variants.
+        resources: The number of resources.
+        groups: The number of groups.
+        seed: The seed of the random number generator.
+        start: The start of the first case.
+
+    Returns:
+        The event log, ordered by case and timestamp.
+
+    Raises:
+        ValueError: If one of the sizes is not positive.
+    """
+    for name, value in (
+        ("cases", cases),
+        ("activities", activities),
+        ("trace_length", trace_length),
+        ("variants", variants),
+        ("resources", resources),
+        ("groups", groups),
+    ):
+        if value < 1:
+            raise ValueError(f"{name} must be positive, got {value}.")
+    rng = np.random.default_rng(seed)
+
+    base = np.resize(rng.permutation(activities), trace_length)
+    traces: List[np.ndarray] = [base] + [
+        _mutate(base, activities, rng) for _ in range(variants - 1)
+    ]
+    lengths = np.array([len(trace) for trace in traces])
+    padded = np.zeros((variants, lengths.max()), dtype=np.int64)
+    for i, trace in enumerate(traces):
+        padded[i, : len(trace)] = trace
+
+    weights = 1.0 / np.arange(1, variants + 1)
+    case_variants = rng.choice(variants, size=cases, p=weights / weights.sum())
+    case_lengths = lengths[case_variants]
+    in_trace = np.arange(padded.shape[1]) < case_lengths[:, None]
+    activity_codes = padded[case_variants][in_trace]
+    case_codes = np.repeat(np.arange(cases), case_lengths)
+    events = len(activity_codes)
+
+    # Every activity is executed by a random pool of resources
+    pool_size = max(1, min(resources, 2 * resources // activities))
+    pools = np.stack(
+        [
+            rng.choice(resources, size=pool_size, replace=False)
+            for _ in range(activities)
+        ]
+    )
+    resource_codes = pools[activity_codes, rng.integers(0, pool_size, events)]
+
+    case_starts = np.cumsum(rng.exponential(3600.0, cases))
+    gaps = rng.exponential(7200.0, events)
+    first_events = np.concatenate(([0], np.cumsum(case_lengths)[:-1]))
+    gaps[first_events] = 0.0
+    elapsed = np.cumsum(gaps)
+    offsets = elapsed - np.repeat(elapsed[first_events], case_lengths)
+    seconds = np.round(case_starts[case_codes] + offsets)
+
+    activity_names = np.array(
+        [f"Activity {i}" for i in range(activities)], dtype=object
+    )
+    resource_names = np.array([f"Resource {i}" for i in range(resources)], dtype=object)
+    group_names = np.array(
+        [f"Group {i % groups}" for i in range(resources)], dtype=object
+    )
+    return pd.DataFrame(
+        {
+            "case:concept:name": np.char.add("case-", case_codes.astype(str)).astype(
+                object
+            ),
+            "concept:name": activity_names[activity_codes],
+            "time:timestamp": pd.Timestamp(start, tz="UTC")
+            + pd.to_timedelta(seconds, unit="s"),
+            "org:resource": resource_names[resource_codes],
+            "org:group": group_names[resource_codes],
+        }
+    )
@@ -13,7 +13,7 @@ import {
   CircularProgress,
 } from "@mui/material";
 import { useLocation, useNavigate } from "react-router-dom";
-import { COMMIT_LOG_TO_CELONIS } from "./config";
+import { COMMIT_LOG_TO_CELONIS, GET_JOB_STATUS } from "./config";
 
 const MappingPage = () => {
   const location = useLocation();
@@ -28,6 +28,7 @@ const MappingPage = () => {
   const [groupCol, setGroupCol] = useState("");
 
   const [loading, setLoading] = useState(false);
+  const [phase, setPhase] = useState("");
 
   const selectedValues = [
     caseIdCol,
@@ -59,17 +60,33 @@ const MappingPage = () => {
         body: JSON.stringify(payload),
       });
 
-      const result = await res.json();
+      const { job_id: jobId, detail } = await res.json();
+      if (!res.ok) {
+        throw new Error(detail);
+      }
+
+      // The commit runs as a job, poll it until it is done
+      let job = null;
+      while (!job || job.status === "pending" || job.status === "running") {
+        await new Promise((res) => setTimeout(res, 1000));
+        const jobRes = await fetch(`${GET_JOB_STATUS}/${jobId}`);
+        job = await jobRes.json();
+        if (job.phase) {
+          setPhase(`${job.phase} (${Math.round((job.progress || 0) * 100)}%)`);
+        }
+      }
       setLoading(false);
+      setPhase("");
 
-      if (result.message === "Table created successfully") {
-        alert(result.message);
-        navigate("/results", { state: result });
+      if (job.status === "complete") {
+        alert(job.result.message);
+        navigate("/results", { state: job.result });
       } else {
-        alert("Unexpected response from server.");
+        alert("Failed to commit logs: " + job.error);
       }
     } catch (err) {
       setLoading(false);
+      setPhase("");
       alert("Failed to commit logs: " + err.message);
     }
   };
@@ -114,8 +131,17 @@ const MappingPage = () => {
           )}
 
           {loading ? (
-            <Box sx={{ display: "flex", justifyContent: "center", mt: 2 }}>
+            <Box
+              sx={{
+                display: "flex",
+                flexDirection: "column",
+                alignItems: "center",
+                gap: 1,
+                mt: 2,
+              }}
+            >
               <CircularProgress />
+              {phase && <Typography variant="body2">{phase}</Typography>}
             </Box>
           ) : (
             <Button variant="contained" onClick={handleSubmit}>
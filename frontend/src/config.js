@@ -12,6 +12,7 @@ export const CELONIS_CONNECTION = `${API_BASE}/api/setup/celonis-credentials`;
 export const CELONIS_LOG_UPLOAD = `${API_BASE}/api/logs/upload-log`;
 export const GET_COLUMN_NAMES = `${API_BASE}/api/setup/get-column-names`;
 export const COMMIT_LOG_TO_CELONIS = `${API_BASE}/api/logs/commit-log-to-celonis`;
+export const GET_JOB_STATUS = `${API_BASE}/api/jobs`;
 export const GET_GENERAL_INSIGHTS = `${API_BASE}/api/general/get-general-information`;
 
 // Log Skeleton Endpoints
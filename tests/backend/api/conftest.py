@@ -2,6 +2,7 @@
 
 import os
 import tempfile
+import threading
 from typing import Any, Dict, Optional
 from unittest.mock import MagicMock, patch
 
@@ -20,11 +21,14 @@ class MockCelonisConnectionManager:
     def __init__(self, **kwargs: Any) -> None:
         """Initialize mock with minimal setup."""
         self.data_frame = pd.DataFrame()
+        self.commit_lock = threading.Lock()
         self.add_dataframe = MagicMock()
         self.create_table = MagicMock()
         self.get_basic_dataframe_from_celonis = MagicMock()
         self.get_dataframe_with_resource_group_from_celonis = MagicMock()
         self.get_dataframe_from_celonis = MagicMock()
+        self.get_filtered_dataframe_from_celonis = MagicMock()
+        self.iter_dataframes_from_celonis = MagicMock()
 
 
 def mock_get_celonis_connection(request: Request) -> MockCelonisConnectionManager:
@@ -8,6 +8,7 @@ from pytest_mock import MockerFixture
 
 import backend.api.modules.log_skeleton_router as log_skeleton_router
 from backend.api.models.schemas.job_models import JobStatus
+from backend.api.workspaces import DEFAULT_WORKSPACE
 from backend.celonis_connection.celonis_connection_manager import (
     CelonisConnectionManager,
 )
@@ -156,7 +157,9 @@ def test_compute_log_skeleton(client, mocker, fake_celonis_manager, fake_uuid) -
     assert job.module == log_skeleton_router.MODULE_NAME
     assert job.status == "pending"
 
-    dummy_task.assert_called_once_with(client.app, fake_uuid, fake_celonis_manager)
+    workspace = client.app.state.workspaces.get(DEFAULT_WORKSPACE)
+    assert workspace.state is client.app.state
+    dummy_task.assert_called_once_with(workspace, fake_uuid, fake_celonis_manager)
 
 
 # ******** Tests for get_equivalence ********
@@ -6,6 +6,7 @@ import pandas as pd
 from fastapi.testclient import TestClient
 
 from backend.api.models.schemas.job_models import JobStatus
+from backend.conformance_checking.resource_profile_cube import ResourceProfileCube
 from backend.main import app
 
 
@@ -25,6 +26,22 @@ class TestComputeResourceBasedEndpoint:
             assert isinstance(response.json()["job_id"], str)
             assert len(response.json()["job_id"]) > 0
 
+    def test_compute_passes_the_roles_threshold(self, test_client: TestClient):
+        """Test that the threshold of the role discovery reaches the task."""
+        with patch(
+            "backend.api.modules.resource_based_router.compute_and_store_resource_based_metrics"
+        ) as mock_task:
+            response = test_client.post(
+                "/api/resource-based/compute", params={"roles_threshold": 0.8}
+            )
+            assert response.status_code == 202
+            assert mock_task.call_args.args[3] == 0.8
+
+            response = test_client.post(
+                "/api/resource-based/compute", params={"roles_threshold": 1.5}
+            )
+            assert response.status_code == 422
+
 
 # *****************Social Network Analysis (SNA) Tests*****************
 
@@ -1013,9 +1030,14 @@ class TestGetInteractionOfTwoResourcesPQLEndpoint:
         self, test_client: TestClient
     ):
         """Test successful retrieval of interaction two resources (PQL)."""
-        with patch(
-            "backend.api.modules.resource_based_router.resource_based_queries.get_interaction_two_resources"
-        ) as mock_get_interaction:
+        with (
+            patch(
+                "backend.api.modules.resource_based_router.resource_based_queries.get_interaction_two_resources"
+            ) as mock_get_interaction,
+            patch(
+                "backend.api.modules.resource_based_router.get_case_resource_index"
+            ) as mock_get_index,
+        ):
             mock_get_interaction.return_value = 0.45
             response = test_client.get(
                 "/api/resource-based/pql/resource-profile/interaction-two-resources",
@@ -1028,3 +1050,284 @@ class TestGetInteractionOfTwoResourcesPQLEndpoint:
             )
             assert response.status_code == 200
             assert response.json() == 0.45
+            # The cached index of the extract is used
+            assert (
+                mock_get_interaction.call_args.kwargs["index"]
+                is mock_get_index.return_value
+            )
+
+
+# *****************Resource Profile Cube Tests*****************
+
+
+def _cube_sample_log() -> pd.DataFrame:
+    """Returns a small event log for the resource profile cube tests."""
+    return pd.DataFrame(
+        {
+            "case:concept:name": ["Case 1", "Case 1", "Case 2", "Case 2"],
+            "org:resource": ["Resource A", "Resource B", "Resource A", "Resource A"],
+            "concept:name": ["Activity A", "Activity B", "Activity A", "Activity C"],
+            "time:timestamp": pd.to_datetime(
+                [
+                    "2023-01-01 10:00:00",
+                    "2023-01-02 10:00:00",
+                    "2023-01-03 10:00:00",
+                    "2023-01-05 10:00:00",
+                ]
+            ),
+            "org:group": ["Group 1", "Group 1", "Group 1", "Group 1"],
+        }
+    )
+
+
+class TestResourceProfileCubeEndpoints:
+    """Tests for the resource profile endpoints answered by the cube."""
+
+    def test_build_resource_profile_cube(
+        self,
+        test_client: TestClient,
+        mock_celonis_manager,  # type: ignore
+    ):
+        """Test that the cube is built once and cached in the app state."""
+        from backend.api.celonis import get_celonis_connection
+
+        manager = mock_celonis_manager  # type: ignore
+        manager.get_dataframe_with_resource_group_from_celonis.return_value = (
+            _cube_sample_log()
+        )
+        test_client.app.dependency_overrides[get_celonis_connection] = (  # type: ignore
+            lambda: manager
+        )
+
+        response = test_client.post(
+            "/api/resource-based/resource-profile/cube", params={"granularity": "day"}
+        )
+        assert response.status_code == 200
+        assert response.json()["resources"] == 2
+        assert response.json()["buckets"] == 5
+        assert "resource_profile_cube:day" in test_client.app.state.extract_cache  # type: ignore
+
+        # A second request must be served from the cache
+        test_client.post("/api/resource-based/resource-profile/cube")
+        manager.get_dataframe_with_resource_group_from_celonis.assert_called_once()
+
+    def test_distinct_activities_from_cube(self, test_client: TestClient):
+        """Test that use_cube answers from the cached cube."""
+        test_client.app.state.extract_cache["resource_profile_cube:day"] = (  # type: ignore
+            ResourceProfileCube(_cube_sample_log())
+        )
+        response = test_client.get(
+            "/api/resource-based/resource-profile/distinct-activities",
+            params={
+                "resource": "Resource A",
+                "start_time": "2023-01-01",
+                "end_time": "2023-01-04",
+                "use_cube": True,
+            },
+        )
+        assert response.status_code == 200
+        assert response.json() == 1
+
+    def test_fraction_case_completions_pql_from_cube(self, test_client: TestClient):
+        """Test that the PQL endpoints can use the cached cube as well."""
+        test_client.app.state.extract_cache["resource_profile_cube:day"] = (  # type: ignore
+            ResourceProfileCube(_cube_sample_log())
+        )
+        with patch(
+            "backend.api.modules.resource_based_router.resource_based_queries.get_fraction_case_completions"
+        ) as mock_get_fraction:
+            response = test_client.get(
+                "/api/resource-based/pql/resource-profile/fraction-case-completions",
+                params={
+                    "resource": "Resource B",
+                    "start_time": "2023-01-01",
+                    "end_time": "2023-01-06",
+                    "use_cube": True,
+                },
+            )
+            mock_get_fraction.assert_not_called()
+        assert response.status_code == 200
+        assert response.json() == 0.5
+
+
+class TestMultitaskingBulkEndpoint:
+    """Tests for api/resource-based/resource-profile/multitasking/bulk."""
+
+    def test_get_multitasking_bulk(
+        self,
+        test_client: TestClient,
+        mock_celonis_manager,  # type: ignore
+    ):
+        """Test that the time series is returned and the index is cached."""
+        from backend.api.celonis import get_celonis_connection
+
+        manager = mock_celonis_manager  # type: ignore
+        manager.get_dataframe_with_resource_group_from_celonis.return_value = (
+            _cube_sample_log()
+        )
+        test_client.app.dependency_overrides[get_celonis_connection] = (  # type: ignore
+            lambda: manager
+        )
+
+        params = {"start_time": "2023-01-01", "end_time": "2023-01-06"}
+        response = test_client.get(
+            "/api/resource-based/resource-profile/multitasking/bulk", params=params
+        )
+        assert response.status_code == 200
+        table = response.json()["tables"][0]
+        assert table["headers"] == ["Resource", "Time Bucket", "Multitasking"]
+        assert ["Resource B", "2023-01-02 00:00:00", "0.0000"] in table["rows"]
+        assert "multitasking_index" in test_client.app.state.extract_cache  # type: ignore
+
+        test_client.get(
+            "/api/resource-based/resource-profile/multitasking/bulk", params=params
+        )
+        manager.get_dataframe_with_resource_group_from_celonis.assert_called_once()
+
+    def test_get_multitasking_bulk_no_data(
+        self,
+        test_client: TestClient,
+        mock_celonis_manager,  # type: ignore
+    ):
+        """Test that a missing extract results in a 404."""
+        from backend.api.celonis import get_celonis_connection
+
+        manager = mock_celonis_manager  # type: ignore
+        manager.get_dataframe_with_resource_group_from_celonis.return_value = (
+            pd.DataFrame()
+        )
+        test_client.app.dependency_overrides[get_celonis_connection] = (  # type: ignore
+            lambda: manager
+        )
+
+        response = test_client.get(
+            "/api/resource-based/resource-profile/multitasking/bulk",
+            params={"start_time": "2023-01-01", "end_time": "2023-01-06"},
+        )
+        assert response.status_code == 404
+
+
+class TestInteractionMatrixEndpoint:
+    """Tests for api/resource-based/resource-profile/interaction-matrix."""
+
+    def test_get_interaction_matrix(
+        self,
+        test_client: TestClient,
+        mock_celonis_manager,  # type: ignore
+    ):
+        """Test that the matrix is returned and the index is cached."""
+        from backend.api.celonis import get_celonis_connection
+
+        manager = mock_celonis_manager  # type: ignore
+        manager.get_dataframe_with_resource_group_from_celonis.return_value = (
+            _cube_sample_log()
+        )
+        test_client.app.dependency_overrides[get_celonis_connection] = (  # type: ignore
+            lambda: manager
+        )
+
+        params = {"start_time": "2023-01-01", "end_time": "2023-01-06"}
+        response = test_client.get(
+            "/api/resource-based/resource-profile/interaction-matrix", params=params
+        )
+        assert response.status_code == 200
+        table = response.json()["tables"][0]
+        assert table["headers"] == ["Resource", "Resource A", "Resource B"]
+        assert table["rows"] == [["Resource A", "2", "1"], ["Resource B", "1", "1"]]
+        assert "case_resource_index" in test_client.app.state.extract_cache  # type: ignore
+
+        test_client.get(
+            "/api/resource-based/resource-profile/interaction-matrix", params=params
+        )
+        manager.get_dataframe_with_resource_group_from_celonis.assert_called_once()
+
+    def test_get_interaction_matrix_pql(self, test_client: TestClient):
+        """Test that the PQL variant builds the index from a PQL query."""
+        from backend.conformance_checking.case_resource_index import (
+            CaseResourceIndex,
+        )
+
+        with patch(
+            "backend.api.modules.resource_based_router.resource_based_queries.get_case_resource_index"
+        ) as mock_get_index:
+            mock_get_index.return_value = CaseResourceIndex(_cube_sample_log())
+            response = test_client.get(
+                "/api/resource-based/pql/resource-profile/interaction-matrix",
+                params={"start_time": "2023-01-01", "end_time": "2023-01-02 10:00:00"},
+            )
+            mock_get_index.assert_called_once()
+        assert response.status_code == 200
+        assert response.json()["tables"][0]["rows"] == [
+            ["Resource A", "1", "1"],
+            ["Resource B", "1", "1"],
+        ]
+
+
+class TestFilteredResourceProfileExtracts:
+    """Tests for the resource profile endpoints with filtered extracts."""
+
+    def test_distinct_activities_extracts_window_of_resource(
+        self,
+        test_client: TestClient,
+        mock_celonis_manager,  # type: ignore
+    ):
+        """Test that only the window and resource are extracted."""
+        from backend.api.celonis import get_celonis_connection
+
+        manager = mock_celonis_manager  # type: ignore
+        log = _cube_sample_log()
+        manager.get_filtered_dataframe_from_celonis.return_value = log[
+            log["org:resource"] == "Resource A"
+        ].drop(columns=["org:group"])
+        test_client.app.dependency_overrides[get_celonis_connection] = (  # type: ignore
+            lambda: manager
+        )
+
+        response = test_client.get(
+            "/api/resource-based/resource-profile/distinct-activities",
+            params={
+                "resource": "Resource A",
+                "start_time": "2023-01-01 00:00:00",
+                "end_time": "2023-01-06 00:00:00",
+            },
+        )
+
+        assert response.status_code == 200
+        assert response.json() == 2
+        call = manager.get_filtered_dataframe_from_celonis.call_args
+        assert "org:group" not in call.args[0]
+        assert call.kwargs["resources"] == ["Resource A"]
+        assert call.kwargs["start_time"] == "2023-01-01 00:00:00"
+        manager.get_dataframe_with_resource_group_from_celonis.assert_not_called()
+
+    def test_social_position_without_events_in_window(
+        self,
+        test_client: TestClient,
+        mock_celonis_manager,  # type: ignore
+    ):
+        """Test that an empty window is not treated as missing data."""
+        from backend.api.celonis import get_celonis_connection
+
+        manager = mock_celonis_manager  # type: ignore
+        manager.get_filtered_dataframe_from_celonis.return_value = pd.DataFrame(
+            {"case:concept:name": [], "time:timestamp": [], "org:resource": []}
+        )
+        test_client.app.dependency_overrides[get_celonis_connection] = (  # type: ignore
+            lambda: manager
+        )
+
+        response = test_client.get(
+            "/api/resource-based/resource-profile/social-position",
+            params={
+                "resource": "Resource A",
+                "start_time": "2030-01-01 00:00:00",
+                "end_time": "2030-01-02 00:00:00",
+            },
+        )
+
+        assert response.status_code == 200
+        assert response.json() == 0.0
+        assert (
+            manager.get_filtered_dataframe_from_celonis.call_args.kwargs["resources"]
+            is None
+        )
@@ -26,6 +26,46 @@ class TestComputeTemporalProfileEndpoint:
             assert isinstance(response.json()["job_id"], str)
             assert len(response.json()["job_id"]) > 0
 
+    def test_compute_temporal_conformance_result_with_filters(
+        self, test_client: TestClient
+    ):
+        """Test that the extract filters are passed on to the task."""
+        with patch(
+            "backend.api.modules.temporal_profile_router.compute_and_store_temporal_conformance_result"
+        ) as mock_task:
+            response = test_client.post(
+                "/api/temporal-profile/compute-result",
+                params={
+                    "zeta": 0.5,
+                    "activities": ["A", "B"],
+                    "start_time": "2024-01-01",
+                    "case_sample": 100,
+                },
+            )
+
+            assert response.status_code == 202
+            assert mock_task.call_args.args[4] == {
+                "start_time": "2024-01-01",
+                "end_time": None,
+                "activities": ["A", "B"],
+                "case_sample": 100,
+            }
+
+    def test_compute_temporal_conformance_result_with_invalid_time(
+        self, test_client: TestClient
+    ):
+        """Test that an invalid time is rejected before a job is created."""
+        with patch(
+            "backend.api.modules.temporal_profile_router.compute_and_store_temporal_conformance_result"
+        ) as mock_task:
+            response = test_client.post(
+                "/api/temporal-profile/compute-result",
+                params={"zeta": 0.5, "start_time": "2024-01-01'}; {d'"},
+            )
+
+            assert response.status_code == 422
+            mock_task.assert_not_called()
+
 
 class TestGetTemporalConformanceResultEndpoint:
     """Tests for the api/temporal-profile/get-result endpoint."""
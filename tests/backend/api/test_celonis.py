@@ -0,0 +1,50 @@
+"""Tests for the Celonis settings of backend/api/celonis.py."""
+
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from backend.api import celonis
+
+
+def _write_env(path: Path, api_token: str) -> None:
+    path.write_text(
+        "CELONIS_BASE_URL=https://test.celonis.cloud\n"
+        "CELONIS_DATA_POOL_NAME=pool\n"
+        "CELONIS_DATA_MODEL_NAME=model\n"
+        f"API_TOKEN={api_token}\n"
+        "JOB_WORKERS=1\n"
+    )
+
+
+def test_settings_are_read_again_only_when_env_changes(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that the .env file is cached and wins over the environment."""
+    celonis._load_celonis_settings.cache_clear()
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("API_TOKEN", "from-environment")
+    env = tmp_path / ".env"
+    _write_env(env, "first")
+
+    with patch.object(
+        celonis, "CelonisSettings", wraps=celonis.CelonisSettings
+    ) as settings:
+        first = celonis.load_celonis_settings()
+        assert celonis.load_celonis_settings() is first
+        assert settings.call_count == 1
+
+        _write_env(env, "second")
+        stat = env.stat()
+        os.utime(env, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        second = celonis.load_celonis_settings()
+
+    assert first is not None and first.API_TOKEN == "first"
+    assert second is not None and second.API_TOKEN == "second"
+
+    env.unlink()
+    for name in ("CELONIS_BASE_URL", "CELONIS_DATA_POOL_NAME", "API_TOKEN"):
+        monkeypatch.delenv(name, raising=False)
+    assert celonis.load_celonis_settings() is None
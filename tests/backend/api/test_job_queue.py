@@ -0,0 +1,205 @@
+"""Tests for the shared job queue of backend/api/job_queue.py."""
+
+import sqlite3
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pandas as pd
+import pytest
+from fastapi import BackgroundTasks
+from starlette.datastructures import State
+
+from backend.api.job_queue import (
+    JobQueueSettings,
+    JobWorker,
+    create_job_store,
+    holding_connections,
+    process_name,
+    submit_job,
+)
+from backend.api.models.schemas.setup_models import CelonisCredentials
+from backend.api.tasks.log_skeleton_tasks import compute_and_store_log_skeleton
+from backend.api.workspaces import (
+    WorkspaceRegistry,
+    WorkspaceSettings,
+    add_job,
+    init_workspace_state,
+)
+from backend.celonis_connection.celonis_connection_manager import (
+    CelonisConnectionManager,
+)
+from backend.utils.job_store import JobMapping, SQLiteJobStore
+
+
+def _process(store: SQLiteJobStore) -> SimpleNamespace:
+    """Returns an application state as a worker process would have it."""
+    state = State()
+    init_workspace_state(state)
+    state.workspaces = WorkspaceRegistry(state, job_store=store)
+    return SimpleNamespace(state=state)
+
+
+def _celonis() -> MagicMock:
+    celonis = MagicMock(spec=CelonisConnectionManager)
+    celonis.base_url, celonis.api_token = "https://test.celonis.cloud", "token"
+    celonis.data_pool_name, celonis.data_model_name = "pool", "model"
+    celonis.get_basic_dataframe_from_celonis.return_value = pd.DataFrame(
+        {
+            "case:concept:name": ["1", "1", "2", "2"],
+            "concept:name": ["A", "B", "A", "B"],
+            "time:timestamp": pd.to_datetime(["2023-01-01", "2023-01-02"] * 2),
+        }
+    )
+    return celonis
+
+
+def test_job_accepted_by_one_process_is_run_and_served_by_another(
+    tmp_path: Path,
+) -> None:
+    """Test that a queued job is run by the worker of another process."""
+    store = SQLiteJobStore(str(tmp_path / "jobs.sqlite3"))
+    accepting, running = _process(store), _process(store)
+    workspace = accepting.state.workspaces.get("alice")
+    background_tasks = BackgroundTasks()
+
+    add_job(workspace, "1", "log_skeleton")
+    submit_job(
+        background_tasks,
+        workspace,
+        compute_and_store_log_skeleton,
+        "1",
+        _celonis(),
+        profile=True,
+    )
+    assert background_tasks.tasks == []
+
+    # The Celonis connection is taken from the running process
+    celonis = _celonis()
+    running.state.workspaces.get("alice").state.celonis = celonis
+    worker = JobWorker(running, store, "worker")
+    assert worker.run_once()
+    assert not worker.run_once()
+
+    celonis.get_basic_dataframe_from_celonis.assert_called_once()
+    rec = workspace.state.jobs["1"]
+    assert rec.status == "complete"
+    assert rec.result and "always_before" in rec.result
+    assert rec.profile is not None
+
+
+def test_job_that_cannot_be_started_fails(tmp_path: Path) -> None:
+    """Test that an unknown task fails its job instead of the worker."""
+    store = SQLiteJobStore(str(tmp_path / "jobs.sqlite3"))
+    app = _process(store)
+    workspace = app.state.workspaces.get("default")
+    add_job(workspace, "1", "test")
+    task = MagicMock(__module__="tests", __qualname__="task")
+
+    submit_job(BackgroundTasks(), workspace, task, "1")
+
+    assert JobWorker(app, store, "worker").run_once()
+    task.assert_not_called()
+    rec = JobMapping(store, "default")["1"]
+    assert rec.status == "failed"
+    assert rec.error and "only backend objects" in rec.error
+
+
+def test_queued_job_names_its_connection_without_the_token(tmp_path: Path) -> None:
+    """Test that the API token is not queued but taken by the worker."""
+    store = SQLiteJobStore(str(tmp_path / "jobs.sqlite3"))
+    accepting, running = _process(store), _process(store)
+    workspace = accepting.state.workspaces.get("alice")
+    add_job(workspace, "1", "log_skeleton")
+    celonis = _celonis()
+    celonis.api_token = "secret-token"
+
+    submit_job(
+        BackgroundTasks(), workspace, compute_and_store_log_skeleton, "1", celonis
+    )
+
+    with sqlite3.connect(store.path) as conn:
+        (queued,) = conn.execute("SELECT data FROM queue").fetchone()
+    assert "secret-token" not in queued
+
+    running.state.workspaces.get("alice").credentials = CelonisCredentials(
+        celonis_base_url="https://test.celonis.cloud",
+        celonis_data_pool_name="pool",
+        celonis_data_model_name="model",
+        api_token="secret-token",
+    )
+    running.state.celonis_pool = MagicMock()
+    running.state.celonis_pool.get.return_value = _celonis()
+    assert JobWorker(running, store, "worker").run_once()
+
+    running.state.celonis_pool.get.assert_called_once_with(
+        "https://test.celonis.cloud", "pool", "model", "secret-token"
+    )
+    assert workspace.state.jobs["1"].status == "complete"
+
+
+def test_job_holds_its_connection_until_it_ran() -> None:
+    """Test that a job keeps the pool from closing its manager."""
+    celonis = _celonis()
+    task = MagicMock()
+
+    run = holding_connections(task, celonis, zeta=0.5)
+    celonis.acquire.assert_called_once()
+    celonis.release.assert_not_called()
+
+    run("workspace", "1", celonis, zeta=0.5)
+    task.assert_called_once_with("workspace", "1", celonis, zeta=0.5)
+    celonis.release.assert_called_once()
+
+
+def test_job_with_workspace_credentials_is_pinned_to_its_process(
+    tmp_path: Path,
+) -> None:
+    """Test that only this process runs a job whose token only it knows."""
+    store = SQLiteJobStore(str(tmp_path / "jobs.sqlite3"))
+    app = _process(store)
+    workspace = app.state.workspaces.get("alice")
+    workspace.credentials = CelonisCredentials(
+        celonis_base_url="https://test.celonis.cloud",
+        celonis_data_pool_name="pool",
+        celonis_data_model_name="model",
+        api_token="secret-token",
+    )
+    add_job(workspace, "1", "log_skeleton")
+    submit_job(
+        BackgroundTasks(), workspace, compute_and_store_log_skeleton, "1", _celonis()
+    )
+
+    other = JobWorker(_process(store), store, "other")
+    other.process = "other-host-1"
+    assert not other.run_once()
+    assert workspace.state.jobs["1"].status == "pending"
+
+    app.state.celonis_pool = MagicMock()
+    app.state.celonis_pool.get.return_value = _celonis()
+    worker = JobWorker(app, store, "worker")
+    assert worker.process == process_name()
+    assert worker.run_once()
+    assert workspace.state.jobs["1"].status == "complete"
+
+
+def test_shared_job_store_requires_the_workspace_secret(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that the workers do not start without a shared secret."""
+    settings = JobQueueSettings(
+        JOB_STORE="sqlite", JOB_STORE_URL=str(tmp_path / "jobs.sqlite3")
+    )
+    monkeypatch.setattr(
+        "backend.api.job_queue.get_workspace_settings",
+        lambda: WorkspaceSettings(WORKSPACE_SECRET=""),
+    )
+    with pytest.raises(ValueError, match="WORKSPACE_SECRET"):
+        create_job_store(settings)
+
+    monkeypatch.setattr(
+        "backend.api.job_queue.get_workspace_settings",
+        lambda: WorkspaceSettings(WORKSPACE_SECRET="secret"),
+    )
+    assert isinstance(create_job_store(settings), SQLiteJobStore)
+    assert create_job_store(JobQueueSettings(JOB_STORE="memory")) is None
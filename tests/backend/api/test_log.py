@@ -1,12 +1,21 @@
 """Comprehensive tests for backend/api/log.py endpoints."""
 
+import gzip
 import io
+import os
+import zipfile
 from unittest.mock import MagicMock, mock_open, patch
 
 import pandas as pd
 import pytest
 from fastapi import status
 from fastapi.testclient import TestClient
+from httpx import Response
+
+
+def _get_job(test_client: TestClient, response: Response) -> dict:
+    """Fetches the job of a commit, which already ran in the test client."""
+    return test_client.get(f"/api/jobs/{response.json()['job_id']}").json()
 
 
 class TestUploadLogEndpoint:
@@ -17,7 +26,7 @@ class TestUploadLogEndpoint:
         csv_content = "case_id,activity,timestamp\n1,A,2023-01-01\n1,B,2023-01-02"
         csv_file = io.BytesIO(csv_content.encode())
 
-        with patch("backend.utils.file_handlers.process_file") as mock_process:
+        with patch("backend.utils.file_handlers.read_columns") as mock_read_columns:
             mock_df = pd.DataFrame(
                 {
                     "case_id": [1, 1],
@@ -25,7 +34,7 @@ class TestUploadLogEndpoint:
                     "timestamp": ["2023-01-01", "2023-01-02"],
                 }
             )
-            mock_process.return_value = mock_df
+            mock_read_columns.return_value = mock_df.columns.tolist()
 
             with patch("tempfile.NamedTemporaryFile") as mock_temp:
                 mock_temp_instance = MagicMock()
@@ -55,7 +64,7 @@ class TestUploadLogEndpoint:
         xes_content = b"<?xml version='1.0' encoding='UTF-8'?><log></log>"
         xes_file = io.BytesIO(xes_content)
 
-        with patch("backend.utils.file_handlers.process_file") as mock_process:
+        with patch("backend.utils.file_handlers.read_columns") as mock_read_columns:
             mock_df = pd.DataFrame(
                 {
                     "case:concept:name": [1],
@@ -63,7 +72,7 @@ class TestUploadLogEndpoint:
                     "time:timestamp": ["2023-01-01"],
                 }
             )
-            mock_process.return_value = mock_df
+            mock_read_columns.return_value = mock_df.columns.tolist()
 
             with patch("tempfile.NamedTemporaryFile") as mock_temp:
                 mock_temp_instance = MagicMock()
@@ -91,7 +100,10 @@ class TestUploadLogEndpoint:
 
         assert response.status_code == status.HTTP_400_BAD_REQUEST
         assert response.json() == {
-            "detail": "Invalid file type. Only .csv and .xes are allowed."
+            "detail": (
+                "Invalid file type. Only .csv, .xes, .csv.gz, .xes.gz and .zip "
+                "are allowed."
+            )
         }
 
     def test_upload_case_insensitive_file_extensions(
@@ -101,9 +113,9 @@ class TestUploadLogEndpoint:
         csv_content = "case_id,activity\n1,A"
         csv_file = io.BytesIO(csv_content.encode())
 
-        with patch("backend.utils.file_handlers.process_file") as mock_process:
+        with patch("backend.utils.file_handlers.read_columns") as mock_read_columns:
             mock_df = pd.DataFrame({"case_id": [1], "activity": ["A"]})
-            mock_process.return_value = mock_df
+            mock_read_columns.return_value = mock_df.columns.tolist()
 
             with patch("tempfile.NamedTemporaryFile") as mock_temp:
                 mock_temp_instance = MagicMock()
@@ -122,8 +134,8 @@ class TestUploadLogEndpoint:
         csv_content = "invalid,csv,content"
         csv_file = io.BytesIO(csv_content.encode())
 
-        with patch("backend.utils.file_handlers.process_file") as mock_process:
-            mock_process.side_effect = ValueError("Invalid file format")
+        with patch("backend.utils.file_handlers.read_columns") as mock_read_columns:
+            mock_read_columns.side_effect = ValueError("Invalid file format")
 
             response = test_client.post(
                 "/api/logs/upload-log",
@@ -139,8 +151,8 @@ class TestUploadLogEndpoint:
         """Test upload of empty file."""
         empty_file = io.BytesIO(b"")
 
-        with patch("backend.utils.file_handlers.process_file") as mock_process:
-            mock_process.side_effect = ValueError("Empty file")
+        with patch("backend.utils.file_handlers.read_columns") as mock_read_columns:
+            mock_read_columns.side_effect = ValueError("Empty file")
 
             response = test_client.post(
                 "/api/logs/upload-log",
@@ -158,14 +170,14 @@ class TestUploadLogEndpoint:
         )
         large_file = io.BytesIO(large_content.encode())
 
-        with patch("backend.utils.file_handlers.process_file") as mock_process:
+        with patch("backend.utils.file_handlers.read_columns") as mock_read_columns:
             mock_df = pd.DataFrame(
                 {
                     "case_id": list(range(10000)),
                     "activity": [f"Activity_{i}" for i in range(10000)],
                 }
             )
-            mock_process.return_value = mock_df
+            mock_read_columns.return_value = mock_df.columns.tolist()
 
             with patch("tempfile.NamedTemporaryFile") as mock_temp:
                 mock_temp_instance = MagicMock()
@@ -184,9 +196,9 @@ class TestUploadLogEndpoint:
         csv_content = "case_id,activity\n1,A"
         csv_file = io.BytesIO(csv_content.encode())
 
-        with patch("backend.utils.file_handlers.process_file") as mock_process:
+        with patch("backend.utils.file_handlers.read_columns") as mock_read_columns:
             mock_df = pd.DataFrame({"case_id": [1], "activity": ["A"]})
-            mock_process.return_value = mock_df
+            mock_read_columns.return_value = mock_df.columns.tolist()
 
             with patch("tempfile.NamedTemporaryFile") as mock_temp:
                 mock_temp_instance = MagicMock()
@@ -205,9 +217,9 @@ class TestUploadLogEndpoint:
         csv_content = "case_id,activity\n1,A"
         csv_file = io.BytesIO(csv_content.encode())
 
-        with patch("backend.utils.file_handlers.process_file") as mock_process:
+        with patch("backend.utils.file_handlers.read_columns") as mock_read_columns:
             mock_df = pd.DataFrame({"case_id": [1], "activity": ["A"]})
-            mock_process.return_value = mock_df
+            mock_read_columns.return_value = mock_df.columns.tolist()
 
             with patch("tempfile.NamedTemporaryFile") as mock_temp:
                 mock_temp_instance = MagicMock()
@@ -233,6 +245,157 @@ class TestUploadLogEndpoint:
 
         assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
 
+    def test_upload_streams_csv_to_disk(self, test_client: TestClient) -> None:
+        """Test that the columns are read from the header of the stored file."""
+        csv_content = b"case_id,activity,timestamp\n1,A,2023-01-01\n1,B,2023-01-02"
+
+        response = test_client.post(
+            "/api/logs/upload-log",
+            files={"file": ("test.csv", io.BytesIO(csv_content), "text/csv")},
+        )
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.json() == {"columns": ["case_id", "activity", "timestamp"]}
+        path = test_client.app.state.current_log  # type: ignore
+        with open(path, "rb") as f:
+            assert f.read() == csv_content
+        # CSV logs are typed on commit instead of being cached
+        assert test_client.app.state.current_log_cache is None  # type: ignore
+        os.unlink(path)
+
+    def test_upload_streams_xes_to_disk(self, test_client: TestClient) -> None:
+        """Test that the columns are read from the first events of a XES file."""
+        with open("tests/input_data/running-example.xes", "rb") as f:
+            response = test_client.post(
+                "/api/logs/upload-log",
+                files={"file": ("running-example.xes", f, "application/xml")},
+            )
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.json()["columns"] == [
+            "concept:name",
+            "org:resource",
+            "time:timestamp",
+            "Activity",
+            "Resource",
+            "Costs",
+            "case:concept:name",
+            "case:creator",
+        ]
+        os.unlink(test_client.app.state.current_log)  # type: ignore
+        os.unlink(test_client.app.state.current_log_cache)  # type: ignore
+
+    def test_upload_caches_parsed_log(self, test_client: TestClient) -> None:
+        """Test that the uploaded log is parsed once and cached as Arrow."""
+        from backend.utils import file_handlers
+
+        with open("tests/input_data/running-example.xes", "rb") as f:
+            response = test_client.post(
+                "/api/logs/upload-log",
+                files={"file": ("running-example.xes", f, "application/xml")},
+            )
+
+        assert response.status_code == status.HTTP_201_CREATED
+        path = test_client.app.state.current_log  # type: ignore
+        cache_path = test_client.app.state.current_log_cache  # type: ignore
+        assert cache_path == path + file_handlers.LOG_CACHE_SUFFIX
+        cached = file_handlers.read_log_cache(cache_path)
+        assert len(cached) == 42
+        assert "case:concept:name" in cached.columns
+        os.unlink(path)
+        os.unlink(cache_path)
+
+    def test_upload_replaces_previous_cache(self, test_client: TestClient) -> None:
+        """Test that uploading a new log removes the cache of the previous one."""
+        with open("tests/input_data/running-example.xes", "rb") as f:
+            xes_content = f.read()
+
+        test_client.post(
+            "/api/logs/upload-log",
+            files={"file": ("first.xes", xes_content, "application/xml")},
+        )
+        first_path = test_client.app.state.current_log  # type: ignore
+        first_cache = test_client.app.state.current_log_cache  # type: ignore
+        assert os.path.exists(first_cache)
+
+        test_client.post(
+            "/api/logs/upload-log",
+            files={"file": ("second.xes", xes_content, "application/xml")},
+        )
+
+        assert not os.path.exists(first_cache)
+        os.unlink(first_path)
+        os.unlink(test_client.app.state.current_log)  # type: ignore
+        os.unlink(test_client.app.state.current_log_cache)  # type: ignore
+
+    def test_upload_compressed_xes(self, test_client: TestClient) -> None:
+        """Test that a gzip compressed XES file is stored compressed."""
+        with open("tests/input_data/running-example.xes", "rb") as f:
+            content = gzip.compress(f.read())
+
+        response = test_client.post(
+            "/api/logs/upload-log",
+            files={"file": ("running-example.xes.gz", content, "application/gzip")},
+        )
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert "case:concept:name" in response.json()["columns"]
+        path = test_client.app.state.current_log  # type: ignore
+        assert path.endswith(".xes.gz")
+        assert os.path.getsize(path) == len(content)
+        os.unlink(path)
+        os.unlink(test_client.app.state.current_log_cache)  # type: ignore
+
+    def test_upload_zipped_csv(self, test_client: TestClient) -> None:
+        """Test that the columns of a zipped CSV file are read."""
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as archive:
+            archive.writestr("log.csv", "case_id,activity\n1,A\n")
+
+        response = test_client.post(
+            "/api/logs/upload-log",
+            files={"file": ("log.zip", buffer.getvalue(), "application/zip")},
+        )
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.json() == {"columns": ["case_id", "activity"]}
+        assert test_client.app.state.current_log_cache is None  # type: ignore
+        os.unlink(test_client.app.state.current_log)  # type: ignore
+
+    def test_upload_zip_without_log(self, test_client: TestClient) -> None:
+        """Test that a zip archive without a log is rejected."""
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as archive:
+            archive.writestr("notes.txt", "no log here")
+
+        response = test_client.post(
+            "/api/logs/upload-log",
+            files={"file": ("log.zip", buffer.getvalue(), "application/zip")},
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "exactly one .csv or .xes file" in response.json()["detail"]
+        assert test_client.app.state.current_log is None  # type: ignore
+
+    def test_upload_exceeds_max_size(self, test_client: TestClient) -> None:
+        """Test that uploads above the maximum size are rejected."""
+        from backend.api.log import UploadSettings, get_upload_settings
+
+        test_client.app.dependency_overrides[get_upload_settings] = (  # type: ignore
+            lambda: UploadSettings(MAX_UPLOAD_SIZE_MB=1, UPLOAD_CHUNK_SIZE_KB=64)
+        )
+        large_content = b"case_id,activity\n" + b"1,A\n" * 300_000
+
+        with patch("backend.utils.file_handlers.read_columns") as mock_read_columns:
+            response = test_client.post(
+                "/api/logs/upload-log",
+                files={"file": ("large.csv", io.BytesIO(large_content), "text/csv")},
+            )
+            mock_read_columns.assert_not_called()
+
+        assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        assert test_client.app.state.current_log is None  # type: ignore
+
 
 class TestCommitLogToCelonisEndpoint:
     """Test cases for /api/logs/commit-log-to-celonis endpoint."""
@@ -271,7 +434,7 @@ class TestCommitLogToCelonisEndpoint:
             with (
                 patch("os.path.exists", return_value=True),
                 patch("builtins.open", mock_open(read_data=csv_content)),
-                patch("backend.utils.file_handlers.process_file") as mock_process,
+                patch("backend.utils.file_handlers.read_csv_typed") as mock_read_csv,
                 patch("os.unlink") as mock_unlink,
             ):
                 mock_df = pd.DataFrame(
@@ -282,14 +445,16 @@ class TestCommitLogToCelonisEndpoint:
                         "resource": ["User1", "User2"],
                     }
                 )
-                mock_process.return_value = mock_df
+                mock_read_csv.return_value = mock_df
 
                 response = test_client.post(
                     "/api/logs/commit-log-to-celonis", json=column_mapping
                 )
 
-                assert response.status_code == status.HTTP_200_OK
-                assert response.json() == {"message": "Table created successfully"}
+                assert response.status_code == status.HTTP_202_ACCEPTED
+                job = _get_job(test_client, response)
+                assert job["status"] == "complete"
+                assert job["result"] == {"message": "Table created successfully"}
 
                 # Verify Celonis methods were called
                 mock_celonis.add_dataframe.assert_called_once()
@@ -330,7 +495,7 @@ class TestCommitLogToCelonisEndpoint:
             with (
                 patch("os.path.exists", return_value=True),
                 patch("builtins.open", mock_open(read_data=xes_content)),
-                patch("backend.utils.file_handlers.process_file") as mock_process,
+                patch("backend.utils.file_handlers.read_log_file") as mock_process,
                 patch("os.unlink") as mock_unlink,
             ):
                 mock_df = pd.DataFrame(
@@ -345,8 +510,9 @@ class TestCommitLogToCelonisEndpoint:
                 # XES files don't need column mapping
                 response = test_client.post("/api/logs/commit-log-to-celonis")
 
-                assert response.status_code == status.HTTP_200_OK
-                assert response.json() == {"message": "Table created successfully"}
+                assert response.status_code == status.HTTP_202_ACCEPTED
+                job = _get_job(test_client, response)
+                assert job["result"] == {"message": "Table created successfully"}
 
                 # Verify Celonis methods were called
                 mock_celonis.add_dataframe.assert_called_once()
@@ -409,23 +575,24 @@ class TestCommitLogToCelonisEndpoint:
 
     def test_commit_file_processing_error(self, test_client: TestClient) -> None:
         """Test commit when file processing fails."""
-        test_client.app.state.current_log = "/tmp/test.csv"  # type: ignore
+        test_client.app.state.current_log = "/tmp/test.xes"  # type: ignore
 
         csv_content = "invalid,content"
 
         with (
             patch("os.path.exists", return_value=True),
             patch("builtins.open", mock_open(read_data=csv_content)),
-            patch("backend.utils.file_handlers.process_file") as mock_process,
+            patch("backend.utils.file_handlers.read_log_file") as mock_process,
         ):
             mock_process.side_effect = ValueError("Invalid file format")
 
             response = test_client.post("/api/logs/commit-log-to-celonis")
 
-            assert response.status_code == status.HTTP_400_BAD_REQUEST
-            assert response.json() == {
-                "detail": "Error processing file: Invalid file format"
-            }
+            assert response.status_code == status.HTTP_202_ACCEPTED
+            job = _get_job(test_client, response)
+            assert job["status"] == "failed"
+            assert job["phase"] == "parse"
+            assert job["error"] == "Error processing file: Invalid file format"
 
     def test_commit_csv_with_timestamp_conversion(
         self, test_client: TestClient
@@ -464,7 +631,7 @@ class TestCommitLogToCelonisEndpoint:
             with (
                 patch("os.path.exists", return_value=True),
                 patch("builtins.open", mock_open(read_data=csv_content)),
-                patch("backend.utils.file_handlers.process_file") as mock_process,
+                patch("backend.utils.file_handlers.read_csv_typed") as mock_read_csv,
                 patch("os.unlink") as mock_unlink,
                 patch("pandas.to_datetime") as mock_to_datetime,
             ):
@@ -476,14 +643,14 @@ class TestCommitLogToCelonisEndpoint:
                         "resource": ["User1"],
                     }
                 )
-                mock_process.return_value = mock_df
+                mock_read_csv.return_value = mock_df
                 mock_to_datetime.return_value = pd.to_datetime(["2023-01-01 10:00:00"])  # type: ignore
 
                 response = test_client.post(
                     "/api/logs/commit-log-to-celonis", json=column_mapping
                 )
 
-                assert response.status_code == status.HTTP_200_OK
+                assert response.status_code == status.HTTP_202_ACCEPTED
 
                 # Verify timestamp conversion was called (it might be called multiple times during processing)
                 assert mock_to_datetime.call_count >= 1
@@ -515,19 +682,20 @@ class TestCommitLogToCelonisEndpoint:
 
     def test_commit_empty_log_file(self, test_client: TestClient) -> None:
         """Test commit with empty log file."""
-        test_client.app.state.current_log = "/tmp/empty.csv"  # type: ignore
+        test_client.app.state.current_log = "/tmp/empty.xes"  # type: ignore
 
         with (
             patch("os.path.exists", return_value=True),
             patch("builtins.open", mock_open(read_data="")),
-            patch("backend.utils.file_handlers.process_file") as mock_process,
+            patch("backend.utils.file_handlers.read_log_file") as mock_process,
         ):
             mock_process.side_effect = ValueError("Empty file")
 
             response = test_client.post("/api/logs/commit-log-to-celonis")
 
-            assert response.status_code == status.HTTP_400_BAD_REQUEST
-            assert response.json() == {"detail": "Error processing file: Empty file"}
+            job = _get_job(test_client, response)
+            assert job["status"] == "failed"
+            assert job["error"] == "Error processing file: Empty file"
 
     def test_commit_csv_with_partial_column_mapping(
         self, test_client: TestClient
@@ -550,7 +718,7 @@ class TestCommitLogToCelonisEndpoint:
         with (
             patch("os.path.exists", return_value=True),
             patch("builtins.open", mock_open(read_data=csv_content)),
-            patch("backend.utils.file_handlers.process_file") as mock_process,
+            patch("backend.utils.file_handlers.read_csv_typed") as mock_read_csv,
             patch("os.unlink") as mock_unlink,
             patch("backend.api.log.get_celonis_connection", return_value=mock_celonis),
             patch(
@@ -561,16 +729,202 @@ class TestCommitLogToCelonisEndpoint:
             mock_df = pd.DataFrame(
                 {"case_id": [1], "activity": ["A"], "timestamp": ["2023-01-01"]}
             )
-            mock_process.return_value = mock_df
+            mock_read_csv.return_value = mock_df
 
             response = test_client.post(
                 "/api/logs/commit-log-to-celonis", json=minimal_mapping
             )
 
-            assert response.status_code == status.HTTP_200_OK
+            assert response.status_code == status.HTTP_202_ACCEPTED
             # Verify cleanup was performed
             mock_unlink.assert_called_once_with("/tmp/test.csv")
 
+    def test_commit_uses_cached_log(self, test_client: TestClient) -> None:
+        """Test that the commit reads the cached log instead of parsing again."""
+        with open("tests/input_data/running-example.xes", "rb") as f:
+            test_client.post(
+                "/api/logs/upload-log",
+                files={"file": ("running-example.xes", f, "application/xml")},
+            )
+        path = test_client.app.state.current_log  # type: ignore
+        cache_path = test_client.app.state.current_log_cache  # type: ignore
+
+        mock_celonis = MagicMock()
+        from backend.api.celonis import get_celonis_connection
+
+        test_client.app.dependency_overrides[get_celonis_connection] = (  # type: ignore
+            lambda: mock_celonis
+        )
+        with patch("backend.utils.file_handlers.process_file") as mock_process:
+            response = test_client.post("/api/logs/commit-log-to-celonis")
+            mock_process.assert_not_called()
+
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        df = mock_celonis.add_dataframe.call_args[0][0]
+        assert "case:concept:name" in df.columns
+        assert len(df) == 42
+        assert not os.path.exists(path)
+        assert not os.path.exists(cache_path)
+        assert test_client.app.state.current_log_cache is None  # type: ignore
+
+    def test_commit_csv_types_columns_while_reading(
+        self, test_client: TestClient, tmp_path
+    ) -> None:
+        """Test that a CSV log without a cache is read typed with the mapping."""
+        path = tmp_path / "log.csv"
+        path.write_text(
+            "case,activity,time,resource\n"
+            "1,A,30.12.2010 14:32:00,Pete\n1,B,not a date,Mike\n"
+        )
+        test_client.app.state.current_log = str(path)  # type: ignore
+
+        mock_celonis = MagicMock()
+        from backend.api.celonis import get_celonis_connection
+
+        test_client.app.dependency_overrides[get_celonis_connection] = (  # type: ignore
+            lambda: mock_celonis
+        )
+        with patch("backend.utils.file_handlers.process_file") as mock_process:
+            response = test_client.post(
+                "/api/logs/commit-log-to-celonis",
+                json={
+                    "case_id_column": "case",
+                    "activity_column": "activity",
+                    "timestamp_column": "time",
+                    "resource_1_column": "resource",
+                },
+            )
+            mock_process.assert_not_called()
+
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        df = mock_celonis.add_dataframe.call_args[0][0]
+        assert df["time:timestamp"].iloc[0] == pd.Timestamp("2010-12-30 14:32:00")
+        assert pd.isna(df["time:timestamp"].iloc[1])
+        assert df.select_dtypes("category").empty
+        assert df["org:resource"].tolist() == ["Pete", "Mike"]
+        assert not path.exists()
+
+    def test_commit_compressed_csv_requires_mapping(
+        self, test_client: TestClient
+    ) -> None:
+        """Test that a compressed CSV log also requires a column mapping."""
+        test_client.post(
+            "/api/logs/upload-log",
+            files={
+                "file": (
+                    "log.csv.gz",
+                    gzip.compress(b"case_id,activity\n1,A\n"),
+                    "application/gzip",
+                )
+            },
+        )
+        path = test_client.app.state.current_log  # type: ignore
+
+        response = test_client.post("/api/logs/commit-log-to-celonis")
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json() == {
+            "detail": "Column mapping is required for CSV files."
+        }
+        os.unlink(path)
+
+    def test_commit_appends_new_events(self, test_client: TestClient) -> None:
+        """Test that an append keeps the cache if no events are new."""
+        with open("tests/input_data/running-example.xes", "rb") as f:
+            test_client.post(
+                "/api/logs/upload-log",
+                files={"file": ("running-example.xes", f, "application/xml")},
+            )
+        test_client.app.state.extract_cache["cube"] = object()  # type: ignore
+        from backend.api.models.schemas.job_models import JobStatus
+
+        test_client.app.state.jobs["done"] = JobStatus(  # type: ignore
+            module="temporal", status="complete", result={"pairs": []}
+        )
+
+        mock_celonis = MagicMock()
+        from backend.api.celonis import get_celonis_connection
+
+        test_client.app.dependency_overrides[get_celonis_connection] = (  # type: ignore
+            lambda: mock_celonis
+        )
+        mock_celonis.append_to_table.return_value = pd.DataFrame(
+            {"case:concept:name": []}
+        )
+        response = test_client.post(
+            "/api/logs/commit-log-to-celonis", params={"mode": "new_events"}
+        )
+
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert _get_job(test_client, response)["result"]["appended_events"] == 0
+        assert mock_celonis.append_to_table.call_args.kwargs["mode"] == "new_events"
+        mock_celonis.create_table.assert_not_called()
+        assert "cube" in test_client.app.state.extract_cache  # type: ignore
+        assert not test_client.get("/api/jobs/done").json()["stale"]
+
+        # A non empty delta invalidates the cached structures
+        with open("tests/input_data/running-example.xes", "rb") as f:
+            test_client.post(
+                "/api/logs/upload-log",
+                files={"file": ("running-example.xes", f, "application/xml")},
+            )
+        mock_celonis.append_to_table.return_value = pd.DataFrame(
+            {"case:concept:name": ["1", "1", "2"]}
+        )
+        response = test_client.post(
+            "/api/logs/commit-log-to-celonis", params={"mode": "new_cases"}
+        )
+
+        assert _get_job(test_client, response)["result"] == {
+            "message": "Appended 3 events of 2 cases",
+            "appended_events": 3,
+            "affected_cases": 2,
+        }
+        assert test_client.app.state.extract_cache == {}  # type: ignore
+        # The results computed from the previous log are outdated
+        assert test_client.get("/api/jobs/done").json()["stale"]
+        assert not _get_job(test_client, response)["stale"]
+
+    def test_commit_append_creates_missing_table(self, test_client: TestClient) -> None:
+        """Test that an append creates the table if it does not exist yet."""
+        with open("tests/input_data/running-example.xes", "rb") as f:
+            test_client.post(
+                "/api/logs/upload-log",
+                files={"file": ("running-example.xes", f, "application/xml")},
+            )
+
+        mock_celonis = MagicMock()
+        from backend.api.celonis import get_celonis_connection
+
+        test_client.app.dependency_overrides[get_celonis_connection] = (  # type: ignore
+            lambda: mock_celonis
+        )
+        mock_celonis.append_to_table.return_value = None
+        response = test_client.post(
+            "/api/logs/commit-log-to-celonis", params={"mode": "new_events"}
+        )
+
+        assert _get_job(test_client, response)["result"] == {
+            "message": "Table created successfully"
+        }
+        mock_celonis.create_table.assert_called_once()
+
+    def test_commit_while_another_commit_runs(self, test_client: TestClient) -> None:
+        """Test that only one log can be committed at a time."""
+        from backend.api.models.schemas.job_models import JobStatus
+
+        test_client.app.state.current_log = "/tmp/test.xes"  # type: ignore
+        test_client.app.state.jobs["running"] = JobStatus(  # type: ignore
+            module="commit_log", status="running", phase="upload", progress=0.5
+        )
+
+        with patch("os.path.exists", return_value=True):
+            response = test_client.post("/api/logs/commit-log-to-celonis")
+
+        assert response.status_code == status.HTTP_409_CONFLICT
+        assert test_client.get("/api/jobs/running").json()["progress"] == 0.5
+        del test_client.app.state.jobs["running"]  # type: ignore
+
     def test_commit_celonis_connection_error(self, test_client: TestClient) -> None:
         """Test commit when Celonis connection fails."""
         from fastapi import Request
@@ -614,3 +968,136 @@ class TestCommitLogToCelonisEndpoint:
         finally:
             # Clean up dependency override
             test_client.app.dependency_overrides.clear()  # type: ignore
+
+
+def test_commit_resumes_a_failed_chunked_upload(tmp_path) -> None:
+    """Test that a commit resumes the failed chunks of the previous one.
+
+    The pool may replace the manager in between, so the resumed upload
+    must not depend on the manager of the failed commit.
+    """
+    import shutil
+
+    from backend.api.models.schemas.job_models import JobStatus
+    from backend.api.tasks.log_tasks import commit_log_and_store_result
+    from backend.api.workspaces import Workspace
+    from backend.celonis_connection.celonis_connection_manager import (
+        CelonisConnectionManager,
+    )
+
+    path = str(tmp_path / "log.xes")
+    shutil.copy("tests/input_data/running-example.xes", path)
+    workspace = Workspace("test")
+    workspace.state.current_log = path
+
+    def connect(failing: bool) -> CelonisConnectionManager:
+        with patch("backend.celonis_connection.celonis_connection_manager.get_celonis"):
+            celonis = CelonisConnectionManager("url", "pool", "model", "token")
+        celonis.data_pool = MagicMock()
+        celonis.data_model = MagicMock()
+        table = celonis.data_pool.create_table.return_value
+        celonis.data_pool.get_tables.return_value.find.return_value = table
+        if failing:
+            table.append.side_effect = ConnectionError("Timeout")
+        return celonis
+
+    first = connect(failing=True)
+    workspace.state.jobs["1"] = JobStatus(module="log", status="pending")
+    with patch(
+        "backend.celonis_connection.celonis_connection_manager.UPLOAD_ATTEMPTS", 1
+    ):
+        commit_log_and_store_result(
+            workspace, "1", first, path, None, "replace", chunk_size=10
+        )
+
+    rec = workspace.state.jobs["1"]
+    assert rec.status == "failed"
+    assert rec.error and "Uploaded 1 of 5 chunks" in rec.error
+    assert first.pending_upload is None
+    assert os.path.exists(path)
+
+    second = connect(failing=False)
+    workspace.state.jobs["2"] = JobStatus(module="log", status="pending")
+    with patch("backend.api.tasks.log_tasks.read_mapped_log") as mock_read:
+        commit_log_and_store_result(
+            workspace, "2", second, path, None, "replace", chunk_size=10
+        )
+        mock_read.assert_not_called()
+
+    assert workspace.state.jobs["2"].status == "complete"
+    second.data_pool.create_table.assert_not_called()  # type: ignore
+    table = second.data_pool.get_tables().find()  # type: ignore
+    assert table.append.call_count == 4
+    second.data_model.reload.assert_called_once()  # type: ignore
+    assert workspace.state.pending_upload is None
+    assert not os.path.exists(path)
+
+
+def test_read_mapped_log_streams_an_uncached_log(tmp_path) -> None:
+    """Test that a log without a parsed cache is read from its path."""
+    from backend.api.tasks.log_tasks import read_mapped_log
+    from backend.api.workspaces import Workspace
+
+    path = str(tmp_path / "log.csv.gz")
+    with gzip.open(path, "wb") as f:
+        f.write(b"case:concept:name,concept:name\n1,A\n1,B\n")
+
+    with patch("backend.utils.file_handlers.process_file") as mock_process:
+        df = read_mapped_log(Workspace("alice"), path, ".csv.gz", ".csv", None)
+
+    mock_process.assert_not_called()
+    assert df["concept:name"].tolist() == ["A", "B"]
+
+
+def test_commit_resumes_a_failed_append(tmp_path) -> None:
+    """Test that a resumed append reports the appended events."""
+    import shutil
+
+    from backend.api.models.schemas.job_models import JobStatus
+    from backend.api.tasks.log_tasks import commit_log_and_store_result
+    from backend.api.workspaces import Workspace
+    from backend.celonis_connection.celonis_connection_manager import (
+        CelonisConnectionManager,
+    )
+
+    path = str(tmp_path / "log.xes")
+    shutil.copy("tests/input_data/running-example.xes", path)
+    workspace = Workspace("test")
+    workspace.state.current_log = path
+    with patch("backend.celonis_connection.celonis_connection_manager.get_celonis"):
+        celonis = CelonisConnectionManager("url", "pool", "model", "token")
+    celonis.data_pool = MagicMock()
+    celonis.data_model = MagicMock()
+    table = celonis.data_pool.get_tables.return_value.find.return_value
+    table.append.side_effect = ConnectionError("Timeout")
+    cases = pd.DataFrame({"Case": ["1", "2"], "Events": [9, 5]})
+
+    workspace.state.jobs["1"] = JobStatus(module="log", status="pending")
+    with (
+        patch.object(celonis, "get_table"),
+        patch.object(celonis, "get_dataframe_from_celonis", return_value=cases),
+        patch(
+            "backend.celonis_connection.celonis_connection_manager.UPLOAD_ATTEMPTS", 1
+        ),
+    ):
+        commit_log_and_store_result(
+            workspace, "1", celonis, path, None, "new_cases", chunk_size=10
+        )
+    assert workspace.state.jobs["1"].status == "failed"
+    assert workspace.state.pending_upload.append
+
+    table.append.side_effect = None
+    workspace.state.jobs["2"] = JobStatus(module="log", status="pending")
+    commit_log_and_store_result(
+        workspace, "2", celonis, path, None, "new_cases", chunk_size=10
+    )
+
+    rec = workspace.state.jobs["2"]
+    assert rec.status == "complete"
+    assert rec.result == {
+        "message": "Appended 32 events of 4 cases",
+        "appended_events": 32,
+        "affected_cases": 4,
+    }
+    celonis.data_pool.create_table.assert_not_called()
+    celonis.data_model.reload.assert_called_once_with(force_complete=False)
@@ -0,0 +1,92 @@
+"""Tests for the /metrics, /api/debug and job profile endpoints."""
+
+from backend.api.models.schemas.job_models import JobStatus
+from backend.celonis_connection.pql_profiler import get_pql_profiler
+
+
+def test_metrics_have_request_durations_by_route(test_client):
+    """Test that the requests are recorded under their path template."""
+    test_client.get("/api/jobs/unknown-job")
+
+    response = test_client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert (
+        'http_request_duration_seconds_count{method="GET",'
+        'route="/api/jobs/{job_id}",status="404"}'
+    ) in response.text
+    assert "# TYPE celonis_extraction_duration_seconds histogram" in response.text
+
+
+def test_metrics_have_job_queue_and_cache_gauges(test_client):
+    """Test that the gauges are taken from the app state."""
+    test_client.app.state.jobs = {
+        "1": JobStatus(module="log_skeleton", status="pending"),
+        "2": JobStatus(module="log_skeleton", status="pending"),
+        "3": JobStatus(module="temporal", status="running"),
+    }
+    test_client.app.state.extract_cache = {"cube": list(range(100))}
+
+    text = test_client.get("/metrics").text
+
+    assert 'jobs{status="pending"} 2' in text
+    assert 'jobs{status="running"} 1' in text
+    assert 'cached_bytes{cache="uploaded_log"} 0' in text
+    extract = next(
+        line
+        for line in text.splitlines()
+        if line.startswith('cached_bytes{cache="extract"}')
+    )
+    assert int(extract.split()[-1]) > 0
+
+
+def test_log_skeleton_job_records_phases(test_client):
+    """Test that a failed job reports and records the phase it failed in."""
+    response = test_client.post("/api/log-skeleton/compute-skeleton")
+    job = test_client.get(f"/api/jobs/{response.json()['job_id']}").json()
+    text = test_client.get("/metrics").text
+
+    # The mocked extraction returns no DataFrame, so the computation fails
+    assert job["status"] == "failed"
+    assert job["phase"] == "compute"
+    assert (
+        'job_phase_duration_seconds_count{module="log_skeleton",phase="extract"}'
+        in text
+    )
+    assert 'job_duration_seconds_count{module="log_skeleton",status="failed"}' in text
+
+
+def test_pql_stats_endpoint(test_client):
+    """Test that the PQL statistics are returned and can be cleared."""
+    profiler = get_pql_profiler()
+    profiler.clear()
+    profiler.record("q1", 0.3, rows=1, columns=1, caller="f")
+    profiler.record("q2", 0.1, rows=1, columns=1, caller="f")
+
+    stats = test_client.get("/api/debug/pql-stats", params={"limit": 1}).json()
+    test_client.delete("/api/debug/pql-stats")
+
+    assert stats["query_count"] == 2
+    assert [q["query"] for q in stats["queries"]] == ["q1"]
+    assert profiler.get_stats()["query_count"] == 0
+
+
+def test_job_profile_endpoint(test_client):
+    """Test that a profiled job's profile can be downloaded."""
+    plain = test_client.post("/api/log-skeleton/compute-skeleton").json()["job_id"]
+    profiled = test_client.post(
+        "/api/log-skeleton/compute-skeleton", params={"profile": True}
+    ).json()["job_id"]
+
+    status = test_client.get(f"/api/jobs/{profiled}").json()
+    profile = test_client.get(f"/api/jobs/{profiled}/profile").json()
+    collapsed = test_client.get(
+        f"/api/jobs/{profiled}/profile", params={"format": "collapsed"}
+    )
+
+    assert "profile" not in status
+    assert set(profile) >= {"collapsed_stacks", "top_allocations", "samples"}
+    assert collapsed.headers["content-type"].startswith("text/plain")
+    assert "attachment" in collapsed.headers["content-disposition"]
+    assert test_client.get(f"/api/jobs/{plain}/profile").status_code == 404
@@ -0,0 +1,225 @@
+"""Tests for the workspaces of backend/api/workspaces.py."""
+
+import io
+import os
+import time
+from types import SimpleNamespace
+from typing import Dict
+
+import numpy as np
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from starlette.datastructures import State
+
+from backend.api.models.schemas.job_models import JobStatus
+from backend.api.workspaces import (
+    ADMIN_HEADER,
+    DEFAULT_WORKSPACE,
+    WORKSPACE_HEADER,
+    Workspace,
+    WorkspaceRegistry,
+    WorkspaceSettings,
+    get_extract_cache,
+    init_workspace_state,
+    store_in_cache,
+)
+
+ADMIN = {ADMIN_HEADER: "admin-secret"}
+
+
+def _create_workspace(client: TestClient) -> Dict[str, str]:
+    """Creates a workspace and returns the header that selects it."""
+    response = client.post("/api/workspaces")
+    assert response.status_code == status.HTTP_201_CREATED
+    return {WORKSPACE_HEADER: response.json()["workspace_id"]}
+
+
+def _upload(client: TestClient, header: str, **headers: str) -> None:
+    csv_content = f"{header},activity,timestamp\n1,A,2023-01-01\n".encode()
+    response = client.post(
+        "/api/logs/upload-log",
+        files={"file": ("log.csv", io.BytesIO(csv_content), "text/csv")},
+        headers=headers,
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+
+
+def test_workspaces_keep_their_own_log_and_jobs(test_client: TestClient) -> None:
+    """Test that two workspaces do not overwrite each other."""
+    alice_headers = _create_workspace(test_client)
+    alice_id = alice_headers[WORKSPACE_HEADER]
+    _upload(test_client, "case_id")
+    _upload(test_client, "case", **alice_headers)
+
+    default = test_client.get("/api/setup/get-column-names")
+    alice = test_client.get("/api/setup/get-column-names", headers=alice_headers)
+    assert default.json()["columns"][0] == "case_id"
+    assert alice.json()["columns"][0] == "case"
+
+    workspace = test_client.app.state.workspaces.get(alice_id)  # type: ignore
+    workspace.state.jobs["job"] = JobStatus(module="log_skeleton", status="complete")
+    assert test_client.get("/api/jobs/job", headers=alice_headers).status_code == 200
+    assert test_client.get("/api/jobs/job").status_code == 404
+
+    test_client.app.state.workspaces.admin_token = "admin-secret"  # type: ignore
+    listed = test_client.get("/api/workspaces", headers=ADMIN).json()["workspaces"]
+    assert [w["workspace_id"] for w in listed] == [DEFAULT_WORKSPACE, alice_id]
+
+    log_path = workspace.state.current_log
+    response = test_client.delete(f"/api/workspaces/{alice_id}", headers=alice_headers)
+    assert response.status_code == 200
+    assert workspace.state.current_log is None
+    response = test_client.delete(f"/api/workspaces/{DEFAULT_WORKSPACE}", headers=ADMIN)
+    assert response.status_code == 400
+    response = test_client.delete(f"/api/workspaces/{alice_id}", headers=ADMIN)
+    assert response.status_code == 404
+    assert not os.path.exists(log_path)
+    test_client.app.state.workspaces.get(DEFAULT_WORKSPACE).close()  # type: ignore
+
+
+def test_workspace_limits_concurrent_jobs(test_client: TestClient) -> None:
+    """Test that a workspace at its job limit rejects new jobs with 429."""
+    alice_headers = _create_workspace(test_client)
+    workspace = test_client.app.state.workspaces.get(  # type: ignore
+        alice_headers[WORKSPACE_HEADER]
+    )
+    workspace.max_concurrent_jobs = 1
+    workspace.state.jobs["running"] = JobStatus(module="temporal", status="running")
+
+    response = test_client.post(
+        "/api/temporal-profile/compute-result",
+        params={"zeta": 0.5},
+        headers=alice_headers,
+    )
+
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert list(workspace.state.jobs) == ["running"]
+    # Other workspaces are not limited by it
+    response = test_client.post(
+        "/api/temporal-profile/compute-result", params={"zeta": 0.5}
+    )
+    assert response.status_code == status.HTTP_202_ACCEPTED
+
+
+def test_invalid_workspace_id_is_rejected(test_client: TestClient) -> None:
+    """Test that workspace IDs are validated."""
+    response = test_client.get("/api/jobs/job", headers={WORKSPACE_HEADER: "../x"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_only_issued_workspace_ids_are_accepted(test_client: TestClient) -> None:
+    """Test that a chosen or forged workspace ID is rejected with 403."""
+    issued = _create_workspace(test_client)[WORKSPACE_HEADER]
+    forged = issued[:32] + "0" * 32
+
+    for workspace_id in ("alice", forged):
+        response = test_client.get(
+            "/api/jobs/job", headers={WORKSPACE_HEADER: workspace_id}
+        )
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+    response = test_client.get("/api/jobs/job", headers={WORKSPACE_HEADER: issued})
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_admin_endpoints_require_the_admin_token(test_client: TestClient) -> None:
+    """Test that workspaces cannot list or delete other workspaces."""
+    alice, bob = _create_workspace(test_client), _create_workspace(test_client)
+
+    # Disabled without a configured admin token
+    assert test_client.get("/api/workspaces").status_code == 403
+    test_client.app.state.workspaces.admin_token = "admin-secret"  # type: ignore
+    assert test_client.get("/api/workspaces", headers=alice).status_code == 403
+    wrong = {ADMIN_HEADER: "wrong"}
+    assert test_client.get("/api/workspaces", headers=wrong).status_code == 403
+
+    response = test_client.delete(
+        f"/api/workspaces/{bob[WORKSPACE_HEADER]}", headers=alice
+    )
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+    response = test_client.delete(
+        f"/api/workspaces/{bob[WORKSPACE_HEADER]}", headers=ADMIN
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_idle_workspaces_make_room_for_new_ones() -> None:
+    """Test that one client cannot hold all workspaces for good."""
+    state = State()
+    init_workspace_state(state)
+    registry = WorkspaceRegistry(
+        state,
+        WorkspaceSettings(
+            MAX_WORKSPACES=3, MAX_WORKSPACES_PER_CLIENT=1, WORKSPACE_IDLE_SECONDS=60
+        ),
+    )
+
+    alice = registry.create("10.0.0.1")
+    with pytest.raises(ValueError, match="per client"):
+        registry.create("10.0.0.1")
+    bob = registry.create("10.0.0.2")
+    with pytest.raises(ValueError, match="maximum of 3"):
+        registry.create("10.0.0.3")
+
+    # A workspace with an active job is kept however long it is idle
+    bob.state.jobs["1"] = JobStatus(module="log_skeleton", status="running")
+    alice.state.current_log_columns = ["case"]
+    for workspace in (alice, bob):
+        workspace.last_used = time.monotonic() - 120
+    carol = registry.create("10.0.0.3")
+
+    assert registry.list() == [registry.get(DEFAULT_WORKSPACE), bob, carol]
+    assert alice.state.current_log_columns == []
+    # The creator of the closed workspace may create another one
+    registry.remove(carol.workspace_id)
+    registry.create("10.0.0.1")
+
+
+def test_workspace_creation_is_limited_per_client(test_client: TestClient) -> None:
+    """Test that POST /api/workspaces rejects a client at its limit."""
+    test_client.app.state.workspaces.max_per_client = 2  # type: ignore
+    _create_workspace(test_client)
+    _create_workspace(test_client)
+    response = test_client.post("/api/workspaces")
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+
+def test_store_in_cache_drops_oldest_entries() -> None:
+    """Test that the extract cache is kept within the byte limit."""
+    workspace = Workspace("test", max_cache_bytes=2500)
+    first, second = np.zeros(100), np.zeros(150)
+
+    store_in_cache(workspace, "first", first)
+    store_in_cache(workspace, "second", second)
+    assert list(workspace.state.extract_cache) == ["first", "second"]
+
+    store_in_cache(workspace, "third", np.zeros(150))
+    assert list(workspace.state.extract_cache) == ["second", "third"]
+
+    store_in_cache(workspace, "too large", np.zeros(1000))
+    assert "too large" not in workspace.state.extract_cache
+
+
+def test_extract_cache_is_invalidated_for_every_workspace() -> None:
+    """Test that a commit through a shared manager clears all caches."""
+    celonis = SimpleNamespace(
+        base_url="url",
+        data_pool_name="pool",
+        data_model_name="model",
+        extract_version="1",
+    )
+    alice, bob = Workspace("alice"), Workspace("bob")
+    for workspace in (alice, bob):
+        get_extract_cache(workspace, celonis)
+        store_in_cache(workspace, "cube", np.zeros(10))
+
+    assert "cube" in get_extract_cache(alice, celonis)
+    # A commit of bob changes the extract of the shared connection
+    celonis.extract_version = "2"
+    assert get_extract_cache(alice, celonis) == {}
+    assert get_extract_cache(bob, celonis) == {}
+
+    # Another connection has its own extract
+    get_extract_cache(alice, celonis)["cube"] = np.zeros(10)
+    other = SimpleNamespace(**{**vars(celonis), "data_model_name": "other"})
+    assert get_extract_cache(alice, other) == {}
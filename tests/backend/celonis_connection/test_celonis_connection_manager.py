@@ -510,3 +510,359 @@ def test_get_data_model_no_data_model(
     mock_celonis_connection_manager.data_model = None  # type: ignore
     result = mock_celonis_connection_manager.get_data_model()
     assert result is None
+
+
+def test_create_table_in_chunks(
+    mock_celonis_connection_manager: CelonisConnectionManager,
+):
+    """Test that a large data frame is uploaded in appended chunks.
+
+    :param mock_celonis_connection_manager: Mock
+        CelonisConnectionManager object.
+    """
+    mock_data_pool = MagicMock()
+    mock_data_model = MagicMock()
+    mock_celonis_connection_manager.data_model = mock_data_model
+    mock_celonis_connection_manager.data_pool = mock_data_pool
+    mock_celonis_connection_manager.data_frame = pd.DataFrame(
+        {"case:concept:name": range(10), "concept:name": ["A"] * 10}
+    )
+    mock_celonis_connection_manager.create_table(chunk_size=3, max_workers=2)
+
+    table = mock_data_pool.create_table.return_value
+    first_chunk = mock_data_pool.create_table.call_args.kwargs["df"]
+    assert first_chunk["case:concept:name"].tolist() == [0, 1, 2]
+    appended = sorted(
+        row for call in table.append.call_args_list for row in call.args[0].iloc[:, 0]
+    )
+    assert appended == list(range(3, 10))
+    mock_data_model.create_process_configuration.assert_called_once()
+    mock_data_model.reload.assert_called_once()
+    assert mock_celonis_connection_manager.pending_upload is None
+
+
+def test_resume_chunked_upload(
+    mock_celonis_connection_manager: CelonisConnectionManager,
+):
+    """Test that a failed chunked upload resumes with the pending chunks.
+
+    :param mock_celonis_connection_manager: Mock
+        CelonisConnectionManager object.
+    """
+    mock_data_pool = MagicMock()
+    mock_data_model = MagicMock()
+    mock_celonis_connection_manager.data_model = mock_data_model
+    mock_celonis_connection_manager.data_pool = mock_data_pool
+    mock_celonis_connection_manager.data_frame = pd.DataFrame({"x": range(9)})
+    table = mock_data_pool.create_table.return_value
+    mock_data_pool.get_tables.return_value.find.return_value = table
+    pushed = []
+
+    def append(chunk: pd.DataFrame) -> None:
+        if chunk["x"].iloc[0] == 6 and not pushed.count("failed"):
+            pushed.append("failed")
+            raise ConnectionError("Timeout")
+        pushed.append(chunk["x"].iloc[0])
+
+    table.append.side_effect = append
+    with patch(
+        "backend.celonis_connection.celonis_connection_manager.UPLOAD_ATTEMPTS", 1
+    ):
+        with pytest.raises(ConnectionError):
+            mock_celonis_connection_manager.create_table(chunk_size=3)
+        mock_data_model.reload.assert_not_called()
+        assert mock_celonis_connection_manager.pending_upload.pending == [2]  # type: ignore
+
+        mock_celonis_connection_manager.resume_upload()
+
+    assert sorted(p for p in pushed if p != "failed") == [3, 6]
+    mock_data_pool.create_table.assert_called_once()
+    mock_data_model.reload.assert_called_once()
+    assert mock_celonis_connection_manager.pending_upload is None
+
+
+def test_append_new_events(
+    mock_celonis_connection_manager: CelonisConnectionManager,
+):
+    """Test that only events that are not in the table are appended.
+
+    Events at the latest timestamp of the table are compared by their case
+    and activity.
+
+    :param mock_celonis_connection_manager: Mock
+        CelonisConnectionManager object.
+    """
+    mock_data_pool = MagicMock()
+    mock_data_model = MagicMock()
+    mock_celonis_connection_manager.data_model = mock_data_model
+    mock_celonis_connection_manager.data_pool = mock_data_pool
+    mock_celonis_connection_manager.data_frame = pd.DataFrame(
+        {
+            "case:concept:name": ["1", "3", "1", "2"],
+            "concept:name": ["A", "A", "B", "A"],
+            "time:timestamp": pd.to_datetime(
+                [
+                    "2024-01-01 10:00",
+                    "2024-01-01 10:00",
+                    "2024-01-02 10:00",
+                    "2024-01-03 10:00",
+                ],
+                utc=True,
+            ),
+        }
+    )
+    latest = pd.DataFrame({"Latest": [pd.Timestamp("2024-01-01 10:00")]})
+    at_latest = pd.DataFrame(
+        {
+            "Case": ["1", "0"],
+            "Activity": ["A", "A"],
+            "Timestamp": pd.to_datetime(["2024-01-01 10:00:00", "2024-01-01 10:00:30"]),
+        }
+    )
+
+    with (
+        patch.object(mock_celonis_connection_manager, "get_table"),
+        patch.object(
+            mock_celonis_connection_manager,
+            "get_dataframe_from_celonis",
+            return_value=latest,
+        ),
+        patch.object(
+            mock_celonis_connection_manager, "_execute_pql", return_value=at_latest
+        ) as mock_execute,
+    ):
+        delta = mock_celonis_connection_manager.append_to_table()
+
+    assert delta is not None
+    assert delta["case:concept:name"].tolist() == ["3", "1", "2"]
+    (filter_statement,) = mock_execute.call_args.args[1]
+    assert "{d'2024-01-01 10:00:00'}" in filter_statement
+    table = mock_data_pool.get_tables.return_value.find.return_value
+    table.append.assert_called_once()
+    assert mock_celonis_connection_manager.pending_upload is None
+    mock_data_pool.create_table.assert_not_called()
+    mock_data_model.reload.assert_called_once_with(force_complete=False)
+
+
+def test_resume_failed_append(
+    mock_celonis_connection_manager: CelonisConnectionManager,
+):
+    """Test that a failed append resumes without creating the table.
+
+    :param mock_celonis_connection_manager: Mock
+        CelonisConnectionManager object.
+    """
+    mock_data_pool = MagicMock()
+    mock_data_model = MagicMock()
+    mock_celonis_connection_manager.data_model = mock_data_model
+    mock_celonis_connection_manager.data_pool = mock_data_pool
+    mock_celonis_connection_manager.data_frame = pd.DataFrame(
+        {"case:concept:name": ["1", "1", "2", "2", "3"]}
+    )
+    table = mock_data_pool.get_tables.return_value.find.return_value
+    table.append.side_effect = [None, ConnectionError("Timeout"), None, None]
+    cases = pd.DataFrame({"Case": ["0"], "Events": [4]})
+
+    with (
+        patch.object(mock_celonis_connection_manager, "get_table"),
+        patch.object(
+            mock_celonis_connection_manager,
+            "get_dataframe_from_celonis",
+            return_value=cases,
+        ),
+        patch(
+            "backend.celonis_connection.celonis_connection_manager.UPLOAD_ATTEMPTS", 1
+        ),
+        pytest.raises(ConnectionError),
+    ):
+        mock_celonis_connection_manager.append_to_table(
+            mode="new_cases", chunk_size=2, max_workers=1
+        )
+
+    upload = mock_celonis_connection_manager.pending_upload
+    assert upload is not None and upload.append
+    assert (upload.rows, upload.cases) == (5, 3)
+    assert upload.pending == [1]
+    mock_data_model.reload.assert_not_called()
+
+    mock_celonis_connection_manager.resume_upload()
+
+    assert table.append.call_count == 4
+    mock_data_pool.create_table.assert_not_called()
+    mock_data_model.add_table.assert_not_called()
+    mock_data_model.reload.assert_called_once_with(force_complete=False)
+    assert mock_celonis_connection_manager.pending_upload is None
+
+
+def test_append_new_cases_without_delta(
+    mock_celonis_connection_manager: CelonisConnectionManager,
+):
+    """Test that nothing is pushed if all cases are already in the table.
+
+    :param mock_celonis_connection_manager: Mock
+        CelonisConnectionManager object.
+    """
+    mock_data_pool = MagicMock()
+    mock_data_model = MagicMock()
+    mock_celonis_connection_manager.data_model = mock_data_model
+    mock_celonis_connection_manager.data_pool = mock_data_pool
+    mock_celonis_connection_manager.data_frame = pd.DataFrame(
+        {"case:concept:name": [1, 2], "concept:name": ["A", "B"]}
+    )
+    cases = pd.DataFrame({"Case": ["1", "2"], "Events": [4, 2]})
+
+    with (
+        patch.object(mock_celonis_connection_manager, "get_table"),
+        patch.object(
+            mock_celonis_connection_manager,
+            "get_dataframe_from_celonis",
+            return_value=cases,
+        ),
+    ):
+        delta = mock_celonis_connection_manager.append_to_table(mode="new_cases")
+
+    assert delta is not None and delta.empty
+    mock_data_pool.get_tables.assert_not_called()
+    mock_data_model.reload.assert_not_called()
+
+
+def test_append_to_missing_table(
+    mock_celonis_connection_manager: CelonisConnectionManager,
+):
+    """Test that None is returned if there is no table to append to.
+
+    :param mock_celonis_connection_manager: Mock
+        CelonisConnectionManager object.
+    """
+    mock_celonis_connection_manager.data_model = MagicMock()
+    mock_celonis_connection_manager.data_pool = MagicMock()
+
+    with patch.object(mock_celonis_connection_manager, "get_table", return_value=None):
+        assert mock_celonis_connection_manager.append_to_table() is None
+    with pytest.raises(ValueError, match="Unknown append mode"):
+        mock_celonis_connection_manager.append_to_table(mode="all")
+
+
+def test_create_table_reports_progress(
+    mock_celonis_connection_manager: CelonisConnectionManager,
+):
+    """Test that the phases of a chunked upload are reported in order.
+
+    :param mock_celonis_connection_manager: Mock
+        CelonisConnectionManager object.
+    """
+    mock_celonis_connection_manager.data_model = MagicMock()
+    mock_celonis_connection_manager.data_pool = MagicMock()
+    mock_celonis_connection_manager.data_frame = pd.DataFrame({"x": range(9)})
+    reported = []
+
+    mock_celonis_connection_manager.create_table(
+        chunk_size=3,
+        max_workers=1,
+        on_progress=lambda phase, progress: reported.append((phase, progress)),
+    )
+
+    assert reported == [
+        ("upload", 0.0),
+        ("upload", 1 / 3),
+        ("upload", 2 / 3),
+        ("upload", 1.0),
+        ("configure", 0.0),
+        ("configure", 1.0),
+        ("reload", 0.0),
+        ("reload", 1.0),
+    ]
+
+
+def test_build_extract_filters():
+    """Test that only the given filters are built and values are quoted."""
+    from backend.celonis_connection.celonis_connection_manager import (
+        build_extract_filters,
+    )
+
+    assert build_extract_filters() == []
+    assert build_extract_filters(
+        start_time="2024-01-01", activities=["A", "O'Neil"], resources=[]
+    ) == [
+        """FILTER "ACTIVITIES"."time:timestamp" >= {d'2024-01-01 00:00:00'};""",
+        """FILTER "ACTIVITIES"."concept:name" IN ('A', 'O\\'Neil');""",
+    ]
+
+
+def test_build_extract_filters_parses_the_times():
+    """Test that the times are parsed and not copied into the query."""
+    from backend.celonis_connection.celonis_connection_manager import (
+        build_extract_filters,
+    )
+
+    assert build_extract_filters(end_time="2024-01-01T12:30:00+02:00") == [
+        """FILTER "ACTIVITIES"."time:timestamp" < {d'2024-01-01 10:30:00'};""",
+    ]
+    with pytest.raises(ValueError):
+        build_extract_filters(start_time="2024-01-01'}; FILTER 1 = 1; {d'")
+
+
+def test_get_filtered_dataframe_from_celonis(
+    mock_celonis_connection_manager: CelonisConnectionManager,
+):
+    """Test that the columns and filters are pushed down to Celonis.
+
+    :param mock_celonis_connection_manager: Mock
+        CelonisConnectionManager object.
+    """
+    mock_celonis_connection_manager.data_model = MagicMock()
+    with patch(
+        "backend.celonis_connection.celonis_connection_manager.pqlDataFrame"
+    ) as mock_pql_df:
+        mock_pql_df.return_value.to_pandas.side_effect = [
+            pd.DataFrame({"Case": ["1", "2", "3"], "Events": [3, 2, 1]}),
+            pd.DataFrame({"time:timestamp": []}),
+        ]
+        mock_celonis_connection_manager.get_filtered_dataframe_from_celonis(
+            ["time:timestamp"], end_time="2024-02-01", case_sample=2, seed=1
+        )
+
+    case_query, extract = mock_pql_df.call_args_list
+    assert case_query.kwargs["filters"] == [
+        """FILTER "ACTIVITIES"."time:timestamp" < {d'2024-02-01 00:00:00'};"""
+    ]
+    assert list(extract.args[0]) == ["time:timestamp"]
+    sample_filter = extract.kwargs["filters"][1]
+    assert sample_filter.startswith('FILTER "ACTIVITIES"."case:concept:name" IN (')
+    assert sample_filter.count("'") == 4
+
+
+def test_iter_dataframes_from_celonis(
+    mock_celonis_connection_manager: CelonisConnectionManager,
+):
+    """Test that whole cases are packed into pages of bounded size.
+
+    :param mock_celonis_connection_manager: Mock
+        CelonisConnectionManager object.
+    """
+    mock_celonis_connection_manager.data_model = MagicMock()
+    with patch(
+        "backend.celonis_connection.celonis_connection_manager.pqlDataFrame"
+    ) as mock_pql_df:
+        mock_pql_df.return_value.to_pandas.side_effect = [
+            pd.DataFrame({"Case": ["1", "2", "3"], "Events": [3, 2, 4]}),
+            pd.DataFrame({"concept:name": ["A"] * 5}),
+            pd.DataFrame({"concept:name": ["B"] * 4}),
+        ]
+        pages = list(
+            mock_celonis_connection_manager.iter_dataframes_from_celonis(
+                ["concept:name"], activities=["A", "B"], page_events=5
+            )
+        )
+
+    assert [len(page) for page in pages] == [5, 4]
+    case_query, first_page, second_page = mock_pql_df.call_args_list
+    activity_filter = """FILTER "ACTIVITIES"."concept:name" IN ('A', 'B');"""
+    assert case_query.kwargs["filters"] == [activity_filter]
+    assert first_page.kwargs["filters"] == [
+        activity_filter,
+        """FILTER "ACTIVITIES"."case:concept:name" IN ('1', '2');""",
+    ]
+    assert second_page.kwargs["filters"][1] == (
+        """FILTER "ACTIVITIES"."case:concept:name" IN ('3');"""
+    )
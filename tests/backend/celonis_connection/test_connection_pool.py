@@ -0,0 +1,117 @@
+"""Tests for the pool of Celonis connections."""
+
+import threading
+import time
+from typing import List
+from unittest.mock import MagicMock, patch
+
+from backend.celonis_connection.connection_pool import CelonisConnectionPool
+
+
+class FakeFactory:
+    """Creates mock managers and remembers them."""
+
+    def __init__(self, delay: float = 0.0) -> None:
+        """Initialize the factory with the time a connection takes."""
+        self.delay = delay
+        self.managers: List[MagicMock] = []
+
+    def __call__(
+        self, base_url: str, data_pool_name: str, data_model_name: str, api_token: str
+    ) -> MagicMock:
+        """Creates a mock manager with the API token."""
+        time.sleep(self.delay)
+        manager = MagicMock(api_token=api_token)
+        self.managers.append(manager)
+        return manager
+
+
+def test_pool_reuses_manager_per_key() -> None:
+    """Test that a key gets one manager and other keys get their own."""
+    factory = FakeFactory()
+    pool = CelonisConnectionPool(factory=factory)  # type: ignore
+
+    first = pool.get("url", "pool", "model", "token")
+    assert pool.get("url", "pool", "model", "token") is first
+    other = pool.get("url", "pool", "other-model", "token")
+
+    assert other is not first
+    assert len(factory.managers) == 2
+    assert set(pool.keys()) == {
+        ("url", "pool", "model"),
+        ("url", "pool", "other-model"),
+    }
+
+    assert pool.find("url", "pool", "model") is first
+    assert pool.find("url", "pool", "missing") is None
+    assert len(factory.managers) == 2
+
+
+def test_pool_replaces_manager_when_token_changes() -> None:
+    """Test that new credentials close the manager of the old ones."""
+    factory = FakeFactory()
+    pool = CelonisConnectionPool(factory=factory)  # type: ignore
+
+    old = pool.get("url", "pool", "model", "old-token")
+    new = pool.get("url", "pool", "model", "new-token")
+
+    assert new is not old
+    assert new.api_token == "new-token"
+    old.close_when_unused.assert_called_once()
+    assert len(pool.keys()) == 1
+
+
+def test_pool_evicts_idle_and_least_recently_used_managers() -> None:
+    """Test the idle timeout and the maximum size of the pool."""
+    factory = FakeFactory()
+    pool = CelonisConnectionPool(max_size=2, factory=factory)  # type: ignore
+
+    a = pool.get("url", "pool", "a", "token")
+    pool.get("url", "pool", "b", "token")
+    pool.get("url", "pool", "a", "token")
+    pool.get("url", "pool", "c", "token")
+
+    # b was used least recently
+    assert set(pool.keys()) == {("url", "pool", "a"), ("url", "pool", "c")}
+    factory.managers[1].close_when_unused.assert_called_once()
+
+    pool.idle_seconds = 0.0
+    assert pool.evict_idle() == 2
+    assert pool.keys() == []
+    a.close_when_unused.assert_called_once()
+
+
+def test_concurrent_requests_share_one_connection() -> None:
+    """Test that a warm-up and requests for the same key connect once."""
+    factory = FakeFactory(delay=0.05)
+    pool = CelonisConnectionPool(factory=factory)  # type: ignore
+
+    warm_up = pool.warm_up_in_background("url", "pool", "model", "token")
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(pool.get("url", "pool", "model", "token"))
+        )
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in [warm_up, *threads]:
+        thread.join()
+
+    assert len(factory.managers) == 1
+    assert all(manager is factory.managers[0] for manager in results)
+
+
+def test_manager_in_use_is_closed_after_its_release() -> None:
+    """Test that an evicted manager stays open until its job releases it."""
+    with patch("backend.celonis_connection.celonis_connection_manager.get_celonis"):
+        pool = CelonisConnectionPool(max_size=1)
+        manager = pool.get("url", "pool", "model", "token")
+        manager.acquire()
+        pool.get("url", "pool", "other-model", "token")
+
+    assert pool.keys() == [("url", "pool", "other-model")]
+    manager.celonis.client.close.assert_not_called()
+    manager.release()
+    manager.celonis.client.close.assert_called_once()
@@ -0,0 +1,177 @@
+"""Test the OfflineCelonisConnectionManager and the PQLEmulator."""
+
+import time
+
+import pandas as pd
+import pm4py  # type: ignore
+import pytest
+
+from backend.celonis_connection.offline_connection_manager import (
+    OfflineCelonisConnectionManager,
+)
+from backend.celonis_connection.pql_emulator import PQLEmulator
+from backend.pql_queries import general_queries, log_skeleton_queries
+from backend.utils import file_handlers
+
+
+@pytest.fixture
+def running_example() -> pd.DataFrame:
+    """Read the running example with a group per resource."""
+    log = file_handlers.read_xes("tests/input_data/running-example.xes")
+    log["org:group"] = log["org:resource"].map(
+        lambda r: "Staff" if r != "Sara" else "Boss"
+    )
+    return log
+
+
+@pytest.fixture
+def offline_celonis(running_example: pd.DataFrame) -> OfflineCelonisConnectionManager:
+    """Create an offline connection with the running example as table."""
+    celonis = OfflineCelonisConnectionManager()
+    celonis.add_dataframe(running_example)
+    celonis.create_table()
+    return celonis
+
+
+def test_dfg_representation(
+    offline_celonis: OfflineCelonisConnectionManager, running_example: pd.DataFrame
+):
+    """Test that SOURCE, TARGET and COUNT give the DFG of pm4py."""
+    dfg, _, _ = pm4py.discover_dfg(running_example)
+
+    result = general_queries.get_dfg_representation(offline_celonis)
+
+    assert {(row.Source, row.Target): row.Path for row in result.itertuples()} == dfg
+
+
+def test_general_information(offline_celonis: OfflineCelonisConnectionManager):
+    """Test COUNT DISTINCT, also of the VARIANT of the cases."""
+    result = general_queries.get_general_information(offline_celonis)
+
+    assert result.to_dict("records") == [
+        {"CaseCount": 6, "ActivityCount": 8, "TraceVariants": 6}
+    ]
+    traces = general_queries.get_traces_with_count(offline_celonis)
+    assert traces["Count"].sum() == 6
+    assert traces["Trace"].iloc[0].startswith("register request, ")
+
+
+def test_log_skeleton_queries(offline_celonis: OfflineCelonisConnectionManager):
+    """Test MATCH_PROCESS, MATCH_ACTIVITIES and CASE WHEN."""
+    always_before = log_skeleton_queries.get_always_before_relation(offline_celonis)
+    never_together = log_skeleton_queries.get_never_together_relation(offline_celonis)
+    directly_follows = log_skeleton_queries.get_directly_follows_relation_and_count(
+        offline_celonis
+    )
+
+    relations = {
+        (row[0], row[1]): row[2] for row in always_before.itertuples(index=False)
+    }
+    assert relations[("register request", "decide")] == "true"
+    assert relations[("decide", "pay compensation")] == "true"
+    assert relations[("check ticket", "decide")] == "false"
+    together = {
+        (row[0], row[1]): row[2] for row in never_together.itertuples(index=False)
+    }
+    assert together[("reject request", "pay compensation")] == "true"
+    assert together[("register request", "decide")] == "false"
+    assert set(directly_follows["Rel"]) == {"true"}
+
+
+def test_filtered_extracts(
+    offline_celonis: OfflineCelonisConnectionManager, running_example: pd.DataFrame
+):
+    """Test that the filters and pages of the extracts are evaluated."""
+    expected = running_example[
+        (running_example["time:timestamp"] >= pd.Timestamp("2011-01-06", tz="UTC"))
+        & (running_example["concept:name"] == "decide")
+    ]
+    decisions = offline_celonis.get_filtered_dataframe_from_celonis(
+        ["case:concept:name", "concept:name"],
+        start_time="2011-01-06",
+        activities=["decide"],
+    )
+    pages = list(
+        offline_celonis.iter_dataframes_from_celonis(
+            ["case:concept:name"], page_events=10
+        )
+    )
+    resource_log = offline_celonis.get_dataframe_with_resource_group_from_celonis()
+
+    assert decisions is not None
+    assert set(decisions["concept:name"]) == {"decide"}
+    assert len(decisions) == len(expected)
+    assert sum(len(page) for page in pages) == 42
+    for page in pages:
+        # No case is split between pages
+        assert len(page) <= 10 or page["case:concept:name"].nunique() == 1
+    assert resource_log is not None
+    assert str(resource_log["time:timestamp"].dt.tz) == "UTC"
+
+
+def test_append_is_visible_after_reload(
+    offline_celonis: OfflineCelonisConnectionManager, running_example: pd.DataFrame
+):
+    """Test that the appended cases are loaded into the data model."""
+    running_example["case:concept:name"] += "-copy"
+    offline_celonis.add_dataframe(running_example)
+
+    delta = offline_celonis.append_to_table(mode="new_cases")
+
+    assert delta is not None and len(delta) == 42
+    result = general_queries.get_number_of_cases(offline_celonis)
+    assert result["Case Count"].iloc[0] == 12
+
+
+def test_append_keeps_new_events_at_the_latest_timestamp(
+    offline_celonis: OfflineCelonisConnectionManager, running_example: pd.DataFrame
+):
+    """Test that only the known events at the latest timestamp are skipped."""
+    latest = running_example.loc[running_example["time:timestamp"].idxmax()]
+    tie = latest.copy()
+    tie["case:concept:name"] = "new"
+    later = tie.copy()
+    later["time:timestamp"] += pd.Timedelta(hours=1)
+    offline_celonis.add_dataframe(pd.DataFrame([latest, tie, later]))
+
+    delta = offline_celonis.append_to_table(chunk_size=1)
+
+    assert delta is not None
+    assert delta["case:concept:name"].tolist() == ["new", "new"]
+    result = general_queries.get_number_of_cases(offline_celonis)
+    assert result["Case Count"].iloc[0] == 7
+
+
+def test_latency_per_round_trip(running_example: pd.DataFrame):
+    """Test that every query sleeps for the latency and is counted."""
+    celonis = OfflineCelonisConnectionManager(latency=0.02)
+    celonis.add_dataframe(running_example)
+    celonis.create_table()
+
+    start = time.perf_counter()
+    general_queries.get_number_of_activities(celonis)
+    general_queries.get_number_of_cases(celonis)
+
+    assert time.perf_counter() - start >= 0.04
+    assert celonis.query_count == 2
+
+
+def test_emulator_rejects_unsupported_pql(running_example: pd.DataFrame):
+    """Test that PQL outside of the supported subset raises a ValueError."""
+    emulator = PQLEmulator(running_example)
+
+    with pytest.raises(ValueError, match="Unsupported PQL function 'ROUND'"):
+        emulator.evaluate({"x": 'ROUND("ACTIVITIES"."concept:name")'})
+    with pytest.raises(ValueError, match="Table 'CASES' not found"):
+        emulator.evaluate({"x": '"CASES"."concept:name"'})
+
+
+def test_transferred_rows_and_bytes(offline_celonis: OfflineCelonisConnectionManager):
+    """Test that the returned rows and bytes are counted until a reset."""
+    result = general_queries.get_dfg_representation(offline_celonis)
+
+    assert offline_celonis.query_count == 1
+    assert offline_celonis.rows_transferred == len(result)
+    assert offline_celonis.bytes_transferred > 0
+    offline_celonis.reset_counters()
+    assert offline_celonis.rows_transferred == offline_celonis.bytes_transferred == 0
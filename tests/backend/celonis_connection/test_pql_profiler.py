@@ -0,0 +1,84 @@
+"""Test the PQL profiler and its recording of the queries."""
+
+import json
+
+import pandas as pd
+import pytest
+
+from backend.celonis_connection.offline_connection_manager import (
+    OfflineCelonisConnectionManager,
+)
+from backend.celonis_connection.pql_profiler import (
+    PQLProfiler,
+    format_query,
+    get_pql_profiler,
+)
+from backend.pql_queries import general_queries
+from backend.utils import file_handlers
+
+
+@pytest.fixture
+def offline_celonis() -> OfflineCelonisConnectionManager:
+    """Create an offline connection with the running example as table."""
+    celonis = OfflineCelonisConnectionManager()
+    celonis.add_dataframe(
+        file_handlers.read_xes("tests/input_data/running-example.xes")
+    )
+    celonis.create_table()
+    return celonis
+
+
+def test_queries_are_recorded_with_their_caller(
+    offline_celonis: OfflineCelonisConnectionManager,
+):
+    """Test that the queries of the connection manager are profiled."""
+    profiler = get_pql_profiler()
+    profiler.clear()
+
+    general_queries.get_dfg_representation(offline_celonis)
+    general_queries.get_dfg_representation(offline_celonis)
+    offline_celonis.get_basic_dataframe_from_celonis()
+
+    stats = profiler.get_stats()
+    assert stats["query_count"] == 3
+    dfg = next(q for q in stats["queries"] if q["count"] == 2)
+    assert dfg["callers"] == [
+        "backend.pql_queries.general_queries.get_dfg_representation"
+    ]
+    assert dfg["rows"] == 16 and dfg["columns"] == 3
+    assert 'SOURCE("ACTIVITIES"."concept:name")' in dfg["query"]
+    extract = next(q for q in stats["queries"] if q["count"] == 1)
+    assert extract["callers"] == [
+        f"{__name__}.test_queries_are_recorded_with_their_caller"
+    ]
+    assert '"ACTIVITIES"."case:concept:name"' in extract["query"]
+
+
+def test_rolling_window_and_slow_query_log(tmp_path):
+    """Test that old queries are dropped and slow queries are logged."""
+    log_path = tmp_path / "slow.jsonl"
+    profiler = PQLProfiler(
+        window=2, slow_query_seconds=0.5, slow_query_log=str(log_path)
+    )
+
+    profiler.record("a", 0.1, rows=1, columns=1, caller="f")
+    profiler.record("b", 0.7, rows=2, columns=1, caller="g")
+    profiler.record("b", 0.2, rows=2, columns=1, caller="h")
+
+    stats = profiler.get_stats(limit=1)
+    assert stats["query_count"] == 2
+    assert stats["queries"][0]["callers"] == ["g", "h"]
+    assert stats["queries"][0]["max_duration_s"] == 0.7
+    slow = [json.loads(line) for line in log_path.read_text().splitlines()]
+    assert [(s["query"], s["caller"]) for s in slow] == [("b", "g")]
+
+
+def test_format_query_normalizes_whitespace():
+    """Test that the same query gives the same text and filters are kept."""
+    query = {"Count": 'COUNT(\n    "ACTIVITIES"."concept:name"\n)'}
+
+    text = format_query(query, ['FILTER "ACTIVITIES"."org:resource" = \'Sara\';'])
+
+    assert text.splitlines()[0] == 'Count: COUNT( "ACTIVITIES"."concept:name" )'
+    assert len(text.splitlines()) == 2
+    assert format_query(query) == format_query(pd.Series(query).to_dict())
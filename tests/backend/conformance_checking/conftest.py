@@ -0,0 +1,20 @@
+"""Shared fixtures and windows of the conformance checking tests."""
+
+import pm4py  # type: ignore
+import pytest
+
+# Time windows of the running example, the last one starts at noon
+WINDOWS = [
+    ("2010-12-30 00:00:00", "2011-01-25 00:00:00"),
+    ("2011-01-03 00:00:00", "2011-01-10 00:00:00"),
+    ("2011-01-06 12:00:00", "2011-01-09 00:00:00"),
+]
+
+# The resources of the running example
+RESOURCES = ["Sara", "Mike", "Pete", "Ellen", "Sue", "Sean"]
+
+
+@pytest.fixture(scope="module")
+def sample_log():
+    """Fixture to read the running example, shared by the tests of a module."""
+    return pm4py.read_xes("tests/input_data/running-example.xes")  # type: ignore
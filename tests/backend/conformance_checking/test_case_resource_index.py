@@ -0,0 +1,98 @@
+"""Tests the CaseResourceIndex class."""
+
+import pandas as pd
+import pytest
+from conformance_checking.case_resource_index import CaseResourceIndex
+from pm4py.algo.organizational_mining.resource_profiles import (  # type: ignore
+    algorithm as rp_algorithm,  # type: ignore
+)
+
+from tests.backend.conformance_checking.conftest import RESOURCES, WINDOWS
+
+
+@pytest.fixture(scope="module")
+def index(sample_log):  # type: ignore
+    """Fixture to create a CaseResourceIndex based on the sample_log."""
+    return CaseResourceIndex(sample_log)  # type: ignore
+
+
+@pytest.fixture
+def small_log():
+    """Fixture for a log with three cases ending on consecutive days."""
+    return pd.DataFrame(
+        {
+            "case:concept:name": ["1", "1", "2", "2", "3"],
+            "org:resource": ["A", "B", "A", "C", "B"],
+            "time:timestamp": pd.to_datetime(
+                [
+                    "2023-01-01 08:00:00",
+                    "2023-01-01 12:00:00",
+                    "2023-01-02 08:00:00",
+                    "2023-01-02 12:00:00",
+                    "2023-01-03 08:00:00",
+                ]
+            ),
+        }
+    )
+
+
+@pytest.mark.parametrize("start_time,end_time", WINDOWS)
+@pytest.mark.parametrize("resource", RESOURCES)
+def test_matches_pm4py(sample_log, index, start_time, end_time, resource):  # type: ignore
+    """Test that interaction and social position equal the PM4Py values."""
+    assert index.get_social_position(start_time, end_time, resource) == pytest.approx(  # type: ignore
+        rp_algorithm.social_position(sample_log, start_time, end_time, resource)
+    )
+    for other in RESOURCES:
+        assert index.get_interaction_two_resources(  # type: ignore
+            start_time, end_time, resource, other
+        ) == rp_algorithm.interaction_two_resources(
+            sample_log, start_time, end_time, resource, other
+        )
+
+
+@pytest.mark.parametrize("start_time,end_time", WINDOWS)
+def test_interaction_matrix(index, start_time, end_time):  # type: ignore
+    """Test that the matrix equals the pairwise interactions."""
+    matrix = index.get_interaction_matrix(start_time, end_time)  # type: ignore
+    assert (matrix.to_numpy() == matrix.to_numpy().T).all()  # type: ignore
+    for resource in RESOURCES:
+        for other in RESOURCES:
+            assert matrix.loc[resource, other] == index.get_interaction_two_resources(  # type: ignore
+                start_time, end_time, resource, other
+            )
+
+
+def test_inclusive_end(small_log):  # type: ignore
+    """Test that inclusive_end includes cases ending exactly at the end time."""
+    index = CaseResourceIndex(small_log)  # type: ignore
+    start_time, end_time = "2023-01-01 00:00:00", "2023-01-02 12:00:00"
+    assert index.get_interaction_two_resources(start_time, end_time, "A", "C") == 0
+    assert (
+        index.get_interaction_two_resources(
+            start_time, end_time, "A", "C", inclusive_end=True
+        )
+        == 1
+    )
+    assert index.get_interaction_two_resources(start_time, end_time, "A", "Z") == 0
+
+
+def test_connected_resources(small_log):  # type: ignore
+    """Test the resources sharing cases with a resource."""
+    index = CaseResourceIndex(small_log)  # type: ignore
+    assert index.get_connected_resources(
+        "2023-01-01 00:00:00", "2023-01-03 08:00:00", "A"
+    ) == (2, 3)
+    assert index.get_connected_resources(
+        "2023-01-02 10:00:00", "2023-01-03 08:00:00", "B"
+    ) == (0, 2)
+    assert index.get_connected_resources(
+        "2023-01-01 00:00:00", "2023-01-03 08:00:00", "Z"
+    ) == (0, 3)
+
+
+def test_empty_window(index):  # type: ignore
+    """Test that a window outside of the log is empty."""
+    start_time, end_time = "2020-01-01 00:00:00", "2021-01-01 00:00:00"
+    assert index.get_social_position(start_time, end_time, "Sara") == 0.0  # type: ignore
+    assert index.get_interaction_matrix(start_time, end_time).to_numpy().sum() == 0  # type: ignore
@@ -0,0 +1,91 @@
+"""Tests the MultitaskingIndex class."""
+
+import pandas as pd
+import pytest
+from conformance_checking.multitasking import MultitaskingIndex
+from pm4py.algo.organizational_mining.resource_profiles import (  # type: ignore
+    algorithm as rp_algorithm,  # type: ignore
+)
+
+from tests.backend.conformance_checking.conftest import RESOURCES, WINDOWS
+
+
+@pytest.fixture(scope="module")
+def index(sample_log):  # type: ignore
+    """Fixture to create a MultitaskingIndex based on the sample_log."""
+    return MultitaskingIndex(sample_log)  # type: ignore
+
+
+@pytest.fixture
+def overlap_log():
+    """Fixture for a log in which Resource A works on two cases at once."""
+    return pd.DataFrame(
+        {
+            "case:concept:name": ["1", "1", "2", "2", "3", "3"],
+            "org:resource": ["A", "A", "B", "A", "B", "A"],
+            "time:timestamp": pd.to_datetime(
+                [
+                    "2023-01-01 08:00:00",
+                    "2023-01-01 12:00:00",
+                    "2023-01-01 09:00:00",
+                    "2023-01-01 11:00:00",
+                    "2023-01-02 08:00:00",
+                    "2023-01-02 10:00:00",
+                ]
+            ),
+        }
+    )
+
+
+@pytest.mark.parametrize("start_time,end_time", WINDOWS)
+@pytest.mark.parametrize("resource", RESOURCES)
+def test_matches_pm4py(sample_log, index, start_time, end_time, resource):  # type: ignore
+    """Test that the sweep yields the PM4Py multitasking."""
+    assert index.get_multitasking(start_time, end_time, resource) == pytest.approx(  # type: ignore
+        rp_algorithm.multitasking(sample_log, start_time, end_time, resource)
+    )
+
+
+@pytest.mark.parametrize("start_time,end_time", WINDOWS)
+def test_all_resources(index, start_time, end_time):  # type: ignore
+    """Test that the bulk computation equals the single computations."""
+    values = index.get_multitasking_all_resources(start_time, end_time)  # type: ignore
+    assert set(values) == set(RESOURCES)  # type: ignore
+    for resource in RESOURCES:
+        assert values[resource] == pytest.approx(  # type: ignore
+            index.get_multitasking(start_time, end_time, resource)  # type: ignore
+        )
+
+
+def test_overlapping_intervals(overlap_log):  # type: ignore
+    """Test the multitasking of a log with known overlaps."""
+    index = MultitaskingIndex(overlap_log)  # type: ignore
+    start_time, end_time = "2023-01-01 00:00:00", "2023-01-03 00:00:00"
+    assert index.get_multitasking(start_time, end_time, "A") == pytest.approx(0.75)
+    assert index.get_multitasking(start_time, end_time, "B") == 0.0
+    assert index.get_multitasking(start_time, end_time, "Nobody") == 0.0
+
+
+def test_time_series(overlap_log):  # type: ignore
+    """Test that the time series is bucketed by the completion time."""
+    index = MultitaskingIndex(overlap_log)  # type: ignore
+    series = index.get_multitasking_time_series(
+        "2023-01-01 00:00:00", "2023-01-03 00:00:00", granularity="day"
+    )
+    assert series["A"] == [
+        ("2023-01-01 00:00:00", 1.0),
+        ("2023-01-02 00:00:00", 0.0),
+    ]
+    # None of the events of B has a duration, so it was never active
+    assert "B" not in series
+
+    only_b = index.get_multitasking_time_series(
+        "2023-01-01 00:00:00", "2023-01-03 00:00:00", resources=["B"]
+    )
+    assert only_b == {}
+
+
+def test_invalid_granularity(index):  # type: ignore
+    """Test that an unsupported granularity is rejected."""
+    with pytest.raises(ValueError):
+        index.get_multitasking_time_series(*WINDOWS[0], granularity="week")  # type: ignore
@@ -0,0 +1,102 @@
+"""Tests the OrganizationalDiagnostics class."""
+
+import pandas as pd
+import pm4py  # type: ignore
+import pytest
+from conformance_checking.organizational_diagnostics import OrganizationalDiagnostics
+from pm4py.algo.organizational_mining.local_diagnostics import (  # type: ignore
+    algorithm as org_algorithm,  # type: ignore
+)
+
+
+@pytest.fixture
+def sample_log():
+    """Fixture for the running example with groups spanning resources."""
+    log = pm4py.read_xes("tests/input_data/running-example.xes")  # type: ignore
+    groups = {"Sara": "Office", "Mike": "Office", "Ellen": "Office"}
+    log["org:group"] = log["org:resource"].map(groups).fillna("Field")  # type: ignore
+    # Pete works for both groups
+    pete = (log["org:resource"] == "Pete") & (log.index % 2 == 0)  # type: ignore
+    log.loc[pete, "org:group"] = "Office"  # type: ignore
+    return log  # type: ignore
+
+
+@pytest.fixture
+def counts():
+    """Fixture for aggregated counts as returned by the PQL query."""
+    return pd.DataFrame(
+        {
+            "Group": ["G1", "G1", "G2", "G2"],
+            "Resource": ["A", "B", "A", "C"],
+            "Activity": ["X", "Y", "X", "X"],
+            "Activity Count": [2, 2, 1, 3],
+        }
+    )
+
+
+def test_matches_pm4py(sample_log):  # type: ignore
+    """Test that all four diagnostics equal PM4Py's local diagnostics."""
+    expected = org_algorithm.apply_from_group_attribute(
+        sample_log,
+        parameters={org_algorithm.Parameters.GROUP_KEY: "org:group"},
+    )
+    diagnostics = OrganizationalDiagnostics(sample_log).to_dict()  # type: ignore
+    assert set(diagnostics) == set(expected)
+    for key in ["group_coverage", "group_member_contribution"]:
+        assert diagnostics[key] == expected[key]
+    for key in ["group_relative_focus", "group_relative_stake"]:
+        for group, values in expected[key].items():
+            assert diagnostics[key][group] == pytest.approx(values)
+
+
+def test_event_attribution(counts):  # type: ignore
+    """Test the diagnostics when events only count for their own group."""
+    diagnostics = OrganizationalDiagnostics(
+        counts,
+        group_col="Group",
+        resource_col="Resource",
+        activity_col="Activity",
+        count_col="Activity Count",
+        by_membership=False,
+    )
+    focus = diagnostics.get_group_relative_focus()
+    assert focus.loc["G1", "X"] == pytest.approx(2 / 6)
+    assert focus.loc["G2", "Y"] == 0.0
+    stake = diagnostics.get_group_relative_stake()
+    assert stake.loc["G1"].tolist() == [0.5, 0.5]
+    assert stake.loc["G2", "X"] == 1.0
+    coverage = diagnostics.get_group_coverage()
+    assert coverage.loc["G2", "C"] == pytest.approx(0.75)
+    assert coverage.loc["G1", "C"] == 0.0
+    assert diagnostics.get_resource_activity_counts().loc["A", "X"] == 3
+
+
+def test_membership_attribution(counts):  # type: ignore
+    """Test that members count with all their events for each group."""
+    diagnostics = OrganizationalDiagnostics(
+        counts,
+        group_col="Group",
+        resource_col="Resource",
+        activity_col="Activity",
+        count_col="Activity Count",
+    )
+    # A is a member of G1, so all three of its X events count for G1
+    assert diagnostics.get_group_relative_focus().loc["G1", "X"] == pytest.approx(3 / 6)
+    assert diagnostics.get_group_member_contribution()["G2"] == {
+        "A": {"X": 3},
+        "C": {"X": 3},
+    }
+
+
+def test_missing_values_are_ignored():
+    """Test that events without a group are ignored."""
+    log = pd.DataFrame(
+        {
+            "org:group": ["G1", None],
+            "org:resource": ["A", "A"],
+            "concept:name": ["X", "Y"],
+        }
+    )
+    diagnostics = OrganizationalDiagnostics(log)
+    assert diagnostics.activities == ["X"]
+    assert diagnostics.to_dict()["group_coverage"] == {"G1": {"A": 1.0}}
@@ -42,6 +42,26 @@ def test_is_handover_of_work_directed(resource_based):  # type: ignore
     assert isinstance(handover_of_work, bool)
 
 
+def test_compute_handover_of_work_from_batches(sample_log):  # type: ignore
+    """Test that the batched Handover of Work equals the one of the whole log."""
+    expected = ResourceBased(sample_log)  # type: ignore
+    expected.compute_handover_of_work()  # type: ignore
+    ordered = sample_log.sort_values(  # type: ignore
+        ["case:concept:name", "time:timestamp"], kind="stable"
+    )
+    cases = ordered["case:concept:name"].unique()
+    batched = ResourceBased(ordered)  # type: ignore
+    batched.compute_handover_of_work_from_batches(
+        ordered[ordered["case:concept:name"].isin(cases[i::2])] for i in range(2)
+    )
+
+    values = batched.get_handover_of_work_values()
+    assert batched.is_handover_of_work_directed()
+    assert values.keys() == expected.get_handover_of_work_values().keys()
+    for pair, value in expected.get_handover_of_work_values().items():
+        assert values[pair] == pytest.approx(value)
+
+
 def test_compute_subcontracting(resource_based):  # type: ignore
     """Test the compute_subcontracting method."""
     resource_based.compute_subcontracting()  # type: ignore
@@ -91,6 +111,54 @@ def test_compute_similar_activities(resource_based):  # type: ignore
     assert isinstance(resource_based._similar_activities, SNA)  # type: ignore
 
 
+def test_compute_similar_activities_from_batches(sample_log):  # type: ignore
+    """Test that the batched Similar Activities equal the ones of the whole log."""
+    expected = ResourceBased(sample_log)  # type: ignore
+    expected.compute_similar_activities()  # type: ignore
+    cases = sample_log["case:concept:name"].unique()  # type: ignore
+    batched = ResourceBased(sample_log)  # type: ignore
+    batched.compute_similar_activities_from_batches(
+        sample_log[sample_log["case:concept:name"].isin(cases[i::3])]  # type: ignore
+        for i in range(3)
+    )
+
+    values = batched.get_similar_activities_values()
+    assert not batched.is_similar_activities_directed()
+    for pair, value in expected.get_similar_activities_values().items():
+        assert values[pair] == pytest.approx(value)
+
+
+def test_batched_metrics_use_the_configured_columns(sample_log):  # type: ignore
+    """Test that the batched metrics read the configured column names."""
+    columns = {
+        "case:concept:name": "case",
+        "concept:name": "activity",
+        "time:timestamp": "timestamp",
+        "org:resource": "resource",
+    }
+    renamed = sample_log.rename(columns=columns)  # type: ignore
+    expected = ResourceBased(sample_log)  # type: ignore
+    expected.compute_handover_of_work_from_batches([sample_log])
+    expected.compute_similar_activities_from_batches([sample_log])
+    batched = ResourceBased(
+        renamed,
+        case_id_col="case",
+        activity_col="activity",
+        timestamp_col="timestamp",
+        resource_col="resource",
+    )
+    batched.compute_handover_of_work_from_batches([renamed])
+    batched.compute_similar_activities_from_batches([renamed])
+
+    assert (
+        batched.get_handover_of_work_values() == expected.get_handover_of_work_values()
+    )
+    assert (
+        batched.get_similar_activities_values()
+        == expected.get_similar_activities_values()
+    )
+
+
 def test_get_similar_activities_values(resource_based):  # type: ignore
     """Test the get_similar_activities_values method."""
     resource_based.compute_similar_activities()  # type: ignore
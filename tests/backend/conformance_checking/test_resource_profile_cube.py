@@ -0,0 +1,98 @@
+"""Tests the ResourceProfileCube class."""
+
+import pytest
+from conformance_checking.resource_based import ResourceBased
+from conformance_checking.resource_profile_cube import ResourceProfileCube
+
+from tests.backend.conformance_checking.conftest import RESOURCES, WINDOWS
+
+# Windows aligned to the day grid, so the cube must match PM4Py exactly
+DAY_WINDOWS = [*WINDOWS[:2], ("2009-01-01 00:00:00", "2012-01-01 00:00:00")]
+
+
+@pytest.fixture
+def cube(sample_log):  # type: ignore
+    """Fixture to create a day-bucketed ResourceProfileCube."""
+    return ResourceProfileCube(sample_log, granularity="day")  # type: ignore
+
+
+@pytest.fixture
+def resource_based(sample_log):  # type: ignore
+    """Fixture to create a ResourceBased instance based on the sample_log."""
+    return ResourceBased(sample_log)  # type: ignore
+
+
+def test_invalid_granularity(sample_log):  # type: ignore
+    """Test that an unsupported granularity is rejected."""
+    with pytest.raises(ValueError):
+        ResourceProfileCube(sample_log, granularity="week")  # type: ignore
+
+
+@pytest.mark.parametrize("start_time,end_time", DAY_WINDOWS)
+@pytest.mark.parametrize("resource", RESOURCES)
+def test_cube_matches_pm4py(cube, resource_based, start_time, end_time, resource):  # type: ignore
+    """Test that the cube metrics equal the PM4Py resource profiles."""
+    assert cube.get_number_of_distinct_activities(  # type: ignore
+        start_time, end_time, resource
+    ) == resource_based.get_number_of_distinct_activities(  # type: ignore
+        start_time, end_time, resource
+    )
+    assert cube.get_activity_frequency(  # type: ignore
+        start_time, end_time, resource, "decide"
+    ) == pytest.approx(
+        resource_based.get_activity_frequency(  # type: ignore
+            start_time, end_time, resource, "decide"
+        )
+    )
+    assert cube.get_activity_completions(  # type: ignore
+        start_time, end_time, resource
+    ) == resource_based.get_activity_completions(start_time, end_time, resource)  # type: ignore
+    assert cube.get_case_completions(  # type: ignore
+        start_time, end_time, resource
+    ) == resource_based.get_case_completions(start_time, end_time, resource)  # type: ignore
+    assert cube.get_fraction_case_completions(  # type: ignore
+        start_time, end_time, resource
+    ) == pytest.approx(
+        resource_based.get_fraction_case_completions(  # type: ignore
+            start_time, end_time, resource
+        )
+    )
+
+
+def test_unknown_resource(cube):  # type: ignore
+    """Test that an unknown resource yields empty metrics."""
+    start_time, end_time = DAY_WINDOWS[0]
+    assert cube.get_number_of_distinct_activities(start_time, end_time, "Nobody") == 0  # type: ignore
+    assert cube.get_activity_frequency(start_time, end_time, "Nobody", "decide") == 0.0  # type: ignore
+    assert cube.get_case_completions(start_time, end_time, "Nobody") == 0  # type: ignore
+    assert cube.get_fraction_case_completions(start_time, end_time, "Nobody") == 0.0  # type: ignore
+
+
+def test_empty_window(cube):  # type: ignore
+    """Test that a window outside of the log is empty."""
+    assert (
+        cube.get_activity_completions(  # type: ignore
+            "2020-01-01 00:00:00", "2021-01-01 00:00:00", "Sara"
+        )
+        == 0
+    )
+
+
+def test_hour_granularity(sample_log):  # type: ignore
+    """Test that hourly buckets cover the same events as daily buckets."""
+    hourly = ResourceProfileCube(sample_log, granularity="hour")  # type: ignore
+    daily = ResourceProfileCube(sample_log, granularity="day")  # type: ignore
+    start_time, end_time = DAY_WINDOWS[0]
+    assert hourly.num_buckets > daily.num_buckets
+    assert hourly.get_activity_completions(  # type: ignore
+        start_time, end_time, "Sara"
+    ) == daily.get_activity_completions(start_time, end_time, "Sara")  # type: ignore
+
+
+def test_get_summary(cube):  # type: ignore
+    """Test the get_summary method."""
+    summary = cube.get_summary()  # type: ignore
+    assert summary["granularity"] == "day"
+    assert summary["resources"] == 6
+    assert summary["activities"] == 8
+    assert summary["bytes"] > 0
@@ -0,0 +1,58 @@
+"""Tests the RoleDiscovery class."""
+
+import pandas as pd
+import pytest
+from conformance_checking.role_discovery import RoleDiscovery
+from pm4py.algo.organizational_mining.roles import (  # type: ignore
+    algorithm as roles_algorithm,  # type: ignore
+)
+
+
+@pytest.fixture
+def small_log():
+    """Fixture for a log with two identical and one disjoint profile."""
+    activities = ["X", "X", "Y", "Y", "Y", "Y", "Z"]
+    resources = ["A", "B", "A", "A", "B", "B", "C"]
+    return pd.DataFrame({"concept:name": activities, "org:resource": resources})
+
+
+def _as_tuples(roles):  # type: ignore
+    """Converts roles to comparable tuples."""
+    return [
+        (tuple(role["activities"]), role["originators_importance"])  # type: ignore
+        for role in roles  # type: ignore
+    ]
+
+
+@pytest.mark.parametrize("threshold", [0.65, 0.3, 0.1])
+def test_matches_pm4py(sample_log, threshold):  # type: ignore
+    """Test that the roles equal the roles discovered by PM4Py."""
+    expected = roles_algorithm.apply(
+        sample_log,
+        parameters={"roles_threshold_parameter": threshold},
+    )
+    roles = RoleDiscovery(sample_log).discover(threshold)  # type: ignore
+    assert _as_tuples(roles) == [  # type: ignore
+        (tuple(role.activities), role.originator_importance) for role in expected
+    ]
+
+
+def test_identical_profiles_are_merged(small_log):  # type: ignore
+    """Test that activities with proportional profiles form one role."""
+    roles = RoleDiscovery(small_log).discover(threshold=0.99)  # type: ignore
+    assert _as_tuples(roles) == [  # type: ignore
+        (("X", "Y"), {"A": 3, "B": 3}),
+        (("Z",), {"C": 1}),
+    ]
+
+
+def test_disjoint_profiles_are_never_merged(small_log):  # type: ignore
+    """Test that roles without a shared originator stay separate."""
+    roles = RoleDiscovery(small_log).discover(threshold=0.0)  # type: ignore
+    assert len(roles) == 2  # type: ignore
+
+
+def test_empty_log():
+    """Test that an empty log has no roles."""
+    log = pd.DataFrame({"concept:name": [], "org:resource": []})
+    assert RoleDiscovery(log).discover() == []
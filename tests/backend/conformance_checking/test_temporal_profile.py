@@ -78,3 +78,33 @@ def test_get_sorted_coloured_diagnostics(temporal_profile):  # type: ignore
     sorted_coloured_diagnostics = temporal_profile.get_sorted_coloured_diagnostics()  # type: ignore
     assert sorted_coloured_diagnostics is not None
     assert isinstance(sorted_coloured_diagnostics, Styler)
+
+
+def _split_cases(log, parts):  # type: ignore
+    """Splits the log into batches of whole cases."""
+    cases = log["case:concept:name"].unique()
+    return [log[log["case:concept:name"].isin(cases[i::parts])] for i in range(parts)]
+
+
+def test_discover_temporal_profile_from_batches(sample_log):  # type: ignore
+    """Test that the batched discovery equals the discovery on the whole log."""
+    expected = TemporalProfile(sample_log)  # type: ignore
+    expected.discover_temporal_profile()  # type: ignore
+    batched = TemporalProfile(pd.DataFrame())
+    batched.discover_temporal_profile_from_batches(_split_cases(sample_log, 3))  # type: ignore
+
+    profile = batched.get_temporal_profile()
+    assert profile.keys() == expected.get_temporal_profile().keys()
+    for pair, (mean, std) in expected.get_temporal_profile().items():
+        assert profile[pair] == pytest.approx((mean, std))
+
+
+def test_check_temporal_conformance_of_batches(sample_log):  # type: ignore
+    """Test that every case of the batches is checked."""
+    tp = TemporalProfile(pd.DataFrame())
+    batches = _split_cases(sample_log, 2)  # type: ignore
+    tp.discover_temporal_profile_from_batches(batches)
+    tp.check_temporal_conformance_of_batches(batches, zeta=0.5)
+
+    assert len(tp.get_temporal_conformance_result()) == 6
+    assert tp.get_zeta() == 0.5
@@ -0,0 +1,91 @@
+"""Tests for the compressed log handling in backend/utils/file_handlers.py."""
+
+import gzip
+import io
+import zipfile
+
+import pandas as pd
+import pytest
+
+from backend.utils import file_handlers
+
+RUNNING_EXAMPLE = "tests/input_data/running-example.xes"
+
+CSV_CONTENT = b"case_id,activity,timestamp\n1,A,2023-01-01\n1,B,2023-01-02\n"
+
+
+def _zip(members: dict) -> bytes:
+    """Creates a zip archive with the given member names and contents."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in members.items():
+            archive.writestr(name, content)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize(
+    "filename, expected",
+    [
+        ("log.csv", ".csv"),
+        ("log.XES", ".xes"),
+        ("Road_Traffic.xes.gz", ".xes.gz"),
+        ("log.CSV.GZ", ".csv.gz"),
+        ("archive.v2.zip", ".zip"),
+        ("log.gz", ".gz"),
+    ],
+)
+def test_get_file_extension(filename: str, expected: str) -> None:
+    """Test that gzip extensions keep the extension of the log."""
+    assert file_handlers.get_file_extension(filename) == expected
+
+
+def test_process_file_csv_gz() -> None:
+    """Test that gzip compressed CSV content is parsed."""
+    result = file_handlers.process_file(gzip.compress(CSV_CONTENT), ".csv.gz")
+
+    pd.testing.assert_frame_equal(result, pd.read_csv(io.BytesIO(CSV_CONTENT)))
+
+
+def test_process_file_xes_zip() -> None:
+    """Test that a XES log inside a zip archive is parsed."""
+    with open(RUNNING_EXAMPLE, "rb") as f:
+        content = f.read()
+    archive = _zip({"logs/running-example.xes": content, "__MACOSX/._x.xes": b""})
+
+    result = file_handlers.process_file(archive, ".zip")
+
+    pd.testing.assert_frame_equal(result, file_handlers.read_xes(RUNNING_EXAMPLE))
+
+
+def test_read_columns_from_compressed_log(tmp_path) -> None:
+    """Test that the columns are read from compressed logs on disk."""
+    path = tmp_path / "log.xes.gz"
+    with open(RUNNING_EXAMPLE, "rb") as f:
+        path.write_bytes(gzip.compress(f.read()))
+
+    columns = file_handlers.read_columns(str(path), ".xes.gz")
+
+    assert columns[:3] == ["concept:name", "org:resource", "time:timestamp"]
+    assert "case:concept:name" in columns
+
+
+def test_get_log_format_of_zip() -> None:
+    """Test that the format of a zip archive is taken from its member."""
+    archive = io.BytesIO(_zip({"log.csv": CSV_CONTENT}))
+
+    assert file_handlers.get_log_format(archive, ".zip") == ".csv"
+    assert file_handlers.get_log_format("ignored", ".xes.gz") == ".xes"
+
+
+def test_zip_with_multiple_logs() -> None:
+    """Test that a zip archive must contain exactly one log."""
+    archive = _zip({"a.csv": CSV_CONTENT, "b.csv": CSV_CONTENT})
+
+    with pytest.raises(ValueError, match="exactly one .csv or .xes file, found 2"):
+        file_handlers.process_file(archive, ".zip")
+
+
+def test_unsupported_compressed_extension() -> None:
+    """Test that compressed files of other types are rejected."""
+    with pytest.raises(ValueError, match="Unsupported file extension: .gz"):
+        file_handlers.process_file(gzip.compress(CSV_CONTENT), ".gz")
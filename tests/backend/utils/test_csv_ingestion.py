@@ -0,0 +1,109 @@
+"""Tests for the typed CSV ingestion in backend/utils/file_handlers.py."""
+
+import gzip
+
+import pandas as pd
+import pytest
+
+from backend.utils import file_handlers
+
+CSV_CONTENT = (
+    "case,activity,time,resource,cost\n"
+    "1,A,30.12.2010 14:32:00,Pete,50\n"
+    "1,B,31.12.2010 09:15:00,Mike,10\n"
+    "2,A,01.01.2011 10:00:00,Pete,20\n"
+)
+
+
+def _read(path: str, extension: str = ".csv", **kwargs) -> pd.DataFrame:
+    """Reads a test log with the columns of CSV_CONTENT."""
+    return file_handlers.read_csv_typed(
+        path,
+        extension,
+        case_id_col="case",
+        activity_col="activity",
+        timestamp_col="time",
+        resource_col="resource",
+        **kwargs,
+    )
+
+
+def test_read_csv_typed(tmp_path) -> None:
+    """Test that the mapped columns are typed while reading."""
+    path = tmp_path / "log.csv"
+    path.write_text(CSV_CONTENT)
+
+    result = _read(str(path))
+
+    assert list(result.columns) == ["case", "activity", "time", "resource", "cost"]
+    for col in ("case", "activity", "resource"):
+        assert isinstance(result[col].dtype, pd.CategoricalDtype)
+    assert result["time"].tolist() == [
+        pd.Timestamp("2010-12-30 14:32:00"),
+        pd.Timestamp("2010-12-31 09:15:00"),
+        pd.Timestamp("2011-01-01 10:00:00"),
+    ]
+    assert result["cost"].tolist() == [50, 10, 20]
+
+
+def test_read_csv_typed_gzip_with_explicit_format(tmp_path) -> None:
+    """Test a gzip compressed log with a given timestamp format."""
+    path = tmp_path / "log.csv.gz"
+    path.write_bytes(gzip.compress(CSV_CONTENT.encode()))
+
+    result = _read(str(path), ".csv.gz", timestamp_format="%m.%d.%Y %H:%M:%S")
+
+    # Only the last timestamp fits the month-first format
+    assert result["time"].isna().tolist() == [True, True, False]
+    assert result["time"].iloc[2] == pd.Timestamp("2011-01-01 10:00:00")
+
+
+def test_read_csv_typed_combines_chunk_categories(tmp_path, monkeypatch) -> None:
+    """Test that categories differing between chunks are combined."""
+    monkeypatch.setattr(file_handlers, "CSV_CHUNK_ROWS", 1)
+    path = tmp_path / "log.csv"
+    path.write_text(CSV_CONTENT)
+
+    with open(path, "rb") as f:
+        result = _read(f)  # type: ignore
+
+    assert isinstance(result["activity"].dtype, pd.CategoricalDtype)
+    assert result["activity"].tolist() == ["A", "B", "A"]
+    assert sorted(result["resource"].cat.categories) == ["Mike", "Pete"]
+
+
+def test_read_csv_typed_falls_back_on_type_changes(tmp_path, monkeypatch) -> None:
+    """Test that a column changing its type in a later chunk is still read."""
+    monkeypatch.setattr(file_handlers, "CSV_BLOCK_SIZE", 64)
+    path = tmp_path / "log.csv"
+    path.write_text(CSV_CONTENT + "2,C,02.01.2011 10:00:00,Sara,unknown\n" * 5)
+
+    result = _read(str(path))
+
+    assert len(result) == 8
+    assert result["cost"].tolist()[-1] == "unknown"
+
+
+def test_read_csv_typed_missing_column(tmp_path) -> None:
+    """Test that a mapped column missing in the file raises a ValueError."""
+    path = tmp_path / "log.csv"
+    path.write_text(CSV_CONTENT)
+
+    with pytest.raises(ValueError, match=r"Columns not found .*'case_id'"):
+        file_handlers.read_csv_typed(str(path), ".csv", "case_id", "activity", "time")
+
+
+def test_detect_timestamp_format() -> None:
+    """Test that a format is only returned if it fits the sample."""
+    assert (
+        file_handlers.detect_timestamp_format(
+            pd.Series(["2023-01-01 10:00:00", "2023-01-02 11:30:00"])
+        )
+        == "%Y-%m-%d %H:%M:%S"
+    )
+    assert (
+        file_handlers.detect_timestamp_format(
+            pd.Series(["2023-01-01 10:00:00", "02/01/2023"])
+        )
+        is None
+    )
@@ -0,0 +1,99 @@
+"""Tests for the SQLite job store and the job mapping."""
+
+import threading
+from pathlib import Path
+
+from backend.api.models.schemas.job_models import JobStatus
+from backend.utils.job_store import JobMapping, QueuedJob, SQLiteJobStore
+
+
+def test_mapping_saves_the_changes_of_its_records(tmp_path: Path) -> None:
+    """Test that a record changed in one mapping is seen by another one."""
+    store = SQLiteJobStore(str(tmp_path / "jobs.sqlite3"))
+    jobs = JobMapping(store, "default")
+    other_process = JobMapping(SQLiteJobStore(store.path), "default")
+
+    jobs["1"] = JobStatus(module="temporal", status="pending")
+    rec = jobs["1"]
+    rec.status = "complete"
+    rec.result = {"pairs": [("A", "B")]}
+    rec.profile = {"samples": 3}
+
+    stored = other_process["1"]
+    assert stored.status == "complete"
+    assert stored.result == {"pairs": [["A", "B"]]}
+    assert stored.profile == {"samples": 3}
+    assert list(other_process) == ["1"]
+    assert "1" not in JobMapping(store, "alice")
+    assert other_process.get("missing") is None
+
+    del jobs["1"]
+    assert len(other_process) == 0
+
+
+def test_every_queued_job_is_claimed_once(tmp_path: Path) -> None:
+    """Test that concurrent workers never claim the same job."""
+    store = SQLiteJobStore(str(tmp_path / "jobs.sqlite3"))
+    for i in range(20):
+        store.enqueue(QueuedJob("default", str(i), "backend.task", args=[i]))
+
+    claimed = []
+
+    def work(name: str) -> None:
+        while (job := store.claim(name)) is not None:
+            claimed.append(job.job_id)
+            store.finish(job.namespace, job.job_id)
+
+    threads = [threading.Thread(target=work, args=(f"w{i}",)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(claimed, key=int) == [str(i) for i in range(20)]
+    assert store.claim("w0") is None
+
+
+def test_job_of_a_dead_worker_is_claimed_again(tmp_path: Path) -> None:
+    """Test that a job whose lease expired is claimed by another worker."""
+    store = SQLiteJobStore(str(tmp_path / "jobs.sqlite3"))
+    store.enqueue(QueuedJob("default", "1", "backend.task"))
+
+    assert store.claim("dead", lease_seconds=-1) is not None
+    job = store.claim("alive")
+    assert job is not None and job.job_id == "1"
+
+    assert store.claim("other") is None
+    assert store.renew("default", "1", "alive")
+    assert not store.renew("default", "1", "dead")
+
+
+def test_pinned_job_is_only_claimed_by_its_process(tmp_path: Path) -> None:
+    """Test that the workers of other processes skip a pinned job."""
+    store = SQLiteJobStore(str(tmp_path / "jobs.sqlite3"))
+    store.enqueue(QueuedJob("default", "1", "backend.task", process="host-1"))
+    store.enqueue(QueuedJob("default", "2", "backend.task"))
+
+    job = store.claim("w0", process="host-2")
+    assert job is not None and job.job_id == "2"
+    assert store.claim("w0", process="host-2") is None
+    job = store.claim("w1", process="host-1")
+    assert job is not None and job.job_id == "1" and job.process == "host-1"
+
+
+def test_progress_within_a_phase_is_saved_sparingly(tmp_path: Path) -> None:
+    """Test that only the first and last progress of a phase are saved."""
+    store = SQLiteJobStore(str(tmp_path / "jobs.sqlite3"))
+    jobs = JobMapping(store, "default")
+    jobs["1"] = JobStatus(module="log", status="running")
+    rec = jobs["1"]
+
+    rec.phase = "upload"
+    for i in range(51):
+        rec.progress = i / 100
+    assert jobs["1"].progress == 0.0
+    for i in range(51, 101):
+        rec.progress = i / 100
+
+    assert jobs["1"].phase == "upload"
+    assert jobs["1"].progress == 1.0
@@ -0,0 +1,63 @@
+"""Tests for the lazy imports and the import time of the API."""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from backend.utils.lazy_import import LazyModule, lazy_import
+
+# The time budget of importing the API in seconds, generous for slow CI
+IMPORT_TIME_BUDGET = 3.0
+
+# Modules that must not be imported when the API starts
+HEAVY_MODULES = (
+    "pm4py",
+    "scipy",
+    "pycelonis",
+    "pycelonis_core",
+    "saolapy",
+    "matplotlib",
+    "networkx",
+)
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+
+_MEASURE_IMPORT = """
+import json, sys, time
+start = time.perf_counter()
+import backend.main
+print(json.dumps({
+    "seconds": time.perf_counter() - start,
+    "modules": sorted({name.split(".")[0] for name in sys.modules}),
+}))
+"""
+
+
+def test_lazy_module_imports_on_first_attribute() -> None:
+    """Test that the module is imported when an attribute is used."""
+    sys.modules.pop("colorsys", None)
+    colorsys = lazy_import("colorsys")
+
+    assert isinstance(colorsys, LazyModule)
+    assert "colorsys" not in sys.modules
+    assert colorsys.rgb_to_hsv(1.0, 0.0, 0.0) == (0.0, 1.0, 1.0)
+    assert "colorsys" in sys.modules
+
+
+def test_api_imports_without_heavy_modules_within_budget() -> None:
+    """Test that the API starts without pm4py, scipy and pycelonis."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(p for p in sys.path if p))
+    output = subprocess.run(
+        [sys.executable, "-c", _MEASURE_IMPORT],
+        cwd=REPO_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+
+    assert not set(HEAVY_MODULES) & set(result["modules"])
+    assert result["seconds"] < IMPORT_TIME_BUDGET
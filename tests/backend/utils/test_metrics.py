@@ -0,0 +1,77 @@
+"""Tests for the metrics and their Prometheus text format."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.api.models.schemas.job_models import JobStatus
+from backend.utils.metrics import (
+    JOB_PHASE_DURATION,
+    Gauge,
+    Histogram,
+    estimate_nbytes,
+    job_phase,
+    timed,
+)
+
+
+def test_histogram_renders_cumulative_buckets() -> None:
+    """Test that the buckets count all values up to their bound."""
+    histogram = Histogram("test_seconds", "Test.", ["route"], buckets=[0.1, 1.0])
+    histogram.observe(0.05, route="/a")
+    histogram.observe(0.5, route="/a")
+    histogram.observe(5, route="/a")
+
+    assert histogram.render().splitlines() == [
+        "# HELP test_seconds Test.",
+        "# TYPE test_seconds histogram",
+        'test_seconds_bucket{route="/a",le="0.1"} 1',
+        'test_seconds_bucket{route="/a",le="1"} 2',
+        'test_seconds_bucket{route="/a",le="+Inf"} 3',
+        'test_seconds_sum{route="/a"} 5.55',
+        'test_seconds_count{route="/a"} 3',
+    ]
+
+
+def test_labels_are_checked_and_escaped() -> None:
+    """Test that wrong labels raise and quotes in values are escaped."""
+    gauge = Gauge("test_gauge", "Test.", ["name"])
+    gauge.set(2, name='say "hi"')
+
+    assert 'test_gauge{name="say \\"hi\\""} 2' in gauge.render()
+    with pytest.raises(ValueError, match="expects the labels"):
+        gauge.set(1, other="x")
+
+
+def test_timed_and_job_phase_record_durations() -> None:
+    """Test that the decorator and the job phase record a duration."""
+    histogram = Histogram("test_timed_seconds", "Test.", ["method"])
+
+    @timed(histogram, method="f")
+    def f(x: int) -> int:
+        return x + 1
+
+    rec = JobStatus(module="test_module", status="running")
+    before = JOB_PHASE_DURATION.get_count(module="test_module", phase="compute")
+    with job_phase(rec, "compute"):
+        assert f(1) == 2
+
+    assert histogram.get_count(method="f") == 1
+    assert rec.phase == "compute"
+    assert (
+        JOB_PHASE_DURATION.get_count(module="test_module", phase="compute")
+        == before + 1
+    )
+
+
+def test_estimate_nbytes_follows_references() -> None:
+    """Test that arrays and DataFrames referenced by objects are counted."""
+
+    class Index:
+        def __init__(self) -> None:
+            self.codes = np.zeros(1000, dtype=np.int64)
+            self.frame = pd.DataFrame({"a": np.zeros(1000)})
+            self.alias = self.codes
+
+    assert estimate_nbytes(Index()) >= 16000
+    assert estimate_nbytes(Index()) < 20000
@@ -0,0 +1,69 @@
+"""Tests for the profiling of the background jobs."""
+
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from backend.api.models.schemas.job_models import JobStatus
+from backend.utils.profiling import JobProfiler, profiled_job
+
+
+def _busy_loop(seconds: float) -> int:
+    end = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < end:
+        total += 1
+    return total
+
+
+def test_profiler_samples_stacks_and_allocations() -> None:
+    """Test that the stacks of the thread and its allocations are recorded."""
+    with JobProfiler(interval=0.001) as profiler:
+        _busy_loop(0.2)
+        kept = np.ones(1_000_000)
+
+    result = profiler.get_result()
+    assert result["samples"] > 0
+    assert f"{__name__}._busy_loop" in result["collapsed_stacks"]
+    first = result["collapsed_stacks"].splitlines()[0]
+    assert int(first.rsplit(" ", 1)[1]) > 0
+    assert result["peak_traced_bytes"] >= kept.nbytes
+    assert result["top_allocations"][0]["bytes"] >= kept.nbytes
+
+
+def test_profiled_job_stores_the_profile_also_on_failure() -> None:
+    """Test that the profile is stored with the job if the task raises."""
+    app = SimpleNamespace(
+        state=SimpleNamespace(jobs={"1": JobStatus(module="test", status="running")})
+    )
+
+    @profiled_job
+    def task(app, job_id):
+        _busy_loop(0.05)
+        raise RuntimeError("failed")
+
+    try:
+        task(app, "1")
+    except RuntimeError:
+        pass
+
+    profile = app.state.jobs["1"].profile
+    assert profile is not None and profile["duration_s"] >= 0.05
+    assert "profile" not in app.state.jobs["1"].model_dump()
+
+
+def test_overlapping_profilers_leave_out_the_peak() -> None:
+    """Test that the shared peak is not reported for overlapping jobs."""
+    with JobProfiler() as first:
+        with JobProfiler() as second:
+            np.ones(1_000)
+    with JobProfiler() as alone:
+        np.ones(1_000)
+
+    for profiler in (first, second):
+        result = profiler.get_result()
+        assert result["peak_traced_bytes"] is None
+        assert "another profiled job" in result["peak_note"]
+    assert alone.get_result()["peak_traced_bytes"] > 0
+    assert "peak_note" not in alone.get_result()
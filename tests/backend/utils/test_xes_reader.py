@@ -0,0 +1,104 @@
+"""Tests for the streaming XES reader in backend/utils/file_handlers.py."""
+
+import gzip
+import io
+
+import pandas as pd
+import pm4py  # type: ignore
+import pytest
+
+from backend.utils import file_handlers
+
+RUNNING_EXAMPLE = "tests/input_data/running-example.xes"
+
+TYPED_LOG = b"""<?xml version="1.0" encoding="UTF-8"?>
+<log xes.version="1.0">
+  <global scope="event">
+    <string key="concept:name" value="name"/>
+  </global>
+  <trace>
+    <event>
+      <string key="concept:name" value="A"/>
+      <date key="time:timestamp" value="2024-01-01T10:00:00.000+02:00"/>
+      <int key="amount" value="3"/>
+      <boolean key="paid" value="true"/>
+      <list key="items">
+        <string key="item" value="x"/>
+      </list>
+    </event>
+    <event>
+      <string key="concept:name" value="B"/>
+      <date key="time:timestamp" value="2024-01-02T10:00:00.000+02:00"/>
+      <float key="amount" value="1.5"/>
+      <boolean key="paid" value="false"/>
+    </event>
+    <string key="concept:name" value="case-1"/>
+  </trace>
+</log>
+"""
+
+
+def test_read_xes_matches_pm4py() -> None:
+    """Test that the streaming reader returns the DataFrame of pm4py."""
+    expected = pm4py.read_xes(RUNNING_EXAMPLE)
+
+    result = file_handlers.read_xes(RUNNING_EXAMPLE)
+
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_process_xes_file_reads_gzip_content() -> None:
+    """Test that gzip compressed XES content is decompressed on the fly."""
+    with open(RUNNING_EXAMPLE, "rb") as f:
+        content = f.read()
+
+    result = file_handlers.process_xes_file(gzip.compress(content))
+
+    pd.testing.assert_frame_equal(result, file_handlers.read_xes(RUNNING_EXAMPLE))
+
+
+def test_iter_xes_batches_emits_complete_traces() -> None:
+    """Test that batches are bounded and only contain complete traces."""
+    batches = list(file_handlers.iter_xes_batches(RUNNING_EXAMPLE, batch_size=10))
+
+    assert len(batches) > 1
+    assert sum(batch.num_rows for batch in batches) == 42
+    for batch in batches:
+        cases = batch.column("case:concept:name").to_pylist()
+        # Every case of the running example has at least 4 events
+        assert min(cases.count(case) for case in set(cases)) >= 4
+
+
+def test_read_xes_projects_columns() -> None:
+    """Test that only the requested attributes are read."""
+    result = file_handlers.read_xes(
+        RUNNING_EXAMPLE, columns=["case:concept:name", "concept:name"]
+    )
+
+    assert list(result.columns) == ["concept:name", "case:concept:name"]
+    assert len(result) == 42
+
+
+def test_read_xes_converts_typed_attributes() -> None:
+    """Test the attribute types, trailing trace attributes and skipped lists."""
+    result = file_handlers.read_xes(io.BytesIO(TYPED_LOG))
+
+    assert list(result.columns) == [
+        "concept:name",
+        "time:timestamp",
+        "amount",
+        "paid",
+        "case:concept:name",
+    ]
+    assert result["case:concept:name"].tolist() == ["case-1", "case-1"]
+    assert result["amount"].tolist() == [3.0, 1.5]
+    assert result["paid"].tolist() == [True, False]
+    assert result["time:timestamp"].iloc[0] == pd.Timestamp(
+        "2024-01-01 10:00:00", tz="UTC"
+    )
+
+
+def test_read_xes_invalid_file() -> None:
+    """Test that malformed XML raises a ValueError."""
+    with pytest.raises(ValueError, match="Failed to process XES file"):
+        file_handlers.read_xes(io.BytesIO(b"<log><trace><event>"))
@@ -0,0 +1,67 @@
+"""Tests for the synthetic logs and the benchmark harness in benchmarks/."""
+
+import pandas as pd
+import pytest
+
+from benchmarks import run_benchmarks
+from benchmarks.synthetic_log import generate_log
+
+
+def test_generate_log_sizes() -> None:
+    """Test that the log follows the given sizes."""
+    log = generate_log(
+        cases=200, activities=6, trace_length=8, variants=5, resources=9, groups=3
+    )
+
+    assert log["case:concept:name"].nunique() == 200
+    assert set(log["concept:name"]) <= {f"Activity {i}" for i in range(6)}
+    traces = log.groupby("case:concept:name", sort=False)["concept:name"].agg(tuple)
+    assert traces.nunique() <= 5
+    assert log["org:resource"].nunique() <= 9
+    assert log["org:group"].nunique() <= 3
+    assert log.groupby("case:concept:name")[
+        "time:timestamp"
+    ].is_monotonic_increasing.all()
+
+
+def test_generate_log_is_reproducible() -> None:
+    """Test that the same seed gives the same log."""
+    pd.testing.assert_frame_equal(generate_log(seed=3), generate_log(seed=3))
+    assert not generate_log(seed=3).equals(generate_log(seed=4))
+
+
+def test_generate_log_rejects_empty_sizes() -> None:
+    """Test that sizes below one raise a ValueError."""
+    with pytest.raises(ValueError, match="cases must be positive"):
+        generate_log(cases=0)
+
+
+def test_measure_running_example() -> None:
+    """Test that a benchmark run is measured."""
+    result = run_benchmarks.measure("running-example", "temporal_profile", repeat=2)
+
+    assert result["events"] == 42
+    assert result["cases"] == 6
+    assert len(result["wall_times_s"]) == 2
+    assert result["wall_time_s"] == min(result["wall_times_s"])
+    assert result["events_per_s"] == pytest.approx(42 / result["wall_time_s"])
+
+
+def test_compare_results() -> None:
+    """Test that the speedup is reported for benchmarks in both runs."""
+    baseline = {
+        "results": [
+            {"log": "a", "benchmark": "b", "wall_time_s": 2.0, "peak_rss_mb": 100},
+            {"log": "a", "benchmark": "c", "skipped": "Columns missing."},
+        ]
+    }
+    current = {
+        "results": [
+            {"log": "a", "benchmark": "b", "wall_time_s": 1.0, "peak_rss_mb": 80},
+            {"log": "a", "benchmark": "c", "wall_time_s": 1.0, "peak_rss_mb": 80},
+        ]
+    }
+
+    assert run_benchmarks.compare_results(baseline, current) == [
+        "a / b: 2.000 s -> 1.000 s (2.00x), peak RSS 100 MB -> 80 MB"
+    ]
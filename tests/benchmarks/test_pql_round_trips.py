@@ -0,0 +1,46 @@
+"""Tests for the PQL round trip budgets in benchmarks/pql_round_trips.py."""
+
+import json
+from pathlib import Path
+
+from benchmarks import pql_round_trips
+
+
+def test_endpoints_stay_within_budgets() -> None:
+    """Test that no endpoint runs more queries or rows than its budget."""
+    budgets = json.loads(Path(pql_round_trips.BUDGETS_FILE).read_text())
+
+    results = pql_round_trips.measure_endpoints("running-example")
+
+    assert "GET /api/general/get-general-information" in results
+    assert results["POST /api/log-skeleton/compute-skeleton"]["job_status"] == (
+        "complete"
+    )
+    assert pql_round_trips.check_budgets(results, budgets["running-example"]) == []
+
+
+def test_check_budgets_reports_regressions() -> None:
+    """Test that exceeded, missing and failed budgets are reported."""
+    result = {"status": 200, "job_status": None, "queries": 3, "rows": 10}
+    results = {
+        "GET /a": result,
+        "GET /b": result,
+        "GET /c": {**result, "status": 500},
+        "GET /d": {**result, "status": 500},
+        "GET /e": result,
+    }
+    budgets = {
+        "GET /a": {"queries": 1, "rows": 10},
+        "GET /c": {"queries": 3, "rows": 10},
+        "GET /d": {"skip": "Not supported."},
+        "GET /e": {"queries": 3, "rows": 10},
+    }
+
+    assert pql_round_trips.check_budgets(results, budgets) == [
+        "GET /a: 3 queries, budget 1",
+        "GET /b: no budget",
+        "GET /c: failed with status 500",
+    ]
+    assert pql_round_trips.make_budgets(results, budgets)["GET /d"] == {
+        "skip": "Not supported."
+    }